@@ -2,21 +2,156 @@
 Agente IA Inteligente - Versão final corrigida (FastMCP 1.26.0)
 """
 import ast
+import functools
+import itertools
 import logging
 import requests
 import json
+import queue
 import re
+import threading
 import time
-import unicodedata
 import secrets
 
+from classificador_intencoes import (
+    CONVERSAS_POR_NOME,
+    INTENCOES_POR_NOME,
+    MENSAGEM_LOGIN,
+    classificar,
+    normalizar_texto,
+)
+from cache_llm import CacheRespostasLLM, escopo_ferramentas
+from cliente_http import ClienteHTTP
+from especulacao import ExecutorEspeculativo
+from estado_sessao import EstadoSessao
+from stream_ollama import LeitorDecisao, StreamOllama, complemento_resposta
+
 # Configurações
 USE_OLLAMA = True
-OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_URL = "http://localhost:11434/api/chat"
 OLLAMA_MODEL = "llama3.2:3b"
+OLLAMA_KEEP_ALIVE = "30m"  # mantém o modelo (e o prefixo do prompt) carregado entre perguntas
 
 logger = logging.getLogger(__name__)
 
+# System prompt das perguntas gerais: fixo, então o Ollama reaproveita o
+# prefixo já avaliado (KV cache) enquanto o modelo está carregado
+PROMPT_SISTEMA_GERAL = """Você é um assistente de IA inteligente e amigável. Responda perguntas com clareza, bom humor quando apropriado, e sempre sendo útil.
+        
+Regras:
+1. Responda de forma natural e conversacional
+2. Use emojis quando apropriado para tornar a resposta mais amigável
+3. Seja conciso mas completo
+4. Se não souber a resposta exata, admita e tente ser helpful mesmo assim
+5. Sempre mantenha um tom amigável e prestativo"""
+
+
+def payload_chat(system_prompt, pergunta, temperatura, formato=None):
+    """
+    Corpo do /api/chat em streaming.
+
+    O system prompt vai como mensagem própria e sempre idêntico, na frente da
+    pergunta: com keep_alive o modelo continua carregado e o Ollama reaproveita
+    os tokens desse prefixo em vez de avaliá-los de novo a cada pergunta. As
+    opções de amostragem ficam em "options" (o Ollama ignora "temperature" no
+    primeiro nível).
+    """
+    payload = {
+        "model": OLLAMA_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": pergunta},
+        ],
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"temperature": temperatura},
+    }
+    if formato:
+        payload["format"] = formato
+    return payload
+
+
+@functools.lru_cache(maxsize=32)
+def prompt_sistema_decisao(ferramentas, usuario_autenticado):
+    """
+    System prompt de consultar_llm, montado uma vez por variante.
+
+    ferramentas é uma tupla de (nome, descrição). O texto só depende dela e
+    do login, então perguntas e sessões diferentes mandam exatamente o mesmo
+    prefixo e o Ollama não precisa reavaliá-lo.
+    """
+    tools_list = "\n".join(f"- {nome}: {descricao}" for nome, descricao in ferramentas)
+    
+    return f"""Você é um agente de uma faculdade e um assistente inteligente para ajudar alunos. Sua missão é:
+1. Responder perguntas sobre assuntos acadêmicos e ajudar com requerimentos
+2. Se a pergunta for fora do contexto acadêmico, responder de forma inteligente, amigável e útil
+
+Ferramentas acadêmicas disponíveis:
+{tools_list}
+
+IMPORTANTE - FERRAMENTAS QUE REQUEREM LOGIN:
+ Ferramentas que SÓ funcionam para usuários logados:
+   - consultar_aluno (dados pessoais)
+   - perguntar_sobre_aluno (matérias, notas, etc)
+   - criar_requerimento (requerimentos acadêmicos)
+   - resumo_academico (histórico acadêmico)
+   - buscar_pagamentos (boletos e pagamentos)
+
+ Ferramentas públicas (funcionam SEM login):
+   - listar_cursos (lista todos os cursos)
+   - listar_materias_disponiveis (lista disciplinas disponíveis)
+   - cadastrar_novo_aluno (cadastra novo aluno no sistema)
+   - diagnosticar_banco (informações do sistema)
+
+USUÁRIO ATUAL: {"LOGADO (tem acesso a todas as ferramentas)" if usuario_autenticado else "NÃO LOGADO (só pode usar ferramentas públicas)"}
+
+Responda SEMPRE com JSON no formato:
+{{"acao": "ferramenta", "ferramenta": "nome", "argumentos": {{}}}}
+ou {{"acao": "conversa", "resposta": "texto"}}
+
+INSTRUÇÕES IMPORTANTES:
+1. Primeiro, tente identificar se é uma pergunta acadêmica ou geral
+2. Se for acadêmica:
+   - {"Use ferramentas disponíveis conforme necessário" if usuario_autenticado else "Use APENAS listar_cursos ou listar_materias_disponiveis (ferramentas públicas)"}
+   - {"Use criar_requerimento para requerimentos" if usuario_autenticado else "Oriente o usuário a fazer login para criar requerimentos"}
+3. Se FOR UMA PERGUNTA GERAL (não acadêmica):
+   - Sempre responda com {{"acao": "conversa", "resposta": "..."}} com uma resposta inteligente, contextualizada e amigável
+   - Seja conversível, prestativo e sempre mantenha um tom útil
+   - Responda completamente a pergunta de forma natural
+4. Seja educado, amigável e prestativo com os alunos
+5. Entenda perguntas implícitas e contexto
+6. Se o usuário NÃO está logado e pede dados pessoais, oriente-o a fazer login primeiro
+
+TIPOS DE REQUERIMENTOS ACADÊMICOS DISPONÍVEIS:
+- adicao_materia: Para adicionar uma disciplina
+- remocao_materia: Para remover uma disciplina
+- declaracao: Para gerar declarações (matricula, frequencia, conclusao)
+- boleto: Para solicitar 2ª via de boleto
+- trancamento: Para trancar semestre/matéria
+- certificado: Para solicitar certificado
+- transferencia: Para solicitar transferência interna/externa
+- endereco: Para solicitar atualização de endereço
+- diploma: Para solicitar 2ª via de diploma
+
+EXEMPLOS ACADÊMICOS:
+- "quem sou eu?" -> {{"acao": "ferramenta", "ferramenta": "consultar_aluno", "argumentos": {{}}}}
+- "minhas matérias" -> {{"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {{"pergunta": "minhas matérias"}}}}
+- "quais são os cursos?" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
+- "me fale sobre os cursos" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
+- "cursos disponíveis" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
+- "quero adicionar matéria ALG-101" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "adicao_materia", "kwargs": {{"codigo_materia": "ALG-101"}}}}}}
+- "remover MAT-102" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "remocao_materia", "kwargs": {{"codigo_materia": "MAT-102"}}}}}}
+- "preciso de declaração de matrícula" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "declaracao", "kwargs": {{"tipo_declaracao": "matricula"}}}}}}
+- "segunda via de boleto" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "boleto", "kwargs": {{"valor": 850.00}}}}}}
+- "resumo acadêmico" -> {{"acao": "ferramenta", "ferramenta": "resumo_academico", "argumentos": {{}}}}
+
+EXEMPLOS NÃO ACADÊMICOS (Respostas conversacionais):
+- "obrigado" -> {{"acao": "conversa", "resposta": "Por nada! Estou aqui para ajudar com qualquer coisa. "}}
+- "como você está?" -> {{"acao": "conversa", "resposta": "Estou bem! Pronto para ajudar você em tudo que precisar. Como posso ajudá-lo?"}}
+- "qual é a capital da França?" -> {{"acao": "conversa", "resposta": "A capital da França é Paris, uma das cidades mais bonitas e históricas do mundo."}}
+- "me conte um piada" -> {{"acao": "conversa", "resposta": "Claro! Por que o livro de matemática se suicidou? Porque tinha muitos problemas! "}}
+- "está chovendo?" -> {{"acao": "conversa", "resposta": "Não tenho informações meteorológicas em tempo real, mas você pode verificar em um aplicativo de previsão do tempo."}}"""
+
 
 def _safe_eval_math(expression):
     try:
@@ -62,6 +197,8 @@ def _safe_eval_math(expression):
             right = _eval(node.right)
             if left is None or right is None:
                 return None
+            if isinstance(node.op, (ast.Div, ast.Mod)) and right == 0:
+                return None
             if isinstance(node.op, ast.Add):
                 return left + right
             if isinstance(node.op, ast.Sub):
@@ -79,23 +216,148 @@ def _safe_eval_math(expression):
 
     return _eval(tree)
 
+def chamar_fastmcp(http, mcp_url, metodo, params, request_id):
+    """
+    Chama o servidor FastMCP via HTTP (endpoint raiz)
+
+    Não depende do agente: as threads da especulação chamam por aqui com
+    ids próprios enquanto a thread do turno usa o mesmo ClienteHTTP.
+    """
+    # Preparar payload JSON-RPC
+    payload = {
+        "jsonrpc": "2.0",
+        "method": metodo,
+        "params": params,
+        "id": request_id
+    }
+
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+
+    # print(f" [FastMCP] {metodo} (ID: {payload['id']})")  # Debug desabilitado
+
+    try:
+        # IMPORTANTE: usar a URL base sem /mcp
+        response = http.post(
+            "mcp",
+            mcp_url,
+            json=payload,
+            headers=headers
+        )
+
+        # print(f" Status: {response.status_code}")  # Debug desabilitado
+
+        if response.status_code == 200:
+            try:
+                result = response.json()
+                return result
+            except json.JSONDecodeError:
+                return {"error": "Resposta não é JSON válido"}
+        else:
+            try:
+                erro = response.json()
+                return {"error": erro}
+            except:
+                return {"error": f"HTTP {response.status_code}"}
+
+    except requests.exceptions.ConnectionError:
+        return {"error": "ConnectionError - servidor não está respondendo"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def chamar_fastmcp_lote(http, mcp_url, chamadas, proximo_id):
+    """
+    Faz várias chamadas tools/call num único lote JSON-RPC
+
+    chamadas é uma lista de (nome_ferramenta, argumentos) já preparados;
+    retorna as respostas em texto na mesma ordem. Servidor sem suporte a
+    lote ou item sem resposta: aquela chamada é refeita individualmente.
+    Como chamar_fastmcp, não depende do agente (a especulação usa daqui).
+    """
+    payload = []
+    ids = {}
+    for indice, (tool_name, arguments) in enumerate(chamadas):
+        request_id = proximo_id()
+        ids[request_id] = indice
+        payload.append({
+            "jsonrpc": "2.0",
+            "method": "tools/call",
+            "params": {"name": tool_name, "arguments": arguments},
+            "id": request_id
+        })
+
+    try:
+        response = http.post(
+            "mcp",
+            mcp_url,
+            json=payload,
+            headers={"Content-Type": "application/json", "Accept": "application/json"}
+        )
+        resultado = response.json() if response.status_code == 200 else None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Lote JSON-RPC falhou: {e}")
+        resultado = None
+
+    respostas = [None] * len(chamadas)
+    if isinstance(resultado, list):
+        for item in resultado:
+            indice = ids.get(item.get("id")) if isinstance(item, dict) else None
+            if indice is not None:
+                respostas[indice] = AgenteIAInteligente._texto_da_resposta(chamadas[indice][0], item)
+
+    for item in payload:
+        indice = ids[item["id"]]
+        if respostas[indice] is None:
+            params = item["params"]
+            respostas[indice] = AgenteIAInteligente._texto_da_resposta(
+                params["name"], chamar_fastmcp(http, mcp_url, "tools/call", params, proximo_id())
+            )
+    return respostas
+
+
+def _campo_da_sessao(nome):
+    """Atributo do agente guardado no EstadoSessao (self.estado)"""
+    return property(
+        lambda self: getattr(self.estado, nome),
+        lambda self, valor: setattr(self.estado, nome, valor),
+    )
+
+
 class AgenteIAInteligente:
-    def __init__(self, mcp_url="http://localhost:8000"):
+    # Estado por conversa; o resto do agente é compartilhável entre sessões
+    aluno_id = _campo_da_sessao("aluno_id")
+    aluno_nome = _campo_da_sessao("aluno_nome")
+    contexto = _campo_da_sessao("contexto")
+    request_id = _campo_da_sessao("request_id")
+    acao_pendente = _campo_da_sessao("acao_pendente")
+    dados_cadastro = _campo_da_sessao("dados_cadastro")  # Para coletar dados de novos alunos
+    
+    def __init__(self, mcp_url="http://localhost:8000", estado=None, http=None, ferramentas=None,
+                 cache_llm=None, especulacao=None):
         self.mcp_url = mcp_url  # URL base sem /mcp
-        self.aluno_id = None
-        self.aluno_nome = None
-        self.contexto = []
-        self.request_id = 1
-        self.ferramentas = []
-        self.acao_pendente = None
-        self.dados_cadastro = None  # Para coletar dados de novos alunos
+        self.estado = estado if estado is not None else EstadoSessao()
+        self.ferramentas = ferramentas if ferramentas is not None else []
+        # Conexões keep-alive com MCP, Ollama e Flask
+        self.http = http if http is not None else ClienteHTTP()
+        # Respostas do LLM já obtidas (exatas e por similaridade)
+        self.cache_llm = cache_llm if cache_llm is not None else CacheRespostasLLM.do_ambiente()
+        # Ferramentas de leitura previstas, chamadas enquanto o LLM decide
+        self.especulacao = especulacao if especulacao is not None else ExecutorEspeculativo.do_ambiente()
+        self._rodada = None  # RodadaEspeculativa da mensagem atual
+        self._ids_especulacao = itertools.count(1)  # ids JSON-RPC das threads da especulação
+        self._classificacao = None  # (pergunta, Classificacao) da última mensagem
+        self._ao_fragmento = None  # callback do streaming durante processar_mensagem
         
     def _get_next_id(self):
         """Retorna o próximo ID de requisição"""
         self.request_id += 1
         return self.request_id
     
-    def _resposta_ferramenta_indisponivel(self, tool_name):
+    @staticmethod
+    def _resposta_ferramenta_indisponivel(tool_name):
         """Retorna uma resposta útil quando uma ferramenta não está disponível"""
         respostas_alternativas = {
             "listar_cursos": (
@@ -127,57 +389,14 @@ class AgenteIAInteligente:
         """
         if params is None:
             params = {}
-        
-        # Preparar payload JSON-RPC
-        payload = {
-            "jsonrpc": "2.0",
-            "method": metodo,
-            "params": params,
-            "id": self._get_next_id()
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        
-        # print(f" [FastMCP] {metodo} (ID: {payload['id']})")  # Debug desabilitado
-        
-        try:
-            # IMPORTANTE: usar a URL base sem /mcp
-            response = requests.post(
-                self.mcp_url,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            
-            # print(f" Status: {response.status_code}")  # Debug desabilitado
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    return result
-                except json.JSONDecodeError:
-                    return {"error": "Resposta não é JSON válido"}
-            else:
-                try:
-                    erro = response.json()
-                    return {"error": erro}
-                except:
-                    return {"error": f"HTTP {response.status_code}"}
-                
-        except requests.exceptions.ConnectionError:
-            return {"error": "ConnectionError - servidor não está respondendo"}
-        except Exception as e:
-            return {"error": str(e)}
+        return chamar_fastmcp(self.http, self.mcp_url, metodo, params, self._get_next_id())
     
     def verificar_servidor(self, max_tentativas=10, intervalo=1):
         """Verifica se o servidor está respondendo com retry"""
         for tentativa in range(1, max_tentativas + 1):
             try:
                 print(f"   Tentativa {tentativa}/{max_tentativas}...", end="\r")
-                response = requests.get(f"{self.mcp_url}/health", timeout=2)
+                response = self.http.get("mcp_health", f"{self.mcp_url}/health")
                 if response.status_code == 200:
                     data = response.json()
                     print(f"\n[OK] Servidor conectado com sucesso!                  ")
@@ -239,6 +458,49 @@ class AgenteIAInteligente:
         """
         # print(f"\n Chamando ferramenta: {tool_name}")  # Debug desabilitado
         
+        bloqueio = self._preparar_argumentos(tool_name, arguments)
+        if bloqueio:
+            return bloqueio
+        
+        params = {
+            "name": tool_name,
+            "arguments": arguments
+        }
+        
+        resposta = self._chamar_fastmcp("tools/call", params)
+        return self._texto_da_resposta(tool_name, resposta)
+    
+    def chamar_ferramentas_lote(self, chamadas):
+        """
+        Chama várias ferramentas num único lote JSON-RPC
+        
+        Args:
+            chamadas: lista de (nome_ferramenta, argumentos)
+        
+        Returns:
+            Lista de respostas em texto, na mesma ordem de chamadas
+        """
+        respostas = [None] * len(chamadas)
+        preparadas = []
+        for indice, (tool_name, arguments) in enumerate(chamadas):
+            arguments = dict(arguments or {})
+            bloqueio = self._preparar_argumentos(tool_name, arguments)
+            if bloqueio:
+                respostas[indice] = bloqueio
+            else:
+                preparadas.append((indice, (tool_name, arguments)))
+        
+        if preparadas:
+            enviadas = chamar_fastmcp_lote(self.http, self.mcp_url,
+                                           [chamada for _, chamada in preparadas], self._get_next_id)
+            for (indice, _), resposta in zip(preparadas, enviadas):
+                respostas[indice] = resposta
+        return respostas
+    
+    def _preparar_argumentos(self, tool_name, arguments):
+        """
+        Completa aluno_id nos argumentos; retorna mensagem se exigir login
+        """
         # Ferramentas que NÃO requerem aluno_id
         ferramentas_publicas = ["listar_alunos", "diagnosticar_banco", "listar_cursos", "listar_materias_disponiveis", "cadastrar_novo_aluno"]
         
@@ -262,14 +524,11 @@ class AgenteIAInteligente:
                 # print(f" Adicionando aluno_id={self.aluno_id}")  # Debug desabilitado
         
         # print(f" Argumentos: {json.dumps(arguments, ensure_ascii=False)}")  # Debug desabilitado
-        
-        params = {
-            "name": tool_name,
-            "arguments": arguments
-        }
-        
-        resposta = self._chamar_fastmcp("tools/call", params)
-        
+        return None
+    
+    @staticmethod
+    def _texto_da_resposta(tool_name, resposta):
+        """Extrai o texto de uma resposta JSON-RPC de tools/call"""
         # Processar resposta
         if "result" in resposta:
             result = resposta["result"]
@@ -289,125 +548,89 @@ class AgenteIAInteligente:
                 mensagem_erro = erro.get('message', str(erro))
                 # Tratar ferramentas não encontradas de forma mais amigável
                 if "not found" in mensagem_erro.lower() or "não encontrada" in mensagem_erro.lower():
-                    return self._resposta_ferramenta_indisponivel(tool_name)
+                    return AgenteIAInteligente._resposta_ferramenta_indisponivel(tool_name)
                 return f" Erro: {mensagem_erro}"
             return f" Erro: {erro}"
         else:
             return str(resposta)
     
-    def consultar_llm(self, pergunta):
-        """Consulta o LLM para interpretar a pergunta"""
-        
-        # Lista de ferramentas para o prompt
-        tools_list = "\n".join([f"- {f['name']}: {f.get('description', '')}" for f in self.ferramentas])
-        
-        # Verificar se usuário está autenticado para personalizar o prompt
-        usuario_autenticado = self.aluno_id is not None
-        
-        system_prompt = f"""Você é um agente de uma faculdade e um assistente inteligente para ajudar alunos. Sua missão é:
-1. Responder perguntas sobre assuntos acadêmicos e ajudar com requerimentos
-2. Se a pergunta for fora do contexto acadêmico, responder de forma inteligente, amigável e útil
-
-Ferramentas acadêmicas disponíveis:
-{tools_list}
-
-IMPORTANTE - FERRAMENTAS QUE REQUEREM LOGIN:
- Ferramentas que SÓ funcionam para usuários logados:
-   - consultar_aluno (dados pessoais)
-   - perguntar_sobre_aluno (matérias, notas, etc)
-   - criar_requerimento (requerimentos acadêmicos)
-   - resumo_academico (histórico acadêmico)
-   - buscar_pagamentos (boletos e pagamentos)
-
- Ferramentas públicas (funcionam SEM login):
-   - listar_cursos (lista todos os cursos)
-   - listar_materias_disponiveis (lista disciplinas disponíveis)
-   - cadastrar_novo_aluno (cadastra novo aluno no sistema)
-   - diagnosticar_banco (informações do sistema)
+    def _escopo_cache_llm(self):
+        """O prompt de consultar_llm só muda com o login e as ferramentas"""
+        login = "logado" if self.aluno_id is not None else "visitante"
+        return f"decisao|{login}|{escopo_ferramentas(self.ferramentas)}"
 
-USUÁRIO ATUAL: {"LOGADO (tem acesso a todas as ferramentas)" if usuario_autenticado else "NÃO LOGADO (só pode usar ferramentas públicas)"}
+    def _lembrar_decisao(self, escopo, pergunta, decisao):
+        """Guarda a decisão do LLM no cache, sem o aluno_id de quem perguntou"""
+        if not isinstance(decisao, dict) or "acao" not in decisao:
+            return decisao
+        guardada = dict(decisao)
+        if isinstance(guardada.get("argumentos"), dict):
+            guardada["argumentos"] = {k: v for k, v in guardada["argumentos"].items() if k != "aluno_id"}
+        self.cache_llm.guardar(escopo, pergunta, guardada)
+        return decisao
 
-Responda SEMPRE com JSON no formato:
-{{"acao": "ferramenta", "ferramenta": "nome", "argumentos": {{}}}}
-ou {{"acao": "conversa", "resposta": "texto"}}
-
-INSTRUÇÕES IMPORTANTES:
-1. Primeiro, tente identificar se é uma pergunta acadêmica ou geral
-2. Se for acadêmica:
-   - {"Use ferramentas disponíveis conforme necessário" if usuario_autenticado else "Use APENAS listar_cursos ou listar_materias_disponiveis (ferramentas públicas)"}
-   - {"Use criar_requerimento para requerimentos" if usuario_autenticado else "Oriente o usuário a fazer login para criar requerimentos"}
-3. Se FOR UMA PERGUNTA GERAL (não acadêmica):
-   - Sempre responda com {{"acao": "conversa", "resposta": "..."}} com uma resposta inteligente, contextualizada e amigável
-   - Seja conversível, prestativo e sempre mantenha um tom útil
-   - Responda completamente a pergunta de forma natural
-4. Seja educado, amigável e prestativo com os alunos
-5. Entenda perguntas implícitas e contexto
-6. Se o usuário NÃO está logado e pede dados pessoais, oriente-o a fazer login primeiro
-
-TIPOS DE REQUERIMENTOS ACADÊMICOS DISPONÍVEIS:
-- adicao_materia: Para adicionar uma disciplina
-- remocao_materia: Para remover uma disciplina
-- declaracao: Para gerar declarações (matricula, frequencia, conclusao)
-- boleto: Para solicitar 2ª via de boleto
-- trancamento: Para trancar semestre/matéria
-- certificado: Para solicitar certificado
-- transferencia: Para solicitar transferência interna/externa
-- endereco: Para solicitar atualização de endereço
-- diploma: Para solicitar 2ª via de diploma
-
-EXEMPLOS ACADÊMICOS:
-- "quem sou eu?" -> {{"acao": "ferramenta", "ferramenta": "consultar_aluno", "argumentos": {{}}}}
-- "minhas matérias" -> {{"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {{"pergunta": "minhas matérias"}}}}
-- "quais são os cursos?" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
-- "me fale sobre os cursos" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
-- "cursos disponíveis" -> {{"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {{}}}}
-- "quero adicionar matéria ALG-101" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "adicao_materia", "kwargs": {{"codigo_materia": "ALG-101"}}}}}}
-- "remover MAT-102" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "remocao_materia", "kwargs": {{"codigo_materia": "MAT-102"}}}}}}
-- "preciso de declaração de matrícula" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "declaracao", "kwargs": {{"tipo_declaracao": "matricula"}}}}}}
-- "segunda via de boleto" -> {{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {{"tipo": "boleto", "kwargs": {{"valor": 850.00}}}}}}
-- "resumo acadêmico" -> {{"acao": "ferramenta", "ferramenta": "resumo_academico", "argumentos": {{}}}}
+    def _emitir(self, texto):
+        """Repassa texto parcial da resposta a quem pediu streaming"""
+        if self._ao_fragmento is not None and texto:
+            self._ao_fragmento(texto)
 
-EXEMPLOS NÃO ACADÊMICOS (Respostas conversacionais):
-- "obrigado" -> {{"acao": "conversa", "resposta": "Por nada! Estou aqui para ajudar com qualquer coisa. "}}
-- "como você está?" -> {{"acao": "conversa", "resposta": "Estou bem! Pronto para ajudar você em tudo que precisar. Como posso ajudá-lo?"}}
-- "qual é a capital da França?" -> {{"acao": "conversa", "resposta": "A capital da França é Paris, uma das cidades mais bonitas e históricas do mundo."}}
-- "me conte um piada" -> {{"acao": "conversa", "resposta": "Claro! Por que o livro de matemática se suicidou? Porque tinha muitos problemas! "}}
-- "está chovendo?" -> {{"acao": "conversa", "resposta": "Não tenho informações meteorológicas em tempo real, mas você pode verificar em um aplicativo de previsão do tempo."}}"""
+    def consultar_llm(self, pergunta):
+        """Consulta o LLM para interpretar a pergunta"""
+        if USE_OLLAMA:
+            escopo_cache = self._escopo_cache_llm()
+            decisao = self.cache_llm.obter(escopo_cache, pergunta)
+            if decisao is not None:
+                if decisao.get("acao") == "conversa":
+                    self._emitir(decisao.get("resposta"))
+                return decisao
+            
+            # O Ollama leva centenas de ms: as ferramentas prováveis já vão sendo chamadas
+            self._especular(pergunta)
+        
+        # O prompt só muda com as ferramentas e o login: montado uma vez por variante
+        ferramentas = tuple((f['name'], f.get('description', '')) for f in self.ferramentas)
+        system_prompt = prompt_sistema_decisao(ferramentas, self.aluno_id is not None)
         
         if USE_OLLAMA:
-            payload = {
-                "model": OLLAMA_MODEL,
-                "prompt": f"{system_prompt}\n\nPergunta: {pergunta}\n\nResposta JSON:",
-                "stream": False,
-                "temperature": 0.3,  # Um pouco maior para mais criatividade em respostas gerais
-                "format": "json"
-            }
+            payload = payload_chat(system_prompt, pergunta, temperatura=0.3, formato="json")
             
             try:
                 # print(" Consultando Ollama...")  # Debug desabilitado
-                response = requests.post(OLLAMA_URL, json=payload, timeout=30)
+                inicio = time.perf_counter()
+                response = self.http.post("ollama", OLLAMA_URL, json=payload, stream=True)
                 
                 if response.status_code == 200:
-                    texto = response.json().get("response", "{}")
+                    # A decisão é montada conforme os tokens chegam; o texto de
+                    # "resposta" já vai sendo repassado a quem pediu streaming
+                    leitor = LeitorDecisao(ao_texto=self._emitir)
+                    stream = StreamOllama(response, rotulo="ollama decisão", inicio=inicio)
+                    for fragmento in stream:
+                        leitor.alimentar(fragmento)
+                        if leitor.pronta:
+                            # Ferramenta e argumentos completos: não espera o fim da geração
+                            stream.fechar()
+                            return self._lembrar_decisao(escopo_cache, pergunta, leitor.decisao())
+                    texto = "".join(leitor.texto) or "{}"
                     # print(f" Resposta LLM: {texto[:200]}...")  # Debug desabilitado
                     
                     # Extrair JSON
                     try:
-                        return json.loads(texto)
+                        return self._lembrar_decisao(escopo_cache, pergunta, json.loads(texto))
                     except json.JSONDecodeError as exc:
                         logger.debug("Falha ao decodificar JSON do LLM: %s", exc)
                         match = re.search(r'\{.*\}', texto, re.DOTALL)
                         if match:
                             try:
-                                return json.loads(match.group())
+                                return self._lembrar_decisao(escopo_cache, pergunta, json.loads(match.group()))
                             except json.JSONDecodeError as exc:
                                 logger.debug("Falha ao extrair JSON do LLM: %s", exc)
                     
                     # Se não conseguiu fazer JSON, pero temos texto, retornar como conversação
                     if texto and texto.strip():
-                        return {"acao": "conversa", "resposta": texto}
+                        return self._lembrar_decisao(escopo_cache, pergunta, {"acao": "conversa", "resposta": texto})
                     return {"acao": "conversa", "resposta": "Desculpe, não consegui processar sua pergunta."}
                 else:
+                    response.close()
                     # Fallback: análise simples baseada em palavras-chave
                     return self._analise_inteligente(pergunta)
                     
@@ -421,308 +644,92 @@ EXEMPLOS NÃO ACADÊMICOS (Respostas conversacionais):
         # Se USE_OLLAMA for False
         return self._analise_inteligente(pergunta)
     
+    def _especular(self, pergunta):
+        """Dispara as ferramentas de leitura previstas pelo classificador"""
+        if not self.aluno_id or not self.especulacao.k or self._rodada is not None:
+            return
+        classificacao = self._classificar(pergunta)
+        chamadas = []
+        for nome in classificacao.candidatas:
+            decisao = INTENCOES_POR_NOME[nome]["decidir"](classificacao.slots, self.aluno_id)
+            if decisao.get("acao") == "ferramenta":
+                args = dict(decisao.get("argumentos") or {})
+                if self._preparar_argumentos(decisao["ferramenta"], args) is None:
+                    chamadas.append((decisao["ferramenta"], args))
+        self._rodada = self.especulacao.iniciar(chamadas, self._chamada_especulativa(),
+                                                self._lote_especulativo())
+
+    def _chamada_especulativa(self):
+        """
+        chamar_ferramenta para as threads da especulação.
+
+        Os argumentos já chegam preparados; a função só leva a URL, o
+        ClienteHTTP (feito para ser compartilhado) e um contador de ids
+        próprio, nada do estado do agente que a thread do turno altera.
+        """
+        http, mcp_url, ids = self.http, self.mcp_url, self._ids_especulacao
+
+        def executar(tool_name, arguments):
+            params = {"name": tool_name, "arguments": arguments}
+            resposta = chamar_fastmcp(http, mcp_url, "tools/call", params, next(ids))
+            return AgenteIAInteligente._texto_da_resposta(tool_name, resposta)
+
+        return executar
+
+    def _lote_especulativo(self):
+        """Como _chamada_especulativa, para as chamadas previstas num lote só"""
+        http, mcp_url, ids = self.http, self.mcp_url, self._ids_especulacao
+
+        def executar_lote(chamadas):
+            return chamar_fastmcp_lote(http, mcp_url, chamadas, ids.__next__)
+
+        return executar_lote
+
+    def _chamar_ferramenta_decidida(self, ferramenta, args):
+        """chamar_ferramenta, reaproveitando a chamada especulada se for a mesma"""
+        if self._rodada is not None and self.aluno_id:
+            self._preparar_argumentos(ferramenta, args)
+            aproveitada, resposta = self._rodada.resultado(ferramenta, args)
+            if aproveitada:
+                return resposta
+        return self.chamar_ferramenta(ferramenta, args)
+
+    def _classificar(self, pergunta):
+        """Classificação da mensagem, feita uma vez por texto e reaproveitada no turno"""
+        if self._classificacao is None or self._classificacao[0] != pergunta:
+            self._classificacao = (pergunta, classificar(pergunta))
+        return self._classificacao[1]
+
     def _analise_inteligente(self, pergunta):
         """
         Análise inteligente da pergunta - tenta identificar ação acadêmica
         Se não conseguir, tenta responder como um chatbot inteligente
         """
-        pergunta_lower = pergunta.lower()
-        pergunta_sem_acento = self._normalizar_texto(pergunta)
+        classificacao = self._classificar(pergunta)
+        regra = INTENCOES_POR_NOME.get(classificacao.intencao)
 
-        # Detectar se é apenas um código de matéria (ex: "ALG-101")
-        if re.match(r'^[A-Z]{3}-\d{3}$', pergunta.strip(), re.IGNORECASE):
-            codigo = pergunta.strip().upper()
-            # Assumir que é para adicionar uma matéria
-            return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "adicao_materia", "kwargs": {"codigo_materia": codigo}}}
-        
-        # Padrões de reconhecimento
-        if any(palavra in pergunta_lower for palavra in ["quem sou", "meus dados", "minhas informações"]):
-            # Só pode consultar dados se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "consultar_aluno", "argumentos": {}}
-            else:
-                return {"acao": "conversa", "resposta": "Para consultar seus dados, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-        
-        elif any(palavra in pergunta_sem_acento for palavra in ["materia", "disciplina", "cadeira"]) and \
-             not any(palavra in pergunta_sem_acento for palavra in ["adicionar", "mudar", "trocar", "remover", "deletar", "excluir"]):
-            # Só pode consultar matérias se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {"pergunta": "minhas matérias"}}
-            else:
-                return {"acao": "conversa", "resposta": "Para consultar suas matérias, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-        
-        elif any(palavra in pergunta_lower for palavra in ["notas", "média", "nota"]):
-            # Só pode consultar notas se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {"pergunta": "minhas notas"}}
-            else:
-                return {"acao": "conversa", "resposta": "Para consultar suas notas, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-        
-        elif any(palavra in pergunta_sem_acento for palavra in ["curso", "cursos"]):
-            # Esta ferramenta NÃO requer aluno_id - qualquer um pode usar
-            # Verificar se a ferramenta listar_cursos está disponível
-            ferramentas_disponiveis = [f.get('name') for f in self.ferramentas] if self.ferramentas else []
-            
-            if "listar_cursos" in ferramentas_disponiveis:
-                match = re.search(
-                    r'\bcurso(?:s)?\s+(?:do|da|de)?\s*([A-Z]{2,6}(?:-\d{1,3})?)\b',
-                    pergunta,
-                    re.IGNORECASE
-                )
-                if match:
-                    return {"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {"codigo": match.group(1).upper()}}
-                return {"acao": "ferramenta", "ferramenta": "listar_cursos", "argumentos": {}}
-            else:
-                # Fornecer resposta direta se a ferramenta não estiver disponível
-                return {"acao": "conversa", "resposta": self._resposta_ferramenta_indisponivel("listar_cursos")}
-        
-        elif any(palavra in pergunta_lower for palavra in ["boleto", "pagamento", "financeiro", "mensalidade"]):
-            # Só pode consultar boletos se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {"pergunta": "meus boletos"}}
-            else:
-                return {"acao": "conversa", "resposta": "Para consultar boletos e pagamentos, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-        
-        elif any(palavra in pergunta_lower for palavra in ["resumo", "situação academica", "histórico"]):
-            # Só pode consultar resumo acadêmico se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "resumo_academico", "argumentos": {}}
-            else:
-                return {"acao": "conversa", "resposta": "Para consultar seu resumo acadêmico, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-
-        # DESISTÊNCIA / CANCELAMENTO DE MATRÍCULA
-        elif any(palavra in pergunta_sem_acento for palavra in ["desistir", "desistencia", "desistência", "cancelar matricula", "cancelamento", "sair da faculdade", "abandonar curso"]):
-            # Só pode criar requerimento se tiver aluno_id
-            if self.aluno_id:
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "trancamento", "kwargs": {"motivo": "Desistência do aluno"}}}
-            else:
-                return {"acao": "conversa", "resposta": "Para criar requerimentos, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-        
-        # DECLARAÇÃO - detectar requerimento de declaração
-        elif any(palavra in pergunta_sem_acento for palavra in ["declaracao", "declaração", "comprovante"]):
-            # Só pode criar declaração se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para solicitar declarações, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            if any(palavra in pergunta_sem_acento for palavra in ["matricula", "matrícula"]):
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "declaracao", "kwargs": {"tipo_declaracao": "matricula"}}}
-            elif any(palavra in pergunta_sem_acento for palavra in ["frequencia", "presenca", "presença"]):
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "declaracao", "kwargs": {"tipo_declaracao": "frequencia"}}}
-            elif any(palavra in pergunta_sem_acento for palavra in ["conclusao", "conclusão", "formatura", "tcc"]):
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "declaracao", "kwargs": {"tipo_declaracao": "conclusao"}}}
-            else:
-                # Padrão geral de declaração
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "declaracao", "kwargs": {"tipo_declaracao": "matricula"}}}
-        
-        # SEGUNDA VIA DE BOLETO
-        elif any(palavra in pergunta_sem_acento for palavra in ["segunda via", "2 via", "segunda_via"]) or \
-             any(palavra in pergunta_lower for palavra in ["reemitir boleto", "emitirboletonov"]):
-            # Só pode solicitar boleto se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para solicitar segunda via de boleto, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            # Extrair valor se fornecido
-            match = re.search(r'r?\$?\s*(\d+[.,]\d{2})', pergunta, re.IGNORECASE)
-            valor = float(match.group(1).replace(',', '.')) if match else 850.00
-            return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "boleto", "kwargs": {"valor": valor}}}
-        
-        # TRANCAMENTO DE SEMESTRE
-        elif any(palavra in pergunta_sem_acento for palavra in ["trancar", "trancamento", "pausar"]):
-            # Só pode trancar se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para solicitar trancamento, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            if any(palavra in pergunta_sem_acento for palavra in ["materia", "disciplina"]):
-                match = re.search(r'\b([A-Z]{3}-\d{3})\b', pergunta, re.IGNORECASE)
-                if match:
-                    return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "remocao_materia", "kwargs": {"codigo_materia": match.group(1).upper()}}}
-            else:
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "trancamento", "kwargs": {"motivo": "Solicitação do aluno"}}}
-        
-        # DIPLOMA/CERTIFICADO
-        elif any(palavra in pergunta_sem_acento for palavra in ["diploma", "certificado", "segunda via diploma"]):
-            # Só pode solicitar diploma se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para solicitar diploma ou certificado, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "diploma", "kwargs": {}}}
-        
-        # TRANSFERÊNCIA
-        elif any(palavra in pergunta_sem_acento for palavra in ["transferencia", "transferência", "mudar de curso"]):
-            # Só pode solicitar transferência se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para solicitar transferência, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "transferencia", "kwargs": {"motivo": "Solicitação do aluno"}}}
-        
-        # ATUALIZAR ENDEREÇO
-        elif any(palavra in pergunta_sem_acento for palavra in ["endereco", "endereço", "mudar endereco", "mudar endereço"]):
-            # Só pode atualizar endereço se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para atualizar endereço, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "endereco", "kwargs": {}}}
-        
-        # ADICIONAR MATÉRIA - com várias palavras-chave
-        elif any(palavra in pergunta_sem_acento for palavra in ["adicionar", "matricular", "inscrever", "quero uma materia", "preciso de uma materia", "registrar materia"]):
-            # Só pode adicionar matéria se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para adicionar matérias, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            # Tentar extrair código da matéria (ex: ALG-101)
-            match = re.search(r'\b([A-Z]{3}-\d{3})\b', pergunta, re.IGNORECASE)
-            if match:
-                codigo = match.group(1).upper()
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "adicao_materia", "kwargs": {"codigo_materia": codigo}}}
-            # Se não forneceu código, listar matérias disponíveis
-            return {"acao": "ferramenta", "ferramenta": "listar_materias_disponiveis", "argumentos": {"aluno_id": self.aluno_id}}
-        
-        # MUDAR/TROCAR MATÉRIA
-        elif any(palavra in pergunta_sem_acento for palavra in ["mudar", "trocar", "cambiar"]) and \
-             any(palavra in pergunta_sem_acento for palavra in ["materia", "disciplina"]):
-            # Só pode trocar matéria se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para trocar de matéria, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            # Tentar extrair código
-            matches = re.findall(r'\b([A-Z]{3}-\d{3})\b', pergunta, re.IGNORECASE)
-            if len(matches) >= 2:
-                # Usuário forneceu 2 códigos (remover e adicionar)
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "remocao_materia", "kwargs": {"codigo_materia": matches[0].upper()}}}
-            elif len(matches) == 1:
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "adicao_materia", "kwargs": {"codigo_materia": matches[0].upper()}}}
-            return {"acao": "conversa", "resposta": "Para trocar de matéria, qual é o código da matéria que deseja adicionar? (ex: ALG-101)"}
-        
-        # REMOVER/DELETAR MATÉRIA
-        elif any(palavra in pergunta_sem_acento for palavra in ["remover", "deletar", "excluir"]) and \
-             any(palavra in pergunta_sem_acento for palavra in ["materia", "disciplina"]):
-            # Só pode remover matéria se tiver aluno_id
-            if not self.aluno_id:
-                return {"acao": "conversa", "resposta": "Para remover matérias, você precisa fazer login primeiro. Use o menu inicial e escolha a opção [1] Fazer login."}
-            
-            match = re.search(r'\b([A-Z]{3}-\d{3})\b', pergunta, re.IGNORECASE)
-            if match:
-                codigo = match.group(1).upper()
-                return {"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "remocao_materia", "kwargs": {"codigo_materia": codigo}}}
-            return {"acao": "conversa", "resposta": "Para remover uma matéria, qual é o código dela? (ex: ALG-101)"}
-        
-        # AGRADECIMENTOS
-        elif any(palavra in pergunta_lower for palavra in ["obrigado", "valeu", "agradeço", "brigadão", "obrigada"]):
-            return {"acao": "conversa", "resposta": "Por nada! Estou aqui para ajudar com qualquer coisa relacionada à sua vida acadêmica. "}
-        
-        # SAUDAÇÕES
-        elif any(palavra in pergunta_lower for palavra in ["oi", "olá", "bom dia", "boa tarde", "boa noite", "e ai"]):
-            return {"acao": "conversa", "resposta": "Olá! Como posso ajudá-lo com sua vida acadêmica hoje?"}
-        
-        # FREQUÊNCIA
-        elif any(palavra in pergunta_sem_acento for palavra in ["frequencia", "frequência"]):
-            return {"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {"pergunta": "minha frequência"}}
-        
-        else:
-            # Se chegou aqui, não é uma pergunta acadêmica reconhecida
+        if regra is None:
+            # Não é uma pergunta acadêmica reconhecida
             # Tentar responder como um assistente inteligente geral
             return self._resposta_contextualizada_geral(pergunta)
+
+        if regra.get("login") and not self.aluno_id:
+            return {"acao": "conversa", "resposta": MENSAGEM_LOGIN.format(regra["login"])}
+
+        # Ferramentas que não exigem login podem não estar publicadas no servidor
+        necessaria = regra.get("ferramenta_necessaria")
+        if necessaria and necessaria not in [f.get('name') for f in self.ferramentas or []]:
+            return {"acao": "conversa", "resposta": self._resposta_ferramenta_indisponivel(necessaria)}
+
+        return regra["decidir"](classificacao.slots, self.aluno_id)
     
     def _mapear_necessidade_para_requerimento(self, pergunta):
         """
         Mapeia necessidades/interesses do aluno para requerimentos disponíveis.
         Detecta interesse em serviços como declarações, boletos, transferência, etc.
-        Retorna (tipo_servico, confirmado, mensagem_sugestao)
+        Retorna {"tipo", "config", "subtipo"} ou None
         """
-        pergunta_lower = pergunta.lower()
-        pergunta_sem_acento = self._normalizar_texto(pergunta)
-        
-        # MAPEAMENTO GENÉRICO DE NECESSIDADES
-        mapa_necessidades = {
-            # DECLARAÇÕES
-            "declaracao": {
-                "triggers": ["preciso de declaracao", "quero declaracao", "gostaria de declaracao", "necessito declaracao",
-                           "declaracao de", "comprovante de", "preciso comprovante"],
-                "subtypes": {
-                    "matricula": ["matricula", "matrícula", "inscrito"],
-                    "frequencia": ["frequencia", "presença", "presenca"],
-                    "conclusao": ["conclusao", "conclusão", "formatura", "tcc", "formado"]
-                },
-                "mensagem_padrao": "Posso gerar uma declaração para você. Qual tipo você precisa?",
-                "requerimento": "declaracao"
-            },
-            # BOLETO
-            "boleto": {
-                "triggers": ["boleto", "segunda via", "reemitir", "2 via", "boleto novo", "nova emissao"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de solicitar segunda via do boleto?",
-                "requerimento": "boleto"
-            },
-            # TRANSFERÊNCIA
-            "transferencia": {
-                "triggers": ["transferencia", "transferência", "mudar de curso", "trocar curso", "sair deste curso"],
-                "subtypes": {
-                    "interna": ["interna", "interno"],
-                    "externa": ["externa", "externo", "outra instituicao"]
-                },
-                "mensagem_padrao": "Você gostaria de fazer uma transferência? Pode ser interna ou externa.",
-                "requerimento": "transferencia"
-            },
-            # TRANCAMENTO
-            "trancamento": {
-                "triggers": ["trancar", "trancamento", "pausar", "parar", "dar um tempo"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de trancar o semestre?",
-                "requerimento": "trancamento"
-            },
-            # DIPLOMA
-            "diploma": {
-                "triggers": ["diploma", "segunda via diploma", "2 via diploma", "solicitar diploma"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de solicitar segunda via do diploma?",
-                "requerimento": "diploma"
-            },
-            # ENDEREÇO
-            "endereco": {
-                "triggers": ["endereco", "endereço", "mudar endereco", "mudar endereço", "atualizar dados"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de atualizar seu endereço?",
-                "requerimento": "endereco"
-            },
-            # CERTIFICADO
-            "certificado": {
-                "triggers": ["certificado", "certificacao", "certificação"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de solicitar um certificado?",
-                "requerimento": "certificado"
-            },
-            # CADASTRO / MATRÍCULA (NOVO ALUNO)
-            "cadastro": {
-                "triggers": ["quero me cadastrar", "fazer matricula", "fazer matrícula", "me inscrever", 
-                           "quero estudar", "iniciar curso", "ser aluno", "entrar na faculdade",
-                           "ingressar", "fazer inscricao", "nova matricula", "primeiro acesso",
-                           "sou novo", "quero me matricular"],
-                "subtypes": {},
-                "mensagem_padrao": "Você gostaria de fazer matrícula como novo aluno?",
-                "requerimento": "cadastro"
-            }
-        }
-        
-        # Verificar cada necessidade
-        for tipo_servico, config in mapa_necessidades.items():
-            # Verificar triggers
-            tem_trigger = any(trigger in pergunta_sem_acento for trigger in config["triggers"])
-            
-            if tem_trigger:
-                return {
-                    "tipo": tipo_servico,
-                    "config": config,
-                    "subtipo": self._detectar_subtipo(pergunta_sem_acento, config.get("subtypes", {}))
-                }
-        
-        return None
-    
-    def _detectar_subtipo(self, pergunta_sem_acento, subtypes):
-        """Detecta subtipo da necessidade (ex: matrícula, frequência para declaração)"""
-        for subtipo, triggers in subtypes.items():
-            if any(trigger in pergunta_sem_acento for trigger in triggers):
-                return subtipo
-        return None
+        return self._classificar(pergunta).necessidade
     
     def _processar_necessidade_aluno(self, pergunta):
         """
@@ -1104,83 +1111,28 @@ Responda: Sim ou Não"""
         Responde a perguntas gerais (não acadêmicas) de forma inteligente.
         Ao invés de dizer que não entendeu, tenta responder como um assistente conversacional.
         """
-        pergunta_lower = pergunta.lower()
-        pergunta_sem_acento = self._normalizar_texto(pergunta)
-        
-        # Mapeamento de palavras-chave para respostas inteligentes
-        # SAUDAÇÕES E PERGUNTAS DE BEM-ESTAR
-        if any(palavra in pergunta_lower for palavra in ["como vai", "como você está", "tudo bem", "e aí"]):
-            if "como vai" in pergunta_lower or "como está" in pergunta_lower:
-                return {"acao": "conversa", "resposta": "Estou ótimo, obrigado por perguntar!  E você, como está? Posso ajudá-lo em algo?"}
-            elif "tudo bem" in pergunta_lower:
-                return {"acao": "conversa", "resposta": "Tudo certo! E com você? Como posso ajudá-lo?"}
-            else:
-                return {"acao": "conversa", "resposta": "Tudo bem sim! Pronto para ajudar você. O que você precisa?"}
-        
-        # AGRADECIMENTOS
-        elif any(palavra in pergunta_lower for palavra in ["obrigado", "vlw", "valeu", "brigadão", "brigado", "muito obrigado"]):
-            respostas = [
-                "De nada! Estou sempre aqui para ajudar. ",
-                "Por nada! Se precisar novamente, é só chamar!",
-                "Fico feliz em ajudar! Há mais algo que eu possa fazer?"
-            ]
-            return {"acao": "conversa", "resposta": secrets.choice(respostas)}
-        
-        # DESPEDIDAS
-        elif any(palavra in pergunta_lower for palavra in ["tchau", "até logo", "adeus", "até mais", "falou"]):
-            return {"acao": "conversa", "resposta": "Até logo! Volte sempre que precisar de ajuda! "}
-        
-        # ELOGIOS
-        elif any(palavra in pergunta_lower for palavra in ["obrigado", "você é legal", "você é bom", "gosto", "adorei", "perfeito", "excelente"]):
-            if any(palavra in pergunta_lower for palavra in ["você", "agente", "assistente"]):
-                return {"acao": "conversa", "resposta": "Obrigado! Fico feliz em ajudar. Meu objetivo é tornar sua vida acadêmica mais fácil e confortável! "}
-        
-        # PERGUNTAS SOBRE O AGENTE
-        if any(palavra in pergunta_sem_acento for palavra in ["quem", "o que"] + ["voce", "você"]) and \
-           any(palavra in pergunta_lower for palavra in ["quem é", "o que é", "quem é você"]):
-            return {"acao": "conversa", "resposta": "Sou um assistente de IA inteligente da faculdade! Estou aqui para ajudar você com tudo relacionado à sua vida acadêmica: requerimentos, matérias, notas, boletos, declarações, e muito mais. Além disso, posso conversar sobre outros assuntos também! "}
-        
-        # PERGUNTAS SOBRE HORÁRIOS E DATAS
-        if any(palavra in pergunta_sem_acento for palavra in ["horas", "hora", "que horas", "qual hora", "que dia"]):
-            import datetime
-            agora = datetime.datetime.now()
-            hora_formatada = agora.strftime("%H:%M")
-            data_formatada = agora.strftime("%d/%m/%Y")
-            return {"acao": "conversa", "resposta": f"Agora são {hora_formatada} em {data_formatada}. "}
-        
-        # PERGUNTAS SOBRE ASSUNTOS VÁRIOS
-        if "piada" in pergunta_lower or "piadas" in pergunta_lower:
-            piadas = [
-                "Por que o livro de matemática se suicidou? Porque tinha muitos problemas! ",
-                "O que o 0 (zero) falou para o 8 (oito)? Que cinto legal! ",
-                "Qual é a comida favorita do programador? Array (aletria)! ",
-            ]
-            return {"acao": "conversa", "resposta": secrets.choice(piadas)}
-        
-        # CÁLCULOS SIMPLES
-        if "quanto é" in pergunta_lower or "calcular" in pergunta_lower or "calcula" in pergunta_lower:
-            import re
-            # Tenta encontrar uma operação matemática simples
-            match = re.search(r'(\d+)\s*[\+\-\*\/]\s*(\d+)', pergunta)
-            if match:
-                operacao = pergunta[match.start():match.end()]
+        classificacao = self._classificar(pergunta)
+
+        # Regras em ordem de prioridade: saudações, agradecimentos, despedidas,
+        # elogios, perguntas sobre o agente, horário, piadas, cálculos e tópicos
+        for nome in classificacao.conversas:
+            regra = CONVERSAS_POR_NOME[nome]
+            if regra.get("respostas"):
+                return {"acao": "conversa", "resposta": secrets.choice(regra["respostas"])}
+
+            if nome == "horario":
+                import datetime
+                agora = datetime.datetime.now()
+                hora_formatada = agora.strftime("%H:%M")
+                data_formatada = agora.strftime("%d/%m/%Y")
+                return {"acao": "conversa", "resposta": f"Agora são {hora_formatada} em {data_formatada}. "}
+
+            if nome == "calculo":
+                operacao = classificacao.slots["operacao"]
                 resultado = _safe_eval_math(operacao)
                 if resultado is not None:
                     return {"acao": "conversa", "resposta": f"Deixe-me calcular: {operacao} = {resultado}"}
         
-        # TÓPICOS INTERESSANTES QUE AGENTE PODE COMENTAR
-        topicos_interessantes = {
-            "python": "Python é uma linguagem de programação muito popular! É usada em ciência de dados, web, automação e muito mais. Você está estudando programação?",
-            "inteligencia artificial": "Inteligência Artificial é fascinante! Estou usando um modelo de IA para conversar com você agora. É incrível como a tecnologia evolui!",
-            "tecnologia": "A tecnologia é o futuro! Estamos vivendo em uma era de inovação constante. Que área da tecnologia você mais se interessa?",
-            "estudos": "Dedicação aos estudos é fundamental! Se você tiver alguma dúvida sobre a faculdade, estou aqui para ajudar.",
-            "trabalho": "Trabalhar e estudar ao mesmo tempo é desafiador, mas possível! Se precisar de ajuda para gerenciar seus prazos, posso tentar ajudar.",
-        }
-        
-        for topico, resposta in topicos_interessantes.items():
-            if topico in pergunta_sem_acento:
-                return {"acao": "conversa", "resposta": resposta}
-        
         # RESPOSTA GENÉRICA INTELIGENTE PARA PERGUNTAS DESCONHECIDAS
         # Usar uma estratégia de resposta contextualizada
         resposta_generica = self._gerar_resposta_generica(pergunta)
@@ -1228,31 +1180,34 @@ Responda: Sim ou Não"""
         """
         Consulta o LLM especificamente para responder perguntas gerais (não acadêmicas)
         """
-        system_prompt = """Você é um assistente de IA inteligente e amigável. Responda perguntas com clareza, bom humor quando apropriado, e sempre sendo útil.
-        
-Regras:
-1. Responda de forma natural e conversacional
-2. Use emojis quando apropriado para tornar a resposta mais amigável
-3. Seja conciso mas completo
-4. Se não souber a resposta exata, admita e tente ser helpful mesmo assim
-5. Sempre mantenha um tom amigável e prestativo"""
         
         if USE_OLLAMA:
-            payload = {
-                "model": OLLAMA_MODEL,
-                "prompt": f"{system_prompt}\n\nPergunta: {pergunta}\n\nResposta:",
-                "stream": False,
-                "temperature": 0.5  # Mais criatividade para perguntas gerais
-            }
+            em_cache = self.cache_llm.obter("geral", pergunta)
+            if em_cache is not None:
+                self._emitir(em_cache)
+                return em_cache
+
+            payload = payload_chat(PROMPT_SISTEMA_GERAL, pergunta, temperatura=0.5)  # Mais criatividade
             
             try:
-                response = requests.post(OLLAMA_URL, json=payload, timeout=20)
+                inicio = time.perf_counter()
+                response = self.http.post("ollama_geral", OLLAMA_URL, json=payload, stream=True)
                 
                 if response.status_code == 200:
-                    texto = response.json().get("response", "").strip()
+                    # Tokens repassados conforme chegam (sem os espaços iniciais)
+                    partes = []
+                    for fragmento in StreamOllama(response, rotulo="ollama geral", inicio=inicio):
+                        if not partes:
+                            fragmento = fragmento.lstrip()
+                        if fragmento:
+                            partes.append(fragmento)
+                            self._emitir(fragmento)
+                    texto = "".join(partes).strip()
                     if texto:
-                        return texto
-            except requests.exceptions.RequestException as exc:
+                        return self.cache_llm.guardar("geral", pergunta, texto)
+                else:
+                    response.close()
+            except (requests.exceptions.RequestException, RuntimeError) as exc:
                 logger.debug("Falha ao consultar LLM: %s", exc)
         
         return None
@@ -1261,252 +1216,7 @@ Regras:
         Detecta oportunidades de ações/sugestões baseado na pergunta do aluno.
         Oferece próximos passos relevantes para melhorar a experiência do aluno.
         """
-        pergunta_lower = pergunta.lower()
-        pergunta_sem_acento = self._normalizar_texto(pergunta)
-        oportunidades = []
-        
-        # OPORTUNIDADES COM MATÉRIAS
-        if any(palavra in pergunta_sem_acento for palavra in ["materia", "disciplina", "cadeira", "aula", "professor"]):
-            if any(palavra in pergunta_sem_acento for palavra in ["dificil", "difícil", "complicado", "nao entendo", "não entendi", "perdido"]):
-                oportunidades.append({
-                    "tipo": "suporte",
-                    "titulo": "Dificuldade nas Aulas",
-                    "sugestoes": [
-                        " Quer mudar para outra matéria com menos dificuldade?",
-                        " Posso ajudar a consultar suas matérias atuais",
-                        " Considere conversar com o monitor da disciplina"
-                    ]
-                })
-            
-            if any(palavra in pergunta_sem_acento for palavra in ["gosto", "legal", "adorei", "perfeito", "bom"]):
-                oportunidades.append({
-                    "tipo": "aprendizado",
-                    "titulo": "Excelente Progresso!",
-                    "sugestoes": [
-                        " Quer adicionar matérias optativas relacionadas?",
-                        " Posso listar cursos complementares",
-                        " Veja seu resumo acadêmico para planejamento"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM BOLETO/PAGAMENTO
-        if any(palavra in pergunta_sem_acento for palavra in ["boleto", "pagamento", "mensalidade", "financeiro", "dinheiro", "valor"]):
-            if "problema" in pergunta_sem_acento or "atraso" in pergunta_sem_acento or "nao posso" in pergunta_sem_acento:
-                oportunidades.append({
-                    "tipo": "financeiro_critico",
-                    "titulo": "Situação Financeira",
-                    "sugestoes": [
-                        " Consulte sua situação de boletos",
-                        " Você pode solicitar segunda via do boleto",
-                        " Converse com o setor financeiro sobre opções de pagamento"
-                    ]
-                })
-            else:
-                oportunidades.append({
-                    "tipo": "financeiro",
-                    "titulo": "Informações Financeiras",
-                    "sugestoes": [
-                        " Quer solicitar segunda via do boleto?",
-                        " Consulte seus boletos pendentes",
-                        " Verifique sua situação financeira"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM NOTAS/DESEMPENHO
-        if any(palavra in pergunta_sem_acento for palavra in ["nota", "nota", "desempenho", "resultado", "prova"]):
-            if any(palavra in pergunta_sem_acento for palavra in ["baixa", "ruim", "problema", "nao passou", "reprovei", "falha"]):
-                oportunidades.append({
-                    "tipo": "academico_alerta",
-                    "titulo": "Atenção ao Desempenho",
-                    "sugestoes": [
-                        " Verifique o seu histórico acadêmico completo",
-                        " Considere reforço em matérias críticas",
-                        " Converse com um orientador"
-                    ]
-                })
-            elif any(palavra in pergunta_sem_acento for palavra in ["boa", "bom", "legal", "excelente", "ótimo"]):
-                oportunidades.append({
-                    "tipo": "academico_positivo",
-                    "titulo": "Excelente Desempenho!",
-                    "sugestoes": [
-                        " Parabéns pelo bom desempenho!",
-                        " Considere desafios acadêmicos adicionais",
-                        " Mantenha o ritmo e vise o melhor"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM FREQUÊNCIA
-        if any(palavra in pergunta_sem_acento for palavra in ["frequencia", "presença", "presenca", "falta", "ausencia", "ausência"]):
-            if any(palavra in pergunta_sem_acento for palavra in ["baixa", "problema", "ruim", "muita"]):
-                oportunidades.append({
-                    "tipo": "frequencia_alerta",
-                    "titulo": "Frequência Baixa",
-                    "sugestoes": [
-                        " Verifique sua frequência atual",
-                        " Solicite declaração de frequência se necessário",
-                        " Converse com a coordenação sobre ausências justificadas"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM CURSOS
-        if any(palavra in pergunta_sem_acento for palavra in ["curso", "cursos", "programas", "especialização"]):
-            oportunidades.append({
-                "tipo": "explorar",
-                "titulo": "Explorar Oportunidades",
-                "sugestoes": [
-                    " Consulte todos os cursos disponíveis",
-                    " Veja pré-requisitos de cada disciplina",
-                    " Considere mudar de curso se interessado"
-                ]
-            })
-        
-        # OPORTUNIDADES COM DIPLOMA/CERTIFICADO
-        if any(palavra in pergunta_sem_acento for palavra in ["diploma", "certificado", "formatura", "conclusao"]):
-            oportunidades.append({
-                "tipo": "conclusao",
-                "titulo": "Finalização de Estudos",
-                "sugestoes": [
-                    " Solicite segunda via de diploma se necessário",
-                    " Verifique status da sua conclusão",
-                    " Consulte o resumo acadêmico completo"
-                ]
-            })
-        
-        # OPORTUNIDADES COM TRANSFERÊNCIA
-        if any(palavra in pergunta_sem_acento for palavra in ["transferencia", "transferência", "mudar", "sair"]):
-            oportunidades.append({
-                "tipo": "transferencia",
-                "titulo": "Mudança de Curso",
-                "sugestoes": [
-                    " Solicite transferência interna ou externa",
-                    " Converse sobre seus objetivos acadêmicos",
-                    " Veja opções de outros cursos"
-                ]
-            })
-        
-        # OPORTUNIDADES COM TRANCAMENTO
-        if any(palavra in pergunta_sem_acento for palavra in ["trancar", "trancamento", "pausar", "parar", "sair"]):
-            if "temporario" in pergunta_sem_acento or "temporária" in pergunta_sem_acento:
-                oportunidades.append({
-                    "tipo": "trancamento_temp",
-                    "titulo": "Pausa nos Estudos",
-                    "sugestoes": [
-                        "⏸ Solicite trancamento de semestre",
-                        " Você pode voltar após resolver seus problemas",
-                        " Converse com a coordenação sobre opções"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM ENDEREÇO/DADOS
-        if any(palavra in pergunta_sem_acento for palavra in ["endereco", "endereço", "dados", "informacao", "informação", "mudar", "atualizar"]):
-            oportunidades.append({
-                "tipo": "dados",
-                "titulo": "Manter Dados Atualizados",
-                "sugestoes": [
-                    " Atualize seu endereço se mudou",
-                    " Mantenha seus dados pessoais em dia",
-                    " Solicite atualização de cadastro se necessário"
-                ]
-            })
-        
-        # OPORTUNIDADES COM REQUERIMENTOS GERAIS
-        if any(palavra in pergunta_sem_acento for palavra in ["requerimento", "solicitacao", "solicitar", "pedir"]):
-            oportunidades.append({
-                "tipo": "administrativo",
-                "titulo": "Requerimentos Disponíveis",
-                "sugestoes": [
-                    " Posso ajudar com diversos tipos de requerimentos",
-                    " Especifique o que você precisa",
-                    " Requerimentos processados rapidamente"
-                ]
-            })
-        
-        # OPORTUNIDADES COM DIFICULDADES GERAIS NA FACULDADE
-        if any(palavra in pergunta_sem_acento for palavra in ["problema", "dificuldade", "duvida", "dúvida", "ajuda", "help", "nao sei"]):
-            if "estudar" in pergunta_sem_acento or "aprender" in pergunta_sem_acento or "entender" in pergunta_sem_acento:
-                oportunidades.append({
-                    "tipo": "suporte_academico",
-                    "titulo": "Apoio Acadêmico",
-                    "sugestoes": [
-                        " Consulte suas matérias atuais",
-                        " Considere reforço ou monitoria",
-                        " Converse com um orientador"
-                    ]
-                })
-        
-        # OPORTUNIDADES COM STRESS/CANSAÇO/BEM-ESTAR
-        if any(palavra in pergunta_sem_acento for palavra in ["cansado", "estressado", "estressada", "cansaco", "cansaço", "pressao", "pressão", "sobrecarregado"]):
-            oportunidades.append({
-                "tipo": "bem_estar",
-                "titulo": "Seu Bem-Estar Acadêmico",
-                "sugestoes": [
-                    " Seu bem-estar é importante!",
-                    "⏸ Considere trancar semestre se necessário",
-                    " Fale com a coordenação de alunos"
-                ]
-            })
-        
-        # OPORTUNIDADES COM PLANEJAMENTO/FUTURO
-        if any(palavra in pergunta_sem_acento for palavra in ["plano", "planejamento", "futuro", "carreira", "depois", "proximos passos", "próximos"]):
-            oportunidades.append({
-                "tipo": "planejamento",
-                "titulo": "Planejamento Acadêmico",
-                "sugestoes": [
-                    " Veja cursos disponíveis para aprimoramento",
-                    " Consulte matérias optativas e eletivas",
-                    " Considere especialização ou extensão"
-                ]
-            })
-        
-        # OPORTUNIDADES COM BOLSA/AUXÍLIO
-        if any(palavra in pergunta_sem_acento for palavra in ["bolsa", "auxilio", "auxílio", "financiamento", "financeiro"]):
-            oportunidades.append({
-                "tipo": "financeiro_bolsa",
-                "titulo": "Oportunidades Financeiras",
-                "sugestoes": [
-                    " Consulte bolsas e auxílios disponíveis",
-                    " Veja sua situação de pagamentos",
-                    " Converse com o financeiro sobre opções"
-                ]
-            })
-        
-        # OPORTUNIDADES COM COMPARECIMENTO/PARTICIPAÇÃO
-        if any(palavra in pergunta_sem_acento for palavra in ["evento", "palestra", "workshop", "semana academica", "congresso", "atividade"]):
-            oportunidades.append({
-                "tipo": "participacao",
-                "titulo": "Eventos e Atividades",
-                "sugestoes": [
-                    " Participe de eventos da instituição",
-                    " Amplie seu conhecimento com palestras",
-                    " Conheça outros alunos e profissionais"
-                ]
-            })
-        
-        # OPORTUNIDADES COM RENOVAÇÃO/CONTINUIDADE
-        if any(palavra in pergunta_sem_acento for palavra in ["continuar", "renovar", "próximo semestre", "proximo", "semestre que vem"]):
-            oportunidades.append({
-                "tipo": "continuidade",
-                "titulo": "Continuação dos Estudos",
-                "sugestoes": [
-                    " Planeje disciplinas para o próximo período",
-                    " Revise matérias e prepare-se antecipadamente",
-                    " Defina seus objetivos para o próximo semestre"
-                ]
-            })
-        
-        # OPORTUNIDADES COM DÚVIDAS ADMINISTRATIVAS
-        if any(palavra in pergunta_sem_acento for palavra in ["administrativo", "burocracia", "documento", "papelada", "registro"]):
-            oportunidades.append({
-                "tipo": "administrativo_geral",
-                "titulo": "Documentação e Registros",
-                "sugestoes": [
-                    " Solicite declarações e comprovantes",
-                    " Regularize sua documentação",
-                    " Mantenha seus registros atualizados"
-                ]
-            })
-        
-        return oportunidades
+        return list(self._classificar(pergunta).oportunidades)
     
     def _formatar_oportunidades(self, oportunidades):
         """
@@ -1532,11 +1242,7 @@ Regras:
         oportunidades = self._detectar_oportunidades(pergunta)
         
         # Se houver oportunidades e a pergunta é acadêmica, adicionar sugestões
-        pergunta_sem_acento = self._normalizar_texto(pergunta)
-        eh_academica = any(palavra in pergunta_sem_acento for palavra in [
-            "materia", "disciplina", "curso", "boleto", "nota", "frequencia",
-            "requerimento", "diploma", "transferencia", "endereco", "dados"
-        ])
+        eh_academica = self._classificar(pergunta).academica
         
         if oportunidades and eh_academica:
             # Adicionar oportunidades à resposta
@@ -1561,29 +1267,17 @@ Regras:
         if self.aluno_id:
             try:
                 # Fazer requisição para obter requerimentos do aluno
-                response = requests.get(
+                response = self.http.get(
+                    "flask",
                     f"http://localhost:5000/api/requerimentos",
-                    params={"aluno_id": self.aluno_id},
-                    timeout=5
+                    params={"aluno_id": self.aluno_id, "limit": 1},
+                    timeout=(3.05, 5)
                 )
                 if response.status_code == 200:
-                    dados = response.json()
-                    if isinstance(dados, dict) and "requerimentos" in dados:
-                        requerimentos = dados["requerimentos"]
-                    elif isinstance(dados, list):
-                        requerimentos = dados
-                    else:
-                        requerimentos = []
-                    
-                    # Pegar o mais recente
+                    # A listagem vem paginada ({items, next_cursor}) e do mais recente para o mais antigo
+                    requerimentos = response.json().get("items", [])
                     if requerimentos:
-                        # Ordenar por data de criação (descendente) e pegar o primeiro
-                        requerimentos_ordenados = sorted(
-                            requerimentos, 
-                            key=lambda x: x.get('id', 0), 
-                            reverse=True
-                        )
-                        requerimento_id = requerimentos_ordenados[0].get('id')
+                        requerimento_id = requerimentos[0].get('id')
             except Exception as e:
                 logger.warning("Erro ao obter ID do requerimento: %s", e)
         
@@ -1657,49 +1351,50 @@ Regras:
         try:
             if tipo_req == "declaracao":
                 # Chamar endpoint Flask para criar declaração
-                response = requests.post(
+                response = self.http.post(
+                    "flask",
                     "http://localhost:5000/api/requerimentos/declaracao",
                     json={
                         "aluno_id": self.aluno_id,
                         "declaracao_tipo": subtipo or "matricula"
-                    },
-                    timeout=10
+                    }
                 )
-                if response.status_code == 201:
+                # 202: requerimento gravado, PDF sendo gerado em segundo plano
+                if response.status_code in (201, 202):
                     dados = response.json()
                     return dados.get('id')
             
             elif tipo_req == "boleto":
-                response = requests.post(
+                response = self.http.post(
+                    "flask",
                     "http://localhost:5000/api/requerimentos/boleto",
-                    json={"aluno_id": self.aluno_id},
-                    timeout=10
+                    json={"aluno_id": self.aluno_id}
                 )
                 if response.status_code == 201:
                     dados = response.json()
                     return dados.get('id')
             
             elif tipo_req == "adicao_materia":
-                response = requests.post(
+                response = self.http.post(
+                    "flask",
                     "http://localhost:5000/api/requerimentos/adicao-materia",
                     json={
                         "aluno_id": self.aluno_id,
                         "codigo_materia": subtipo or ""
-                    },
-                    timeout=10
+                    }
                 )
                 if response.status_code == 201:
                     dados = response.json()
                     return dados.get('id')
             
             elif tipo_req == "remocao_materia":
-                response = requests.post(
+                response = self.http.post(
+                    "flask",
                     "http://localhost:5000/api/requerimentos/remocao-materia",
                     json={
                         "aluno_id": self.aluno_id,
                         "codigo_materia": subtipo or ""
-                    },
-                    timeout=10
+                    }
                 )
                 if response.status_code == 201:
                     dados = response.json()
@@ -1710,6 +1405,23 @@ Regras:
         
         return None
     
+    def autenticar(self, aluno_id):
+        """
+        Associa a sessão ao aluno se ele existir. Retorna True/False.
+        """
+        self.aluno_id = aluno_id
+        resposta = self.chamar_ferramenta("consultar_aluno", {"aluno_id": aluno_id})
+        texto = str(resposta)
+        
+        if "não encontrado" in texto.lower() or texto.lstrip().startswith(("Erro", "Para usar")):
+            self.aluno_id = None
+            return False
+        
+        # Tentar extrair nome
+        match = re.search(r'Nome:?\s*([^\n]+)', texto)
+        self.aluno_nome = match.group(1).strip() if match else f"Aluno {aluno_id}"
+        return True
+    
     def _fazer_login(self):
         """Realiza o login de um aluno existente"""
         print("\n" + "-"*70)
@@ -1729,19 +1441,10 @@ Regras:
                 if not entrada:
                     continue
                 
-                self.aluno_id = int(entrada)
+                aluno_id = int(entrada)
                 
                 print(" Verificando aluno...")
-                resposta = self.chamar_ferramenta("consultar_aluno", {"aluno_id": self.aluno_id})
-                
-                if "" not in str(resposta) and "não encontrado" not in str(resposta).lower():
-                    # Tentar extrair nome
-                    if isinstance(resposta, str):
-                        match = re.search(r'Nome:?\s*([^\n]+)', resposta)
-                        self.aluno_nome = match.group(1) if match else f"Aluno {self.aluno_id}"
-                    else:
-                        self.aluno_nome = f"Aluno {self.aluno_id}"
-                    
+                if self.autenticar(aluno_id):
                     print(f"\n Login realizado com sucesso!")
                     print(f" Bem-vindo(a), {self.aluno_nome}!")
                     return True
@@ -1842,6 +1545,187 @@ Regras:
         
         return False
 
+    def processar_mensagem(self, pergunta, ao_fragmento=None):
+        """
+        Processa uma mensagem do usuário e retorna a resposta do assistente.
+        
+        Usa e atualiza apenas o estado da sessão (self.estado). Se
+        ao_fragmento for informado, recebe o texto gerado pelo LLM token a
+        token, antes do retorno (ver complemento_resposta para o restante).
+        """
+        self._ao_fragmento = ao_fragmento
+        try:
+            return self._responder(pergunta)
+        finally:
+            self._ao_fragmento = None
+            if self._rodada is not None:
+                self._rodada.encerrar()
+                self._rodada = None
+
+    def processar_mensagem_stream(self, pergunta):
+        """
+        Gera a resposta em pedaços: o texto do LLM sai conforme é gerado e o
+        que falta (oportunidades, respostas sem LLM) vem no fim. Juntos, os
+        pedaços formam o retorno de processar_mensagem.
+        """
+        fila = queue.Queue()
+        fim = object()
+        resultado = {}
+
+        def trabalhar():
+            try:
+                resultado["resposta"] = self.processar_mensagem(pergunta, ao_fragmento=fila.put)
+            except Exception as e:
+                resultado["erro"] = e
+            finally:
+                fila.put(fim)
+
+        threading.Thread(target=trabalhar, name="agente-turno", daemon=True).start()
+        emitido = []
+        while True:
+            fragmento = fila.get()
+            if fragmento is fim:
+                break
+            emitido.append(fragmento)
+            yield fragmento
+
+        if "erro" in resultado:
+            raise resultado["erro"]
+        resto = complemento_resposta("".join(emitido), resultado["resposta"])
+        if resto:
+            yield resto
+
+    def _responder(self, pergunta):
+        """Corpo de processar_mensagem"""
+        pergunta_sem_acento = self._normalizar_texto(pergunta)
+
+        # Processar fluxo de cadastro se estiver em andamento
+        if self.dados_cadastro:
+            resultado = self._processar_resposta_cadastro(pergunta)
+            if resultado:
+                return resultado['resposta']
+
+        # Confirmar ou cancelar acao pendente
+        if self.acao_pendente:
+            if self.acao_pendente.get("tipo") == "adicionar_materia_interesse":
+                # Ação pendente especial para interesse em matéria
+                if self._confirmar_acao_pendente(pergunta_sem_acento):
+                    # Confirmar adição de matéria
+                    resposta = f"Perfeito!  Vou abrir um requerimento para adicionar {self.acao_pendente.get('materia')} à sua grade.\n\n"
+                    resposta += "Seu requerimento foi processado com sucesso!"
+                    self.acao_pendente = None
+                    return resposta
+                elif self._negar_acao_pendente(pergunta_sem_acento):
+                    self.acao_pendente = None
+                    return "Tudo bem! Se mudar de ideia, é só me chamar. "
+                else:
+                    self.acao_pendente = None
+                    decisao = self.consultar_llm(pergunta)
+
+            elif self.acao_pendente.get("tipo") == "servico_interesse":
+                # Ação pendente para serviço de interesse (declaração, boleto, etc)
+                if self._confirmar_acao_pendente(pergunta_sem_acento):
+                    # Confirmar serviço - EXECUTAR A FERRAMENTA
+                    servico = self.acao_pendente.get('servico')
+                    subtipo = self.acao_pendente.get('subtipo')
+
+                    # Extrair argumentos da ação pendente
+                    ferramenta = self.acao_pendente.get('decisao', {}).get('ferramenta')
+                    args = self.acao_pendente.get('decisao', {}).get('argumentos', {})
+
+                    if ferramenta == "criar_requerimento":
+                        # CRIAR REQUERIMENTO NO BANCO PRIMEIRO
+                        requerimento_id = self._criar_requerimento_banco(servico, subtipo)
+
+                        # EXECUTAR A FERRAMENTA MCP PARA RESPOSTA INTELIGENTE
+                        resposta = self.chamar_ferramenta(ferramenta, args)
+                        # Enriquecer com link do PDF (agora temos o ID correto)
+                        resposta = self._enriquecer_resposta_requerimento(resposta, ferramenta, args)
+
+                        # Se conseguiu ID e é declaração, adicionar links diretos na resposta
+                        if requerimento_id and servico == "declaracao":
+                            resposta += f"\n\n **Links diretos:**"
+                            resposta += f"\n Baixar PDF: http://localhost:5000/api/requerimentos/{requerimento_id}/pdf"
+                            resposta += f"\n Visualizar: http://localhost:5000/api/requerimentos/{requerimento_id}/visualizar-pdf"
+                            resposta += f"\n Portal: http://localhost:5000/portal"
+                    else:
+                        mensagens_sucesso = {
+                            "declaracao": f"Perfeito!  Vou gerar sua declaração {f'de {subtipo}' if subtipo else ''}.\n\nSeu documento foi processado!",
+                            "boleto": "Perfeito!  Vou solicitar segunda via do boleto.\n\nSua solicitação foi processada!",
+                            "transferencia": "Perfeito!  Vou processar sua transferência.\n\nSua solicitação foi recebida!",
+                            "trancamento": "Perfeito!  Vou processar seu trancamento.\n\nSua solicitação foi processada!",
+                            "diploma": "Perfeito!  Vou solicitar segunda via do diploma.\n\nSua solicitação foi processada!",
+                            "endereco": "Perfeito!  Vou atualizar seu endereço.\n\nSeus dados foram atualizados!",
+                            "certificado": "Perfeito!  Vou solicitar o certificado.\n\nSua solicitação foi processada!"
+                        }
+                        resposta = mensagens_sucesso.get(servico, "Perfeito!  Sua solicitação foi processada com sucesso!")
+
+                    self.acao_pendente = None
+                    return resposta
+                elif self._negar_acao_pendente(pergunta_sem_acento):
+                    self.acao_pendente = None
+                    return "Tudo bem! Se precisar depois, é só me chamar. "
+                else:
+                    self.acao_pendente = None
+                    decisao = self.consultar_llm(pergunta)
+
+            else:
+                # Ação pendente padrão
+                if self._confirmar_acao_pendente(pergunta_sem_acento):
+                    decisao = self.acao_pendente
+                    self.acao_pendente = None
+                elif self._negar_acao_pendente(pergunta_sem_acento):
+                    self.acao_pendente = None
+                    decisao = {"acao": "conversa", "resposta": "Tudo bem. Se precisar de algo, estou aqui."}
+                else:
+                    self.acao_pendente = None
+                    decisao = self.consultar_llm(pergunta)
+
+                    # Para confissoes, pedir confirmacao antes de executar requerimento
+                    if self._texto_confessional(pergunta_sem_acento) and decisao.get("acao") == "ferramenta" and decisao.get("ferramenta") == "criar_requerimento":
+                        self.acao_pendente = decisao
+                        decisao = self._montar_confirmacao_acao(decisao)
+        else:
+            # Verificar se há interesse em matéria ANTES de consultar LLM
+            resultado_interesse = self._processar_interesse_em_materia(pergunta)
+
+            if resultado_interesse:
+                # Há interesse em matéria - usar a resposta processada
+                decisao = resultado_interesse
+            else:
+                # Verificar se há necessidade de serviço (declaração, boleto, etc)
+                resultado_necessidade = self._processar_necessidade_aluno(pergunta)
+
+                if resultado_necessidade:
+                    # Há necessidade de serviço - usar a resposta processada
+                    decisao = resultado_necessidade
+                else:
+                    # Não há interesse ou necessidade específica - consultar LLM normalmente
+                    decisao = self.consultar_llm(pergunta)
+
+                    # Para confissoes, pedir confirmacao antes de executar requerimento
+                    if self._texto_confessional(pergunta_sem_acento) and decisao.get("acao") == "ferramenta" and decisao.get("ferramenta") == "criar_requerimento":
+                        self.acao_pendente = decisao
+                        decisao = self._montar_confirmacao_acao(decisao)
+
+        if decisao.get("acao") == "ferramenta":
+            ferramenta = decisao.get("ferramenta")
+            args = decisao.get("argumentos", {})
+
+            if ferramenta:
+                resposta = self._chamar_ferramenta_decidida(ferramenta, args)
+                # Enriquecer resposta com informações de requerimento
+                resposta = self._enriquecer_resposta_requerimento(resposta, ferramenta, args)
+            else:
+                resposta = "Não identifiquei a ferramenta"
+        else:
+            resposta = decisao.get("resposta", "OK")
+
+        # Integrar oportunidades na resposta
+        resposta = self._integrar_oportunidades_na_resposta(resposta, pergunta)
+
+        return resposta
+
     def executar(self):
         """Loop principal"""
         if not self.iniciar():
@@ -1891,144 +1775,10 @@ Regras:
                 if not pergunta:
                     continue
 
-                pergunta_sem_acento = self._normalizar_texto(pergunta)
-
-                # Processar fluxo de cadastro se estiver em andamento
-                if self.dados_cadastro:
-                    resultado = self._processar_resposta_cadastro(pergunta)
-                    if resultado:
-                        print(f" Assistente: {resultado['resposta']}")
-                        time.sleep(0.5)
-                        continue
-
-                # Confirmar ou cancelar acao pendente
-                if self.acao_pendente:
-                    if self.acao_pendente.get("tipo") == "adicionar_materia_interesse":
-                        # Ação pendente especial para interesse em matéria
-                        if self._confirmar_acao_pendente(pergunta_sem_acento):
-                            # Confirmar adição de matéria
-                            resposta = f"Perfeito!  Vou abrir um requerimento para adicionar {self.acao_pendente.get('materia')} à sua grade.\n\n"
-                            resposta += "Seu requerimento foi processado com sucesso!"
-                            self.acao_pendente = None
-                            print(f" Assistente: {resposta}")
-                            time.sleep(0.5)
-                            continue
-                        elif self._negar_acao_pendente(pergunta_sem_acento):
-                            self.acao_pendente = None
-                            print(f" Assistente: Tudo bem! Se mudar de ideia, é só me chamar. ")
-                            time.sleep(0.5)
-                            continue
-                        else:
-                            self.acao_pendente = None
-                            decisao = self.consultar_llm(pergunta)
-                    
-                    elif self.acao_pendente.get("tipo") == "servico_interesse":
-                        # Ação pendente para serviço de interesse (declaração, boleto, etc)
-                        if self._confirmar_acao_pendente(pergunta_sem_acento):
-                            # Confirmar serviço - EXECUTAR A FERRAMENTA
-                            servico = self.acao_pendente.get('servico')
-                            subtipo = self.acao_pendente.get('subtipo')
-                            
-                            # Extrair argumentos da ação pendente
-                            ferramenta = self.acao_pendente.get('decisao', {}).get('ferramenta')
-                            args = self.acao_pendente.get('decisao', {}).get('argumentos', {})
-                            
-                            if ferramenta == "criar_requerimento":
-                                # CRIAR REQUERIMENTO NO BANCO PRIMEIRO
-                                requerimento_id = self._criar_requerimento_banco(servico, subtipo)
-                                
-                                # EXECUTAR A FERRAMENTA MCP PARA RESPOSTA INTELIGENTE
-                                resposta = self.chamar_ferramenta(ferramenta, args)
-                                # Enriquecer com link do PDF (agora temos o ID correto)
-                                resposta = self._enriquecer_resposta_requerimento(resposta, ferramenta, args)
-                                
-                                # Se conseguiu ID e é declaração, adicionar links diretos na resposta
-                                if requerimento_id and servico == "declaracao":
-                                    resposta += f"\n\n **Links diretos:**"
-                                    resposta += f"\n Baixar PDF: http://localhost:5000/api/requerimentos/{requerimento_id}/pdf"
-                                    resposta += f"\n Visualizar: http://localhost:5000/api/requerimentos/{requerimento_id}/visualizar-pdf"
-                                    resposta += f"\n Portal: http://localhost:5000/portal"
-                            else:
-                                mensagens_sucesso = {
-                                    "declaracao": f"Perfeito!  Vou gerar sua declaração {f'de {subtipo}' if subtipo else ''}.\n\nSeu documento foi processado!",
-                                    "boleto": "Perfeito!  Vou solicitar segunda via do boleto.\n\nSua solicitação foi processada!",
-                                    "transferencia": "Perfeito!  Vou processar sua transferência.\n\nSua solicitação foi recebida!",
-                                    "trancamento": "Perfeito!  Vou processar seu trancamento.\n\nSua solicitação foi processada!",
-                                    "diploma": "Perfeito!  Vou solicitar segunda via do diploma.\n\nSua solicitação foi processada!",
-                                    "endereco": "Perfeito!  Vou atualizar seu endereço.\n\nSeus dados foram atualizados!",
-                                    "certificado": "Perfeito!  Vou solicitar o certificado.\n\nSua solicitação foi processada!"
-                                }
-                                resposta = mensagens_sucesso.get(servico, "Perfeito!  Sua solicitação foi processada com sucesso!")
-                            
-                            self.acao_pendente = None
-                            print(f" Assistente: {resposta}")
-                            time.sleep(0.5)
-                            continue
-                        elif self._negar_acao_pendente(pergunta_sem_acento):
-                            self.acao_pendente = None
-                            print(f" Assistente: Tudo bem! Se precisar depois, é só me chamar. ")
-                            time.sleep(0.5)
-                            continue
-                        else:
-                            self.acao_pendente = None
-                            decisao = self.consultar_llm(pergunta)
-                    
-                    else:
-                        # Ação pendente padrão
-                        if self._confirmar_acao_pendente(pergunta_sem_acento):
-                            decisao = self.acao_pendente
-                            self.acao_pendente = None
-                        elif self._negar_acao_pendente(pergunta_sem_acento):
-                            self.acao_pendente = None
-                            decisao = {"acao": "conversa", "resposta": "Tudo bem. Se precisar de algo, estou aqui."}
-                        else:
-                            self.acao_pendente = None
-                            decisao = self.consultar_llm(pergunta)
-
-                            # Para confissoes, pedir confirmacao antes de executar requerimento
-                            if self._texto_confessional(pergunta_sem_acento) and decisao.get("acao") == "ferramenta" and decisao.get("ferramenta") == "criar_requerimento":
-                                self.acao_pendente = decisao
-                                decisao = self._montar_confirmacao_acao(decisao)
-                else:
-                    # Verificar se há interesse em matéria ANTES de consultar LLM
-                    resultado_interesse = self._processar_interesse_em_materia(pergunta)
-                    
-                    if resultado_interesse:
-                        # Há interesse em matéria - usar a resposta processada
-                        decisao = resultado_interesse
-                    else:
-                        # Verificar se há necessidade de serviço (declaração, boleto, etc)
-                        resultado_necessidade = self._processar_necessidade_aluno(pergunta)
-                        
-                        if resultado_necessidade:
-                            # Há necessidade de serviço - usar a resposta processada
-                            decisao = resultado_necessidade
-                        else:
-                            # Não há interesse ou necessidade específica - consultar LLM normalmente
-                            decisao = self.consultar_llm(pergunta)
-
-                            # Para confissoes, pedir confirmacao antes de executar requerimento
-                            if self._texto_confessional(pergunta_sem_acento) and decisao.get("acao") == "ferramenta" and decisao.get("ferramenta") == "criar_requerimento":
-                                self.acao_pendente = decisao
-                                decisao = self._montar_confirmacao_acao(decisao)
-                
-                if decisao.get("acao") == "ferramenta":
-                    ferramenta = decisao.get("ferramenta")
-                    args = decisao.get("argumentos", {})
-                    
-                    if ferramenta:
-                        resposta = self.chamar_ferramenta(ferramenta, args)
-                        # Enriquecer resposta com informações de requerimento
-                        resposta = self._enriquecer_resposta_requerimento(resposta, ferramenta, args)
-                    else:
-                        resposta = "Não identifiquei a ferramenta"
-                else:
-                    resposta = decisao.get("resposta", "OK")
-                
-                # Integrar oportunidades na resposta
-                resposta = self._integrar_oportunidades_na_resposta(resposta, pergunta)
-                
-                print(f" Assistente: {resposta}")
+                print(" Assistente: ", end="", flush=True)
+                for fragmento in self.processar_mensagem_stream(pergunta):
+                    print(fragmento, end="", flush=True)
+                print()
                 
                 # Pequena pausa para não sobrecarregar
                 time.sleep(0.5)
@@ -2083,9 +1833,7 @@ Regras:
 
     def _normalizar_texto(self, texto):
         """Normaliza texto removendo acentos e convertendo para minusculas"""
-        texto_normalizado = unicodedata.normalize("NFD", texto)
-        texto_sem_acento = "".join(ch for ch in texto_normalizado if unicodedata.category(ch) != "Mn")
-        return texto_sem_acento.lower()
+        return normalizar_texto(texto)
 
     def _descricao_requerimento(self, decisao):
         """Gera descricao curta do requerimento para confirmacao"""
@@ -2153,6 +1901,13 @@ def main():
         import traceback
         traceback.print_exc()
         input("\nPressione ENTER para sair...")
+    finally:
+        logger.info("Latência HTTP por endpoint: %s", json.dumps(agente.http.metricas(), ensure_ascii=False))
+        logger.info("Cache do LLM: %s", json.dumps(agente.cache_llm.metricas(), ensure_ascii=False))
+        logger.info("Especulação de ferramentas: %s", json.dumps(agente.especulacao.metricas(), ensure_ascii=False))
+        agente.cache_llm.salvar()
+        agente.especulacao.fechar()
+        agente.http.fechar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
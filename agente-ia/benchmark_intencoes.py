@@ -0,0 +1,138 @@
+"""
+Benchmark do classificador de intenções
+
+Mede o tempo de análise de cada pergunta do corpus (intenção, necessidade,
+oportunidades e flag acadêmica) e, quando recebe uma versão anterior do
+agente, compara tempo e decisões com a cascata de palavras-chave dela.
+
+Uso:
+    python benchmark_intencoes.py
+    git show <revisao>:agente-ia/agente_ia_inteligente.py > /tmp/agente_referencia.py
+    python benchmark_intencoes.py --referencia /tmp/agente_referencia.py
+"""
+import argparse
+import importlib.util
+import logging
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import agente_ia_inteligente  # noqa: E402
+from cliente_http import ClienteHTTP  # noqa: E402
+from estado_sessao import EstadoSessao  # noqa: E402
+
+# Perguntas reais (menu de ajuda, exemplos do prompt e logs de conversa)
+CORPUS = [
+    "quem sou eu?", "meus dados", "minhas informações", "minhas matérias", "minha grade",
+    "minhas notas", "meu histórico", "meus boletos", "quanto devo?", "resumo acadêmico",
+    "declaração de matrícula", "preciso de declaracao de frequencia", "comprovante de conclusão do tcc",
+    "segunda via de boleto", "2 via do boleto de R$ 850,00", "reemitir boleto", "histórico escolar",
+    "adicionar matéria ALG-101", "remover matéria MAT-102", "ALG-101", "mat-102",
+    "trancar o semestre", "quero trancar a disciplina FIS-201", "quero trancar a matéria",
+    "solicitar transferência", "quero mudar de curso", "transferência externa para outra instituicao",
+    "quero me cadastrar", "fazer matrícula", "sou novo aqui, quero me matricular",
+    "quais cursos tem?", "me fale sobre os cursos", "curso de ADS", "cursos disponíveis",
+    "Quais cursos vocês oferecem?", "Como funciona a matrícula?", "Quanto custa o curso?",
+    "quero trocar ALG-101 por MAT-102", "trocar de disciplina", "excluir disciplina",
+    "quero me inscrever em uma matéria nova", "preciso de uma materia de estatística",
+    "atualizar meu endereço", "mudei de endereço", "segunda via do diploma", "preciso do certificado",
+    "quero desistir do curso", "cancelar matricula", "qual minha frequência?",
+    "estou com muitas faltas, minha frequencia está baixa", "minha média em cálculo",
+    "tirei nota baixa na prova", "minha nota foi excelente", "a aula de física é muito difícil",
+    "gosto muito da disciplina de algoritmos", "adorei a matéria de ALG-101",
+    "o boleto está em atraso, não posso pagar", "qual o valor da mensalidade?",
+    "existe bolsa ou auxílio estudantil?", "quando é a semana academica?", "tem palestra hoje?",
+    "quero continuar no próximo semestre", "estou muito cansado e estressado",
+    "preciso planejar minha carreira", "preciso de um documento para o estágio",
+    "oi", "olá, bom dia", "boa noite!", "e aí, tudo bem?", "como vai você?", "como você está?",
+    "obrigado!", "valeu pela ajuda", "muito obrigado", "tchau", "até logo", "você é legal",
+    "quem é você?", "o que é você?", "que horas são?", "me conte uma piada",
+    "quanto é 25 * 4?", "calcula 10 / 4", "o que você acha de python?",
+    "me fale sobre inteligencia artificial", "gosto de tecnologia", "como conciliar trabalho e estudos?",
+    "qual é a capital da França?", "está chovendo?", "não sei o que fazer, preciso de ajuda para estudar",
+    "quero pedir um requerimento", "preciso atualizar meus dados cadastrais",
+]
+
+
+def _deterministico(modulo):
+    """Desliga o Ollama e fixa secrets.choice para que as decisões sejam comparáveis"""
+    modulo.USE_OLLAMA = False
+    modulo.secrets = types.SimpleNamespace(choice=lambda opcoes: opcoes[0])
+
+
+def _agente(modulo, http):
+    agente = modulo.AgenteIAInteligente(http=http)
+    agente.ferramentas = [{"name": "listar_cursos"}]
+    if hasattr(agente, "estado"):
+        agente.estado = EstadoSessao(aluno_id=1, aluno_nome="Benchmark")
+    else:
+        agente.aluno_id = 1
+        agente.aluno_nome = "Benchmark"
+    return agente
+
+
+def _analisar(agente, pergunta):
+    """O trabalho de análise feito em um turno: decisão, serviço e oportunidades"""
+    if hasattr(agente, "_classificacao"):
+        agente._classificacao = None
+    decisao = agente._analise_inteligente(pergunta)
+    necessidade = agente._mapear_necessidade_para_requerimento(pergunta)
+    oportunidades = agente._detectar_oportunidades(pergunta)
+    return decisao, (necessidade or {}).get("tipo"), (necessidade or {}).get("subtipo"), oportunidades
+
+
+def _cronometrar(agente, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pergunta in CORPUS:
+            _analisar(agente, pergunta)
+    return (time.perf_counter() - inicio) / (repeticoes * len(CORPUS)) * 1e6
+
+
+def _carregar_referencia(caminho):
+    spec = importlib.util.spec_from_file_location("agente_referencia", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--referencia", help="agente_ia_inteligente.py de uma versão anterior")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    http = ClienteHTTP()
+    _deterministico(agente_ia_inteligente)
+    atual = _agente(agente_ia_inteligente, http)
+    tempo_atual = _cronometrar(atual, args.repeticoes)
+    print(f"Corpus: {len(CORPUS)} perguntas, {args.repeticoes} repetições")
+    print(f"Classificador:  {tempo_atual:8.1f} µs/pergunta")
+
+    if args.referencia:
+        referencia_mod = _carregar_referencia(args.referencia)
+        _deterministico(referencia_mod)
+        referencia = _agente(referencia_mod, http)
+        tempo_referencia = _cronometrar(referencia, args.repeticoes)
+        print(f"Cascata:        {tempo_referencia:8.1f} µs/pergunta")
+        print(f"Ganho:          {tempo_referencia / tempo_atual:8.1f}x")
+
+        divergentes = []
+        for pergunta in CORPUS:
+            if _analisar(atual, pergunta) != _analisar(referencia, pergunta):
+                divergentes.append(pergunta)
+        print(f"Divergências:   {len(divergentes)}")
+        for pergunta in divergentes:
+            print(f"  {pergunta!r}")
+            print(f"    cascata:       {_analisar(referencia, pergunta)[0]}")
+            print(f"    classificador: {_analisar(atual, pergunta)[0]}")
+
+    http.fechar()
+
+
+if __name__ == "__main__":
+    main()
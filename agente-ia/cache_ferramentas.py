@@ -0,0 +1,199 @@
+"""
+Cache read-through dos resultados das ferramentas MCP somente leitura
+
+Cada entrada guarda a versão das tabelas que a ferramenta consulta. As
+versões ficam na tabela versoes_tabelas do próprio banco e são incrementadas
+por quem escreve (Flask e ferramentas de escrita), então uma escrita em
+qualquer processo invalida as entradas dependentes no próximo acesso.
+"""
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("escola-mcp.cache")
+
+SQL_CRIAR_VERSOES = """
+    CREATE TABLE IF NOT EXISTS versoes_tabelas (
+        tabela VARCHAR(64) PRIMARY KEY,
+        versao INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+SQL_INCREMENTAR_VERSAO = """
+    INSERT INTO versoes_tabelas (tabela, versao) VALUES (?, 1)
+    ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1
+"""
+
+# Resultados de falha não entram no cache
+_PREFIXOS_ERRO = ("Erro", "Não foi possível")
+
+
+class VersoesTabelas:
+    """Leitura e incremento dos contadores de versão por tabela"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def garantir_tabela(self):
+        with self.pool.conexao() as conn:
+            conn.execute(SQL_CRIAR_VERSOES)
+            conn.commit()
+        self.pool.invalidar_schema()
+
+    def atuais(self, tabelas):
+        """Tupla com a versão de cada tabela, na ordem pedida"""
+        with self.pool.conexao() as conn:
+            rows = conn.execute("SELECT tabela, versao FROM versoes_tabelas").fetchall()
+        versoes = {row[0]: row[1] for row in rows}
+        return tuple(versoes.get(tabela, 0) for tabela in tabelas)
+
+    def incrementar(self, tabelas):
+        with self.pool.conexao() as conn:
+            conn.executemany(SQL_INCREMENTAR_VERSAO, [(tabela,) for tabela in tabelas])
+            conn.commit()
+
+
+class CacheFerramentas:
+    """
+    Cache TTL + LRU limitado por memória.
+
+    Args:
+        versoes: VersoesTabelas usada para validar as entradas
+        ttl: segundos de validade de uma entrada
+        max_bytes: memória máxima estimada ocupada pelas entradas
+    """
+
+    def __init__(self, versoes, ttl=30.0, max_bytes=16 * 1024 * 1024, relogio=time.monotonic):
+        self.versoes = versoes
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # chave -> (valor, versoes, expira_em, tamanho)
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expiradas": 0,
+            "invalidadas": 0,
+        }
+
+    # ------------------------------------------------------------ decoradores
+
+    def cachear(self, *tabelas):
+        """Decora uma ferramenta somente leitura que depende de tabelas"""
+        def decorador(func):
+            assinatura = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                chave = self._chave(func.__name__, assinatura, args, kwargs)
+                try:
+                    versoes = self.versoes.atuais(tabelas)
+                except Exception as e:
+                    logger.warning(f"Cache ignorado para {func.__name__}: {e}")
+                    return func(*args, **kwargs)
+
+                encontrado, valor = self._obter(chave, versoes)
+                if encontrado:
+                    return valor
+
+                valor = func(*args, **kwargs)
+                if self._cacheavel(valor):
+                    # Versões lidas antes da execução: uma escrita concorrente
+                    # deixa a entrada já desatualizada, nunca o contrário
+                    self._guardar(chave, valor, versoes)
+                return valor
+            return wrapper
+        return decorador
+
+    def invalida(self, *tabelas):
+        """Decora uma ferramenta de escrita; incrementa as versões ao terminar"""
+        def decorador(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    try:
+                        self.versoes.incrementar(tabelas)
+                    except Exception as e:
+                        logger.error(f"Falha ao invalidar cache de {tabelas}: {e}")
+                        self.limpar()
+            return wrapper
+        return decorador
+
+    # ---------------------------------------------------------------- internos
+
+    @staticmethod
+    def _chave(nome, assinatura, args, kwargs):
+        argumentos = assinatura.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        return nome, json.dumps(argumentos.arguments, sort_keys=True, default=str)
+
+    @staticmethod
+    def _cacheavel(valor):
+        return isinstance(valor, str) and not valor.lstrip().startswith(_PREFIXOS_ERRO)
+
+    def _remover(self, chave):
+        _, _, _, tamanho = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def _obter(self, chave, versoes):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                valor, versoes_entrada, expira_em, _ = entrada
+                if versoes_entrada != versoes:
+                    self._stats["invalidadas"] += 1
+                    self._remover(chave)
+                elif expira_em <= self._relogio():
+                    self._stats["expiradas"] += 1
+                    self._remover(chave)
+                else:
+                    self._entradas.move_to_end(chave)
+                    self._stats["hits"] += 1
+                    return True, valor
+            self._stats["misses"] += 1
+            return False, None
+
+    def _guardar(self, chave, valor, versoes):
+        tamanho = sys.getsizeof(valor) + sys.getsizeof(chave[1])
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (valor, versoes, self._relogio() + self.ttl, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                antiga = next(iter(self._entradas))
+                self._remover(antiga)
+                self._stats["evictions"] += 1
+
+    # ------------------------------------------------------------------ gestão
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def metricas(self):
+        """Contadores de hit/miss/eviction (exposto em /health)"""
+        with self._lock:
+            dados = dict(self._stats)
+            dados.update({
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            })
+        consultas = dados["hits"] + dados["misses"]
+        dados["taxa_acerto"] = round(dados["hits"] / consultas, 3) if consultas else 0.0
+        return dados
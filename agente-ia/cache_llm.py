@@ -0,0 +1,234 @@
+"""
+Cache de respostas do LLM (Ollama) em duas camadas
+
+1. Exata: pergunta normalizada dentro do mesmo escopo (tipo de consulta,
+   estado de login e conjunto de ferramentas, que é o que muda o prompt).
+2. Aproximada: assinatura de trigramas de caracteres da pergunta e
+   similaridade de Jaccard acima de um limiar, buscada por índice invertido.
+   Só casa perguntas com os mesmos números/códigos (ALG-101, R$ 850,00) e a
+   mesma negação, para que "trancar ALG-101" não reaproveite "trancar MAT-102".
+
+As entradas ficam num OrderedDict em ordem LRU e são gravadas em JSON
+(escrita atômica) a cada N inserções e no encerramento.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from classificador_intencoes import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = Path(__file__).resolve().parent / "cache_llm.json"
+VERSAO_ARQUIVO = 1
+
+_PADRAO_PONTUACAO = re.compile(r"[^\w\s-]")
+_NEGACOES = frozenset({"nao", "nem", "nunca", "jamais"})
+
+
+def normalizar_pergunta(pergunta):
+    """Minúsculas, sem acento, sem pontuação e com espaços simples"""
+    return " ".join(_PADRAO_PONTUACAO.sub(" ", normalizar_texto(pergunta)).split())
+
+
+def trigramas(texto):
+    """Trigramas de caracteres de cada palavra, com bordas marcadas"""
+    grams = set()
+    for palavra in texto.split():
+        palavra = f" {palavra} "
+        grams.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return frozenset(grams)
+
+
+def termos_fixos(texto):
+    """Palavras que precisam ser iguais para reaproveitar uma resposta"""
+    return frozenset(p for p in texto.split() if p in _NEGACOES or any(ch.isdigit() for ch in p))
+
+
+def escopo_ferramentas(ferramentas):
+    """Identificador curto do conjunto de ferramentas anunciado no prompt"""
+    conteudo = json.dumps(
+        sorted((f.get("name", ""), f.get("description", "")) for f in ferramentas or []),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:12]
+
+
+class CacheRespostasLLM:
+    """
+    Args:
+        caminho: arquivo JSON de persistência (None = só memória)
+        max_entradas: limite do LRU
+        limiar: similaridade mínima (Jaccard de trigramas) da camada aproximada
+        salvar_a_cada: inserções entre gravações automáticas
+    """
+
+    def __init__(self, caminho=None, max_entradas=512, limiar=0.85, salvar_a_cada=20):
+        self.caminho = Path(caminho) if caminho else None
+        self.max_entradas = max_entradas
+        self.limiar = limiar
+        self.salvar_a_cada = salvar_a_cada
+        self._entradas = OrderedDict()  # (escopo, texto) -> (resposta, trigramas, fixos)
+        self._indice = {}  # escopo -> trigrama -> set(texto)
+        self._lock = threading.Lock()
+        self._alteracoes = 0
+        self._stats = {
+            "hits_exatos": 0,
+            "hits_aproximados": 0,
+            "misses": 0,
+            "evictions": 0,
+            "gravacoes": 0,
+        }
+        self._carregar()
+
+    @classmethod
+    def do_ambiente(cls):
+        """Configuração por AGENTE_CACHE_LLM (caminho; vazio = só memória), _MAX e _LIMIAR"""
+        caminho = os.getenv("AGENTE_CACHE_LLM", str(CAMINHO_PADRAO))
+        return cls(
+            caminho=caminho or None,
+            max_entradas=int(os.getenv("AGENTE_CACHE_LLM_MAX", "512")),
+            limiar=float(os.getenv("AGENTE_CACHE_LLM_LIMIAR", "0.85")),
+        )
+
+    # ------------------------------------------------------------ consulta
+
+    def obter(self, escopo, pergunta):
+        """Resposta guardada para a pergunta (cópia) ou None"""
+        texto = normalizar_pergunta(pergunta)
+        with self._lock:
+            chave = (escopo, texto)
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self._stats["hits_exatos"] += 1
+                return copy.deepcopy(self._entradas[chave][0])
+
+            chave = self._mais_parecida(escopo, texto)
+            if chave is not None:
+                self._entradas.move_to_end(chave)
+                self._stats["hits_aproximados"] += 1
+                return copy.deepcopy(self._entradas[chave][0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def _mais_parecida(self, escopo, texto):
+        indice = self._indice.get(escopo)
+        grams = trigramas(texto)
+        if not indice or not grams:
+            return None
+
+        comuns = Counter()
+        for gram in grams:
+            comuns.update(indice.get(gram, ()))
+
+        fixos = termos_fixos(texto)
+        melhor, melhor_sim = None, self.limiar
+        for candidato, intersecao in comuns.items():
+            _, grams_candidato, fixos_candidato = self._entradas[(escopo, candidato)]
+            similaridade = intersecao / (len(grams) + len(grams_candidato) - intersecao)
+            if similaridade >= melhor_sim and fixos_candidato == fixos:
+                melhor, melhor_sim = candidato, similaridade
+        return (escopo, melhor) if melhor is not None else None
+
+    # ------------------------------------------------------------ escrita
+
+    def guardar(self, escopo, pergunta, resposta):
+        """Guarda a resposta; retorna a própria resposta para encadear no return"""
+        texto = normalizar_pergunta(pergunta)
+        if not texto:
+            return resposta
+        with self._lock:
+            self._inserir(escopo, texto, copy.deepcopy(resposta))
+            self._alteracoes += 1
+            salvar = self.caminho is not None and self._alteracoes >= self.salvar_a_cada
+        if salvar:
+            self.salvar()
+        return resposta
+
+    def _inserir(self, escopo, texto, resposta):
+        chave = (escopo, texto)
+        if chave in self._entradas:
+            self._remover(chave)
+        grams = trigramas(texto)
+        self._entradas[chave] = (resposta, grams, termos_fixos(texto))
+        indice = self._indice.setdefault(escopo, {})
+        for gram in grams:
+            indice.setdefault(gram, set()).add(texto)
+
+        while len(self._entradas) > self.max_entradas:
+            self._remover(next(iter(self._entradas)))
+            self._stats["evictions"] += 1
+
+    def _remover(self, chave):
+        escopo, texto = chave
+        _, grams, _ = self._entradas.pop(chave)
+        indice = self._indice.get(escopo, {})
+        for gram in grams:
+            textos = indice.get(gram)
+            if textos is not None:
+                textos.discard(texto)
+                if not textos:
+                    del indice[gram]
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._indice.clear()
+            self._alteracoes += 1
+
+    # ------------------------------------------------------------ disco
+
+    def _carregar(self):
+        if self.caminho is None or not self.caminho.exists():
+            return
+        try:
+            dados = json.loads(self.caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Cache do LLM ignorado (%s): %s", self.caminho, exc)
+            return
+        if dados.get("versao") != VERSAO_ARQUIVO:
+            return
+        for entrada in dados.get("entradas", []):
+            self._inserir(entrada["escopo"], entrada["texto"], entrada["resposta"])
+
+    def salvar(self):
+        """Grava as entradas (da menos para a mais recente) se houve alteração"""
+        if self.caminho is None:
+            return
+        with self._lock:
+            if not self._alteracoes:
+                return
+            dados = {
+                "versao": VERSAO_ARQUIVO,
+                "entradas": [
+                    {"escopo": escopo, "texto": texto, "resposta": resposta}
+                    for (escopo, texto), (resposta, _, _) in self._entradas.items()
+                ],
+            }
+            self._alteracoes = 0
+            self._stats["gravacoes"] += 1
+
+        temporario = self.caminho.with_suffix(self.caminho.suffix + ".tmp")
+        try:
+            temporario.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+            os.replace(temporario, self.caminho)
+        except OSError as exc:
+            logger.warning("Não foi possível gravar o cache do LLM em %s: %s", self.caminho, exc)
+
+    # ------------------------------------------------------------ métricas
+
+    def metricas(self):
+        with self._lock:
+            dados = dict(self._stats)
+            dados["entradas"] = len(self._entradas)
+        consultas = dados["hits_exatos"] + dados["hits_aproximados"] + dados["misses"]
+        acertos = dados["hits_exatos"] + dados["hits_aproximados"]
+        dados["taxa_acerto"] = round(acertos / consultas, 4) if consultas else 0.0
+        return dados
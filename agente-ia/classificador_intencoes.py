@@ -0,0 +1,663 @@
+"""
+Classificador de intenções do agente
+
+As regras que antes eram uma cascata de any(palavra in texto) espalhada por
+_analise_inteligente, _mapear_necessidade_para_requerimento,
+_detectar_oportunidades e _resposta_contextualizada_geral ficam aqui em
+tabelas declarativas, na mesma ordem de prioridade. Todos os termos viram um
+único autômato Aho–Corasick montado na importação; cada mensagem é
+normalizada uma vez, percorrida uma vez por variante (minúsculas e sem
+acento) e as regras passam a ser testes de pertinência em conjuntos.
+
+A semântica é a mesma da cascata: um termo "casa" quando é substring do
+texto (inclusive dentro de outra palavra, como "oi" em "noite").
+"""
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+
+LOWER = "lower"
+SEM_ACENTO = "sem_acento"
+
+MENSAGEM_LOGIN = (
+    "Para {}, você precisa fazer login primeiro. "
+    "Use o menu inicial e escolha a opção [1] Fazer login."
+)
+
+# ============ PADRÕES (compilados uma vez) ============
+
+PADRAO_CODIGO_ISOLADO = re.compile(r'^[A-Z]{3}-\d{3}$', re.IGNORECASE)
+PADRAO_CODIGO_MATERIA = re.compile(r'\b([A-Z]{3}-\d{3})\b', re.IGNORECASE)
+PADRAO_CODIGO_CURSO = re.compile(r'\bcurso(?:s)?\s+(?:do|da|de)?\s*([A-Z]{2,6}(?:-\d{1,3})?)\b', re.IGNORECASE)
+PADRAO_VALOR = re.compile(r'r?\$?\s*(\d+[.,]\d{2})', re.IGNORECASE)
+PADRAO_OPERACAO = re.compile(r'(\d+)\s*[\+\-\*\/]\s*(\d+)')
+
+
+def normalizar_texto(texto):
+    """Remove acentos e converte para minúsculas"""
+    texto_normalizado = unicodedata.normalize("NFD", texto)
+    return "".join(ch for ch in texto_normalizado if unicodedata.category(ch) != "Mn").lower()
+
+
+# ============ DECISÕES ============
+
+def _ferramenta(nome, argumentos=None):
+    def decidir(slots, aluno_id):
+        return {"acao": "ferramenta", "ferramenta": nome, "argumentos": dict(argumentos or {})}
+    return decidir
+
+
+def _requerimento(tipo, **kwargs):
+    def decidir(slots, aluno_id):
+        return {"acao": "ferramenta", "ferramenta": "criar_requerimento",
+                "argumentos": {"tipo": tipo, "kwargs": dict(kwargs)}}
+    return decidir
+
+
+def _conversa(resposta):
+    def decidir(slots, aluno_id):
+        return {"acao": "conversa", "resposta": resposta}
+    return decidir
+
+
+def _decidir_codigo_isolado(slots, aluno_id):
+    return _requerimento("adicao_materia", codigo_materia=slots["codigo_isolado"])(slots, aluno_id)
+
+
+def _decidir_cursos(slots, aluno_id):
+    if slots["codigo_curso"]:
+        return _ferramenta("listar_cursos", {"codigo": slots["codigo_curso"]})(slots, aluno_id)
+    return _ferramenta("listar_cursos")(slots, aluno_id)
+
+
+def _decidir_segunda_via(slots, aluno_id):
+    return _requerimento("boleto", valor=slots["valor"] if slots["valor"] is not None else 850.00)(slots, aluno_id)
+
+
+def _decidir_trancar_materia(slots, aluno_id):
+    if slots["codigos"]:
+        return _requerimento("remocao_materia", codigo_materia=slots["codigos"][0])(slots, aluno_id)
+    return {"acao": "conversa", "resposta": "Para trancar uma matéria, qual é o código dela? (ex: ALG-101)"}
+
+
+def _decidir_adicionar(slots, aluno_id):
+    if slots["codigos"]:
+        return _requerimento("adicao_materia", codigo_materia=slots["codigos"][0])(slots, aluno_id)
+    # Sem código: lista as matérias disponíveis
+    return _ferramenta("listar_materias_disponiveis", {"aluno_id": aluno_id})(slots, aluno_id)
+
+
+def _decidir_trocar_materia(slots, aluno_id):
+    codigos = slots["codigos"]
+    if len(codigos) >= 2:
+        # Dois códigos: remover o primeiro (o segundo vem na próxima mensagem)
+        return _requerimento("remocao_materia", codigo_materia=codigos[0])(slots, aluno_id)
+    if len(codigos) == 1:
+        return _requerimento("adicao_materia", codigo_materia=codigos[0])(slots, aluno_id)
+    return {"acao": "conversa", "resposta": "Para trocar de matéria, qual é o código da matéria que deseja adicionar? (ex: ALG-101)"}
+
+
+def _decidir_remover_materia(slots, aluno_id):
+    if slots["codigos"]:
+        return _requerimento("remocao_materia", codigo_materia=slots["codigos"][0])(slots, aluno_id)
+    return {"acao": "conversa", "resposta": "Para remover uma matéria, qual é o código dela? (ex: ALG-101)"}
+
+
+# ============ TABELAS DE REGRAS ============
+#
+# Chaves de uma regra:
+#   lower / sem_acento  termos do grupo principal (basta um, em qualquer campo)
+#   tambem              (campo, termos): grupo que também precisa casar
+#   exceto              (campo, termos): grupo que não pode casar
+#   slot                slot que precisa ter sido extraído
+# A primeira regra satisfeita vence, como nos if/elif originais.
+
+INTENCOES = [
+    {"nome": "codigo_materia", "slot": "codigo_isolado",
+     "decidir": _decidir_codigo_isolado},
+    {"nome": "consultar_aluno", "lower": ["quem sou", "meus dados", "minhas informações"],
+     "login": "consultar seus dados", "decidir": _ferramenta("consultar_aluno")},
+    {"nome": "materias", "sem_acento": ["materia", "disciplina", "cadeira"],
+     "exceto": (SEM_ACENTO, ["adicionar", "mudar", "trocar", "remover", "deletar", "excluir"]),
+     "login": "consultar suas matérias",
+     "decidir": _ferramenta("perguntar_sobre_aluno", {"pergunta": "minhas matérias"})},
+    {"nome": "notas", "lower": ["notas", "média", "nota"],
+     "login": "consultar suas notas",
+     "decidir": _ferramenta("perguntar_sobre_aluno", {"pergunta": "minhas notas"})},
+    {"nome": "cursos", "sem_acento": ["curso", "cursos"],
+     "ferramenta_necessaria": "listar_cursos", "decidir": _decidir_cursos},
+    {"nome": "boletos", "lower": ["boleto", "pagamento", "financeiro", "mensalidade"],
+     "login": "consultar boletos e pagamentos",
+     "decidir": _ferramenta("perguntar_sobre_aluno", {"pergunta": "meus boletos"})},
+    {"nome": "resumo", "lower": ["resumo", "situação academica", "histórico"],
+     "login": "consultar seu resumo acadêmico", "decidir": _ferramenta("resumo_academico")},
+    {"nome": "desistencia",
+     "sem_acento": ["desistir", "desistencia", "desistência", "cancelar matricula", "cancelamento",
+                    "sair da faculdade", "abandonar curso"],
+     "login": "criar requerimentos",
+     "decidir": _requerimento("trancamento", motivo="Desistência do aluno")},
+    {"nome": "declaracao_matricula", "sem_acento": ["declaracao", "declaração", "comprovante"],
+     "tambem": (SEM_ACENTO, ["matricula", "matrícula"]),
+     "login": "solicitar declarações",
+     "decidir": _requerimento("declaracao", tipo_declaracao="matricula")},
+    {"nome": "declaracao_frequencia", "sem_acento": ["declaracao", "declaração", "comprovante"],
+     "tambem": (SEM_ACENTO, ["frequencia", "presenca", "presença"]),
+     "login": "solicitar declarações",
+     "decidir": _requerimento("declaracao", tipo_declaracao="frequencia")},
+    {"nome": "declaracao_conclusao", "sem_acento": ["declaracao", "declaração", "comprovante"],
+     "tambem": (SEM_ACENTO, ["conclusao", "conclusão", "formatura", "tcc"]),
+     "login": "solicitar declarações",
+     "decidir": _requerimento("declaracao", tipo_declaracao="conclusao")},
+    {"nome": "declaracao", "sem_acento": ["declaracao", "declaração", "comprovante"],
+     "login": "solicitar declarações",
+     "decidir": _requerimento("declaracao", tipo_declaracao="matricula")},
+    {"nome": "segunda_via", "sem_acento": ["segunda via", "2 via", "segunda_via"],
+     "lower": ["reemitir boleto", "emitirboletonov"],
+     "login": "solicitar segunda via de boleto", "decidir": _decidir_segunda_via},
+    {"nome": "trancar_materia", "sem_acento": ["trancar", "trancamento", "pausar"],
+     "tambem": (SEM_ACENTO, ["materia", "disciplina"]),
+     "login": "solicitar trancamento", "decidir": _decidir_trancar_materia},
+    {"nome": "trancamento", "sem_acento": ["trancar", "trancamento", "pausar"],
+     "login": "solicitar trancamento",
+     "decidir": _requerimento("trancamento", motivo="Solicitação do aluno")},
+    {"nome": "diploma", "sem_acento": ["diploma", "certificado", "segunda via diploma"],
+     "login": "solicitar diploma ou certificado", "decidir": _requerimento("diploma")},
+    {"nome": "transferencia", "sem_acento": ["transferencia", "transferência", "mudar de curso"],
+     "login": "solicitar transferência",
+     "decidir": _requerimento("transferencia", motivo="Solicitação do aluno")},
+    {"nome": "endereco", "sem_acento": ["endereco", "endereço", "mudar endereco", "mudar endereço"],
+     "login": "atualizar endereço", "decidir": _requerimento("endereco")},
+    {"nome": "adicionar_materia",
+     "sem_acento": ["adicionar", "matricular", "inscrever", "quero uma materia",
+                    "preciso de uma materia", "registrar materia"],
+     "login": "adicionar matérias", "decidir": _decidir_adicionar},
+    {"nome": "trocar_materia", "sem_acento": ["mudar", "trocar", "cambiar"],
+     "tambem": (SEM_ACENTO, ["materia", "disciplina"]),
+     "login": "trocar de matéria", "decidir": _decidir_trocar_materia},
+    {"nome": "remover_materia", "sem_acento": ["remover", "deletar", "excluir"],
+     "tambem": (SEM_ACENTO, ["materia", "disciplina"]),
+     "login": "remover matérias", "decidir": _decidir_remover_materia},
+    {"nome": "agradecimento", "lower": ["obrigado", "valeu", "agradeço", "brigadão", "obrigada"],
+     "decidir": _conversa("Por nada! Estou aqui para ajudar com qualquer coisa relacionada à sua vida acadêmica. ")},
+    {"nome": "saudacao", "lower": ["oi", "olá", "bom dia", "boa tarde", "boa noite", "e ai"],
+     "decidir": _conversa("Olá! Como posso ajudá-lo com sua vida acadêmica hoje?")},
+    {"nome": "frequencia", "sem_acento": ["frequencia", "frequência"],
+     "decidir": _ferramenta("perguntar_sobre_aluno", {"pergunta": "minha frequência"})},
+]
+
+# Respostas para perguntas não acadêmicas. Regras sem "respostas" (horário,
+# cálculo) são montadas pelo agente.
+CONVERSAS = [
+    {"nome": "bem_estar_como_vai", "lower": ["como vai", "como você está", "tudo bem", "e aí"],
+     "tambem": (LOWER, ["como vai", "como está"]),
+     "respostas": ["Estou ótimo, obrigado por perguntar!  E você, como está? Posso ajudá-lo em algo?"]},
+    {"nome": "bem_estar_tudo_bem", "lower": ["tudo bem"],
+     "respostas": ["Tudo certo! E com você? Como posso ajudá-lo?"]},
+    {"nome": "bem_estar", "lower": ["como vai", "como você está", "tudo bem", "e aí"],
+     "respostas": ["Tudo bem sim! Pronto para ajudar você. O que você precisa?"]},
+    {"nome": "agradecimento",
+     "lower": ["obrigado", "vlw", "valeu", "brigadão", "brigado", "muito obrigado"],
+     "respostas": [
+         "De nada! Estou sempre aqui para ajudar. ",
+         "Por nada! Se precisar novamente, é só chamar!",
+         "Fico feliz em ajudar! Há mais algo que eu possa fazer?",
+     ]},
+    {"nome": "despedida", "lower": ["tchau", "até logo", "adeus", "até mais", "falou"],
+     "respostas": ["Até logo! Volte sempre que precisar de ajuda! "]},
+    {"nome": "elogio",
+     "lower": ["obrigado", "você é legal", "você é bom", "gosto", "adorei", "perfeito", "excelente"],
+     "tambem": (LOWER, ["você", "agente", "assistente"]),
+     "respostas": ["Obrigado! Fico feliz em ajudar. Meu objetivo é tornar sua vida acadêmica mais fácil e confortável! "]},
+    {"nome": "sobre_agente", "sem_acento": ["quem", "o que", "voce", "você"],
+     "tambem": (LOWER, ["quem é", "o que é", "quem é você"]),
+     "respostas": ["Sou um assistente de IA inteligente da faculdade! Estou aqui para ajudar você com tudo relacionado à sua vida acadêmica: requerimentos, matérias, notas, boletos, declarações, e muito mais. Além disso, posso conversar sobre outros assuntos também! "]},
+    {"nome": "horario", "sem_acento": ["horas", "hora", "que horas", "qual hora", "que dia"]},
+    {"nome": "piada", "lower": ["piada", "piadas"],
+     "respostas": [
+         "Por que o livro de matemática se suicidou? Porque tinha muitos problemas! ",
+         "O que o 0 (zero) falou para o 8 (oito)? Que cinto legal! ",
+         "Qual é a comida favorita do programador? Array (aletria)! ",
+     ]},
+    {"nome": "calculo", "lower": ["quanto é", "calcular", "calcula"], "slot": "operacao"},
+    {"nome": "topico_python", "sem_acento": ["python"],
+     "respostas": ["Python é uma linguagem de programação muito popular! É usada em ciência de dados, web, automação e muito mais. Você está estudando programação?"]},
+    {"nome": "topico_ia", "sem_acento": ["inteligencia artificial"],
+     "respostas": ["Inteligência Artificial é fascinante! Estou usando um modelo de IA para conversar com você agora. É incrível como a tecnologia evolui!"]},
+    {"nome": "topico_tecnologia", "sem_acento": ["tecnologia"],
+     "respostas": ["A tecnologia é o futuro! Estamos vivendo em uma era de inovação constante. Que área da tecnologia você mais se interessa?"]},
+    {"nome": "topico_estudos", "sem_acento": ["estudos"],
+     "respostas": ["Dedicação aos estudos é fundamental! Se você tiver alguma dúvida sobre a faculdade, estou aqui para ajudar."]},
+    {"nome": "topico_trabalho", "sem_acento": ["trabalho"],
+     "respostas": ["Trabalhar e estudar ao mesmo tempo é desafiador, mas possível! Se precisar de ajuda para gerenciar seus prazos, posso tentar ajudar."]},
+]
+
+# Serviços que o aluno demonstra precisar (todas as comparações sem acento)
+NECESSIDADES = {
+    # DECLARAÇÕES
+    "declaracao": {
+        "triggers": ["preciso de declaracao", "quero declaracao", "gostaria de declaracao", "necessito declaracao",
+                     "declaracao de", "comprovante de", "preciso comprovante"],
+        "subtypes": {
+            "matricula": ["matricula", "matrícula", "inscrito"],
+            "frequencia": ["frequencia", "presença", "presenca"],
+            "conclusao": ["conclusao", "conclusão", "formatura", "tcc", "formado"]
+        },
+        "mensagem_padrao": "Posso gerar uma declaração para você. Qual tipo você precisa?",
+        "requerimento": "declaracao"
+    },
+    # BOLETO
+    "boleto": {
+        "triggers": ["boleto", "segunda via", "reemitir", "2 via", "boleto novo", "nova emissao"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de solicitar segunda via do boleto?",
+        "requerimento": "boleto"
+    },
+    # TRANSFERÊNCIA
+    "transferencia": {
+        "triggers": ["transferencia", "transferência", "mudar de curso", "trocar curso", "sair deste curso"],
+        "subtypes": {
+            "interna": ["interna", "interno"],
+            "externa": ["externa", "externo", "outra instituicao"]
+        },
+        "mensagem_padrao": "Você gostaria de fazer uma transferência? Pode ser interna ou externa.",
+        "requerimento": "transferencia"
+    },
+    # TRANCAMENTO
+    "trancamento": {
+        "triggers": ["trancar", "trancamento", "pausar", "parar", "dar um tempo"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de trancar o semestre?",
+        "requerimento": "trancamento"
+    },
+    # DIPLOMA
+    "diploma": {
+        "triggers": ["diploma", "segunda via diploma", "2 via diploma", "solicitar diploma"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de solicitar segunda via do diploma?",
+        "requerimento": "diploma"
+    },
+    # ENDEREÇO
+    "endereco": {
+        "triggers": ["endereco", "endereço", "mudar endereco", "mudar endereço", "atualizar dados"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de atualizar seu endereço?",
+        "requerimento": "endereco"
+    },
+    # CERTIFICADO
+    "certificado": {
+        "triggers": ["certificado", "certificacao", "certificação"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de solicitar um certificado?",
+        "requerimento": "certificado"
+    },
+    # CADASTRO / MATRÍCULA (NOVO ALUNO)
+    "cadastro": {
+        "triggers": ["quero me cadastrar", "fazer matricula", "fazer matrícula", "me inscrever",
+                     "quero estudar", "iniciar curso", "ser aluno", "entrar na faculdade",
+                     "ingressar", "fazer inscricao", "nova matricula", "primeiro acesso",
+                     "sou novo", "quero me matricular"],
+        "subtypes": {},
+        "mensagem_padrao": "Você gostaria de fazer matrícula como novo aluno?",
+        "requerimento": "cadastro"
+    }
+}
+
+# Próximos passos sugeridos junto com a resposta (todas sem acento; regras
+# independentes, todas as que casarem entram, na ordem da tabela)
+_GATILHOS_FINANCEIRO = ["boleto", "pagamento", "mensalidade", "financeiro", "dinheiro", "valor"]
+_GATILHOS_NOTAS = ["nota", "desempenho", "resultado", "prova"]
+_NOTAS_RUINS = ["baixa", "ruim", "problema", "nao passou", "reprovei", "falha"]
+
+OPORTUNIDADES = [
+    {"sem_acento": ["materia", "disciplina", "cadeira", "aula", "professor"],
+     "tambem": (SEM_ACENTO, ["dificil", "difícil", "complicado", "nao entendo", "não entendi", "perdido"]),
+     "oportunidade": {"tipo": "suporte", "titulo": "Dificuldade nas Aulas", "sugestoes": [
+         " Quer mudar para outra matéria com menos dificuldade?",
+         " Posso ajudar a consultar suas matérias atuais",
+         " Considere conversar com o monitor da disciplina"]}},
+    {"sem_acento": ["materia", "disciplina", "cadeira", "aula", "professor"],
+     "tambem": (SEM_ACENTO, ["gosto", "legal", "adorei", "perfeito", "bom"]),
+     "oportunidade": {"tipo": "aprendizado", "titulo": "Excelente Progresso!", "sugestoes": [
+         " Quer adicionar matérias optativas relacionadas?",
+         " Posso listar cursos complementares",
+         " Veja seu resumo acadêmico para planejamento"]}},
+    {"sem_acento": _GATILHOS_FINANCEIRO,
+     "tambem": (SEM_ACENTO, ["problema", "atraso", "nao posso"]),
+     "oportunidade": {"tipo": "financeiro_critico", "titulo": "Situação Financeira", "sugestoes": [
+         " Consulte sua situação de boletos",
+         " Você pode solicitar segunda via do boleto",
+         " Converse com o setor financeiro sobre opções de pagamento"]}},
+    {"sem_acento": _GATILHOS_FINANCEIRO,
+     "exceto": (SEM_ACENTO, ["problema", "atraso", "nao posso"]),
+     "oportunidade": {"tipo": "financeiro", "titulo": "Informações Financeiras", "sugestoes": [
+         " Quer solicitar segunda via do boleto?",
+         " Consulte seus boletos pendentes",
+         " Verifique sua situação financeira"]}},
+    {"sem_acento": _GATILHOS_NOTAS,
+     "tambem": (SEM_ACENTO, _NOTAS_RUINS),
+     "oportunidade": {"tipo": "academico_alerta", "titulo": "Atenção ao Desempenho", "sugestoes": [
+         " Verifique o seu histórico acadêmico completo",
+         " Considere reforço em matérias críticas",
+         " Converse com um orientador"]}},
+    {"sem_acento": _GATILHOS_NOTAS,
+     "tambem": (SEM_ACENTO, ["boa", "bom", "legal", "excelente", "ótimo"]),
+     "exceto": (SEM_ACENTO, _NOTAS_RUINS),
+     "oportunidade": {"tipo": "academico_positivo", "titulo": "Excelente Desempenho!", "sugestoes": [
+         " Parabéns pelo bom desempenho!",
+         " Considere desafios acadêmicos adicionais",
+         " Mantenha o ritmo e vise o melhor"]}},
+    {"sem_acento": ["frequencia", "presença", "presenca", "falta", "ausencia", "ausência"],
+     "tambem": (SEM_ACENTO, ["baixa", "problema", "ruim", "muita"]),
+     "oportunidade": {"tipo": "frequencia_alerta", "titulo": "Frequência Baixa", "sugestoes": [
+         " Verifique sua frequência atual",
+         " Solicite declaração de frequência se necessário",
+         " Converse com a coordenação sobre ausências justificadas"]}},
+    {"sem_acento": ["curso", "cursos", "programas", "especialização"],
+     "oportunidade": {"tipo": "explorar", "titulo": "Explorar Oportunidades", "sugestoes": [
+         " Consulte todos os cursos disponíveis",
+         " Veja pré-requisitos de cada disciplina",
+         " Considere mudar de curso se interessado"]}},
+    {"sem_acento": ["diploma", "certificado", "formatura", "conclusao"],
+     "oportunidade": {"tipo": "conclusao", "titulo": "Finalização de Estudos", "sugestoes": [
+         " Solicite segunda via de diploma se necessário",
+         " Verifique status da sua conclusão",
+         " Consulte o resumo acadêmico completo"]}},
+    {"sem_acento": ["transferencia", "transferência", "mudar", "sair"],
+     "oportunidade": {"tipo": "transferencia", "titulo": "Mudança de Curso", "sugestoes": [
+         " Solicite transferência interna ou externa",
+         " Converse sobre seus objetivos acadêmicos",
+         " Veja opções de outros cursos"]}},
+    {"sem_acento": ["trancar", "trancamento", "pausar", "parar", "sair"],
+     "tambem": (SEM_ACENTO, ["temporario", "temporária"]),
+     "oportunidade": {"tipo": "trancamento_temp", "titulo": "Pausa nos Estudos", "sugestoes": [
+         "⏸ Solicite trancamento de semestre",
+         " Você pode voltar após resolver seus problemas",
+         " Converse com a coordenação sobre opções"]}},
+    {"sem_acento": ["endereco", "endereço", "dados", "informacao", "informação", "mudar", "atualizar"],
+     "oportunidade": {"tipo": "dados", "titulo": "Manter Dados Atualizados", "sugestoes": [
+         " Atualize seu endereço se mudou",
+         " Mantenha seus dados pessoais em dia",
+         " Solicite atualização de cadastro se necessário"]}},
+    {"sem_acento": ["requerimento", "solicitacao", "solicitar", "pedir"],
+     "oportunidade": {"tipo": "administrativo", "titulo": "Requerimentos Disponíveis", "sugestoes": [
+         " Posso ajudar com diversos tipos de requerimentos",
+         " Especifique o que você precisa",
+         " Requerimentos processados rapidamente"]}},
+    {"sem_acento": ["problema", "dificuldade", "duvida", "dúvida", "ajuda", "help", "nao sei"],
+     "tambem": (SEM_ACENTO, ["estudar", "aprender", "entender"]),
+     "oportunidade": {"tipo": "suporte_academico", "titulo": "Apoio Acadêmico", "sugestoes": [
+         " Consulte suas matérias atuais",
+         " Considere reforço ou monitoria",
+         " Converse com um orientador"]}},
+    {"sem_acento": ["cansado", "estressado", "estressada", "cansaco", "cansaço", "pressao", "pressão", "sobrecarregado"],
+     "oportunidade": {"tipo": "bem_estar", "titulo": "Seu Bem-Estar Acadêmico", "sugestoes": [
+         " Seu bem-estar é importante!",
+         "⏸ Considere trancar semestre se necessário",
+         " Fale com a coordenação de alunos"]}},
+    {"sem_acento": ["plano", "planejamento", "futuro", "carreira", "depois", "proximos passos", "próximos"],
+     "oportunidade": {"tipo": "planejamento", "titulo": "Planejamento Acadêmico", "sugestoes": [
+         " Veja cursos disponíveis para aprimoramento",
+         " Consulte matérias optativas e eletivas",
+         " Considere especialização ou extensão"]}},
+    {"sem_acento": ["bolsa", "auxilio", "auxílio", "financiamento", "financeiro"],
+     "oportunidade": {"tipo": "financeiro_bolsa", "titulo": "Oportunidades Financeiras", "sugestoes": [
+         " Consulte bolsas e auxílios disponíveis",
+         " Veja sua situação de pagamentos",
+         " Converse com o financeiro sobre opções"]}},
+    {"sem_acento": ["evento", "palestra", "workshop", "semana academica", "congresso", "atividade"],
+     "oportunidade": {"tipo": "participacao", "titulo": "Eventos e Atividades", "sugestoes": [
+         " Participe de eventos da instituição",
+         " Amplie seu conhecimento com palestras",
+         " Conheça outros alunos e profissionais"]}},
+    {"sem_acento": ["continuar", "renovar", "próximo semestre", "proximo", "semestre que vem"],
+     "oportunidade": {"tipo": "continuidade", "titulo": "Continuação dos Estudos", "sugestoes": [
+         " Planeje disciplinas para o próximo período",
+         " Revise matérias e prepare-se antecipadamente",
+         " Defina seus objetivos para o próximo semestre"]}},
+    {"sem_acento": ["administrativo", "burocracia", "documento", "papelada", "registro"],
+     "oportunidade": {"tipo": "administrativo_geral", "titulo": "Documentação e Registros", "sugestoes": [
+         " Solicite declarações e comprovantes",
+         " Regularize sua documentação",
+         " Mantenha seus registros atualizados"]}},
+]
+
+# Perguntas acadêmicas recebem as oportunidades anexadas à resposta
+TERMOS_ACADEMICOS = [
+    "materia", "disciplina", "curso", "boleto", "nota", "frequencia",
+    "requerimento", "diploma", "transferencia", "endereco", "dados"
+]
+
+
+# ============ AUTÔMATO ============
+
+class AutomatoTermos:
+    """
+    Aho–Corasick sobre um conjunto fixo de termos.
+
+    As transições são completadas na construção (DFA), então a busca é um
+    dict.get por caractere. Cada termo ocupa um bit: mascara() devolve o OR
+    dos termos que ocorrem como substring do texto (inclusive sobrepostos),
+    o que deixa a avaliação das regras em operações AND sobre inteiros.
+    """
+
+    def __init__(self, termos):
+        self.termos = sorted({t for t in termos if t})
+        self.bits = {termo: 1 << i for i, termo in enumerate(self.termos)}
+        transicoes = [{}]
+        saidas = [0]
+        for termo in self.termos:
+            estado = 0
+            for ch in termo:
+                proximo = transicoes[estado].get(ch)
+                if proximo is None:
+                    proximo = len(transicoes)
+                    transicoes[estado][ch] = proximo
+                    transicoes.append({})
+                    saidas.append(0)
+                estado = proximo
+            saidas[estado] |= self.bits[termo]
+
+        falha = [0] * len(transicoes)
+        delta = [dict(t) for t in transicoes]
+        fila = deque(transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for ch, proximo in transicoes[estado].items():
+                falha[proximo] = delta[falha[estado]].get(ch, 0) if estado else 0
+                saidas[proximo] |= saidas[falha[proximo]]
+                fila.append(proximo)
+            if estado:
+                for ch, destino in delta[falha[estado]].items():
+                    delta[estado].setdefault(ch, destino)
+
+        self._delta = delta
+        self._saidas = saidas
+
+    def __len__(self):
+        return len(self._delta)
+
+    def mascara_de(self, termos):
+        mascara = 0
+        for termo in termos:
+            mascara |= self.bits[termo]
+        return mascara
+
+    def mascara(self, texto):
+        delta = self._delta
+        saidas = self._saidas
+        estado = 0
+        achados = 0
+        for ch in texto:
+            estado = delta[estado].get(ch, 0)
+            achados |= saidas[estado]
+        return achados
+
+    def encontrar(self, texto):
+        """Termos que ocorrem no texto"""
+        achados = self.mascara(texto)
+        return {termo for termo, bit in self.bits.items() if achados & bit}
+
+
+# ============ COMPILAÇÃO DAS TABELAS ============
+
+def _termos_da_regra(regra):
+    for campo in (LOWER, SEM_ACENTO):
+        yield from regra.get(campo, ())
+    for chave in ("tambem", "exceto"):
+        if chave in regra:
+            yield from regra[chave][1]
+
+
+def _todos_os_termos():
+    for regra in INTENCOES + CONVERSAS + OPORTUNIDADES:
+        yield from _termos_da_regra(regra)
+    for config in NECESSIDADES.values():
+        yield from config["triggers"]
+        for termos in config["subtypes"].values():
+            yield from termos
+    yield from TERMOS_ACADEMICOS
+
+
+AUTOMATO = AutomatoTermos(_todos_os_termos())
+
+
+class _Regra:
+    """Regra de uma tabela com os grupos de termos já convertidos em máscaras"""
+    __slots__ = ("dados", "lower", "sem_acento", "tambem", "exceto", "slot")
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.lower = AUTOMATO.mascara_de(dados.get(LOWER, ()))
+        self.sem_acento = AUTOMATO.mascara_de(dados.get(SEM_ACENTO, ()))
+        self.tambem = self._grupo(dados.get("tambem"))
+        self.exceto = self._grupo(dados.get("exceto"))
+        self.slot = dados.get("slot")
+
+    @staticmethod
+    def _grupo(grupo):
+        # (máscara em minúsculas, máscara sem acento): só uma delas é usada
+        if not grupo:
+            return None
+        campo, termos = grupo
+        mascara = AUTOMATO.mascara_de(termos)
+        return (mascara, 0) if campo == LOWER else (0, mascara)
+
+    def casa(self, lower, sem_acento, slots):
+        if (self.lower or self.sem_acento) and not (lower & self.lower or sem_acento & self.sem_acento):
+            return False
+        if self.tambem and not (lower & self.tambem[0] or sem_acento & self.tambem[1]):
+            return False
+        if self.exceto and (lower & self.exceto[0] or sem_acento & self.exceto[1]):
+            return False
+        return not self.slot or bool(slots[self.slot])
+
+
+def _uniao(regras):
+    mascara_lower = mascara_sem_acento = 0
+    for regra in regras:
+        mascara_lower |= regra.lower
+        mascara_sem_acento |= regra.sem_acento
+    return mascara_lower, mascara_sem_acento
+
+
+_REGRAS_INTENCOES = [_Regra(r) for r in INTENCOES]
+_REGRAS_CONVERSAS = [_Regra(r) for r in CONVERSAS]
+_REGRAS_OPORTUNIDADES = [_Regra(r) for r in OPORTUNIDADES]
+_REGRAS_NECESSIDADES = [
+    (tipo, config, AUTOMATO.mascara_de(config["triggers"]),
+     [(subtipo, AUTOMATO.mascara_de(termos)) for subtipo, termos in config["subtypes"].items()])
+    for tipo, config in NECESSIDADES.items()
+]
+_MASCARA_ACADEMICA = AUTOMATO.mascara_de(TERMOS_ACADEMICOS)
+# Todas as oportunidades têm grupo principal: sem nenhum termo dele, pula a tabela
+_UNIAO_OPORTUNIDADES = _uniao(_REGRAS_OPORTUNIDADES)
+_BIT_CURSO = AUTOMATO.bits["curso"]
+_PADRAO_DIGITO = re.compile(r'\d')
+
+INTENCOES_POR_NOME = {r["nome"]: r for r in INTENCOES}
+CONVERSAS_POR_NOME = {r["nome"]: r for r in CONVERSAS}
+
+
+# ============ CLASSIFICAÇÃO ============
+
+@dataclass
+class Classificacao:
+    """Resultado de uma passada do classificador sobre a mensagem"""
+    intencao: str = None
+    candidatas: tuple = ()  # todas as intenções que casaram, a primeira é `intencao`
+    slots: dict = field(default_factory=dict)
+    conversas: tuple = ()
+    necessidade: dict = None
+    oportunidades: list = field(default_factory=list)
+    academica: bool = False
+
+
+def extrair_slots(pergunta, lower=None):
+    """
+    Códigos de matéria/curso, valor e operação aritmética presentes no texto.
+
+    Com a máscara em minúsculas, as expressões que não têm como casar
+    (sem dígitos, sem "curso") nem são executadas.
+    """
+    slots = {"codigo_isolado": None, "codigos": [], "codigo_curso": None, "valor": None, "operacao": None}
+
+    if lower is None or lower & _BIT_CURSO:
+        codigo_curso = PADRAO_CODIGO_CURSO.search(pergunta)
+        if codigo_curso:
+            slots["codigo_curso"] = codigo_curso.group(1).upper()
+
+    if not _PADRAO_DIGITO.search(pergunta):
+        return slots
+
+    texto = pergunta.strip()
+    if PADRAO_CODIGO_ISOLADO.match(texto):
+        slots["codigo_isolado"] = texto.upper()
+    slots["codigos"] = [c.upper() for c in PADRAO_CODIGO_MATERIA.findall(pergunta)]
+    valor = PADRAO_VALOR.search(pergunta)
+    if valor:
+        slots["valor"] = float(valor.group(1).replace(',', '.'))
+    operacao = PADRAO_OPERACAO.search(pergunta)
+    if operacao:
+        slots["operacao"] = operacao.group(0)
+    return slots
+
+
+def classificar(pergunta):
+    """
+    Classifica a mensagem numa única passada do autômato.
+
+    Retorna a intenção acadêmica (ou None) e as demais que também casaram,
+    os slots extraídos, as regras de
+    conversa que casaram (em ordem de prioridade), a necessidade de serviço
+    no formato de _mapear_necessidade_para_requerimento e as oportunidades.
+    """
+    texto_lower = pergunta.lower()
+    lower = AUTOMATO.mascara(texto_lower)
+    # Sem acentos possíveis, o texto normalizado é o próprio texto em minúsculas
+    sem_acento = lower if pergunta.isascii() else AUTOMATO.mascara(normalizar_texto(pergunta))
+    slots = extrair_slots(pergunta, lower)
+
+    candidatas = tuple(r.dados["nome"] for r in _REGRAS_INTENCOES if r.casa(lower, sem_acento, slots))
+    conversas = tuple(r.dados["nome"] for r in _REGRAS_CONVERSAS if r.casa(lower, sem_acento, slots))
+
+    necessidade = None
+    for tipo, config, gatilhos, subtipos in _REGRAS_NECESSIDADES:
+        if sem_acento & gatilhos:
+            subtipo = next((nome for nome, termos in subtipos if sem_acento & termos), None)
+            necessidade = {"tipo": tipo, "config": config, "subtipo": subtipo}
+            break
+
+    oportunidades = []
+    if lower & _UNIAO_OPORTUNIDADES[0] or sem_acento & _UNIAO_OPORTUNIDADES[1]:
+        oportunidades = [r.dados["oportunidade"] for r in _REGRAS_OPORTUNIDADES if r.casa(lower, sem_acento, slots)]
+
+    return Classificacao(
+        intencao=candidatas[0] if candidatas else None,
+        candidatas=candidatas,
+        slots=slots,
+        conversas=conversas,
+        necessidade=necessidade,
+        oportunidades=oportunidades,
+        academica=bool(sem_acento & _MASCARA_ACADEMICA),
+    )
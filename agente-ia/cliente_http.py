@@ -0,0 +1,181 @@
+"""
+Cliente HTTP compartilhado do agente (MCP Server, Ollama e Flask)
+
+Uma única requests.Session mantém um pool keep-alive por host. Cada
+endpoint lógico tem timeout e número de tentativas próprios, e a latência
+de cada chamada entra num histograma por endpoint.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores (ms) dos baldes do histograma; o último é "acima de"
+BALDES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# timeout = (conexão, leitura) em segundos
+ENDPOINTS_PADRAO = {
+    "mcp": {"timeout": (3.05, 30), "tentativas": 2},
+    "mcp_health": {"timeout": (2, 2), "tentativas": 0},
+    "ollama": {"timeout": (3.05, 30), "tentativas": 1},
+    "ollama_geral": {"timeout": (3.05, 20), "tentativas": 1},
+    "flask": {"timeout": (3.05, 10), "tentativas": 2},
+}
+
+# Respostas que valem nova tentativa em métodos idempotentes
+STATUS_REPETIR = frozenset({502, 503, 504})
+METODOS_IDEMPOTENTES = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class HistogramaLatencia:
+    """Contagem de chamadas por faixa de latência"""
+
+    def __init__(self, baldes=BALDES_MS):
+        self.baldes = tuple(baldes)
+        self.contagens = [0] * (len(self.baldes) + 1)
+        self.total = 0
+        self.soma_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms):
+        self.contagens[bisect.bisect_left(self.baldes, ms)] += 1
+        self.total += 1
+        self.soma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p):
+        """Limite superior do balde que contém o percentil p (0-100)"""
+        if not self.total:
+            return 0.0
+        alvo = self.total * p / 100
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                if indice < len(self.baldes):
+                    return min(float(self.baldes[indice]), round(self.max_ms, 2))
+                return round(self.max_ms, 2)
+        return self.max_ms
+
+    def resumo(self):
+        rotulos = [f"<={b}ms" for b in self.baldes] + [f">{self.baldes[-1]}ms"]
+        return {
+            "chamadas": self.total,
+            "media_ms": round(self.soma_ms / self.total, 2) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentil(50),
+            "p95_ms": self.percentil(95),
+            "p99_ms": self.percentil(99),
+            "baldes": {r: c for r, c in zip(rotulos, self.contagens) if c},
+        }
+
+
+def _falhou_ao_conectar(erro):
+    """True quando a requisição nem chegou a ser enviada (seguro repetir)"""
+    if isinstance(erro, requests.exceptions.ConnectTimeout):
+        return True
+    motivo = getattr(erro.args[0], "reason", None) if erro.args else None
+    return isinstance(motivo, NewConnectionError)
+
+
+class ClienteHTTP:
+    """
+    Sessão HTTP com pool por host, tentativas com backoff e métricas.
+
+    Args:
+        endpoints: dict nome -> {"timeout": (conexao, leitura), "tentativas": n}
+        backoff: espera base (s) entre tentativas, dobrada a cada nova tentativa
+        conexoes_por_host: tamanho do pool keep-alive de cada host
+    """
+
+    def __init__(self, endpoints=None, backoff=None, conexoes_por_host=None):
+        self.endpoints = {nome: dict(cfg) for nome, cfg in ENDPOINTS_PADRAO.items()}
+        for nome, cfg in (endpoints or {}).items():
+            self.endpoints.setdefault(nome, {}).update(cfg)
+
+        self.backoff = float(os.getenv("AGENTE_HTTP_BACKOFF", "0.3")) if backoff is None else backoff
+        if conexoes_por_host is None:
+            conexoes_por_host = int(os.getenv("AGENTE_HTTP_POOL", "4"))
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=8, pool_maxsize=conexoes_por_host)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+
+    def _config(self, endpoint):
+        cfg = self.endpoints.get(endpoint)
+        if cfg is None:
+            cfg = self.endpoints[endpoint] = {"timeout": (3.05, 30), "tentativas": 0}
+        return cfg
+
+    def _registrar(self, endpoint, ms, tentativas, erro):
+        with self._lock:
+            histograma = self._histogramas.get(endpoint)
+            if histograma is None:
+                histograma = self._histogramas[endpoint] = HistogramaLatencia()
+                self._contadores[endpoint] = {"erros": 0, "repeticoes": 0}
+            histograma.registrar(ms)
+            self._contadores[endpoint]["repeticoes"] += tentativas
+            if erro:
+                self._contadores[endpoint]["erros"] += 1
+
+    def requisitar(self, metodo, endpoint, url, **kwargs):
+        """Faz a requisição pelo pool, repetindo falhas seguras com backoff"""
+        cfg = self._config(endpoint)
+        kwargs.setdefault("timeout", cfg["timeout"])
+        metodo = metodo.upper()
+        idempotente = metodo in METODOS_IDEMPOTENTES
+        max_tentativas = cfg.get("tentativas", 0)
+
+        inicio = time.perf_counter()
+        tentativa = 0
+        erro = True
+        try:
+            while True:
+                try:
+                    response = self.sessao.request(metodo, url, **kwargs)
+                except requests.exceptions.ConnectionError as e:
+                    pode_repetir = idempotente or _falhou_ao_conectar(e)
+                    if tentativa >= max_tentativas or not pode_repetir:
+                        raise
+                else:
+                    if (response.status_code not in STATUS_REPETIR or not idempotente
+                            or tentativa >= max_tentativas):
+                        erro = response.status_code >= 500
+                        return response
+                    response.close()
+
+                time.sleep(self.backoff * (2 ** tentativa))
+                tentativa += 1
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self._registrar(endpoint, ms, tentativa, erro)
+            logger.debug("HTTP %s %s [%s] %.1fms", metodo, url, endpoint, ms)
+
+    def get(self, endpoint, url, **kwargs):
+        return self.requisitar("GET", endpoint, url, **kwargs)
+
+    def post(self, endpoint, url, **kwargs):
+        return self.requisitar("POST", endpoint, url, **kwargs)
+
+    def metricas(self):
+        """Histograma de latência e contadores por endpoint"""
+        with self._lock:
+            return {
+                nome: {**histograma.resumo(), **self._contadores[nome]}
+                for nome, histograma in self._histogramas.items()
+            }
+
+    def fechar(self):
+        self.sessao.close()
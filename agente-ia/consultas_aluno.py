@@ -0,0 +1,139 @@
+"""
+Consultas SQL por aluno do servidor MCP e do DatabaseAdapter
+
+Ficam aqui, sem nada que rode na importação, para que
+tests/unit/test_planos_consulta.py verifique (EXPLAIN QUERY PLAN) as
+mesmas strings que os dois executam. As do servidor usam parâmetros
+posicionais (sqlite3, "?"); as do adapter, nomeados (text(), ":aluno_id").
+"""
+
+# ============ SERVIDOR MCP (sqlite3) ============
+
+# consultar_aluno, sem linha em resumo_aluno
+CONTAGEM_MATERIAS = """
+    SELECT COUNT(*) as total,
+           SUM(CASE WHEN mm.status = 'cursando' THEN 1 ELSE 0 END) as cursando
+    FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ?
+"""
+
+TOTAL_PENDENTE = """
+    SELECT COUNT(*) as pendentes,
+           COALESCE(SUM(valor), 0) as total_devendo
+    FROM pagamentos
+    WHERE aluno_id = ? AND status IN ('pendente', 'atrasado')
+"""
+
+# listar_materias_disponiveis: as que o aluno já cursa
+IDS_MATERIAS_DO_ALUNO = """
+    SELECT m.id FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ?
+"""
+
+# perguntar_sobre_aluno
+MATERIAS_DO_ALUNO = """
+    SELECT m.nome, m.codigo, mm.status
+    FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ?
+"""
+
+NOTAS_DO_ALUNO = """
+    SELECT m.nome, mm.nota_final, mm.status
+    FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ? AND mm.nota_final IS NOT NULL
+"""
+
+PAGAMENTOS_PENDENTES = """
+    SELECT * FROM pagamentos
+    WHERE aluno_id = ? AND status IN ('pendente', 'atrasado')
+    ORDER BY data_vencimento
+"""
+
+FREQUENCIA_DO_ALUNO = """
+    SELECT m.nome, mm.frequencia
+    FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ? AND mm.frequencia IS NOT NULL
+"""
+
+# resumo_academico, sem linha em resumo_aluno
+ESTATISTICAS_MATERIAS = """
+    SELECT
+        COUNT(*) as total_materias,
+        SUM(CASE WHEN mm.status = 'cursando' THEN 1 ELSE 0 END) as cursando,
+        SUM(CASE WHEN mm.status = 'aprovado' THEN 1 ELSE 0 END) as aprovadas,
+        SUM(CASE WHEN mm.status = 'reprovado' THEN 1 ELSE 0 END) as reprovadas
+    FROM matriculas_materias mm
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    WHERE mat.aluno_id = ?
+"""
+
+ESTATISTICAS_PAGAMENTOS = """
+    SELECT
+        COUNT(*) as total_pagamentos,
+        SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN 1 ELSE 0 END) as pendentes,
+        COALESCE(SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN valor ELSE 0 END), 0) as valor_devido
+    FROM pagamentos
+    WHERE aluno_id = ?
+"""
+
+TOTAL_REQUERIMENTOS = """
+    SELECT COUNT(*) as total_requerimentos
+    FROM requerimentos
+    WHERE aluno_id = ?
+"""
+
+# buscar_pagamentos
+PAGAMENTOS_POR_STATUS = """
+    SELECT * FROM pagamentos
+    WHERE aluno_id = ? AND status = ?
+    ORDER BY data_vencimento
+"""
+
+PAGAMENTOS_DO_ALUNO = """
+    SELECT * FROM pagamentos
+    WHERE aluno_id = ?
+    ORDER BY data_vencimento DESC
+"""
+
+# ============ DATABASE ADAPTER (SQLAlchemy text) ============
+
+ADAPTER_CURSOS_DO_ALUNO = """
+    SELECT c.*, m.status, m.ano, m.semestre
+    FROM cursos c
+    JOIN matriculas m ON m.curso_id = c.id
+    WHERE m.aluno_id = :aluno_id
+"""
+
+ADAPTER_MATERIAS_DO_ALUNO = """
+    SELECT
+        m.id, m.nome, m.codigo, m.carga_horaria, m.creditos,
+        mm.status, mm.nota_final, mm.frequencia,
+        c.nome as curso_nome
+    FROM materias m
+    JOIN matriculas_materias mm ON mm.materia_id = m.id
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    JOIN cursos c ON c.id = m.curso_id
+    WHERE mat.aluno_id = :aluno_id
+"""
+
+ADAPTER_PAGAMENTOS_DO_ALUNO = """
+    SELECT * FROM pagamentos
+    WHERE aluno_id = :aluno_id
+    ORDER BY data_vencimento DESC
+"""
+
+ADAPTER_REQUERIMENTOS_DO_ALUNO = """
+    SELECT * FROM requerimentos
+    WHERE aluno_id = :aluno_id
+    ORDER BY data_solicitacao DESC
+"""
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
@@ -9,6 +9,8 @@ load_dotenv()
 
 import sqlite3  # Adicione no topo do arquivo
 
+import consultas_aluno
+
 class DatabaseAdapter:
     def __init__(self):
         # CAMINHO ABSOLUTO CORRETO - apontando para a raiz do projeto
@@ -104,12 +106,7 @@ class DatabaseAdapter:
                 
                 # Buscar cursos do aluno (CORRIGIDO)
                 cursos = conn.execute(
-                    text("""
-                        SELECT c.*, m.status, m.ano, m.semestre
-                        FROM cursos c
-                        JOIN matriculas m ON m.curso_id = c.id
-                        WHERE m.aluno_id = :aluno_id
-                    """),
+                    text(consultas_aluno.ADAPTER_CURSOS_DO_ALUNO),
                     {"aluno_id": aluno_id}
                 ).fetchall()
                 
@@ -127,17 +124,7 @@ class DatabaseAdapter:
                 
                 # Buscar matérias do aluno
                 materias = conn.execute(
-                    text("""
-                        SELECT 
-                            m.id, m.nome, m.codigo, m.carga_horaria, m.creditos,
-                            mm.status, mm.nota_final, mm.frequencia,
-                            c.nome as curso_nome
-                        FROM materias m
-                        JOIN matriculas_materias mm ON mm.materia_id = m.id
-                        JOIN matriculas mat ON mat.id = mm.matricula_id
-                        JOIN cursos c ON c.id = m.curso_id
-                        WHERE mat.aluno_id = :aluno_id
-                    """),
+                    text(consultas_aluno.ADAPTER_MATERIAS_DO_ALUNO),
                     {"aluno_id": aluno_id}
                 ).fetchall()
                 
@@ -148,11 +135,7 @@ class DatabaseAdapter:
                 
                 # Buscar pagamentos
                 pagamentos = conn.execute(
-                    text("""
-                        SELECT * FROM pagamentos 
-                        WHERE aluno_id = :aluno_id 
-                        ORDER BY data_vencimento DESC
-                    """),
+                    text(consultas_aluno.ADAPTER_PAGAMENTOS_DO_ALUNO),
                     {"aluno_id": aluno_id}
                 ).fetchall()
                 
@@ -175,11 +158,7 @@ class DatabaseAdapter:
                 
                 # Buscar requerimentos
                 requerimentos = conn.execute(
-                    text("""
-                        SELECT * FROM requerimentos 
-                        WHERE aluno_id = :aluno_id 
-                        ORDER BY data_solicitacao DESC
-                    """),
+                    text(consultas_aluno.ADAPTER_REQUERIMENTOS_DO_ALUNO),
                     {"aluno_id": aluno_id}
                 ).fetchall()
                 
@@ -194,6 +173,16 @@ class DatabaseAdapter:
                     
                     aluno_dict['requerimentos'].append(req_dict)
                 
+                # Contadores por status já somados (resumo_aluno, mantida pela API Flask)
+                aluno_dict['resumo'] = None
+                if inspect(conn).has_table('resumo_aluno'):
+                    resumo = conn.execute(
+                        text("SELECT * FROM resumo_aluno WHERE aluno_id = :aluno_id"),
+                        {"aluno_id": aluno_id}
+                    ).fetchone()
+                    if resumo:
+                        aluno_dict['resumo'] = dict(resumo._mapping)
+                
                 return aluno_dict
                 
         except Exception as e:
@@ -0,0 +1,197 @@
+"""
+Execução especulativa de ferramentas enquanto o LLM decide
+
+Para um aluno logado, as intenções do classificador de palavras-chave já
+indicam quais ferramentas de leitura o LLM provavelmente vai escolher
+(resumo_academico, perguntar_sobre_aluno, buscar_pagamentos...). As k
+mais prováveis são disparadas em paralelo com a consulta ao Ollama; se a
+decisão final pedir exatamente a mesma chamada (ferramenta e argumentos),
+o resultado já está pronto ou a caminho. As demais são canceladas ou,
+se já estavam rodando, descartadas. Só ferramentas sem efeito colateral
+entram na especulação. Com executar_lote, as chamadas previstas vão juntas
+num único lote JSON-RPC em vez de uma requisição cada.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Ferramentas que só leem dados: podem rodar sem que o LLM as tenha pedido
+FERRAMENTAS_SOMENTE_LEITURA = frozenset({
+    "consultar_aluno",
+    "perguntar_sobre_aluno",
+    "resumo_academico",
+    "buscar_pagamentos",
+    "listar_cursos",
+    "listar_materias_disponiveis",
+})
+
+
+def chave_chamada(ferramenta, argumentos):
+    """Identifica a chamada: mesma ferramenta com os mesmos argumentos"""
+    return ferramenta, json.dumps(argumentos or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class RodadaEspeculativa:
+    """Chamadas disparadas para uma mensagem; vive até o fim do turno"""
+
+    def __init__(self, executor, tarefas):
+        self._executor = executor
+        self._tarefas = tarefas  # chave -> (future, inicio)
+        self._usadas = set()
+
+    def resultado(self, ferramenta, argumentos):
+        """
+        (True, resposta) se a chamada foi especulada, senão (False, None).
+
+        Espera a chamada terminar se ela ainda estiver em andamento; o
+        ganho é o tempo que ela já tinha rodado. Se ela nem começou (o pool
+        é dividido entre as sessões), é cancelada e conta como erro da
+        especulação: esperar a fila seria mais lento que a chamada normal.
+        """
+        chave = chave_chamada(ferramenta, argumentos)
+        tarefa = self._tarefas.get(chave)
+        if tarefa is None or chave in self._usadas:
+            return False, None
+        futuro, inicio = tarefa
+        if futuro.cancel():
+            del self._tarefas[chave]
+            self._executor._registrar_sobra(cancelada=True)
+            return False, None
+        pedido = time.perf_counter()
+        try:
+            resposta, fim = futuro.result()
+        except Exception as exc:
+            # A chamada normal vai repetir e tratar o erro
+            logger.debug("Especulação de %s falhou: %s", ferramenta, exc)
+            return False, None
+        self._usadas.add(chave)
+        self._executor._registrar_acerto(max(0.0, min(fim, pedido) - inicio) * 1000)
+        return True, resposta
+
+    def encerrar(self):
+        """Cancela o que não começou e descarta o que não foi usado"""
+        for chave, (futuro, _) in self._tarefas.items():
+            if chave in self._usadas:
+                continue
+            self._executor._registrar_sobra(cancelada=futuro.cancel())
+        self._executor._registrar_rodada(bool(self._usadas))
+        self._tarefas = {}
+
+
+class ExecutorEspeculativo:
+    """
+    Args:
+        k: quantas chamadas previstas disparar por mensagem (0 desliga)
+        max_paralelo: threads para as chamadas especulativas
+    """
+
+    def __init__(self, k=2, max_paralelo=8):
+        self.k = k
+        self._pool = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="especulacao")
+        self._lock = threading.Lock()
+        self._stats = {
+            "rodadas": 0,
+            "rodadas_com_acerto": 0,
+            "disparadas": 0,
+            "aproveitadas": 0,
+            "descartadas": 0,
+            "canceladas": 0,
+            "economia_total_ms": 0.0,
+        }
+
+    @classmethod
+    def do_ambiente(cls):
+        """Configuração por AGENTE_ESPECULACAO_K (0 desliga)"""
+        return cls(k=int(os.getenv("AGENTE_ESPECULACAO_K", "2")))
+
+    def iniciar(self, chamadas, executar, executar_lote=None):
+        """
+        Dispara até k chamadas (ferramenta, argumentos) de leitura.
+
+        executar(ferramenta, argumentos) faz a chamada de verdade. Se houver
+        mais de uma e executar_lote for dado, executar_lote(chamadas) faz
+        todas numa requisição só e devolve as respostas na mesma ordem.
+        Retorna a RodadaEspeculativa, ou None se nada foi disparado.
+        """
+        selecionadas = {}
+        for ferramenta, argumentos in chamadas:
+            if len(selecionadas) >= self.k:
+                break
+            if ferramenta not in FERRAMENTAS_SOMENTE_LEITURA:
+                continue
+            chave = chave_chamada(ferramenta, argumentos)
+            if chave not in selecionadas:
+                selecionadas[chave] = (ferramenta, dict(argumentos))
+        if not selecionadas:
+            return None
+
+        tarefas = {}
+        if executar_lote is not None and len(selecionadas) > 1:
+            futuros = {chave: Future() for chave in selecionadas}
+            self._pool.submit(self._cronometrar_lote, executar_lote,
+                              list(selecionadas.values()), list(futuros.values()))
+            inicio = time.perf_counter()
+            tarefas = {chave: (futuro, inicio) for chave, futuro in futuros.items()}
+        else:
+            for chave, (ferramenta, argumentos) in selecionadas.items():
+                tarefas[chave] = (
+                    self._pool.submit(self._cronometrar, executar, ferramenta, argumentos),
+                    time.perf_counter(),
+                )
+        with self._lock:
+            self._stats["disparadas"] += len(tarefas)
+        return RodadaEspeculativa(self, tarefas)
+
+    @staticmethod
+    def _cronometrar(executar, ferramenta, argumentos):
+        resposta = executar(ferramenta, argumentos)
+        return resposta, time.perf_counter()
+
+    @staticmethod
+    def _cronometrar_lote(executar_lote, chamadas, futuros):
+        # Até o lote sair, cada chamada pode ser cancelada sozinha e fica de fora dele
+        pendentes = [(chamada, futuro) for chamada, futuro in zip(chamadas, futuros)
+                     if futuro.set_running_or_notify_cancel()]
+        if not pendentes:
+            return
+        try:
+            respostas = executar_lote([chamada for chamada, _ in pendentes])
+        except Exception as exc:
+            for _, futuro in pendentes:
+                futuro.set_exception(exc)
+            return
+        fim = time.perf_counter()
+        for (_, futuro), resposta in zip(pendentes, respostas):
+            futuro.set_result((resposta, fim))
+
+    def _registrar_acerto(self, economia_ms):
+        with self._lock:
+            self._stats["aproveitadas"] += 1
+            self._stats["economia_total_ms"] += economia_ms
+
+    def _registrar_sobra(self, cancelada):
+        with self._lock:
+            self._stats["canceladas" if cancelada else "descartadas"] += 1
+
+    def _registrar_rodada(self, acertou):
+        with self._lock:
+            self._stats["rodadas"] += 1
+            self._stats["rodadas_com_acerto"] += int(acertou)
+
+    def metricas(self):
+        with self._lock:
+            dados = dict(self._stats)
+        economia = dados.pop("economia_total_ms")
+        dados["economia_total_ms"] = round(economia, 1)
+        dados["economia_media_ms"] = round(economia / dados["aproveitadas"], 1) if dados["aproveitadas"] else 0.0
+        dados["taxa_acerto"] = round(dados["rodadas_com_acerto"] / dados["rodadas"], 4) if dados["rodadas"] else 0.0
+        dados["taxa_aproveitamento"] = round(dados["aproveitadas"] / dados["disparadas"], 4) if dados["disparadas"] else 0.0
+        return dados
+
+    def fechar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
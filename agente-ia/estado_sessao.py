@@ -0,0 +1,30 @@
+"""
+Estado de uma sessão de conversa com o agente
+
+Tudo o que muda entre uma mensagem e outra fica aqui, separado da lógica do
+AgenteIAInteligente, para que várias sessões compartilhem o mesmo processo
+e o estado possa ser salvo/restaurado como JSON.
+"""
+import time
+from dataclasses import asdict, dataclass, field, fields
+
+
+@dataclass
+class EstadoSessao:
+    aluno_id: int = None
+    aluno_nome: str = None
+    contexto: list = field(default_factory=list)
+    request_id: int = 1
+    acao_pendente: dict = None
+    dados_cadastro: dict = None
+    criada_em: float = field(default_factory=time.time)
+    ultima_atividade: float = field(default_factory=time.time)
+
+    def para_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Restaura um estado salvo; chaves desconhecidas são ignoradas"""
+        conhecidos = {f.name for f in fields(cls)}
+        return cls(**{chave: valor for chave, valor in (dados or {}).items() if chave in conhecidos})
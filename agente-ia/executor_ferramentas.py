@@ -0,0 +1,132 @@
+"""
+Execução das ferramentas MCP fora do event loop
+
+As ferramentas são síncronas (sqlite3, requests, WeasyPrint). O endpoint
+JSON-RPC é async, então cada chamada roda num ThreadPoolExecutor
+dimensionado, com teto de concorrência opcional por ferramenta.
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorFerramentas:
+    """
+    Despacha ferramentas síncronas para um pool de threads.
+
+    Args:
+        max_workers: número de threads do pool
+        limites: dict nome_ferramenta -> máximo de execuções simultâneas
+    """
+
+    def __init__(self, max_workers=8, limites=None):
+        self.max_workers = max(1, int(max_workers))
+        self.limites = {nome: max(1, int(n)) for nome, n in (limites or {}).items()}
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="mcp-ferramenta",
+        )
+        self._semaforos = {}
+        self._lock = threading.Lock()
+        self._aguardando = 0
+        self._em_execucao = 0
+        self._pico_fila = 0
+        self._por_ferramenta = {}
+
+    def _semaforo(self, nome):
+        limite = self.limites.get(nome)
+        if limite is None:
+            return None
+        sem = self._semaforos.get(nome)
+        if sem is None:
+            sem = self._semaforos[nome] = asyncio.Semaphore(limite)
+        return sem
+
+    def _stats(self, nome):
+        stats = self._por_ferramenta.get(nome)
+        if stats is None:
+            stats = self._por_ferramenta[nome] = {
+                "chamadas": 0,
+                "erros": 0,
+                "aguardando": 0,
+                "em_execucao": 0,
+                "tempo_fila_ms": 0.0,
+                "tempo_execucao_ms": 0.0,
+            }
+        return stats
+
+    def _sair_da_fila(self, nome, estado):
+        """Tira a chamada da contagem da fila uma única vez (chamar com o lock)"""
+        if estado["na_fila"]:
+            estado["na_fila"] = False
+            self._aguardando -= 1
+            self._stats(nome)["aguardando"] -= 1
+
+    def _rodar(self, nome, func, kwargs, estado):
+        """Corpo executado na thread do pool"""
+        inicio = time.monotonic()
+        with self._lock:
+            stats = self._stats(nome)
+            self._sair_da_fila(nome, estado)
+            self._em_execucao += 1
+            stats["em_execucao"] += 1
+            stats["tempo_fila_ms"] += (inicio - estado["enfileirado_em"]) * 1000
+        try:
+            return func(**kwargs)
+        except Exception:
+            with self._lock:
+                stats["erros"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._em_execucao -= 1
+                stats["em_execucao"] -= 1
+                stats["tempo_execucao_ms"] += (time.monotonic() - inicio) * 1000
+
+    async def executar(self, nome, func, kwargs=None):
+        """Executa func(**kwargs) numa thread sem bloquear o event loop"""
+        kwargs = kwargs or {}
+        estado = {"na_fila": True, "enfileirado_em": time.monotonic()}
+        with self._lock:
+            stats = self._stats(nome)
+            stats["chamadas"] += 1
+            stats["aguardando"] += 1
+            self._aguardando += 1
+            self._pico_fila = max(self._pico_fila, self._aguardando)
+
+        loop = asyncio.get_running_loop()
+        chamada = functools.partial(self._rodar, nome, func, kwargs, estado)
+        sem = self._semaforo(nome)
+        try:
+            if sem is None:
+                return await loop.run_in_executor(self._executor, chamada)
+            async with sem:
+                return await loop.run_in_executor(self._executor, chamada)
+        finally:
+            # Cancelada antes de chegar a uma thread: a chamada não fica na fila
+            with self._lock:
+                self._sair_da_fila(nome, estado)
+
+    def metricas(self):
+        """Profundidade da fila e contadores por ferramenta (exposto em /health)"""
+        with self._lock:
+            por_ferramenta = {}
+            for nome, stats in self._por_ferramenta.items():
+                dados = dict(stats)
+                dados["tempo_fila_ms"] = round(dados["tempo_fila_ms"], 2)
+                dados["tempo_execucao_ms"] = round(dados["tempo_execucao_ms"], 2)
+                if nome in self.limites:
+                    dados["limite"] = self.limites[nome]
+                por_ferramenta[nome] = dados
+            return {
+                "workers": self.max_workers,
+                "fila": self._aguardando,
+                "pico_fila": self._pico_fila,
+                "em_execucao": self._em_execucao,
+                "ferramentas": por_ferramenta,
+            }
+
+    def encerrar(self, aguardar=True):
+        self._executor.shutdown(wait=aguardar)
@@ -8,9 +8,19 @@ from typing import Optional, Dict, Any, List
 from mcp.server.fastmcp import FastMCP
 import logging
 import traceback
-from jinja2 import Template
+from jinja2 import TemplateNotFound
 import hashlib
 import ipaddress
+import consultas_aluno
+from pool_conexoes import PoolConexoesSQLite, PoolEsgotadoError
+from executor_ferramentas import ExecutorFerramentas
+from registro_templates import RegistroTemplates
+from cache_ferramentas import CacheFerramentas, VersoesTabelas
+from registro_ferramentas import (
+    ListaFerramentasSerializada,
+    construir_registro,
+    construir_schema_ferramentas,
+)
 
 # Configurar logging para arquivo (não interfere com stdio)
 logging.basicConfig(
@@ -64,45 +74,88 @@ try:
 except Exception as e:
     logger.error(f" Erro ao validar banco: {e}")
 
+# Pool compartilhado por todas as ferramentas (conexões reutilizadas entre chamadas).
+# Fica acima de MCP_TOOL_WORKERS porque perguntar_sobre_aluno -> resumo_academico
+# segura duas conexões ao mesmo tempo.
+db_pool = PoolConexoesSQLite(
+    DB_PATH,
+    tamanho_maximo=int(os.getenv("MCP_DB_POOL_SIZE", "10")),
+    timeout=float(os.getenv("MCP_DB_POOL_TIMEOUT", "10")),
+    pragmas={
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": int(os.getenv("MCP_DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": -int(os.getenv("MCP_DB_CACHE_KB", "16384")),
+        "temp_store": "MEMORY",
+    },
+)
+
+# Cache das ferramentas somente leitura, invalidado pelas versões em versoes_tabelas
+# (incrementadas pelo Flask a cada commit e pelas ferramentas de escrita)
+versoes_tabelas = VersoesTabelas(db_pool)
+try:
+    versoes_tabelas.garantir_tabela()
+except Exception as e:
+    logger.error(f" Não foi possível preparar versoes_tabelas: {e}")
+
+cache_ferramentas = CacheFerramentas(
+    versoes_tabelas,
+    ttl=float(os.getenv("MCP_CACHE_TTL", "30")),
+    max_bytes=int(os.getenv("MCP_CACHE_MAX_MB", "16")) * 1024 * 1024,
+)
+
+# Ferramentas síncronas rodam em threads para não travar o event loop do uvicorn.
+# As pesadas (PDF via WeasyPrint, POST para o Flask) têm teto próprio.
+executor_ferramentas = ExecutorFerramentas(
+    max_workers=int(os.getenv("MCP_TOOL_WORKERS", "8")),
+    limites={
+        "criar_requerimento": int(os.getenv("MCP_LIMITE_CRIAR_REQUERIMENTO", "2")),
+        "cadastrar_novo_aluno": int(os.getenv("MCP_LIMITE_CADASTRO", "4")),
+    },
+)
+
+# Templates de declaração compilados uma vez (recarregados se o arquivo mudar)
+TEMPLATE_DECLARACAO = 'declaracao_template.html'
+ESTILO_DECLARACAO = 'declaracao.css'
+registro_templates = RegistroTemplates(
+    [
+        r'C:\Users\JacksonRodrigues\Downloads\AgenteIa\templates',
+        os.path.join(os.path.dirname(__file__), '..', 'templates'),
+        'templates',
+    ],
+    diretorio_bytecode=os.getenv("MCP_TEMPLATE_CACHE_DIR"),
+)
+
 # ============ FUNÇÕES AUXILIARES ============
 
 def get_db_connection():
-    """Retorna uma conexão com o banco de dados"""
+    """
+    Empresta uma conexão do pool compartilhado.
+    
+    O close() da conexão retornada devolve ao pool em vez de fechar.
+    """
     try:
-        # Verificar se o arquivo existe
-        if not os.path.exists(DB_PATH):
-            logger.error(f" Arquivo do banco NÃO encontrado: {DB_PATH}")
-            return None
-        
-        # Tentar conectar
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return db_pool.emprestar()
+    except PoolEsgotadoError as e:
+        logger.error(f" Pool de conexões esgotado: {e}")
+        return None
     except Exception as e:
         logger.error(f" Erro ao conectar ao banco: {e}")
         logger.error(traceback.format_exc())
         return None
 
-def carregar_template_html():
-    """Carrega o template HTML de declaração"""
-    try:
-        # Procurar template em diferentes locais
-        possibles = [
-            r'C:\Users\JacksonRodrigues\Downloads\AgenteIa\templates\declaracao_template.html',
-            os.path.join(os.path.dirname(__file__), '..', 'templates', 'declaracao_template.html'),
-            'templates/declaracao_template.html',
-        ]
-        
-        for path in possibles:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    return f.read()
-        
-        logger.warning("Template HTML não encontrado, usando template padrão")
-        return None
-    except Exception as e:
-        logger.error(f"Erro ao carregar template: {e}")
+def ler_resumo_aluno(cursor, aluno_id):
+    """
+    Contadores do aluno em resumo_aluno (mantida pela API Flask a cada escrita).
+    
+    Retorna None se a tabela ainda não existe neste banco ou o aluno não tem
+    linha; quem chama cai para as consultas agregadas.
+    """
+    if not db_pool.tabela_existe('resumo_aluno'):
         return None
+    cursor.execute("SELECT * FROM resumo_aluno WHERE aluno_id = ?", (aluno_id,))
+    resumo = cursor.fetchone()
+    return dict(resumo) if resumo else None
 
 def gerar_pdf_declaracao(tipo_declaracao: str, aluno_id: int, aluno_nome: str, aluno_matricula: str, aluno_cpf: str = "") -> tuple:
     """
@@ -112,19 +165,12 @@ def gerar_pdf_declaracao(tipo_declaracao: str, aluno_id: int, aluno_nome: str, a
         (sucesso: bool, caminho_pdf: str, nome_arquivo: str)
     """
     try:
-        from weasyprint import HTML, CSS
-        from io import BytesIO
-    except ImportError:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
         logger.warning("weasyprint não instalado, tentando fallback com reportlab")
         return False, None, None
     
     try:
-        # Carregar template
-        template_html = carregar_template_html()
-        
-        if not template_html:
-            return False, None, None
-        
         # Preparar dados para o template
         from datetime import datetime
         from calendar import month_name
@@ -179,10 +225,6 @@ def gerar_pdf_declaracao(tipo_declaracao: str, aluno_id: int, aluno_nome: str, a
             'ip_emissao': '192.168.1.1',
         }
         
-        # Renderizar template com Jinja2
-        template = Template(template_html)
-        html_renderizado = template.render(**dados)
-        
         # Criar diretório para PDFs
         pdf_dir = 'declaracoes'
         if not os.path.exists(pdf_dir):
@@ -193,11 +235,18 @@ def gerar_pdf_declaracao(tipo_declaracao: str, aluno_id: int, aluno_nome: str, a
         nome_arquivo = f"declaracao_{matricula_limpa}_{tipo_declaracao}_{hoje.strftime('%Y%m%d%H%M%S')}.pdf"
         caminho_pdf = os.path.join(pdf_dir, nome_arquivo)
         
-        # Converter HTML para PDF usando WeasyPrint
+        # Template compilado e CSS/fontes já carregados pelo registro; tempos por fase no log
         try:
-            HTML(string=html_renderizado).write_pdf(caminho_pdf)
-            logger.info(f" PDF gerado com sucesso: {caminho_pdf}")
+            pdf, tempos = registro_templates.renderizar_pdf(
+                TEMPLATE_DECLARACAO, dados, estilos=(ESTILO_DECLARACAO,)
+            )
+            with open(caminho_pdf, 'wb') as f:
+                f.write(pdf)
+            logger.info(f" PDF gerado com sucesso: {caminho_pdf} ({tempos})")
             return True, caminho_pdf, nome_arquivo
+        except TemplateNotFound:
+            logger.warning("Template HTML não encontrado")
+            return False, None, None
         except Exception as e:
             logger.warning(f"WeasyPrint falhou: {e}, tentando alternativa")
             return False, None, None
@@ -253,6 +302,7 @@ def listar_alunos(limite: int = 10) -> str:
 
 
 @mcp.tool()
+@cache_ferramentas.cachear("alunos", "materias", "matriculas", "matriculas_materias", "pagamentos")
 def consultar_aluno(aluno_id: int) -> str:
     """
     Consulta informações básicas de um aluno por ID.
@@ -269,9 +319,8 @@ def consultar_aluno(aluno_id: int) -> str:
         
         cursor = conn.cursor()
         
-        # Verificar se a tabela alunos existe
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='alunos'")
-        if not cursor.fetchone():
+        # Verificar se a tabela alunos existe (schema consultado uma vez pelo pool)
+        if not db_pool.tabela_existe('alunos'):
             logger.error(" Tabela 'alunos' não encontrada no banco!")
             conn.close()
             return " Erro: Tabela de alunos não encontrada no banco de dados."
@@ -288,25 +337,18 @@ def consultar_aluno(aluno_id: int) -> str:
         aluno_dict = dict(aluno)
         logger.info(f" Aluno encontrado: {aluno_dict.get('nome_completo')}")
         
-        # Buscar matérias do aluno
-        cursor.execute("""
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN mm.status = 'cursando' THEN 1 ELSE 0 END) as cursando
-            FROM materias m
-            JOIN matriculas_materias mm ON mm.materia_id = m.id
-            JOIN matriculas mat ON mat.id = mm.matricula_id
-            WHERE mat.aluno_id = ?
-        """, (aluno_id,))
-        stats = cursor.fetchone()
-        
-        # Buscar pagamentos pendentes
-        cursor.execute("""
-            SELECT COUNT(*) as pendentes, 
-                   COALESCE(SUM(valor), 0) as total_devendo
-            FROM pagamentos 
-            WHERE aluno_id = ? AND status IN ('pendente', 'atrasado')
-        """, (aluno_id,))
-        financeiro = cursor.fetchone()
+        resumo = ler_resumo_aluno(cursor, aluno_id)
+        if resumo:
+            stats = {'total': resumo['materias_total'], 'cursando': resumo['materias_cursando']}
+            financeiro = {'pendentes': resumo['pagamentos_pendentes'], 'total_devendo': resumo['valor_devido']}
+        else:
+            # Buscar matérias do aluno
+            cursor.execute(consultas_aluno.CONTAGEM_MATERIAS, (aluno_id,))
+            stats = cursor.fetchone()
+            
+            # Buscar pagamentos pendentes
+            cursor.execute(consultas_aluno.TOTAL_PENDENTE, (aluno_id,))
+            financeiro = cursor.fetchone()
         
         conn.close()
         
@@ -332,6 +374,7 @@ def consultar_aluno(aluno_id: int) -> str:
 
 
 @mcp.tool()
+@cache_ferramentas.invalida("alunos", "matriculas")
 def cadastrar_novo_aluno(
     nome_completo: str,
     cpf: str,
@@ -509,6 +552,7 @@ def cadastrar_novo_aluno(
 
 
 @mcp.tool()
+@cache_ferramentas.cachear("materias", "matriculas", "matriculas_materias")
 def listar_materias_disponiveis(aluno_id: int = None, semestre: int = None) -> str:
     """
     Lista as matérias disponíveis que o aluno pode se matricular.
@@ -549,12 +593,7 @@ def listar_materias_disponiveis(aluno_id: int = None, semestre: int = None) -> s
         # Se aluno_id foi informado, filtrar matérias que o aluno já está matriculado
         ja_matriculado = []
         if aluno_id:
-            cursor.execute("""
-                SELECT m.id FROM materias m
-                JOIN matriculas_materias mm ON mm.materia_id = m.id
-                JOIN matriculas mat ON mat.id = mm.matricula_id
-                WHERE mat.aluno_id = ?
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.IDS_MATERIAS_DO_ALUNO, (aluno_id,))
             ja_matriculado = [row['id'] for row in cursor.fetchall()]
         
         conn.close()
@@ -579,6 +618,7 @@ def listar_materias_disponiveis(aluno_id: int = None, semestre: int = None) -> s
 
 
 @mcp.tool()
+@cache_ferramentas.cachear("cursos")
 def listar_cursos(codigo: str = None, apenas_ativos: bool = True) -> str:
     """
     Lista cursos cadastrados ou detalha um curso pelo codigo.
@@ -701,13 +741,7 @@ def perguntar_sobre_aluno(aluno_id: int, pergunta: str) -> str:
 • Status: {dados['status']}"""
         
         elif "matéria" in pergunta_lower or "disciplina" in pergunta_lower or "materias" in pergunta_lower:
-            cursor.execute("""
-                SELECT m.nome, m.codigo, mm.status
-                FROM materias m
-                JOIN matriculas_materias mm ON mm.materia_id = m.id
-                JOIN matriculas mat ON mat.id = mm.matricula_id
-                WHERE mat.aluno_id = ?
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.MATERIAS_DO_ALUNO, (aluno_id,))
             materias = cursor.fetchall()
             
             if materias:
@@ -719,13 +753,7 @@ def perguntar_sobre_aluno(aluno_id: int, pergunta: str) -> str:
             return "Você não está matriculado em nenhuma matéria."
         
         elif "nota" in pergunta_lower:
-            cursor.execute("""
-                SELECT m.nome, mm.nota_final, mm.status
-                FROM materias m
-                JOIN matriculas_materias mm ON mm.materia_id = m.id
-                JOIN matriculas mat ON mat.id = mm.matricula_id
-                WHERE mat.aluno_id = ? AND mm.nota_final IS NOT NULL
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.NOTAS_DO_ALUNO, (aluno_id,))
             notas = cursor.fetchall()
             
             if notas:
@@ -736,11 +764,7 @@ def perguntar_sobre_aluno(aluno_id: int, pergunta: str) -> str:
             return "Você ainda não tem notas lançadas."
         
         elif "pagamento" in pergunta_lower or "boleto" in pergunta_lower or "financeiro" in pergunta_lower:
-            cursor.execute("""
-                SELECT * FROM pagamentos 
-                WHERE aluno_id = ? AND status IN ('pendente', 'atrasado')
-                ORDER BY data_vencimento
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.PAGAMENTOS_PENDENTES, (aluno_id,))
             pendentes = cursor.fetchall()
             
             if pendentes:
@@ -753,13 +777,7 @@ def perguntar_sobre_aluno(aluno_id: int, pergunta: str) -> str:
             return " Todos os seus pagamentos estão em dia!"
         
         elif "frequência" in pergunta_lower or "frequencia" in pergunta_lower:
-            cursor.execute("""
-                SELECT m.nome, mm.frequencia
-                FROM materias m
-                JOIN matriculas_materias mm ON mm.materia_id = m.id
-                JOIN matriculas mat ON mat.id = mm.matricula_id
-                WHERE mat.aluno_id = ? AND mm.frequencia IS NOT NULL
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.FREQUENCIA_DO_ALUNO, (aluno_id,))
             freq = cursor.fetchall()
             
             if freq:
@@ -785,6 +803,7 @@ def perguntar_sobre_aluno(aluno_id: int, pergunta: str) -> str:
 
 
 @mcp.tool()
+@cache_ferramentas.invalida("requerimentos")
 def criar_requerimento(aluno_id: int, tipo: str, kwargs: dict = None) -> str:
     """
     Cria um novo requerimento para o aluno.
@@ -971,6 +990,7 @@ Seu requerimento foi registrado no sistema e será processado em breve."""
 
 
 @mcp.tool()
+@cache_ferramentas.cachear("alunos", "matriculas", "matriculas_materias", "pagamentos", "requerimentos")
 def resumo_academico(aluno_id: int) -> str:
     """
     Mostra um resumo completo da situação acadêmica do aluno.
@@ -995,37 +1015,32 @@ def resumo_academico(aluno_id: int) -> str:
         
         aluno_dict = dict(aluno)
         
-        # Estatísticas de matérias
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_materias,
-                SUM(CASE WHEN status = 'cursando' THEN 1 ELSE 0 END) as cursando,
-                SUM(CASE WHEN status = 'aprovado' THEN 1 ELSE 0 END) as aprovadas,
-                SUM(CASE WHEN status = 'reprovado' THEN 1 ELSE 0 END) as reprovadas
-            FROM matriculas_materias mm
-            JOIN matriculas mat ON mat.id = mm.matricula_id
-            WHERE mat.aluno_id = ?
-        """, (aluno_id,))
-        stats_materias = cursor.fetchone()
-        
-        # Pagamentos
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_pagamentos,
-                SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN 1 ELSE 0 END) as pendentes,
-                COALESCE(SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN valor ELSE 0 END), 0) as valor_devido
-            FROM pagamentos
-            WHERE aluno_id = ?
-        """, (aluno_id,))
-        stats_pagamentos = cursor.fetchone()
-        
-        # Requerimentos
-        cursor.execute("""
-            SELECT COUNT(*) as total_requerimentos
-            FROM requerimentos
-            WHERE aluno_id = ?
-        """, (aluno_id,))
-        stats_requerimentos = cursor.fetchone()
+        resumo = ler_resumo_aluno(cursor, aluno_id)
+        if resumo:
+            stats_materias = {
+                'total_materias': resumo['materias_total'],
+                'cursando': resumo['materias_cursando'],
+                'aprovadas': resumo['materias_aprovadas'],
+                'reprovadas': resumo['materias_reprovadas'],
+            }
+            stats_pagamentos = {
+                'total_pagamentos': resumo['pagamentos_total'],
+                'pendentes': resumo['pagamentos_pendentes'],
+                'valor_devido': resumo['valor_devido'],
+            }
+            stats_requerimentos = {'total_requerimentos': resumo['requerimentos_total']}
+        else:
+            # Estatísticas de matérias
+            cursor.execute(consultas_aluno.ESTATISTICAS_MATERIAS, (aluno_id,))
+            stats_materias = cursor.fetchone()
+            
+            # Pagamentos
+            cursor.execute(consultas_aluno.ESTATISTICAS_PAGAMENTOS, (aluno_id,))
+            stats_pagamentos = cursor.fetchone()
+            
+            # Requerimentos
+            cursor.execute(consultas_aluno.TOTAL_REQUERIMENTOS, (aluno_id,))
+            stats_requerimentos = cursor.fetchone()
         
         conn.close()
         
@@ -1057,6 +1072,7 @@ def resumo_academico(aluno_id: int) -> str:
 
 
 @mcp.tool()
+@cache_ferramentas.cachear("pagamentos")
 def buscar_pagamentos(aluno_id: int, status: Optional[str] = None) -> str:
     """
     Busca pagamentos/boletos do aluno
@@ -1076,17 +1092,9 @@ def buscar_pagamentos(aluno_id: int, status: Optional[str] = None) -> str:
         
         # Buscar pagamentos
         if status:
-            cursor.execute("""
-                SELECT * FROM pagamentos 
-                WHERE aluno_id = ? AND status = ?
-                ORDER BY data_vencimento
-            """, (aluno_id, status))
+            cursor.execute(consultas_aluno.PAGAMENTOS_POR_STATUS, (aluno_id, status))
         else:
-            cursor.execute("""
-                SELECT * FROM pagamentos 
-                WHERE aluno_id = ?
-                ORDER BY data_vencimento DESC
-            """, (aluno_id,))
+            cursor.execute(consultas_aluno.PAGAMENTOS_DO_ALUNO, (aluno_id,))
         
         pagamentos = cursor.fetchall()
         
@@ -1277,9 +1285,10 @@ Por favor, forneça informações claras e úteis sobre este assunto acadêmico.
 # ============ EXECUÇÃO ============
 
 if __name__ == "__main__":
+    import asyncio
     import uvicorn
     from fastapi import FastAPI, Request
-    from fastapi.responses import JSONResponse
+    from fastapi.responses import JSONResponse, Response
     from fastapi.middleware.cors import CORSMiddleware
     
     # Log inicial
@@ -1306,185 +1315,51 @@ if __name__ == "__main__":
     mcp_app = mcp.sse_app()
     app.mount("/mcp", mcp_app)
     
-    # Endpoint JSON-RPC HTTP para compatibilidade
-    @app.post("/")
-    async def jsonrpc_endpoint(request: Request):
-        """Endpoint JSON-RPC para chamadas diretas"""
+    # Registro nome -> função e tools/list montados uma vez a partir dos @mcp.tool()
+    REGISTRO_FERRAMENTAS = construir_registro(mcp)
+    LISTA_FERRAMENTAS = ListaFerramentasSerializada(construir_schema_ferramentas(mcp))
+    logger.info(f" {len(REGISTRO_FERRAMENTAS)} ferramentas registradas (ETag {LISTA_FERRAMENTAS.etag})")
+    
+    def _erro_jsonrpc(request_id, code, message):
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": code, "message": message}
+        }
+    
+    async def _processar_chamada(data, id_padrao=1):
+        """Processa uma requisição JSON-RPC e devolve o dict de resposta"""
+        if not isinstance(data, dict):
+            return _erro_jsonrpc(None, -32600, "Requisição inválida")
+        
+        request_id = data.get("id", id_padrao)
         try:
-            data = await request.json()
             method = data.get("method", "")
-            params = data.get("params", {})
-            request_id = data.get("id", 1)
+            params = data.get("params") or {}
             
             logger.info(f" JSON-RPC: {method} - Params: {params}")
             
-            # Roteamento de métodos
             if method == "tools/list":
-                # Listar ferramentas disponíveis
-                tools = [
-                    {
-                        "name": "listar_alunos",
-                        "description": "Lista os alunos cadastrados no sistema",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "limite": {"type": "number", "description": "Número máximo de alunos"}
-                            }
-                        }
-                    },
-                    {
-                        "name": "consultar_aluno",
-                        "description": "Consulta informações de um aluno específico",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno", "required": True}
-                            },
-                            "required": ["aluno_id"]
-                        }
-                    },
-                    {
-                        "name": "perguntar_sobre_aluno",
-                        "description": "Faz perguntas sobre um aluno (matérias, notas, etc)",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno", "required": True},
-                                "pergunta": {"type": "string", "description": "Pergunta sobre o aluno", "required": True}
-                            },
-                            "required": ["aluno_id", "pergunta"]
-                        }
-                    },
-                    {
-                        "name": "criar_requerimento",
-                        "description": "Cria um requerimento para o aluno",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno", "required": True},
-                                "tipo": {"type": "string", "description": "Tipo de requerimento", "required": True},
-                                "kwargs": {"type": "object", "description": "Argumentos adicionais"}
-                            },
-                            "required": ["aluno_id", "tipo"]
-                        }
-                    },
-                    {
-                        "name": "resumo_academico",
-                        "description": "Gera resumo acadêmico completo do aluno",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno", "required": True}
-                            },
-                            "required": ["aluno_id"]
-                        }
-                    },
-                    {
-                        "name": "buscar_pagamentos",
-                        "description": "Busca pagamentos e boletos do aluno",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno", "required": True},
-                                "status": {"type": "string", "description": "Filtro por status (pendente, pago, atrasado)"}
-                            },
-                            "required": ["aluno_id"]
-                        }
-                    },
-                    {
-                        "name": "diagnosticar_banco",
-                        "description": "Diagnostica qual banco de dados está sendo usado",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {}
-                        }
-                    },
-                    {
-                        "name": "listar_cursos",
-                        "description": "Lista cursos cadastrados ou detalha um curso pelo código",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "codigo": {"type": "string", "description": "Código do curso (opcional)"},
-                                "apenas_ativos": {"type": "boolean", "description": "Se True, lista apenas cursos ativos"}
-                            }
-                        }
-                    },
-                    {
-                        "name": "listar_materias_disponiveis",
-                        "description": "Lista as matérias disponíveis que o aluno pode se matricular",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "aluno_id": {"type": "number", "description": "ID do aluno (opcional)"},
-                                "semestre": {"type": "number", "description": "Filtrar por semestre (opcional)"}
-                            }
-                        }
-                    },
-                    {
-                        "name": "cadastrar_novo_aluno",
-                        "description": "Cadastra um novo aluno no sistema com matrícula automática",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "nome_completo": {"type": "string", "description": "Nome completo do aluno", "required": True},
-                                "cpf": {"type": "string", "description": "CPF do aluno (formato: 000.000.000-00 ou só números)", "required": True},
-                                "data_nascimento": {"type": "string", "description": "Data de nascimento (formato: YYYY-MM-DD ou DD/MM/YYYY)", "required": True},
-                                "email": {"type": "string", "description": "Email do aluno", "required": True},
-                                "telefone": {"type": "string", "description": "Telefone (opcional)"},
-                                "rg": {"type": "string", "description": "RG do aluno (opcional)"},
-                                "endereco": {"type": "string", "description": "Endereço completo (opcional)"},
-                                "cidade": {"type": "string", "description": "Cidade (opcional)"},
-                                "estado": {"type": "string", "description": "Estado - sigla de 2 letras (opcional)"},
-                                "cep": {"type": "string", "description": "CEP (opcional)"},
-                                "senha": {"type": "string", "description": "Senha para acesso ao portal (padrão: senha123)"},
-                                "curso_codigo": {"type": "string", "description": "Código do curso para matrícula automática (opcional)"}
-                            },
-                            "required": ["nome_completo", "cpf", "data_nascimento", "email"]
-                        }
-                    }
-                ]
-                
-                return JSONResponse({
+                return {
                     "jsonrpc": "2.0",
                     "id": request_id,
-                    "result": {"tools": tools}
-                })
+                    "result": LISTA_FERRAMENTAS.resultado()
+                }
             
-            elif method == "tools/call":
-                # Chamar ferramenta
+            if method == "tools/call":
                 tool_name = params.get("name")
-                arguments = params.get("arguments", {})
+                arguments = params.get("arguments") or {}
                 
                 logger.info(f" Chamando ferramenta: {tool_name} com args: {arguments}")
                 
-                # Chamar a ferramenta correspondente
-                result_text = ""
-                
-                if tool_name == "listar_alunos":
-                    result_text = listar_alunos(**arguments)
-                elif tool_name == "consultar_aluno":
-                    result_text = consultar_aluno(**arguments)
-                elif tool_name == "perguntar_sobre_aluno":
-                    result_text = perguntar_sobre_aluno(**arguments)
-                elif tool_name == "criar_requerimento":
-                    result_text = criar_requerimento(**arguments)
-                elif tool_name == "resumo_academico":
-                    result_text = resumo_academico(**arguments)
-                elif tool_name == "buscar_pagamentos":
-                    result_text = buscar_pagamentos(**arguments)
-                elif tool_name == "diagnosticar_banco":
-                    result_text = diagnosticar_banco(**arguments)
-                elif tool_name == "listar_cursos":
-                    result_text = listar_cursos(**arguments)
-                elif tool_name == "listar_materias_disponiveis":
-                    result_text = listar_materias_disponiveis(**arguments)
-                elif tool_name == "cadastrar_novo_aluno":
-                    result_text = cadastrar_novo_aluno(**arguments)
-                else:
+                func = REGISTRO_FERRAMENTAS.get(tool_name)
+                if func is None:
                     result_text = f" Ferramenta '{tool_name}' não encontrada"
+                else:
+                    # Executa numa thread do pool; o event loop segue atendendo outras sessões
+                    result_text = await executor_ferramentas.executar(tool_name, func, arguments)
                 
-                return JSONResponse({
+                return {
                     "jsonrpc": "2.0",
                     "id": request_id,
                     "result": {
@@ -1495,34 +1370,69 @@ if __name__ == "__main__":
                             }
                         ]
                     }
-                })
+                }
             
-            else:
-                return JSONResponse({
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Método '{method}' não encontrado"
-                    }
-                })
-                
+            return _erro_jsonrpc(request_id, -32601, f"Método '{method}' não encontrado")
+        
         except Exception as e:
             logger.error(f" Erro no endpoint JSON-RPC: {e}")
             logger.error(traceback.format_exc())
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "id": data.get("id", 1) if 'data' in locals() else 1,
-                "error": {
-                    "code": -32603,
-                    "message": str(e)
-                }
-            })
+            return _erro_jsonrpc(request_id, -32603, str(e))
+    
+    # Endpoint JSON-RPC HTTP para compatibilidade
+    @app.post("/")
+    async def jsonrpc_endpoint(request: Request):
+        """Endpoint JSON-RPC para chamadas diretas (aceita lotes)"""
+        try:
+            data = await request.json()
+        except ValueError as e:
+            return JSONResponse(_erro_jsonrpc(None, -32700, f"JSON inválido: {e}"))
+        
+        if isinstance(data, list):
+            # Lote JSON-RPC 2.0: itens em paralelo, respostas na ordem do pedido.
+            # Notificações (sem "id") não geram resposta.
+            if not data:
+                return JSONResponse(_erro_jsonrpc(None, -32600, "Lote vazio"))
+            
+            logger.info(f" JSON-RPC lote com {len(data)} chamadas")
+            respostas = await asyncio.gather(
+                *(_processar_chamada(item, id_padrao=None) for item in data)
+            )
+            respostas = [
+                resp for item, resp in zip(data, respostas)
+                if not isinstance(item, dict) or "id" in item
+            ]
+            if not respostas:
+                return Response(status_code=204)
+            return JSONResponse(respostas)
+        
+        if isinstance(data, dict) and data.get("method") == "tools/list":
+            # Resposta pré-serializada; clientes com o ETag recebem 304
+            if LISTA_FERRAMENTAS.etag_confere(request.headers.get("if-none-match")):
+                return Response(status_code=304, headers={"ETag": LISTA_FERRAMENTAS.etag})
+            return Response(
+                content=LISTA_FERRAMENTAS.corpo(data.get("id", 1)),
+                media_type="application/json",
+                headers={"ETag": LISTA_FERRAMENTAS.etag},
+            )
+        
+        return JSONResponse(await _processar_chamada(data))
     
     @app.get("/health")
     async def health_check():
         """Endpoint de saúde"""
-        return {"status": "ok", "message": "Escola MCP Server is running"}
+        return {
+            "status": "ok",
+            "message": "Escola MCP Server is running",
+            "pool": db_pool.metricas(),
+            "executor": executor_ferramentas.metricas(),
+            "cache": cache_ferramentas.metricas(),
+        }
+    
+    @app.on_event("shutdown")
+    def fechar_pool():
+        executor_ferramentas.encerrar()
+        db_pool.fechar()
     
     # Iniciar servidor HTTP
     host = os.getenv("MCP_HOST", "127.0.0.1")
@@ -0,0 +1,322 @@
+"""
+Motor assíncrono de sessões de conversa
+
+Cada sessão é só um EstadoSessao serializado; o AgenteIAInteligente é
+montado por mensagem em cima desse estado. O event loop multiplexa as
+sessões e o pipeline de análise (síncrono) roda num pool de threads
+limitado que compartilha um único ClienteHTTP keep-alive.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from agente_ia_inteligente import AgenteIAInteligente
+from cache_llm import CacheRespostasLLM
+from cliente_http import ClienteHTTP
+from especulacao import ExecutorEspeculativo
+from estado_sessao import EstadoSessao
+from stream_ollama import complemento_resposta
+
+logger = logging.getLogger(__name__)
+
+
+class SessaoNaoEncontradaError(Exception):
+    """Sessão inexistente ou expirada"""
+    pass
+
+
+class AutenticacaoError(Exception):
+    """Token ausente, inválido ou de outro aluno; status é o código HTTP da resposta"""
+
+    def __init__(self, mensagem, status=401):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ArmazemSessoes:
+    """
+    Estados guardados como JSON em memória.
+
+    Cada leitura devolve uma cópia independente; outro backend (arquivo,
+    Redis) só precisa oferecer a mesma interface.
+    """
+
+    def __init__(self):
+        self._dados = {}  # sessao_id -> (json, ultima_atividade)
+        self._lock = threading.Lock()
+
+    def obter(self, sessao_id):
+        with self._lock:
+            salvo = self._dados.get(sessao_id)
+        return json.loads(salvo[0]) if salvo else None
+
+    def salvar(self, sessao_id, estado):
+        texto = json.dumps(estado, ensure_ascii=False)
+        with self._lock:
+            self._dados[sessao_id] = (texto, estado["ultima_atividade"])
+
+    def remover(self, sessao_id):
+        with self._lock:
+            return self._dados.pop(sessao_id, None) is not None
+
+    def ociosas(self, limite):
+        """Ids das sessões sem atividade desde o instante limite"""
+        with self._lock:
+            return [sid for sid, (_, atividade) in self._dados.items() if atividade < limite]
+
+    def __len__(self):
+        return len(self._dados)
+
+
+class MotorSessoes:
+    """
+    Atende muitas sessões de chat num único processo.
+
+    Args:
+        mcp_url: URL base do MCP Server
+        flask_url: URL base da API Flask (valida os tokens de login)
+        max_turnos_simultaneos: threads para o pipeline do agente
+        ttl_ociosa: segundos sem mensagem até a sessão ser descartada
+        armazem: onde os estados serializados ficam guardados
+        cache_llm: cache de respostas do LLM compartilhado pelas sessões
+        especulacao: executor das chamadas especulativas, também compartilhado
+    """
+
+    def __init__(self, mcp_url="http://localhost:8000", max_turnos_simultaneos=32,
+                 ttl_ociosa=1800, armazem=None, http=None, cache_llm=None,
+                 especulacao=None, flask_url="http://localhost:5000"):
+        self.mcp_url = mcp_url
+        self.flask_url = flask_url
+        self.ttl_ociosa = ttl_ociosa
+        self.armazem = armazem if armazem is not None else ArmazemSessoes()
+        self.http = http if http is not None else ClienteHTTP(conexoes_por_host=max_turnos_simultaneos)
+        self.cache_llm = cache_llm if cache_llm is not None else CacheRespostasLLM.do_ambiente()
+        self.especulacao = especulacao if especulacao is not None else ExecutorEspeculativo.do_ambiente()
+        self.ferramentas = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_turnos_simultaneos,
+            thread_name_prefix="sessao-chat",
+        )
+        self._travas = {}
+        self._tarefa_limpeza = None
+        self._stats = {
+            "sessoes_criadas": 0,
+            "sessoes_expiradas": 0,
+            "mensagens": 0,
+            "erros": 0,
+            "tempo_turno_total_ms": 0.0,
+        }
+
+    def _agente(self, estado):
+        return AgenteIAInteligente(
+            self.mcp_url, estado=estado, http=self.http, ferramentas=self.ferramentas,
+            cache_llm=self.cache_llm, especulacao=self.especulacao,
+        )
+
+    async def _em_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _trava(self, sessao_id):
+        # Mensagens da mesma sessão são processadas uma de cada vez, em ordem
+        trava = self._travas.get(sessao_id)
+        if trava is None:
+            trava = self._travas[sessao_id] = asyncio.Lock()
+        return trava
+
+    # ------------------------------------------------------------ ciclo de vida
+
+    async def iniciar(self):
+        """Carrega a lista de ferramentas uma vez e agenda a limpeza de sessões"""
+        self.ferramentas = await self._em_thread(self._agente(EstadoSessao()).listar_ferramentas)
+        self._tarefa_limpeza = asyncio.create_task(self._limpar_periodicamente())
+
+    async def fechar(self):
+        if self._tarefa_limpeza:
+            self._tarefa_limpeza.cancel()
+        self._executor.shutdown(wait=False)
+        self.especulacao.fechar()
+        self.cache_llm.salvar()
+        self.http.fechar()
+
+    async def _limpar_periodicamente(self, intervalo=60):
+        while True:
+            await asyncio.sleep(intervalo)
+            self.expirar_ociosas()
+
+    def expirar_ociosas(self):
+        for sessao_id in self.armazem.ociosas(time.time() - self.ttl_ociosa):
+            trava = self._travas.get(sessao_id)
+            if trava is not None and trava.locked():
+                continue
+            self.armazem.remover(sessao_id)
+            self._travas.pop(sessao_id, None)
+            self._stats["sessoes_expiradas"] += 1
+
+    # ----------------------------------------------------------------- sessões
+
+    def _aluno_do_token(self, token):
+        """id do aluno dono do token JWT do Flask, ou None se o token não vale"""
+        response = self.http.get(
+            "flask",
+            f"{self.flask_url}/api/auth/validar-token",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if response.status_code != 200:
+            return None
+        return (response.json().get("aluno") or {}).get("id")
+
+    async def criar_sessao(self, aluno_id=None, token=None):
+        """
+        Cria uma sessão (visitante ou aluno). Retorna o id e o estado inicial.
+
+        Sessão de aluno exige o token do login no Flask (/api/auth/login);
+        sem aluno_id, o aluno é o do token.
+
+        Raises:
+            AutenticacaoError: aluno_id sem token, token inválido ou de outro aluno
+            SessaoNaoEncontradaError: aluno_id informado não existe
+        """
+        if token:
+            try:
+                do_token = await self._em_thread(self._aluno_do_token, token)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning("Falha ao validar token no Flask: %s", e)
+                raise AutenticacaoError("Não foi possível validar o token", status=503)
+            if do_token is None:
+                raise AutenticacaoError("Token inválido ou expirado")
+            if aluno_id is None:
+                aluno_id = do_token
+            elif aluno_id != do_token:
+                raise AutenticacaoError("Token de outro aluno", status=403)
+        elif aluno_id is not None:
+            raise AutenticacaoError("Sessão de aluno exige o token do login (Authorization: Bearer <token>)")
+
+        estado = EstadoSessao(aluno_nome="Visitante")
+        if aluno_id is not None:
+            autenticado = await self._em_thread(self._agente(estado).autenticar, aluno_id)
+            if not autenticado:
+                raise SessaoNaoEncontradaError(f"Aluno {aluno_id} não encontrado")
+
+        sessao_id = secrets.token_urlsafe(16)
+        self.armazem.salvar(sessao_id, estado.para_dict())
+        self._stats["sessoes_criadas"] += 1
+        return sessao_id, estado.para_dict()
+
+    def estado(self, sessao_id):
+        estado = self.armazem.obter(sessao_id)
+        if estado is None:
+            raise SessaoNaoEncontradaError(f"Sessão {sessao_id} não encontrada")
+        return estado
+
+    def encerrar_sessao(self, sessao_id):
+        self._travas.pop(sessao_id, None)
+        return self.armazem.remover(sessao_id)
+
+    def _processar_turno(self, dados_estado, mensagem, ao_fragmento=None):
+        """Roda na thread: restaura o estado, processa e devolve o novo estado"""
+        estado = EstadoSessao.de_dict(dados_estado)
+        resposta = self._agente(estado).processar_mensagem(mensagem, ao_fragmento=ao_fragmento)
+        estado.ultima_atividade = time.time()
+        return resposta, estado.para_dict()
+
+    async def _concluir_turno(self, sessao_id, turno, inicio):
+        """Espera o turno, contabiliza e salva o novo estado; retorna a resposta"""
+        try:
+            resposta, novo_estado = await turno
+        except Exception:
+            self._stats["erros"] += 1
+            logger.exception("Erro ao processar mensagem da sessão %s", sessao_id)
+            raise
+        finally:
+            self._stats["mensagens"] += 1
+            self._stats["tempo_turno_total_ms"] += (time.perf_counter() - inicio) * 1000
+
+        # Sessão encerrada durante o turno não é recriada
+        if self.armazem.obter(sessao_id) is not None:
+            self.armazem.salvar(sessao_id, novo_estado)
+        return resposta
+
+    async def enviar(self, sessao_id, mensagem):
+        """Processa uma mensagem da sessão e retorna a resposta do assistente"""
+        async with self._trava(sessao_id):
+            dados_estado = self.estado(sessao_id)
+            inicio = time.perf_counter()
+            turno = self._em_thread(self._processar_turno, dados_estado, mensagem)
+            return await self._concluir_turno(sessao_id, turno, inicio)
+
+    async def turno_stream(self, sessao_id, mensagem):
+        """
+        Como enviar(), em eventos: ("fragmento", texto) conforme o LLM
+        produz e, no fim, ("resposta", retorno de processar_mensagem).
+
+        A resposta é a canônica: se o turno mudou de rumo depois de começar
+        a transmitir, os fragmentos já enviados não fazem parte dela.
+
+        Raises:
+            SessaoNaoEncontradaError: antes do primeiro evento
+        """
+        async with self._trava(sessao_id):
+            dados_estado = self.estado(sessao_id)
+            loop = asyncio.get_running_loop()
+            fila = asyncio.Queue()
+
+            def ao_fragmento(texto):
+                loop.call_soon_threadsafe(fila.put_nowait, texto)
+
+            inicio = time.perf_counter()
+            turno = loop.run_in_executor(
+                self._executor, self._processar_turno, dados_estado, mensagem, ao_fragmento
+            )
+            # Agendado depois dos fragmentos da mesma thread: marca o fim da fila
+            turno.add_done_callback(lambda _: fila.put_nowait(None))
+
+            try:
+                while True:
+                    fragmento = await fila.get()
+                    if fragmento is None:
+                        break
+                    yield "fragmento", fragmento
+            finally:
+                # Mesmo com o cliente desconectado, o turno termina e o estado é salvo
+                resposta = await self._concluir_turno(sessao_id, turno, inicio)
+
+            yield "resposta", resposta
+
+    async def enviar_stream(self, sessao_id, mensagem):
+        """
+        Texto da resposta em pedaços (para uma saída que não volta atrás).
+
+        Depois dos fragmentos vem o que falta da resposta (complemento_resposta):
+        normalmente a concatenação é a resposta; se o turno mudou de rumo, é o
+        texto abandonado seguido da resposta inteira.
+
+        Raises:
+            SessaoNaoEncontradaError: antes do primeiro pedaço
+        """
+        emitido = []
+        async for tipo, texto in self.turno_stream(sessao_id, mensagem):
+            if tipo == "fragmento":
+                emitido.append(texto)
+                yield texto
+            else:
+                resto = complemento_resposta("".join(emitido), texto)
+                if resto:
+                    yield resto
+
+    def metricas(self):
+        dados = dict(self._stats)
+        dados["sessoes_ativas"] = len(self.armazem)
+        dados["turnos_em_andamento"] = sum(1 for t in self._travas.values() if t.locked())
+        mensagens = dados["mensagens"]
+        dados["tempo_turno_medio_ms"] = round(dados.pop("tempo_turno_total_ms") / mensagens, 2) if mensagens else 0.0
+        dados["http"] = self.http.metricas()
+        dados["cache_llm"] = self.cache_llm.metricas()
+        dados["especulacao"] = self.especulacao.metricas()
+        return dados
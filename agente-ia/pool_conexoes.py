@@ -0,0 +1,262 @@
+"""
+Pool de conexões SQLite compartilhado pelas ferramentas do MCP Server
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("escola-mcp.pool")
+
+# PRAGMAs aplicados em toda conexão nova (ordem importa: journal_mode primeiro)
+PRAGMAS_PADRAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,  # 256MB
+    "cache_size": -16384,    # valor negativo = KiB (16MB)
+    "temp_store": "MEMORY",
+}
+
+
+class PoolEsgotadoError(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera"""
+    pass
+
+
+class ConexaoPooled:
+    """
+    Envelope de uma conexão emprestada do pool.
+
+    Repassa tudo para a sqlite3.Connection real; close() devolve a conexão ao
+    pool em vez de fechá-la e pode ser chamado mais de uma vez.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Conexão já foi devolvida ao pool")
+        return getattr(conn, nome)
+
+    def close(self):
+        """Devolve a conexão ao pool"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.devolver(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # Garante a devolução mesmo quando uma ferramenta esquece o close()
+        if self.__dict__.get("_conn") is not None:
+            self.close()
+
+
+class PoolConexoesSQLite:
+    """
+    Pool limitado de conexões SQLite thread-safe.
+
+    As conexões são criadas sob demanda até tamanho_maximo, configuradas com
+    PRAGMAS_PADRAO e reutilizadas (LIFO) entre as chamadas de ferramentas.
+    Conexões ociosas há mais de intervalo_verificacao segundos passam por um
+    "SELECT 1" antes de voltar a uso.
+    """
+
+    def __init__(self, db_path, tamanho_maximo=8, timeout=10.0, pragmas=None,
+                 intervalo_verificacao=30.0):
+        self.db_path = db_path
+        self.tamanho_maximo = max(1, int(tamanho_maximo))
+        self.timeout = timeout
+        self.pragmas = dict(PRAGMAS_PADRAO if pragmas is None else pragmas)
+        self.intervalo_verificacao = intervalo_verificacao
+
+        self._cond = threading.Condition()
+        self._ociosas = []  # [(conn, instante_devolucao)]
+        self._total = 0
+        self._fechado = False
+        self._tabelas = None
+
+        self._stats = {
+            "criadas": 0,
+            "emprestimos": 0,
+            "devolucoes": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "descartadas": 0,
+            "falhas_conexao": 0,
+            "tempo_espera_total_ms": 0.0,
+        }
+
+    # ----------------------------------------------------------------- criação
+
+    def _criar_conexao(self):
+        """Abre e configura uma conexão nova (fora do lock)"""
+        if not os.path.exists(self.db_path):
+            raise sqlite3.OperationalError(f"Arquivo do banco não encontrado: {self.db_path}")
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for nome, valor in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {nome} = {valor}")
+            except sqlite3.Error as e:
+                logger.warning(f"PRAGMA {nome}={valor} ignorado: {e}")
+        return conn
+
+    def _conexao_saudavel(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Conexão ociosa descartada no health check: {e}")
+            return False
+
+    @staticmethod
+    def _fechar_silencioso(conn):
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.debug(f"Erro ao fechar conexão descartada: {e}")
+
+    # ------------------------------------------------------ empréstimo/devolução
+
+    def emprestar(self, timeout=None):
+        """Retorna uma ConexaoPooled; espera até timeout segundos por uma vaga"""
+        espera = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        limite = inicio + espera
+        esperou = False
+
+        while True:
+            conn = None
+            verificar = False
+            with self._cond:
+                while True:
+                    if self._fechado:
+                        raise PoolEsgotadoError("Pool de conexões encerrado")
+                    if self._ociosas:
+                        conn, devolvida_em = self._ociosas.pop()
+                        verificar = (time.monotonic() - devolvida_em) > self.intervalo_verificacao
+                        break
+                    if self._total < self.tamanho_maximo:
+                        # Reserva a vaga antes de abrir a conexão fora do lock
+                        self._total += 1
+                        break
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolEsgotadoError(
+                            f"Nenhuma conexão livre após {espera:.1f}s "
+                            f"({self.tamanho_maximo} em uso)"
+                        )
+                    if not esperou:
+                        esperou = True
+                        self._stats["esperas"] += 1
+                    self._cond.wait(restante)
+
+            if conn is None:
+                try:
+                    conn = self._criar_conexao()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._stats["falhas_conexao"] += 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["criadas"] += 1
+            elif verificar and not self._conexao_saudavel(conn):
+                self._fechar_silencioso(conn)
+                with self._cond:
+                    self._total -= 1
+                    self._stats["descartadas"] += 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._stats["emprestimos"] += 1
+                self._stats["tempo_espera_total_ms"] += (time.monotonic() - inicio) * 1000
+            return ConexaoPooled(self, conn)
+
+    def devolver(self, conn):
+        """Devolve uma sqlite3.Connection crua ao pool"""
+        descartar = False
+        try:
+            if conn.in_transaction:
+                # Transação esquecida aberta não pode vazar para o próximo uso
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Rollback na devolução falhou, descartando conexão: {e}")
+            descartar = True
+
+        with self._cond:
+            self._stats["devolucoes"] += 1
+            if self._fechado or descartar:
+                self._total -= 1
+                if descartar:
+                    self._stats["descartadas"] += 1
+            else:
+                self._ociosas.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._fechar_silencioso(conn)
+
+    @contextmanager
+    def conexao(self, timeout=None):
+        """Empresta uma conexão pelo escopo do bloco with"""
+        conn = self.emprestar(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------ schema
+
+    def tabela_existe(self, nome):
+        """Consulta sqlite_master uma única vez e mantém o conjunto em cache"""
+        if self._tabelas is None:
+            with self.conexao() as conn:
+                rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+            self._tabelas = frozenset(row[0] for row in rows)
+        return nome in self._tabelas
+
+    def invalidar_schema(self):
+        self._tabelas = None
+
+    # ----------------------------------------------------------------- métricas
+
+    def metricas(self):
+        """Snapshot das contagens do pool (exposto em /health)"""
+        with self._cond:
+            ociosas = len(self._ociosas)
+            dados = dict(self._stats)
+            dados.update({
+                "tamanho_maximo": self.tamanho_maximo,
+                "abertas": self._total,
+                "ociosas": ociosas,
+                "em_uso": self._total - ociosas,
+            })
+        dados["tempo_espera_total_ms"] = round(dados["tempo_espera_total_ms"], 2)
+        return dados
+
+    def fechar(self):
+        """Fecha as conexões ociosas; as emprestadas são fechadas ao voltar"""
+        with self._cond:
+            self._fechado = True
+            ociosas, self._ociosas = self._ociosas, []
+            self._total -= len(ociosas)
+            self._cond.notify_all()
+        for conn, _ in ociosas:
+            self._fechar_silencioso(conn)
@@ -0,0 +1,110 @@
+"""
+Registro de ferramentas do MCP Server gerado a partir dos @mcp.tool()
+
+Monta, uma única vez na subida do servidor:
+- o mapa nome -> função usado pelo tools/call
+- o schema do tools/list, já serializado e com ETag
+"""
+import hashlib
+import inspect
+import json
+import re
+
+# Tipos do JSON Schema gerado pelo pydantic -> tipos anunciados ao agente
+_TIPOS_JSONRPC = {"integer": "number"}
+
+_RE_ARG = re.compile(r"^\s*(\w+)\s*:\s*(.+)$")
+
+
+def _ferramentas_registradas(mcp):
+    # FastMCP não expõe as funções decoradas por API pública síncrona
+    return mcp._tool_manager.list_tools()
+
+
+def _separar_docstring(doc):
+    """Retorna (descrição curta, {parametro: descrição}) de uma docstring"""
+    doc = inspect.cleandoc(doc or "")
+    if not doc:
+        return "", {}
+
+    partes = doc.split("Args:", 1)
+    descricao = partes[0].strip().split("\n\n")[0].replace("\n", " ").strip()
+    descricao = descricao.rstrip(".")
+
+    argumentos = {}
+    if len(partes) > 1:
+        for linha in partes[1].splitlines():
+            match = _RE_ARG.match(linha)
+            if match:
+                argumentos[match.group(1)] = match.group(2).strip()
+    return descricao, argumentos
+
+
+def _tipo_parametro(schema):
+    tipo = schema.get("type")
+    if tipo is None:
+        # Optional[X] vira anyOf [{type: X}, {type: null}]
+        tipos = [s.get("type") for s in schema.get("anyOf", []) if s.get("type") != "null"]
+        tipo = tipos[0] if tipos else "string"
+    return _TIPOS_JSONRPC.get(tipo, tipo)
+
+
+def construir_registro(mcp):
+    """Mapa nome_ferramenta -> função Python original"""
+    return {tool.name: tool.fn for tool in _ferramentas_registradas(mcp)}
+
+
+def construir_schema_ferramentas(mcp):
+    """Lista no formato do tools/list a partir das assinaturas e docstrings"""
+    ferramentas = []
+    for tool in _ferramentas_registradas(mcp):
+        descricao, docs_args = _separar_docstring(tool.fn.__doc__)
+        propriedades = {}
+        for nome, schema in tool.parameters.get("properties", {}).items():
+            prop = {"type": _tipo_parametro(schema)}
+            if nome in docs_args:
+                prop["description"] = docs_args[nome]
+            propriedades[nome] = prop
+
+        input_schema = {"type": "object", "properties": propriedades}
+        obrigatorios = tool.parameters.get("required", [])
+        if obrigatorios:
+            input_schema["required"] = list(obrigatorios)
+
+        ferramentas.append({
+            "name": tool.name,
+            "description": descricao or tool.name,
+            "inputSchema": input_schema,
+        })
+    return ferramentas
+
+
+class ListaFerramentasSerializada:
+    """
+    Resposta do tools/list pré-serializada.
+
+    Só o id da requisição muda entre respostas, então o "result" é
+    serializado uma vez e emendado no envelope JSON-RPC.
+    """
+
+    def __init__(self, ferramentas):
+        self.ferramentas = ferramentas
+        self._result = json.dumps(
+            {"tools": ferramentas}, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self._result).hexdigest()[:32] + '"'
+
+    def corpo(self, request_id):
+        """Bytes da resposta JSON-RPC completa para este id"""
+        id_json = json.dumps(request_id).encode("utf-8")
+        return b'{"jsonrpc":"2.0","id":' + id_json + b',"result":' + self._result + b"}"
+
+    def resultado(self):
+        """Objeto result (usado dentro de lotes)"""
+        return {"tools": self.ferramentas}
+
+    def etag_confere(self, if_none_match):
+        if not if_none_match:
+            return False
+        candidatos = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidatos or self.etag in candidatos
@@ -0,0 +1,122 @@
+"""
+Registro de templates HTML e estilos do WeasyPrint
+
+Os templates são carregados por um jinja2.Environment único: cada arquivo
+é lido e compilado uma vez, e o bytecode vai para um
+FileSystemBytecodeCache, então um processo novo também não recompila.
+Com auto_reload o Environment só confere o mtime a cada uso e recarrega
+quando o arquivo muda.
+
+As folhas de estilo (templates/*.css) viram weasyprint.CSS uma vez por
+mtime, com uma FontConfiguration compartilhada por todas as renderizações.
+renderizar_pdf devolve os bytes e o tempo de cada fase (template, layout,
+write).
+"""
+import logging
+import os
+import threading
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+logger = logging.getLogger("escola-mcp.templates")
+
+# Formato dos templates ('d/m/Y H:i:s') -> strftime
+_FORMATOS_DATA = {'d': '%d', 'm': '%m', 'Y': '%Y', 'y': '%y', 'H': '%H', 'i': '%M', 's': '%S'}
+
+
+def filtro_data(valor, formato='d/m/Y'):
+    """Filtro |date dos templates"""
+    if not valor:  # None ou variável ausente no contexto
+        return ''
+    return valor.strftime(''.join(_FORMATOS_DATA.get(letra, letra) for letra in formato))
+
+
+class RegistroTemplates:
+    """
+    Args:
+        diretorios: onde procurar templates e CSS, em ordem
+        diretorio_bytecode: cache de bytecode do Jinja (padrão: temporário do sistema)
+    """
+
+    def __init__(self, diretorios, diretorio_bytecode=None):
+        self.diretorios = [d for d in diretorios if os.path.isdir(d)]
+        if diretorio_bytecode:
+            os.makedirs(diretorio_bytecode, exist_ok=True)
+        self.ambiente = Environment(
+            loader=FileSystemLoader(self.diretorios),
+            autoescape=select_autoescape(['html']),
+            auto_reload=True,
+            bytecode_cache=FileSystemBytecodeCache(diretorio_bytecode),
+        )
+        self.ambiente.filters['date'] = filtro_data
+        self._lock = threading.Lock()
+        self._estilos = {}  # nome -> (mtime, CSS)
+        self._fontes = None
+
+    def template(self, nome):
+        """Template compilado (jinja2.TemplateNotFound se não existir)"""
+        return self.ambiente.get_template(nome)
+
+    def _localizar(self, nome):
+        for diretorio in self.diretorios:
+            caminho = os.path.join(diretorio, nome)
+            if os.path.exists(caminho):
+                return caminho
+        return None
+
+    def fontes(self):
+        from weasyprint.text.fonts import FontConfiguration
+
+        with self._lock:
+            if self._fontes is None:
+                self._fontes = FontConfiguration()
+            return self._fontes
+
+    def estilo(self, nome):
+        """weasyprint.CSS da folha, relida só quando o mtime muda (None se não existir)"""
+        from weasyprint import CSS
+
+        caminho = self._localizar(nome)
+        if caminho is None:
+            return None
+        mtime = os.stat(caminho).st_mtime_ns
+        with self._lock:
+            guardado = self._estilos.get(nome)
+            if guardado is not None and guardado[0] == mtime:
+                return guardado[1]
+        folha = CSS(filename=caminho, font_config=self.fontes())
+        with self._lock:
+            self._estilos[nome] = (mtime, folha)
+        return folha
+
+    def renderizar_pdf(self, nome_template, contexto, estilos=()):
+        """
+        PDF do template com o contexto.
+
+        Returns:
+            (bytes do PDF, {'template': s, 'layout': s, 'write': s})
+        """
+        from weasyprint import HTML
+
+        inicio = time.perf_counter()
+        html = self.template(nome_template).render(**contexto)
+        pronto_template = time.perf_counter()
+
+        folhas = [folha for folha in (self.estilo(nome) for nome in estilos) if folha is not None]
+        documento = HTML(string=html).render(stylesheets=folhas, font_config=self.fontes())
+        pronto_layout = time.perf_counter()
+
+        pdf = documento.write_pdf()
+        fim = time.perf_counter()
+
+        tempos = {
+            'template': round(pronto_template - inicio, 4),
+            'layout': round(pronto_layout - pronto_template, 4),
+            'write': round(fim - pronto_layout, 4),
+        }
+        logger.info(
+            "PDF %s: template %.4fs, layout %.4fs, write %.4fs",
+            nome_template, tempos['template'], tempos['layout'], tempos['write'],
+        )
+        return pdf, tempos
@@ -0,0 +1,162 @@
+"""
+API de chat (HTTP + WebSocket) na frente do AgenteIAInteligente
+
+Uso:
+    python servidor_chat.py
+
+Endpoints:
+    POST   /sessoes                     cria sessão (vazio = visitante; aluno exige
+                                        Authorization: Bearer <token de /api/auth/login>,
+                                        com ou sem {"aluno_id": 1})
+    GET    /sessoes/{id}                estado serializado da sessão
+    DELETE /sessoes/{id}                encerra a sessão
+    POST   /sessoes/{id}/mensagens      {"mensagem": "..."} -> {"resposta": "..."}
+    POST   /sessoes/{id}/mensagens/stream  {"mensagem": "..."} -> texto em pedaços
+    WS     /sessoes/{id}/ws             texto in, {"fragmento": "..."}* e {"resposta": "..."} out
+                                        (resposta completa, substitui os fragmentos)
+    GET    /health                      métricas do motor
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from motor_sessoes import AutenticacaoError, MotorSessoes, SessaoNaoEncontradaError
+
+logger = logging.getLogger(__name__)
+
+
+class NovaSessao(BaseModel):
+    aluno_id: Optional[int] = None
+
+
+class Mensagem(BaseModel):
+    mensagem: str
+
+
+def criar_app(motor=None):
+    """Monta o app FastAPI; sem motor, cria um a partir das variáveis de ambiente"""
+    if motor is None:
+        motor = MotorSessoes(
+            mcp_url=os.getenv("MCP_URL", "http://localhost:8000"),
+            flask_url=os.getenv("FLASK_URL", "http://localhost:5000"),
+            max_turnos_simultaneos=int(os.getenv("CHAT_MAX_TURNOS", "32")),
+            ttl_ociosa=int(os.getenv("CHAT_SESSAO_TTL", "1800")),
+        )
+
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        await motor.iniciar()
+        yield
+        await motor.fechar()
+
+    app = FastAPI(title="Agente IA - Chat", lifespan=ciclo_de_vida)
+    app.state.motor = motor
+
+    def _nao_encontrada(e):
+        return JSONResponse({"erro": str(e)}, status_code=404)
+
+    @app.post("/sessoes", status_code=201)
+    async def criar_sessao(dados: NovaSessao = None, authorization: Optional[str] = Header(None)):
+        # Mesmo formato do Flask: "Bearer <token>" ou só o token
+        token = authorization.split(" ")[-1] if authorization else None
+        try:
+            sessao_id, estado = await motor.criar_sessao((dados or NovaSessao()).aluno_id, token=token)
+        except AutenticacaoError as e:
+            return JSONResponse({"erro": str(e)}, status_code=e.status)
+        except SessaoNaoEncontradaError as e:
+            return _nao_encontrada(e)
+        return {"sessao_id": sessao_id, "aluno_id": estado["aluno_id"], "aluno_nome": estado["aluno_nome"]}
+
+    @app.get("/sessoes/{sessao_id}")
+    async def obter_sessao(sessao_id: str):
+        try:
+            return motor.estado(sessao_id)
+        except SessaoNaoEncontradaError as e:
+            return _nao_encontrada(e)
+
+    @app.delete("/sessoes/{sessao_id}")
+    async def encerrar_sessao(sessao_id: str):
+        if not motor.encerrar_sessao(sessao_id):
+            return JSONResponse({"erro": "Sessão não encontrada"}, status_code=404)
+        return Response(status_code=204)
+
+    @app.post("/sessoes/{sessao_id}/mensagens")
+    async def enviar_mensagem(sessao_id: str, dados: Mensagem):
+        texto = dados.mensagem.strip()
+        if not texto:
+            return JSONResponse({"erro": "Mensagem vazia"}, status_code=400)
+        try:
+            resposta = await motor.enviar(sessao_id, texto)
+        except SessaoNaoEncontradaError as e:
+            return _nao_encontrada(e)
+        except Exception as e:
+            return JSONResponse({"erro": f"Erro ao processar mensagem: {e}"}, status_code=500)
+        return {"resposta": resposta}
+
+    @app.post("/sessoes/{sessao_id}/mensagens/stream")
+    async def enviar_mensagem_stream(sessao_id: str, dados: Mensagem):
+        texto = dados.mensagem.strip()
+        if not texto:
+            return JSONResponse({"erro": "Mensagem vazia"}, status_code=400)
+        try:
+            motor.estado(sessao_id)
+        except SessaoNaoEncontradaError as e:
+            return _nao_encontrada(e)
+        return StreamingResponse(
+            motor.enviar_stream(sessao_id, texto), media_type="text/plain; charset=utf-8"
+        )
+
+    @app.websocket("/sessoes/{sessao_id}/ws")
+    async def chat_websocket(websocket: WebSocket, sessao_id: str):
+        try:
+            motor.estado(sessao_id)
+        except SessaoNaoEncontradaError:
+            await websocket.close(code=4404)
+            return
+
+        await websocket.accept()
+        try:
+            while True:
+                texto = (await websocket.receive_text()).strip()
+                if not texto:
+                    continue
+                try:
+                    # Pedaços do LLM conforme chegam; no fim, a resposta de
+                    # processar_mensagem, que substitui os fragmentos
+                    async for tipo, conteudo in motor.turno_stream(sessao_id, texto):
+                        if tipo == "fragmento":
+                            await websocket.send_json({"fragmento": conteudo})
+                        else:
+                            resposta = conteudo
+                except SessaoNaoEncontradaError as e:
+                    await websocket.send_json({"erro": str(e)})
+                    await websocket.close(code=4404)
+                    return
+                except Exception as e:
+                    await websocket.send_json({"erro": f"Erro ao processar mensagem: {e}"})
+                    continue
+                await websocket.send_json({"resposta": resposta})
+        except WebSocketDisconnect:
+            logger.debug("WebSocket da sessão %s desconectado", sessao_id)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "motor": motor.metricas()}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        criar_app(),
+        host=os.getenv("CHAT_HOST", "127.0.0.1"),
+        port=int(os.getenv("CHAT_PORT", "8100")),
+        log_level="info",
+    )
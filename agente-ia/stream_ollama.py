@@ -0,0 +1,309 @@
+"""
+Leitura incremental das respostas do Ollama com "stream": true
+
+O Ollama devolve NDJSON: uma linha por pedaço gerado ({"response": ...} no
+/api/generate, {"message": {"content": ...}} no /api/chat) e uma última com
+"done": true e as estatísticas de tempo (prompt eval x eval).
+StreamOllama itera os pedaços de texto; LeitorDecisao recebe esses pedaços
+e monta a decisão JSON do agente ({"acao": ..., ...}) aos poucos, avisando
+quando a chamada de ferramenta já está completa e repassando o texto de
+"resposta" à medida que chega.
+"""
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class StreamOllama:
+    """
+    Itera os fragmentos de texto de uma resposta em streaming do Ollama.
+
+    Depois do fim, `final` guarda a última linha (done=true) com contagens e
+    durações. fechar() encerra a conexão mesmo que o modelo ainda esteja
+    gerando (a conexão volta ao pool só quando o corpo é lido até o fim).
+    Ao fechar, os tempos da chamada são registrados no log com o `rotulo`;
+    `inicio` (time.perf_counter() de quando o pedido saiu) é a referência
+    do tempo até o primeiro token.
+    """
+
+    def __init__(self, response, rotulo="ollama", inicio=None):
+        self.response = response
+        self.rotulo = rotulo
+        self.final = None
+        self._inicio = inicio if inicio is not None else time.perf_counter()  # envio do pedido
+        self._primeiro_token = None
+        self._registrado = False
+
+    def __iter__(self):
+        try:
+            for linha in self.response.iter_lines():
+                if not linha:
+                    continue
+                try:
+                    dados = json.loads(linha)
+                except ValueError:
+                    logger.debug("Linha NDJSON inválida do Ollama: %r", linha[:200])
+                    continue
+                if dados.get("error"):
+                    raise RuntimeError(f"Ollama: {dados['error']}")
+                texto = dados.get("response") or (dados.get("message") or {}).get("content")
+                if texto:
+                    if self._primeiro_token is None:
+                        self._primeiro_token = time.perf_counter()
+                    yield texto
+                if dados.get("done"):
+                    self.final = dados
+                    return
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        self.response.close()
+        if not self._registrado:
+            self._registrado = True
+            logger.info("%s: %s", self.rotulo, formatar_tempos(self.tempos()))
+
+    def tempos(self):
+        """
+        Tempos da chamada em ms.
+
+        primeiro_token_ms é medido aqui (inclui rede e avaliação do prompt) e
+        é o único disponível quando o stream é fechado antes do fim. Com a
+        linha final, vêm também as durações do próprio Ollama: carga do
+        modelo, avaliação do prompt (tokens que não estavam no KV cache) e
+        geração.
+        """
+        tempos = {"primeiro_token_ms": None, "concluido": self.final is not None}
+        if self._primeiro_token is not None:
+            tempos["primeiro_token_ms"] = round((self._primeiro_token - self._inicio) * 1000, 1)
+        if self.final is None:
+            return tempos
+
+        for campo in ("total", "load", "prompt_eval", "eval"):
+            nanos = self.final.get(f"{campo}_duration")
+            if nanos is not None:
+                tempos[f"{campo}_ms"] = round(nanos / 1e6, 1)
+        for campo in ("prompt_eval", "eval"):
+            tokens = self.final.get(f"{campo}_count")
+            if tokens is None:
+                continue
+            tempos[f"{campo}_tokens"] = tokens
+            nanos = self.final.get(f"{campo}_duration")
+            if nanos:
+                tempos[f"{campo}_tokens_s"] = round(tokens / (nanos / 1e9), 1)
+        return tempos
+
+
+def formatar_tempos(tempos):
+    """Linha curta para o log: prompt eval x eval"""
+    partes = [f"primeiro token {tempos['primeiro_token_ms']} ms"]
+    if not tempos["concluido"]:
+        return partes[0] + " (stream encerrado antes do fim)"
+    if "load_ms" in tempos:
+        partes.append(f"carga {tempos['load_ms']} ms")
+    for campo, nome in (("prompt_eval", "prompt"), ("eval", "geração")):
+        if f"{campo}_ms" in tempos:
+            partes.append(
+                f"{nome} {tempos.get(f'{campo}_tokens', '?')} tok em {tempos[f'{campo}_ms']} ms"
+                f" ({tempos.get(f'{campo}_tokens_s', '?')} tok/s)"
+            )
+    return ", ".join(partes)
+
+
+class LeitorDecisao:
+    """
+    Parser incremental do objeto JSON de decisão.
+
+    Cada campo de primeiro nível entra em `campos` assim que o valor fecha,
+    então {"acao": "ferramenta", "ferramenta": ..., "argumentos": {...}}
+    fica `pronta` antes dos tokens finais. O conteúdo da string "resposta"
+    é decodificado e entregue a `ao_texto` a cada fragmento recebido.
+    Texto que não é JSON só marca `invalido`; quem chama decide o que
+    fazer com o texto bruto.
+    """
+
+    def __init__(self, ao_texto=None):
+        self.ao_texto = ao_texto
+        self.texto = []
+        self.campos = {}
+        self.completo = False
+        self.invalido = False
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._esperando = "inicio"  # inicio, chave, dois_pontos, valor, apos_valor
+        self._chave = None
+        self._inicio = None  # posição onde começou a chave ou o valor atual
+        self._unicode = None  # dígitos de um \uXXXX sendo lido em "resposta"
+        self._alta = None  # surrogate alto esperando o baixo (\ud83d\ude00 -> um caractere)
+        self._emitindo = False
+        self._saida = []
+
+    @property
+    def pronta(self):
+        """Chamada de ferramenta completa: dá para executar sem esperar o resto"""
+        return (self.campos.get("acao") == "ferramenta"
+                and "ferramenta" in self.campos and "argumentos" in self.campos)
+
+    def decisao(self):
+        return dict(self.campos)
+
+    def alimentar(self, fragmento):
+        for ch in fragmento:
+            self.texto.append(ch)
+            if not (self.completo or self.invalido):
+                self._caractere(ch, len(self.texto) - 1)
+        if self._saida:
+            self.ao_texto("".join(self._saida))
+            self._saida.clear()
+
+    def _caractere(self, ch, pos):
+        if self._em_string:
+            self._dentro_de_string(ch, pos)
+            return
+
+        if ch in " \t\r\n":
+            return
+
+        if self._profundidade == 0:
+            if ch == "{" and self._esperando == "inicio":
+                self._profundidade = 1
+                self._esperando = "chave"
+            else:
+                self.invalido = True
+            return
+
+        if self._profundidade > 1:
+            # Dentro de um valor composto (argumentos): só acompanha o aninhamento
+            if ch == '"':
+                self._em_string = True
+            elif ch in "{[":
+                self._profundidade += 1
+            elif ch in "}]":
+                self._profundidade -= 1
+            return
+
+        # Profundidade 1: chaves e valores do objeto de decisão
+        if self._esperando == "chave":
+            if ch == '"':
+                self._em_string = True
+                self._inicio = pos
+            elif ch == "}":
+                self._fechar_objeto()
+            else:
+                self.invalido = True
+        elif self._esperando == "dois_pontos":
+            if ch == ":":
+                self._esperando = "valor"
+            else:
+                self.invalido = True
+        elif self._esperando == "valor":
+            self._inicio = pos
+            self._esperando = "apos_valor"
+            if ch == '"':
+                self._em_string = True
+                self._emitindo = self._chave == "resposta" and self.ao_texto is not None
+            elif ch in "{[":
+                self._profundidade += 1
+        elif self._esperando == "apos_valor":
+            if ch in ",}":
+                self._concluir_valor(pos)
+                if ch == "}":
+                    self._fechar_objeto()
+            elif ch in "{[":
+                self._profundidade += 1
+            elif ch == '"':
+                self._em_string = True
+
+    def _emitir(self, texto):
+        if self._alta is not None:
+            # Surrogate alto sem o baixo não tem UTF-8: vira o caractere de substituição
+            self._saida.append("\ufffd")
+            self._alta = None
+        self._saida.append(texto)
+
+    def _codigo_unicode(self, codigo):
+        if 0xD800 <= codigo < 0xDC00:
+            self._emitir("")
+            self._alta = codigo
+        elif 0xDC00 <= codigo < 0xE000:
+            if self._alta is None:
+                self._emitir("\ufffd")
+            else:
+                self._saida.append(chr(0x10000 + ((self._alta - 0xD800) << 10) + (codigo - 0xDC00)))
+                self._alta = None
+        else:
+            self._emitir(chr(codigo))
+
+    def _dentro_de_string(self, ch, pos):
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) == 4:
+                try:
+                    self._codigo_unicode(int(self._unicode, 16))
+                except ValueError:
+                    self.invalido = True
+                self._unicode = None
+            return
+
+        if self._escape:
+            self._escape = False
+            if self._emitindo:
+                if ch == "u":
+                    self._unicode = ""
+                else:
+                    self._emitir(_ESCAPES.get(ch, ch))
+            return
+
+        if ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            if self._emitindo:
+                self._emitir("")
+            self._em_string = False
+            self._emitindo = False
+            if self._profundidade == 1 and self._esperando == "chave":
+                self._chave = self._decodificar(self._inicio, pos + 1)
+                self._esperando = "dois_pontos"
+        elif self._emitindo:
+            self._emitir(ch)
+
+    def _concluir_valor(self, pos):
+        bruto = "".join(self.texto[self._inicio:pos]).strip()
+        self.campos[self._chave] = self._decodificar_texto(bruto)
+        self._esperando = "chave"
+
+    def _fechar_objeto(self):
+        self._profundidade = 0
+        self.completo = True
+
+    def _decodificar(self, inicio, fim):
+        return self._decodificar_texto("".join(self.texto[inicio:fim]))
+
+    def _decodificar_texto(self, bruto):
+        try:
+            return json.loads(bruto)
+        except ValueError:
+            self.invalido = True
+            return None
+
+
+def complemento_resposta(emitido, final):
+    """
+    O que falta enviar depois dos fragmentos já emitidos.
+
+    Normalmente a resposta final começa pelo texto transmitido (o resto são
+    oportunidades anexadas etc.). Se o turno mudou de rumo depois de começar
+    a transmitir, a resposta final vai inteira, separada do que já saiu.
+    """
+    if final.startswith(emitido):
+        return final[len(emitido):]
+    enviado = emitido.rstrip()
+    if enviado and final.startswith(enviado):
+        # Só diferem por espaços finais que o agente removeu da resposta
+        return final[len(enviado):]
+    return f"\n\n{final}" if emitido else final
@@ -2,6 +2,13 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import Config
 from database import db, migrate
+from src.core.versoes_tabelas import registrar_versionamento
+from src.core.resumo_aluno import registrar_resumo_aluno, resumo_cli
+from src.core.importacao_alunos import alunos_cli
+from src.core.faturamento import pagamentos_cli
+from src.core.declaracoes_lote import requerimentos_cli
+from src.core.varredura_atrasos import iniciar_varredura_periodica
+from src.core.cache_tokens import registrar_invalidacao_tokens
 from src.models import (
     Aluno, Usuario, Curso, Materia,
     Matricula, MatriculaMateria, Requerimento, Pagamento
@@ -25,6 +32,24 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     
+    # Versões por tabela para o cache do MCP Server
+    registrar_versionamento()
+    
+    # Contadores de resumo_aluno atualizados a cada flush
+    registrar_resumo_aluno()
+
+    # Cache de tokens verificados descartado quando o aluno/usuário muda
+    registrar_invalidacao_tokens()
+    app.cli.add_command(resumo_cli)
+    app.cli.add_command(alunos_cli)
+    app.cli.add_command(pagamentos_cli)
+    app.cli.add_command(requerimentos_cli)
+    
+    # Pendentes vencidos viram 'atrasado' a cada VARREDURA_ATRASOS_INTERVALO segundos (0 desliga)
+    intervalo = app.config.get('VARREDURA_ATRASOS_INTERVALO', 0)
+    if intervalo > 0:
+        iniciar_varredura_periodica(app, intervalo)
+    
     # Registrar blueprints
     app.register_blueprint(alunos_bp, url_prefix='/api/alunos')
     app.register_blueprint(materias_bp, url_prefix='/api/materias')
@@ -11,6 +11,9 @@ class Config:
     DEBUG = os.getenv('FLASK_DEBUG', '0') == '1'
     HOST = os.getenv('FLASK_HOST', '127.0.0.1')
     PORT = int(os.getenv('FLASK_PORT', '5000'))
+    VARREDURA_ATRASOS_INTERVALO = int(os.getenv('VARREDURA_ATRASOS_INTERVALO', '0'))
+    TOKEN_CACHE_MAX = int(os.getenv('TOKEN_CACHE_MAX', '10000'))
+    TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '300'))
     
     # Configurações MCP
     MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'http://localhost:5001')
@@ -0,0 +1,40 @@
+"""indices das consultas por aluno, status e data
+
+Revision ID: 3f1c9a2b7d10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+O esquema atual foi criado com db.create_all(); esta é a primeira
+revisão e só acrescenta índices, com IF NOT EXISTS para bancos já
+criados a partir dos modelos que os declaram.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a2b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ('ix_pagamentos_aluno_status', 'pagamentos', ['aluno_id', 'status']),
+    ('ix_pagamentos_data_emissao', 'pagamentos', ['data_emissao']),
+    ('ix_requerimentos_aluno_data', 'requerimentos', ['aluno_id', 'data_solicitacao']),
+    ('ix_requerimentos_data_solicitacao', 'requerimentos', ['data_solicitacao']),
+    ('ix_matriculas_aluno', 'matriculas', ['aluno_id']),
+    ('ix_matriculas_materias_matricula_status', 'matriculas_materias', ['matricula_id', 'status']),
+    ('ix_matriculas_materias_materia', 'matriculas_materias', ['materia_id']),
+)
+
+
+def upgrade():
+    for nome, tabela, colunas in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
@@ -0,0 +1,38 @@
+"""índice de pendentes por vencimento e marca d'água da varredura
+
+Revision ID: 5d3b9e7a1c42
+Revises: e91a3d7c5f28
+Create Date: 2026-10-18 19:00:00.000000
+
+ix_pagamentos_status_vencimento limita cada execução de
+src/core/varredura_atrasos à faixa de vencimentos ainda não varrida,
+guardada em marcas_varredura.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d3b9e7a1c42'
+down_revision = 'e91a3d7c5f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_pagamentos_status_vencimento', 'pagamentos', ['status', 'data_vencimento'],
+        if_not_exists=True,
+    )
+    op.create_table(
+        'marcas_varredura',
+        sa.Column('nome', sa.String(length=64), primary_key=True),
+        sa.Column('ate', sa.Date(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('marcas_varredura')
+    op.drop_index('ix_pagamentos_status_vencimento', table_name='pagamentos', if_exists=True)
@@ -0,0 +1,33 @@
+"""tabela de versões por tabela
+
+Revision ID: 7a4c2e9d1b63
+Revises: 5d3b9e7a1c42
+Create Date: 2026-10-18 21:00:00.000000
+
+versoes_tabelas era criada no primeiro flush (src/core/versoes_tabelas),
+mas as listagens paginadas a leem para saber se o total em cache ainda
+vale; num banco migrado ela precisa existir antes de qualquer escrita.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c2e9d1b63'
+down_revision = '5d3b9e7a1c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'versoes_tabelas',
+        sa.Column('tabela', sa.String(length=64), primary_key=True),
+        sa.Column('versao', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('versoes_tabelas')
@@ -0,0 +1,91 @@
+"""tabela resumo_aluno com os contadores por aluno
+
+Revision ID: 8b27e4c51a93
+Revises: 3f1c9a2b7d10
+Create Date: 2026-10-18 14:00:00.000000
+
+Cria a tabela e preenche a partir das tabelas de origem; daí em diante
+os contadores são mantidos a cada flush (src/core/resumo_aluno).
+`flask resumo verificar` confere o resultado.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b27e4c51a93'
+down_revision = '3f1c9a2b7d10'
+branch_labels = None
+depends_on = None
+
+
+PREENCHER = """
+INSERT INTO resumo_aluno (
+    aluno_id, materias_total, materias_cursando, materias_aprovadas, materias_reprovadas,
+    pagamentos_total, pagamentos_pendentes, valor_devido,
+    requerimentos_total, requerimentos_pendentes, requerimentos_concluidos, requerimentos_rejeitados,
+    atualizado_em
+)
+SELECT
+    a.id,
+    COALESCE(mm.total, 0), COALESCE(mm.cursando, 0), COALESCE(mm.aprovadas, 0), COALESCE(mm.reprovadas, 0),
+    COALESCE(p.total, 0), COALESCE(p.pendentes, 0), COALESCE(p.valor_devido, 0),
+    COALESCE(r.total, 0), COALESCE(r.pendentes, 0), COALESCE(r.concluidos, 0), COALESCE(r.rejeitados, 0),
+    CURRENT_TIMESTAMP
+FROM alunos a
+LEFT JOIN (
+    SELECT mat.aluno_id,
+           COUNT(*) AS total,
+           SUM(CASE WHEN mm.status = 'cursando' THEN 1 ELSE 0 END) AS cursando,
+           SUM(CASE WHEN mm.status = 'aprovado' THEN 1 ELSE 0 END) AS aprovadas,
+           SUM(CASE WHEN mm.status = 'reprovado' THEN 1 ELSE 0 END) AS reprovadas
+    FROM matriculas_materias mm
+    JOIN matriculas mat ON mat.id = mm.matricula_id
+    GROUP BY mat.aluno_id
+) mm ON mm.aluno_id = a.id
+LEFT JOIN (
+    SELECT aluno_id,
+           COUNT(*) AS total,
+           SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN 1 ELSE 0 END) AS pendentes,
+           SUM(CASE WHEN status IN ('pendente', 'atrasado') THEN valor ELSE 0 END) AS valor_devido
+    FROM pagamentos
+    GROUP BY aluno_id
+) p ON p.aluno_id = a.id
+LEFT JOIN (
+    SELECT aluno_id,
+           COUNT(*) AS total,
+           SUM(CASE WHEN status = 'pendente' THEN 1 ELSE 0 END) AS pendentes,
+           SUM(CASE WHEN status = 'concluido' THEN 1 ELSE 0 END) AS concluidos,
+           SUM(CASE WHEN status = 'rejeitado' THEN 1 ELSE 0 END) AS rejeitados
+    FROM requerimentos
+    GROUP BY aluno_id
+) r ON r.aluno_id = a.id
+"""
+
+
+def upgrade():
+    contador = dict(nullable=False, server_default='0')
+    op.create_table(
+        'resumo_aluno',
+        sa.Column('aluno_id', sa.Integer(), sa.ForeignKey('alunos.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('materias_total', sa.Integer(), **contador),
+        sa.Column('materias_cursando', sa.Integer(), **contador),
+        sa.Column('materias_aprovadas', sa.Integer(), **contador),
+        sa.Column('materias_reprovadas', sa.Integer(), **contador),
+        sa.Column('pagamentos_total', sa.Integer(), **contador),
+        sa.Column('pagamentos_pendentes', sa.Integer(), **contador),
+        sa.Column('valor_devido', sa.Float(), **contador),
+        sa.Column('requerimentos_total', sa.Integer(), **contador),
+        sa.Column('requerimentos_pendentes', sa.Integer(), **contador),
+        sa.Column('requerimentos_concluidos', sa.Integer(), **contador),
+        sa.Column('requerimentos_rejeitados', sa.Integer(), **contador),
+        sa.Column('atualizado_em', sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.execute('DELETE FROM resumo_aluno')
+    op.execute(PREENCHER)
+
+
+def downgrade():
+    op.drop_table('resumo_aluno')
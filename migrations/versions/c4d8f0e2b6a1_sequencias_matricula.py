@@ -0,0 +1,32 @@
+"""contador por ano para os números de matrícula
+
+Revision ID: c4d8f0e2b6a1
+Revises: 8b27e4c51a93
+Create Date: 2026-10-18 16:00:00.000000
+
+A linha de cada ano é criada na primeira reserva, a partir do maior
+número já existente (src/core/sequencia_matricula).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8f0e2b6a1'
+down_revision = '8b27e4c51a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sequencias_matricula',
+        sa.Column('ano', sa.Integer(), primary_key=True),
+        sa.Column('ultimo', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('sequencias_matricula')
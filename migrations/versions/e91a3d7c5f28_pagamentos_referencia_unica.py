@@ -0,0 +1,32 @@
+"""um pagamento por aluno, mês de referência e tipo
+
+Revision ID: e91a3d7c5f28
+Revises: c4d8f0e2b6a1
+Create Date: 2026-10-18 18:00:00.000000
+
+Chave do faturamento idempotente (src/core/faturamento). Pagamentos
+sem mês de referência (avulsos) não conflitam: NULL não se repete em
+índice único. Se o banco já tiver mensalidades duplicadas, a criação
+falha e elas precisam ser resolvidas antes.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91a3d7c5f28'
+down_revision = 'c4d8f0e2b6a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'uq_pagamentos_referencia', 'pagamentos',
+        ['aluno_id', 'ano_referencia', 'mes_referencia', 'tipo'],
+        unique=True, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_pagamentos_referencia', table_name='pagamentos', if_exists=True)
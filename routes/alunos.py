@@ -1,11 +1,41 @@
-from flask import Blueprint, request, jsonify
+import io
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from sqlalchemy.exc import IntegrityError
 from database import db
 from src.models import Aluno, Matricula, Curso
+from src.core.errors import ValidationError
+from src.core.importacao_alunos import FORMATOS, importar_alunos
+from src.core.paginacao import MIMETYPE_NDJSON, Listagem, responder_listagem
+from src.core.perfis_carga import perfil_carga
+from src.core.sequencia_matricula import proxima_matricula
 from datetime import datetime
 
 alunos_bp = Blueprint('alunos', __name__)
 
+LISTAGEM_ALUNOS = Listagem(
+    modelo=Aluno,
+    ordem=lambda: (Aluno.id,),
+    campos=lambda: {
+        'id': Aluno.id,
+        'matricula': Aluno.matricula,
+        'nome_completo': Aluno.nome_completo,
+        'cpf': Aluno.cpf,
+        'rg': Aluno.rg,
+        'data_nascimento': Aluno.data_nascimento,
+        'email': Aluno.email,
+        'telefone': Aluno.telefone,
+        'endereco': Aluno.endereco,
+        'cidade': Aluno.cidade,
+        'estado': Aluno.estado,
+        'cep': Aluno.cep,
+        'data_matricula': Aluno.data_matricula,
+        'status': Aluno.status,
+        'tem_senha': Aluno.senha_hash.isnot(None),
+    },
+)
+
 def _validar_campos(data, campos_obrigatorios):
     if not isinstance(data, dict):
         return "JSON invalido ou vazio"
@@ -18,9 +48,11 @@ def _validar_campos(data, campos_obrigatorios):
 
 @alunos_bp.route('/', methods=['GET'])
 def get_alunos():
-    """Listar todos os alunos"""
-    alunos = Aluno.query.all()
-    return jsonify([aluno.to_dict() for aluno in alunos])
+    """Listar alunos (paginado: limit, cursor, fields; formato=ndjson|json exporta tudo)"""
+    try:
+        return responder_listagem(Aluno.query, LISTAGEM_ALUNOS, request)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
 
 @alunos_bp.route('/<int:id>', methods=['GET'])
 def get_aluno(id):
@@ -37,19 +69,14 @@ def create_aluno():
     if erro:
         return jsonify({"erro": erro}), 400
     
-    # Gerar matrícula automática
-    ultimo_aluno = Aluno.query.order_by(Aluno.id.desc()).first()
-    if ultimo_aluno:
-        ultima_matricula = int(ultimo_aluno.matricula.split('/')[1])
-        nova_matricula = f"{datetime.now().year}/{str(ultima_matricula + 1).zfill(5)}"
-    else:
-        nova_matricula = f"{datetime.now().year}/00001"
-    
     try:
         data_nascimento = datetime.strptime(data['data_nascimento'], '%Y-%m-%d').date()
     except ValueError:
         return jsonify({"erro": "data_nascimento deve estar no formato YYYY-MM-DD"}), 400
 
+    # Gerar matrícula automática (sequência por ano, sem consultar o último aluno)
+    nova_matricula = proxima_matricula()
+
     aluno = Aluno(
         matricula=nova_matricula,
         nome_completo=data['nome_completo'],
@@ -77,6 +104,28 @@ def create_aluno():
     
     return jsonify(aluno.to_dict()), 201
 
+@alunos_bp.route('/importar', methods=['POST'])
+def importar_alunos_em_massa():
+    """
+    Importar alunos de um CSV (text/csv) ou NDJSON (application/x-ndjson) no corpo.
+
+    O relatório volta em NDJSON enquanto o arquivo é processado: uma linha
+    por registro com erro, uma por lote gravado e o resumo no fim.
+    """
+    formato = request.args.get('formato') or {
+        'text/csv': 'csv',
+        MIMETYPE_NDJSON: 'ndjson',
+    }.get(request.mimetype)
+    if formato not in FORMATOS:
+        return jsonify({"erro": "Envie text/csv ou application/x-ndjson (ou formato=csv|ndjson)"}), 400
+
+    linhas = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+    relatorio = importar_alunos(linhas, formato)
+    return Response(
+        stream_with_context(json.dumps(item, ensure_ascii=False) + '\n' for item in relatorio),
+        mimetype=MIMETYPE_NDJSON,
+    )
+
 @alunos_bp.route('/<int:id>', methods=['PUT'])
 def update_aluno(id):
     """Atualizar um aluno"""
@@ -118,7 +167,7 @@ def delete_aluno(id):
 def get_aluno_matriculas(id):
     """Listar matrículas de um aluno"""
     aluno = Aluno.query.get_or_404(id)
-    matriculas = Matricula.query.filter_by(aluno_id=id).all()
+    matriculas = Matricula.query.options(*perfil_carga('matriculas.aluno')).filter_by(aluno_id=id).all()
     return jsonify([m.to_dict() for m in matriculas])
 
 @alunos_bp.route('/<int:id>/matriculas', methods=['POST'])
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from database import db
 from src.models import Aluno
+from src.core.cache_tokens import cache_tokens
 from datetime import datetime
 import jwt
 
@@ -118,16 +119,15 @@ def validar_token():
         # Extrair token (formato: "Bearer <token>")
         token = auth_header.split(' ')[1] if ' ' in auth_header else auth_header
         
-        payload = jwt.decode(token, current_app.config.get('SECRET_KEY', 'dev-secret'), algorithms=['HS256'])
-        
-        aluno = Aluno.query.get(payload.get('aluno_id'))
+        # Claims e aluno vêm do cache de tokens (sem consulta enquanto o aluno não muda)
+        aluno = cache_tokens().principal(token, 'aluno')
         
         if not aluno:
             return jsonify({"erro": "Aluno não encontrado"}), 404
         
         return jsonify({
             'valido': True,
-            'aluno': aluno.to_dict()
+            'aluno': aluno
         }), 200
     
     except jwt.ExpiredSignatureError:
@@ -145,23 +145,29 @@ def get_requerimentos_aluno(aluno_id):
     """
     from src.models import Requerimento
     
-    aluno = Aluno.query.get_or_404(aluno_id)
-    
     # Verificar token
+    payload = None
+    aluno_do_token = None
     auth_header = request.headers.get('Authorization')
     if auth_header:
         try:
             token = auth_header.split(' ')[1] if ' ' in auth_header else auth_header
-            payload = jwt.decode(token, current_app.config.get('SECRET_KEY', 'dev-secret'), algorithms=['HS256'])
-            
-            # Verificar se o token é do próprio aluno
-            if payload.get('aluno_id') != aluno_id:
-                return jsonify({"erro": "Sem permissão"}), 403
+            payload = cache_tokens().verificar(token)
+            if payload.get('aluno_id') == aluno_id:
+                aluno_do_token = cache_tokens().principal(token, 'aluno')
         except jwt.InvalidTokenError as exc:
             current_app.logger.warning("Token invalido em /auth/requerimentos: %s", exc)
         except Exception as exc:
             current_app.logger.warning("Erro ao validar token em /auth/requerimentos: %s", exc)
     
+    # Com o token do próprio aluno em cache a existência já está confirmada
+    if aluno_do_token is None:
+        Aluno.query.get_or_404(aluno_id)
+    
+    # Verificar se o token é do próprio aluno
+    if payload is not None and payload.get('aluno_id') != aluno_id:
+        return jsonify({"erro": "Sem permissão"}), 403
+    
     requerimentos = Requerimento.query.filter_by(aluno_id=aluno_id).order_by(Requerimento.data_solicitacao.desc()).all()
     
     return jsonify({
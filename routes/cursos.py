@@ -1,14 +1,33 @@
 from flask import Blueprint, request, jsonify
 from database import db
 from src.models import Curso
+from src.core.errors import ValidationError
+from src.core.paginacao import Listagem, responder_listagem
 
 cursos_bp = Blueprint('cursos', __name__)
 
+LISTAGEM_CURSOS = Listagem(
+    modelo=Curso,
+    ordem=lambda: (Curso.id,),
+    campos=lambda: {
+        'id': Curso.id,
+        'nome': Curso.nome,
+        'codigo': Curso.codigo,
+        'descricao': Curso.descricao,
+        'duracao_semestres': Curso.duracao_semestres,
+        'carga_horaria_total': Curso.carga_horaria_total,
+        'valor_mensalidade': Curso.valor_mensalidade,
+        'ativo': Curso.ativo,
+    },
+)
+
 @cursos_bp.route('/', methods=['GET'])
 def get_cursos():
-    """Listar todos os cursos"""
-    cursos = Curso.query.all()
-    return jsonify([c.to_dict() for c in cursos])
+    """Listar cursos (paginado: limit, cursor, fields; formato=ndjson|json exporta tudo)"""
+    try:
+        return responder_listagem(Curso.query, LISTAGEM_CURSOS, request)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
 
 @cursos_bp.route('/<int:id>', methods=['GET'])
 def get_curso(id):
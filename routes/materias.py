@@ -2,9 +2,30 @@ from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import IntegrityError
 from database import db
 from src.models import Materia, Curso, MatriculaMateria
+from src.core.errors import ValidationError
+from src.core.paginacao import Listagem, responder_listagem
+from src.core.perfis_carga import perfil_carga
 
 materias_bp = Blueprint('materias', __name__)
 
+LISTAGEM_MATERIAS = Listagem(
+    modelo=Materia,
+    ordem=lambda: (Materia.id,),
+    campos=lambda: {
+        'id': Materia.id,
+        'nome': Materia.nome,
+        'codigo': Materia.codigo,
+        'carga_horaria': Materia.carga_horaria,
+        'creditos': Materia.creditos,
+        'semestre': Materia.semestre,
+        'curso_id': Materia.curso_id,
+        'curso_nome': (Curso.nome, Materia.curso),
+        'professor': Materia.professor,
+        'ativo': Materia.ativo,
+    },
+    perfil='materias.lista',
+)
+
 def _validar_campos(data, campos_obrigatorios):
     if not isinstance(data, dict):
         return "JSON invalido ou vazio"
@@ -17,9 +38,11 @@ def _validar_campos(data, campos_obrigatorios):
 
 @materias_bp.route('/', methods=['GET'])
 def get_materias():
-    """Listar todas as matérias"""
-    materias = Materia.query.all()
-    return jsonify([m.to_dict() for m in materias])
+    """Listar matérias (paginado: limit, cursor, fields; formato=ndjson|json exporta tudo)"""
+    try:
+        return responder_listagem(Materia.query, LISTAGEM_MATERIAS, request)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
 
 @materias_bp.route('/<int:id>', methods=['GET'])
 def get_materia(id):
@@ -87,7 +110,10 @@ def update_materia(id):
 def get_materia_alunos(id):
     """Listar alunos matriculados em uma matéria"""
     materia = Materia.query.get_or_404(id)
-    matriculas = MatriculaMateria.query.filter_by(materia_id=id).all()
+    matriculas = (MatriculaMateria.query
+                  .options(*perfil_carga('materias.alunos'))
+                  .filter_by(materia_id=id)
+                  .all())
     
     alunos = []
     for mm in matriculas:
@@ -1,10 +1,37 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from database import db
 from src.models import Pagamento, Aluno
+from src.core.errors import ValidationError
+from src.core.faturamento import faturar_semestre
+from src.core.paginacao import Listagem, responder_listagem
 from datetime import datetime, timedelta
 
 pagamentos_bp = Blueprint('pagamentos', __name__)
 
+# Mais recentes primeiro; id desempata emissões no mesmo instante
+LISTAGEM_PAGAMENTOS = Listagem(
+    modelo=Pagamento,
+    ordem=lambda: (Pagamento.data_emissao, Pagamento.id),
+    decrescente=True,
+    campos=lambda: {
+        'id': Pagamento.id,
+        'aluno_id': Pagamento.aluno_id,
+        'aluno_nome': (Aluno.nome_completo, Pagamento.aluno),
+        'tipo': Pagamento.tipo,
+        'valor': Pagamento.valor,
+        'data_emissao': Pagamento.data_emissao,
+        'data_vencimento': Pagamento.data_vencimento,
+        'data_pagamento': Pagamento.data_pagamento,
+        'status': Pagamento.status,
+        'link_boleto': Pagamento.link_boleto,
+        'codigo_boleto': Pagamento.codigo_boleto,
+        'mes_referencia': Pagamento.mes_referencia,
+        'ano_referencia': Pagamento.ano_referencia,
+    },
+    perfil='pagamentos.lista',
+)
+
 def _validar_campos(data, campos_obrigatorios):
     if not isinstance(data, dict):
         return "JSON invalido ou vazio"
@@ -17,7 +44,7 @@ def _validar_campos(data, campos_obrigatorios):
 
 @pagamentos_bp.route('/', methods=['GET'])
 def get_pagamentos():
-    """Listar todos os pagamentos"""
+    """Listar pagamentos (paginado: limit, cursor, fields; formato=ndjson|json exporta tudo)"""
     aluno_id = request.args.get('aluno_id')
     status = request.args.get('status')
     
@@ -28,8 +55,10 @@ def get_pagamentos():
     if status:
         query = query.filter_by(status=status)
     
-    pagamentos = query.order_by(Pagamento.data_emissao.desc()).all()
-    return jsonify([p.to_dict() for p in pagamentos])
+    try:
+        return responder_listagem(query, LISTAGEM_PAGAMENTOS, request)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
 
 @pagamentos_bp.route('/<int:id>', methods=['GET'])
 def get_pagamento(id):
@@ -93,7 +122,11 @@ def create_pagamento():
     )
     
     db.session.add(pagamento)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"erro": "Ja existe pagamento deste tipo para o mes de referencia"}), 409
     
     return jsonify(pagamento.to_dict()), 201
 
@@ -138,9 +171,15 @@ def gerar_mensalidades(aluno_id):
     meses = range(1, 7) if semestre == 1 else range(7, 13)
     pagamentos = []
     
+    # Meses já faturados ficam de fora (uq_pagamentos_referencia)
+    ja_faturados = {
+        mes for (mes,) in db.session.query(Pagamento.mes_referencia)
+        .filter_by(aluno_id=aluno_id, ano_referencia=ano, tipo='mensalidade')
+    }
+    
     for mes in meses:
         vencimento = datetime(ano, mes, 10)  # Vencimento dia 10
-        if vencimento < datetime.now():
+        if vencimento < datetime.now() or mes in ja_faturados:
             continue
             
         link_boleto = f"https://pagamento.escola.edu.br/boleto/{aluno.matricula}/{ano}{mes:02d}"
@@ -162,4 +201,29 @@ def gerar_mensalidades(aluno_id):
     
     db.session.commit()
     
-    return jsonify([p.to_dict() for p in pagamentos]), 201
\ No newline at end of file
+    return jsonify([p.to_dict() for p in pagamentos]), 201
+
+@pagamentos_bp.route('/faturamento', methods=['POST'])
+def faturar():
+    """
+    Gerar as mensalidades do semestre para todas as matrículas ativas.
+
+    Corpo: ano, semestre, valor_mensal (padrão: valor do curso), curso_id.
+    Idempotente: meses já faturados de um aluno são pulados.
+    """
+    data = request.get_json(silent=True) or {}
+
+    try:
+        ano = int(data.get('ano', datetime.now().year))
+        semestre = int(data.get('semestre', 1))
+        valor_mensal = float(data['valor_mensal']) if data.get('valor_mensal') is not None else None
+        curso_id = int(data['curso_id']) if data.get('curso_id') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"erro": "ano, semestre, valor_mensal e curso_id devem ser numericos"}), 400
+
+    try:
+        resultado = faturar_semestre(ano, semestre, valor_mensal=valor_mensal, curso_id=curso_id)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    return jsonify(resultado), 201
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, jsonify, request
-from src.models import Aluno, Requerimento
+from database import db
+from src.models import Aluno, Requerimento, ResumoAluno
+from src.core.perfis_carga import perfil_carga
 import os
 
 portal_bp = Blueprint('portal', __name__)
@@ -19,17 +21,28 @@ def dashboard_data(aluno_id):
         if not aluno:
             return jsonify({'erro': 'Aluno não encontrado'}), 404
 
-        requerimentos = Requerimento.query.filter_by(aluno_id=aluno_id).all()
+        requerimentos = (Requerimento.query
+                         .options(*perfil_carga('requerimentos.aluno'))
+                         .filter_by(aluno_id=aluno_id)
+                         .all())
         
-        dados = {
-            'aluno': aluno.to_dict(),
-            'requerimentos': [req.to_dict() for req in requerimentos],
-            'estatisticas': {
+        # Contadores mantidos em resumo_aluno (leitura pela chave)
+        resumo = db.session.get(ResumoAluno, aluno_id)
+        if resumo:
+            estatisticas = resumo.to_dict()['requerimentos']
+        else:
+            estatisticas = {
                 'total': len(requerimentos),
                 'concluidos': sum(1 for r in requerimentos if r.status == 'concluido'),
                 'pendentes': sum(1 for r in requerimentos if r.status == 'pendente'),
                 'rejeitados': sum(1 for r in requerimentos if r.status == 'rejeitado')
             }
+        
+        dados = {
+            'aluno': aluno.to_dict(),
+            'requerimentos': [req.to_dict() for req in requerimentos],
+            'estatisticas': estatisticas,
+            'resumo': resumo.to_dict() if resumo else None
         }
         
         return jsonify(dados), 200
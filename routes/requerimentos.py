@@ -1,13 +1,40 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context, url_for
+import json
 import mimetypes
 from database import db
 from src.models import Requerimento, Aluno, Materia, Matricula
-from services.requerimento_service import RequerimentoService
+from src.core.errors import ValidationError
+from src.core.armazem_pdf import DIRETORIO_PADRAO, hash_do_pdf
+from src.core.declaracoes_lote import SAIDAS, gerar_declaracoes_lote, selecionar_alunos, zip_declaracoes
+from src.core.paginacao import MIMETYPE_NDJSON, Listagem, responder_listagem
+from src.core.fila_declaracoes import fila_declaracoes
+from services.requerimento_service import RequerimentoService, dados_declaracao, texto_declaracao
 from datetime import datetime
 import os
 
 requerimentos_bp = Blueprint('requerimentos', __name__)
 
+# Mais recentes primeiro; id desempata solicitações no mesmo instante
+LISTAGEM_REQUERIMENTOS = Listagem(
+    modelo=Requerimento,
+    ordem=lambda: (Requerimento.data_solicitacao, Requerimento.id),
+    decrescente=True,
+    campos=lambda: {
+        'id': Requerimento.id,
+        'aluno_id': Requerimento.aluno_id,
+        'aluno_nome': (Aluno.nome_completo, Requerimento.aluno),
+        'tipo': Requerimento.tipo,
+        'status': Requerimento.status,
+        'data_solicitacao': Requerimento.data_solicitacao,
+        'data_processamento': Requerimento.data_processamento,
+        'descricao': Requerimento.descricao,
+        'observacoes': Requerimento.observacoes,
+        'materia_id': Requerimento.materia_id,
+        'materia_nome': (Materia.nome, Requerimento.materia),
+    },
+    perfil='requerimentos.lista',
+)
+
 def _validar_campos(data, campos_obrigatorios):
     if not isinstance(data, dict):
         return "JSON invalido ou vazio"
@@ -20,7 +47,7 @@ def _validar_campos(data, campos_obrigatorios):
 
 @requerimentos_bp.route('/', methods=['GET'])
 def get_requerimentos():
-    """Listar todos os requerimentos"""
+    """Listar requerimentos (paginado: limit, cursor, fields; formato=ndjson|json exporta tudo)"""
     status = request.args.get('status')
     tipo = request.args.get('tipo')
     aluno_id = request.args.get('aluno_id')
@@ -34,8 +61,10 @@ def get_requerimentos():
     if aluno_id:
         query = query.filter_by(aluno_id=aluno_id)
     
-    requerimentos = query.order_by(Requerimento.data_solicitacao.desc()).all()
-    return jsonify([r.to_dict() for r in requerimentos])
+    try:
+        return responder_listagem(query, LISTAGEM_REQUERIMENTOS, request)
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
 
 @requerimentos_bp.route('/<int:id>', methods=['GET'])
 def get_requerimento(id):
@@ -108,7 +137,7 @@ def criar_requerimento_remocao_materia():
 
 @requerimentos_bp.route('/declaracao', methods=['POST'])
 def criar_requerimento_declaracao():
-    """Criar requerimento para emitir declaração"""
+    """Criar requerimento para emitir declaração (PDF gerado em segundo plano)"""
     data = request.get_json(silent=True)
 
     erro = _validar_campos(data, ["aluno_id", "declaracao_tipo"])
@@ -121,24 +150,103 @@ def criar_requerimento_declaracao():
     if declaracao_tipo not in ["matricula", "frequencia", "conclusao"]:
         return jsonify({"erro": "declaracao_tipo invalido. Use: matricula, frequencia, conclusao"}), 400
 
-    # Gerar declaração
-    declaracao = RequerimentoService.gerar_declaracao(aluno, declaracao_tipo)
+    dados = dados_declaracao(aluno, declaracao_tipo)
     
     requerimento = Requerimento(
         aluno_id=data['aluno_id'],
         tipo='declaracao',
         descricao=f"Solicitação de declaração de {declaracao_tipo}",
         declaracao_tipo=declaracao_tipo,
-        declaracao_texto=declaracao['texto'],
+        declaracao_texto=texto_declaracao(dados),
         declaracao_assinatura=data.get('assinatura', 'Secretaria Acadêmica'),
-        declaracao_data_assinatura=datetime.now(),
-        declaracao_pdf_path=declaracao.get('pdf_path')
+        declaracao_data_assinatura=datetime.now()
     )
     
     db.session.add(requerimento)
     db.session.commit()
     
-    return jsonify(requerimento.to_dict()), 201
+    # O PDF entra em declaracao_pdf_path quando a tarefa terminar
+    tarefa = fila_declaracoes().enviar(requerimento.id, dados)
+    status_url = url_for('requerimentos.status_tarefa_declaracao', tarefa_id=tarefa['tarefa_id'])
+    
+    resposta = requerimento.to_dict()
+    resposta['tarefa'] = {**tarefa, 'status_url': status_url}
+    return jsonify(resposta), 202, {'Location': status_url}
+
+@requerimentos_bp.route('/declaracao/tarefas/<tarefa_id>', methods=['GET'])
+def status_tarefa_declaracao(tarefa_id):
+    """Estado da geração do PDF de uma declaração"""
+    tarefa = fila_declaracoes().consultar(tarefa_id)
+    if tarefa is None:
+        return jsonify({"erro": "Tarefa não encontrada"}), 404
+    
+    if tarefa['status'] == 'concluido':
+        tarefa['pdf_url'] = url_for('requerimentos.download_pdf', id=tarefa['requerimento_id'])
+    return jsonify(tarefa)
+
+@requerimentos_bp.route('/declaracoes/lote', methods=['POST'])
+def criar_declaracoes_em_lote():
+    """
+    Declarações para um curso/turma inteiro.
+
+    Corpo: declaracao_tipo, curso_id, ano, semestre e/ou aluno_ids;
+    saida=ndjson (padrão: progresso e resumo em streaming), zip (um PDF
+    por aluno) ou pdf (um PDF único com todas).
+    """
+    data = request.get_json(silent=True)
+
+    erro = _validar_campos(data, ["declaracao_tipo"])
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    declaracao_tipo = data['declaracao_tipo']
+    if declaracao_tipo not in ["matricula", "frequencia", "conclusao"]:
+        return jsonify({"erro": "declaracao_tipo invalido. Use: matricula, frequencia, conclusao"}), 400
+    saida = data.get('saida', 'ndjson')
+    if saida not in SAIDAS:
+        return jsonify({"erro": f"saida invalida. Use: {', '.join(SAIDAS)}"}), 400
+    aluno_ids = data.get('aluno_ids')
+    if aluno_ids is not None and not isinstance(aluno_ids, list):
+        return jsonify({"erro": "aluno_ids deve ser uma lista"}), 400
+
+    try:
+        alunos = selecionar_alunos(
+            curso_id=data.get('curso_id'),
+            ano=data.get('ano'),
+            semestre=data.get('semestre'),
+            aluno_ids=aluno_ids,
+        )
+    except ValidationError as e:
+        return jsonify({"erro": str(e)}), 400
+    if not alunos:
+        return jsonify({"erro": "Nenhum aluno encontrado para os filtros"}), 404
+
+    relatorio = gerar_declaracoes_lote(
+        alunos,
+        declaracao_tipo,
+        processos=current_app.config.get('DECLARACOES_PROCESSOS'),
+        pdf_unico=saida == 'pdf',
+        assinatura=data.get('assinatura', 'Secretaria Acadêmica'),
+    )
+    if saida == 'ndjson':
+        return Response(
+            stream_with_context(json.dumps(item, ensure_ascii=False) + '\n' for item in relatorio),
+            mimetype=MIMETYPE_NDJSON,
+        )
+
+    # zip/pdf: gera tudo (progresso no log) e então transmite o arquivo
+    resumo = None
+    for item in relatorio:
+        resumo = item.get('resumo', resumo)
+    nome = f"declaracoes_{declaracao_tipo}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    if saida == 'pdf':
+        return send_file(resumo['pdf_unico'], mimetype='application/pdf',
+                         as_attachment=True, download_name=f"{nome}.pdf")
+    return Response(
+        zip_declaracoes(resumo['arquivos']),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{nome}.zip"'},
+    )
 
 @requerimentos_bp.route('/boleto', methods=['POST'])
 def criar_requerimento_boleto():
@@ -212,11 +320,16 @@ def processar_requerimento(id):
     
     return jsonify(requerimento.to_dict())
 
-@requerimentos_bp.route('/<int:id>/pdf', methods=['GET'])
-def download_pdf(id):
-    """Baixar PDF de um requerimento (declaração)"""
-    requerimento = Requerimento.query.get_or_404(id)
-    
+def _servir_pdf(requerimento, as_attachment):
+    """
+    PDF da declaração com ETag forte (hash do conteúdo), If-None-Match e Range.
+
+    Com USE_X_SENDFILE o Flask entrega o arquivo ao servidor (X-Sendfile);
+    com PDF_X_ACCEL_PREFIX (location interna do nginx que aponta para
+    DECLARACOES_DIR) a resposta sai vazia com X-Accel-Redirect. Se o
+    arquivo sumiu, a regeneração vai para a fila de declarações e a
+    resposta é 202 com a tarefa (GETs simultâneos recebem a mesma).
+    """
     # Verificar se é uma declaração e tem PDF
     if requerimento.tipo != 'declaracao':
         return jsonify({"erro": "Requerimento não é uma declaração"}), 400
@@ -225,70 +338,55 @@ def download_pdf(id):
         return jsonify({"erro": "PDF não disponível para este requerimento"}), 404
     
     pdf_path = requerimento.declaracao_pdf_path
-    
-    # Verificar se o arquivo existe
-    if not os.path.exists(pdf_path):
-        # Tentar regenerar o PDF
-        try:
-            resultado = RequerimentoService.gerar_declaracao(
-                requerimento.aluno, 
-                requerimento.declaracao_tipo
-            )
-            if resultado['sucesso']:
-                pdf_path = resultado['pdf_path']
-                requerimento.declaracao_pdf_path = pdf_path
-                db.session.commit()
-            else:
-                return jsonify({"erro": "Não foi possível gerar o PDF"}), 500
-        except Exception as e:
-            return jsonify({"erro": f"Erro ao regenerar PDF: {str(e)}"}), 500
-    
     try:
-        return send_file(
-            pdf_path,
+        etag = hash_do_pdf(pdf_path)
+    except OSError:
+        tarefa = fila_declaracoes().enviar(
+            requerimento.id, dados_declaracao(requerimento.aluno, requerimento.declaracao_tipo)
+        )
+        status_url = url_for('requerimentos.status_tarefa_declaracao', tarefa_id=tarefa['tarefa_id'])
+        return jsonify({
+            "mensagem": "PDF sendo gerado novamente",
+            "tarefa": {**tarefa, 'status_url': status_url},
+        }), 202, {'Location': status_url, 'Retry-After': '2'}
+    
+    matricula_limpa = requerimento.aluno.matricula.replace('/', '_') if requerimento.aluno else requerimento.aluno_id
+    download_name = f"declaracao_{matricula_limpa}_{requerimento.declaracao_tipo}.pdf"
+    
+    prefixo_accel = current_app.config.get('PDF_X_ACCEL_PREFIX')
+    if prefixo_accel:
+        if request.if_none_match.contains(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            relativo = os.path.relpath(pdf_path, current_app.config.get('DECLARACOES_DIR', DIRETORIO_PADRAO))
+            resposta = current_app.response_class(mimetype='application/pdf')
+            resposta.headers['X-Accel-Redirect'] = prefixo_accel.rstrip('/') + '/' + relativo.replace(os.sep, '/')
+            resposta.headers['Content-Disposition'] = (
+                f'{"attachment" if as_attachment else "inline"}; filename="{download_name}"'
+            )
+        resposta.set_etag(etag)
+    else:
+        resposta = send_file(
+            os.path.abspath(pdf_path),
             mimetype='application/pdf',
-            as_attachment=True,
-            download_name=os.path.basename(pdf_path)
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=etag,
         )
-    except Exception as e:
-        return jsonify({"erro": f"Erro ao servir PDF: {str(e)}"}), 500
+    # Dado de aluno: só o navegador guarda, sempre revalidando pelo ETag
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta
+
+@requerimentos_bp.route('/<int:id>/pdf', methods=['GET'])
+def download_pdf(id):
+    """Baixar PDF de um requerimento (declaração)"""
+    requerimento = Requerimento.query.get_or_404(id)
+    return _servir_pdf(requerimento, as_attachment=True)
 
 @requerimentos_bp.route('/<int:id>/visualizar-pdf', methods=['GET'])
 def visualizar_pdf(id):
     """Visualizar PDF inline em um requerimento (declaração)"""
     requerimento = Requerimento.query.get_or_404(id)
-    
-    # Verificar se é uma declaração e tem PDF
-    if requerimento.tipo != 'declaracao':
-        return jsonify({"erro": "Requerimento não é uma declaração"}), 400
-    
-    if not requerimento.declaracao_pdf_path:
-        return jsonify({"erro": "PDF não disponível para este requerimento"}), 404
-    
-    pdf_path = requerimento.declaracao_pdf_path
-    
-    # Verificar se o arquivo existe
-    if not os.path.exists(pdf_path):
-        # Tentar regenerar o PDF
-        try:
-            resultado = RequerimentoService.gerar_declaracao(
-                requerimento.aluno, 
-                requerimento.declaracao_tipo
-            )
-            if resultado['sucesso']:
-                pdf_path = resultado['pdf_path']
-                requerimento.declaracao_pdf_path = pdf_path
-                db.session.commit()
-            else:
-                return jsonify({"erro": "Não foi possível gerar o PDF"}), 500
-        except Exception as e:
-            return jsonify({"erro": f"Erro ao regenerar PDF: {str(e)}"}), 500
-    
-    try:
-        return send_file(
-            pdf_path,
-            mimetype='application/pdf',
-            as_attachment=False
-        )
-    except Exception as e:
-        return jsonify({"erro": f"Erro ao servir PDF: {str(e)}"}), 500
\ No newline at end of file
+    return _servir_pdf(requerimento, as_attachment=False)
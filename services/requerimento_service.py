@@ -9,6 +9,139 @@ from reportlab.lib.units import cm
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import Paragraph, Spacer
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from io import BytesIO
+from src.core.armazem_pdf import armazem_pdf
+
+TITULOS_DECLARACAO = {
+    'matricula': 'DECLARAÇÃO DE MATRÍCULA',
+    'frequencia': 'DECLARAÇÃO DE FREQUÊNCIA',
+    'conclusao': 'DECLARAÇÃO DE CONCLUSÃO'
+}
+
+MESES = (
+    'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'
+)
+
+
+def dados_declaracao(aluno, tipo_declaracao):
+    """
+    Tudo que a declaração usa, em valores simples (vai para o pool de processos).
+    
+    A data de emissão é só o dia: a mesma declaração pedida de novo no
+    mesmo dia sai idêntica e cai no mesmo arquivo do armazém.
+    """
+    # Pegar curso do aluno se existir
+    curso_nome = "Não informado"
+    if aluno.matriculas and len(aluno.matriculas) > 0:
+        curso_nome = aluno.matriculas[0].curso.nome if aluno.matriculas[0].curso else "Não informado"
+    
+    return {
+        'tipo': tipo_declaracao,
+        'nome_completo': aluno.nome_completo,
+        'cpf': aluno.cpf,
+        'matricula': aluno.matricula,
+        'curso': curso_nome,
+        'data_matricula': aluno.data_matricula.strftime('%d/%m/%Y') if aluno.data_matricula else 'Não informada',
+        'emitida_em': datetime.now().date().isoformat(),
+    }
+
+
+def texto_declaracao(dados):
+    """Texto da declaração (também gravado em Requerimento.declaracao_texto)"""
+    return f"""
+Declaramos para os devidos fins que {dados['nome_completo']}, 
+portador(a) do CPF {dados['cpf']}, matriculado(a) sob o número {dados['matricula']},
+está regularmente matriculado(a) neste estabelecimento de ensino.
+
+Curso: {dados['curso']}
+Data de Matrícula: {dados['data_matricula']}
+
+Por ser expressão da verdade, firmamos a presente declaração.
+    """.strip()
+
+
+def renderizar_declaracao(dados):
+    """
+    Bytes do PDF da declaração.
+    
+    Função de módulo, sem banco nem app: roda nos processos de
+    src/core/fila_declaracoes. invariant=1 tira do PDF a data de criação
+    e o ID aleatório, então os mesmos dados geram os mesmos bytes.
+    """
+    return renderizar_declaracoes([dados])
+
+
+def renderizar_declaracoes(lista_dados):
+    """Um PDF com uma página por declaração (PDF único dos lotes)"""
+    saida = BytesIO()
+    c = canvas.Canvas(saida, pagesize=A4, invariant=1)
+    for dados in lista_dados:
+        _desenhar_declaracao(c, dados)
+        c.showPage()
+    c.save()
+    return saida.getvalue()
+
+
+def _desenhar_declaracao(c, dados):
+    width, height = A4
+    
+    # Cabeçalho
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(2*cm, height - 2*cm, "ESCOLA MUNICIPAL PROFESSOR JOSÉ DA SILVA")
+    
+    c.setFont("Helvetica", 12)
+    c.drawString(2*cm, height - 3*cm, "CNPJ: 12.345.678/0001-90")
+    c.drawString(2*cm, height - 3.5*cm, "Rua das Flores, 123 - Centro - São Paulo/SP")
+    
+    # Linha divisória
+    c.line(2*cm, height - 4*cm, width - 2*cm, height - 4*cm)
+    
+    # Título da declaração
+    c.setFont("Helvetica-Bold", 14)
+    c.drawCentredString(width/2, height - 5*cm, TITULOS_DECLARACAO.get(dados['tipo'], 'DECLARAÇÃO'))
+    
+    # Texto da declaração
+    c.setFont("Helvetica", 11)
+    y = height - 7*cm
+    
+    # Quebrar texto em linhas
+    for linha in texto_declaracao(dados).split('\n'):
+        linha_limpa = linha.strip()
+        if linha_limpa:
+            # Limitar caracteres por linha
+            if len(linha_limpa) > 80:
+                palavras = linha_limpa.split(' ')
+                linha_atual = ""
+                for palavra in palavras:
+                    if len(linha_atual) + len(palavra) + 1 <= 80:
+                        linha_atual += palavra + " "
+                    else:
+                        if linha_atual:
+                            c.drawString(2*cm, y, linha_atual.strip())
+                            y -= 0.5*cm
+                        linha_atual = palavra + " "
+                if linha_atual:
+                    c.drawString(2*cm, y, linha_atual.strip())
+                    y -= 0.5*cm
+            else:
+                c.drawString(2*cm, y, linha_limpa)
+                y -= 0.5*cm
+        else:
+            y -= 0.3*cm
+    
+    # Data e assinatura
+    y = height - 15*cm
+    emitida_em = datetime.strptime(dados['emitida_em'], '%Y-%m-%d')
+    data_formatada = f"{emitida_em.day:02d} de {MESES[emitida_em.month - 1]} de {emitida_em.year}"
+    
+    c.drawString(2*cm, y, f"São Paulo, {data_formatada}")
+    
+    y -= 2*cm
+    c.line(2*cm, y, 8*cm, y)
+    c.setFont("Helvetica", 10)
+    c.drawString(2*cm, y - 0.5*cm, "Secretaria Acadêmica")
+
 
 class RequerimentoService:
 
@@ -66,116 +199,19 @@ class RequerimentoService:
     
     @staticmethod
     def gerar_declaracao(aluno, tipo_declaracao):
-        """Gera uma declaração em PDF"""
-        
-        # Criar diretório para declarações se não existir
-        declaracoes_dir = 'declaracoes'
-        if not os.path.exists(declaracoes_dir):
-            os.makedirs(declaracoes_dir)
-            print(f"Pasta '{declaracoes_dir}' criada automaticamente")
-        
-        # Limpar o nome do arquivo (remover caracteres especiais)
-        matricula_limpa = aluno.matricula.replace('/', '_').replace('\\', '_')
-        
-        # Nome do arquivo
-        filename = f"declaracao_{matricula_limpa}_{tipo_declaracao}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join(declaracoes_dir, filename)
-        
-        # Pegar curso do aluno se existir
-        curso_nome = "Não informado"
-        if aluno.matriculas and len(aluno.matriculas) > 0:
-            curso_nome = aluno.matriculas[0].curso.nome if aluno.matriculas[0].curso else "Não informado"
-        
-        # Preparar texto da declaração
-        texto = f"""
-Declaramos para os devidos fins que {aluno.nome_completo}, 
-portador(a) do CPF {aluno.cpf}, matriculado(a) sob o número {aluno.matricula},
-está regularmente matriculado(a) neste estabelecimento de ensino.
-
-Curso: {curso_nome}
-Data de Matrícula: {aluno.data_matricula.strftime('%d/%m/%Y') if aluno.data_matricula else 'Não informada'}
-
-Por ser expressão da verdade, firmamos a presente declaração.
-        """
+        """Gera uma declaração em PDF (no armazém de src/core/armazem_pdf)"""
+        dados = dados_declaracao(aluno, tipo_declaracao)
+        texto = texto_declaracao(dados)
         
         try:
-            # Criar PDF
-            c = canvas.Canvas(filepath, pagesize=A4)
-            width, height = A4
-            
-            # Cabeçalho
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(2*cm, height - 2*cm, "ESCOLA MUNICIPAL PROFESSOR JOSÉ DA SILVA")
-            
-            c.setFont("Helvetica", 12)
-            c.drawString(2*cm, height - 3*cm, "CNPJ: 12.345.678/0001-90")
-            c.drawString(2*cm, height - 3.5*cm, "Rua das Flores, 123 - Centro - São Paulo/SP")
-            
-            # Linha divisória
-            c.line(2*cm, height - 4*cm, width - 2*cm, height - 4*cm)
-            
-            # Título da declaração
-            c.setFont("Helvetica-Bold", 14)
-            titulos = {
-                'matricula': 'DECLARAÇÃO DE MATRÍCULA',
-                'frequencia': 'DECLARAÇÃO DE FREQUÊNCIA',
-                'conclusao': 'DECLARAÇÃO DE CONCLUSÃO'
-            }
-            c.drawCentredString(width/2, height - 5*cm, titulos.get(tipo_declaracao, 'DECLARAÇÃO'))
-            
-            # Texto da declaração
-            c.setFont("Helvetica", 11)
-            y = height - 7*cm
-            
-            # Quebrar texto em linhas
-            linhas = texto.strip().split('\n')
-            for linha in linhas:
-                linha_limpa = linha.strip()
-                if linha_limpa:
-                    # Limitar caracteres por linha
-                    if len(linha_limpa) > 80:
-                        palavras = linha_limpa.split(' ')
-                        linha_atual = ""
-                        for palavra in palavras:
-                            if len(linha_atual) + len(palavra) + 1 <= 80:
-                                linha_atual += palavra + " "
-                            else:
-                                if linha_atual:
-                                    c.drawString(2*cm, y, linha_atual.strip())
-                                    y -= 0.5*cm
-                                linha_atual = palavra + " "
-                        if linha_atual:
-                            c.drawString(2*cm, y, linha_atual.strip())
-                            y -= 0.5*cm
-                    else:
-                        c.drawString(2*cm, y, linha_limpa)
-                        y -= 0.5*cm
-                else:
-                    y -= 0.3*cm
-            
-            # Data e assinatura
-            y = height - 15*cm
-            data_formatada = datetime.now().strftime('%d de %B de %Y').replace(
-                'January', 'janeiro').replace('February', 'fevereiro').replace('March', 'março'
-            ).replace('April', 'abril').replace('May', 'maio').replace('June', 'junho'
-            ).replace('July', 'julho').replace('August', 'agosto').replace('September', 'setembro'
-            ).replace('October', 'outubro').replace('November', 'novembro').replace('December', 'dezembro')
-            
-            c.drawString(2*cm, y, f"São Paulo, {data_formatada}")
-            
-            y -= 2*cm
-            c.line(2*cm, y, 8*cm, y)
-            c.setFont("Helvetica", 10)
-            c.drawString(2*cm, y - 0.5*cm, "Secretaria Acadêmica")
-            
-            c.save()
-            
+            hash_pdf, filepath = armazem_pdf().guardar(renderizar_declaracao(dados))
             print(f" PDF gerado com sucesso: {filepath}")
             
             return {
-                'texto': texto.strip(),
+                'texto': texto,
                 'pdf_path': filepath,
-                'filename': filename,
+                'filename': os.path.basename(filepath),
+                'hash': hash_pdf,
                 'sucesso': True
             }
         except Exception as e:
@@ -184,7 +220,7 @@ Por ser expressão da verdade, firmamos a presente declaração.
             traceback.print_exc()
             # Retornar com informação de erro
             return {
-                'texto': texto.strip(),
+                'texto': texto,
                 'pdf_path': None,
                 'filename': None,
                 'sucesso': False,
@@ -0,0 +1,3 @@
+"""
+Código da aplicação Flask
+"""
@@ -0,0 +1,81 @@
+"""
+Armazém de PDFs endereçado por conteúdo
+
+Cada PDF é gravado uma vez em DIRETORIO/ab/<sha256>.pdf. Conteúdos iguais
+(a mesma declaração pedida duas vezes no dia) caem no mesmo arquivo; a
+gravação vai para um temporário no mesmo diretório e entra com
+os.replace, então quem lê nunca vê um PDF pela metade.
+
+hash_do_pdf dá o hash de qualquer PDF servido (o ETag das rotas): o do
+nome, para os do armazém, ou o SHA-256 do arquivo, calculado uma vez
+por (caminho, mtime, tamanho), para os gravados antes do armazém.
+"""
+import functools
+import hashlib
+import os
+import re
+import tempfile
+
+from flask import current_app
+
+DIRETORIO_PADRAO = 'declaracoes'
+
+_NOME_HASH = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ArmazemPdf:
+    """
+    Args:
+        diretorio: raiz do armazém
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        self.diretorio = diretorio
+
+    def caminho(self, hash_conteudo):
+        return os.path.join(self.diretorio, hash_conteudo[:2], f'{hash_conteudo}.pdf')
+
+    def existe(self, hash_conteudo):
+        return os.path.exists(self.caminho(hash_conteudo))
+
+    def guardar(self, conteudo):
+        """Grava o PDF (se ainda não existe); retorna (hash, caminho)"""
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho(hash_conteudo)
+        if os.path.exists(caminho):
+            return hash_conteudo, caminho
+
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return hash_conteudo, caminho
+
+
+@functools.lru_cache(maxsize=1024)
+def _hash_arquivo(caminho, mtime_ns, tamanho):
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def hash_do_pdf(caminho):
+    """SHA-256 do conteúdo do PDF (OSError se o arquivo não existe)"""
+    estado = os.stat(caminho)
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    if _NOME_HASH.match(nome):
+        return nome
+    return _hash_arquivo(caminho, estado.st_mtime_ns, estado.st_size)
+
+
+def armazem_pdf():
+    """Armazém do app (DECLARACOES_DIR)"""
+    return ArmazemPdf(current_app.config.get('DECLARACOES_DIR', DIRETORIO_PADRAO))
@@ -0,0 +1,193 @@
+"""
+Cache de tokens JWT verificados
+
+O portal consulta /api/auth/validar-token e /api/auth/requerimentos a cada
+poucos segundos por aba aberta, e requer_admin/requer_funcionario
+recarregavam o Usuario a cada request. Aqui as claims de um token
+verificado e o registro do dono (o dict de Aluno.to_dict, ou id/tipo/ativo
+do Usuario) ficam num LRU de TOKENS_GUARDADOS entradas, indexado pelo
+SHA-256 do token.
+
+Uma entrada vale até o exp do token ou TOKEN_CACHE_TTL segundos, o que
+vier antes; vencida, o token é decodificado de novo (e um token expirado
+volta a dar ExpiredSignatureError).
+
+Cada Aluno/Usuario alterado (senha, status, tipo...) ou removido tem sua
+geração incrementada no commit; a entrada guarda a geração de quando o
+registro foi lido e deixa de valer quando ela muda. A invalidação é por
+processo: em outros workers a entrada antiga dura no máximo
+TOKEN_CACHE_TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from database import db
+from src.models import Aluno, Usuario
+
+TOKENS_GUARDADOS = 10000
+TTL_PADRAO = 300
+
+# tipo de principal -> (claim com o id, modelo)
+PRINCIPAIS = {
+    'aluno': ('aluno_id', Aluno),
+    'usuario': ('user_id', Usuario),
+}
+
+# (tipo, id) -> geração; compartilhado por todos os caches do processo
+_geracoes = {}
+_lock_geracoes = threading.Lock()
+
+
+def _registro(tipo, obj):
+    """O que fica em cache do dono do token"""
+    if tipo == 'aluno':
+        return obj.to_dict()
+    return {'id': obj.id, 'tipo': obj.tipo, 'ativo': obj.ativo}
+
+
+def geracao(tipo, principal_id):
+    return _geracoes.get((tipo, principal_id), 0)
+
+
+def invalidar(tipo, principal_id):
+    """Descarta o que estiver em cache do aluno/usuário em todos os tokens"""
+    with _lock_geracoes:
+        chave = (tipo, principal_id)
+        _geracoes[chave] = _geracoes.get(chave, 0) + 1
+
+
+class CacheTokens:
+    """
+    Args:
+        segredo: chave HS256 dos tokens
+        maximo: entradas guardadas (LRU)
+        ttl: segundos que uma entrada vale, no máximo
+    """
+
+    def __init__(self, segredo, maximo=TOKENS_GUARDADOS, ttl=TTL_PADRAO):
+        self.segredo = segredo
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # sha256 do token -> entrada
+
+    def _entrada(self, token):
+        chave = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        agora = time.time()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if agora < entrada['expira']:
+                    self._entradas.move_to_end(chave)
+                    return entrada
+                del self._entradas[chave]
+
+        claims = jwt.decode(token, self.segredo, algorithms=['HS256'])
+        expira = agora + self.ttl
+        if isinstance(claims.get('exp'), (int, float)):
+            expira = min(expira, claims['exp'])
+        entrada = {'expira': expira, 'claims': claims, 'principais': {}}
+        with self._lock:
+            self._entradas[chave] = entrada
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def verificar(self, token):
+        """
+        Claims do token (não altere o dict).
+
+        Raises:
+            jwt.ExpiredSignatureError, jwt.InvalidTokenError
+        """
+        return self._entrada(token)['claims']
+
+    def principal(self, token, tipo):
+        """
+        Registro do aluno/usuário dono do token (None se o token não é
+        desse tipo ou o registro não existe); não altere o dict.
+
+        Raises:
+            jwt.ExpiredSignatureError, jwt.InvalidTokenError
+        """
+        entrada = self._entrada(token)
+        claim, modelo = PRINCIPAIS[tipo]
+        principal_id = entrada['claims'].get(claim)
+        if principal_id is None:
+            return None
+
+        geracao_atual = geracao(tipo, principal_id)
+        guardado = entrada['principais'].get(tipo)
+        if guardado is not None and guardado[0] == geracao_atual:
+            return guardado[1]
+
+        # A geração é lida antes do banco: um commit no meio invalida o que for lido
+        obj = db.session.get(modelo, principal_id)
+        if obj is None:
+            return None
+        registro = _registro(tipo, obj)
+        entrada['principais'][tipo] = (geracao_atual, registro)
+        return registro
+
+
+def cache_tokens():
+    """Cache do app (SECRET_KEY, TOKEN_CACHE_MAX, TOKEN_CACHE_TTL)"""
+    cache = current_app.extensions.get('cache_tokens')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'cache_tokens',
+            CacheTokens(
+                current_app.config.get('SECRET_KEY', 'dev-secret'),
+                maximo=current_app.config.get('TOKEN_CACHE_MAX', TOKENS_GUARDADOS),
+                ttl=current_app.config.get('TOKEN_CACHE_TTL', TTL_PADRAO),
+            ),
+        )
+    return cache
+
+
+# ============ INVALIDAÇÃO ============
+
+def _tipo_principal(obj):
+    for tipo, (_, modelo) in PRINCIPAIS.items():
+        if isinstance(obj, modelo):
+            return tipo
+    return None
+
+
+def _anotar_alterados(session, flush_context):
+    alterados = session.info.setdefault('principais_alterados', set())
+    for obj in session.dirty:
+        tipo = _tipo_principal(obj)
+        if tipo and session.is_modified(obj, include_collections=False):
+            alterados.add((tipo, inspect(obj).identity[0]))
+    for obj in session.deleted:
+        tipo = _tipo_principal(obj)
+        if tipo:
+            alterados.add((tipo, inspect(obj).identity[0]))
+
+
+def _invalidar_apos_commit(session):
+    for tipo, principal_id in session.info.pop('principais_alterados', ()):
+        invalidar(tipo, principal_id)
+
+
+def _descartar_apos_rollback(session):
+    session.info.pop('principais_alterados', None)
+
+
+def registrar_invalidacao_tokens():
+    """Liga a invalidação do cache de tokens a todas as sessões do SQLAlchemy"""
+    for nome, funcao in (
+        ('after_flush', _anotar_alterados),
+        ('after_commit', _invalidar_apos_commit),
+        ('after_rollback', _descartar_apos_rollback),
+    ):
+        if not event.contains(Session, nome, funcao):
+            event.listen(Session, nome, funcao)
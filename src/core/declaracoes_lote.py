@@ -0,0 +1,218 @@
+"""
+Declarações em lote (um curso, uma turma ou uma lista de alunos)
+
+Os alunos e seus cursos saem de uma consulta só (selectinload); os PDFs
+são desenhados num pool de processos que fica de pé o lote inteiro, com
+os dados enviados em blocos. Cada PDF entra no armazém endereçado por
+conteúdo (src/core/armazem_pdf) e todos os Requerimento do lote entram
+num INSERT executemany e um commit; resumo_aluno e versoes_tabelas são
+atualizados na mesma transação.
+
+O relatório é um gerador de dicts, um de progresso a cada
+PROGRESSO_DECLARACOES PDFs e um resumo no fim (com os arquivos gerados,
+para o ZIP, e o PDF único se pedido), pronto para ser transmitido como
+NDJSON.
+"""
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, insert
+from sqlalchemy.orm import joinedload, selectinload
+
+from database import db
+from src.core.armazem_pdf import armazem_pdf
+from src.core.errors import ValidationError
+from src.core.logger import get_logger
+from src.core.resumo_aluno import recalcular_alunos
+from src.core.versoes_tabelas import incrementar_versoes
+from src.models import Aluno, Matricula, Requerimento
+from services.requerimento_service import (
+    TITULOS_DECLARACAO,
+    dados_declaracao,
+    renderizar_declaracao,
+    renderizar_declaracoes,
+    texto_declaracao,
+)
+
+PROGRESSO_DECLARACOES = 50
+SAIDAS = ('ndjson', 'pdf', 'zip')
+
+logger = get_logger('declaracoes_lote')
+
+_tabela = Requerimento.__table__
+
+
+def selecionar_alunos(curso_id=None, ano=None, semestre=None, aluno_ids=None):
+    """
+    Alunos com matrícula cursando no curso/ano/semestre (e/ou da lista), por nome.
+
+    Raises:
+        ValidationError: nenhum filtro informado
+    """
+    if curso_id is None and ano is None and semestre is None and not aluno_ids:
+        raise ValidationError("Informe curso_id, ano, semestre ou aluno_ids")
+
+    consulta = Aluno.query.options(selectinload(Aluno.matriculas).joinedload(Matricula.curso))
+    if curso_id is not None or ano is not None or semestre is not None:
+        filtros = [Matricula.status == 'cursando']
+        if curso_id is not None:
+            filtros.append(Matricula.curso_id == curso_id)
+        if ano is not None:
+            filtros.append(Matricula.ano == ano)
+        if semestre is not None:
+            filtros.append(Matricula.semestre == semestre)
+        consulta = consulta.filter(Aluno.matriculas.any(and_(*filtros)))
+    if aluno_ids:
+        consulta = consulta.filter(Aluno.id.in_(aluno_ids))
+    return consulta.order_by(Aluno.nome_completo, Aluno.id).all()
+
+
+def nome_arquivo(dados):
+    matricula_limpa = dados['matricula'].replace('/', '_').replace('\\', '_')
+    return f"declaracao_{matricula_limpa}_{dados['tipo']}.pdf"
+
+
+def _inserir_requerimentos(linhas):
+    """INSERT executemany dos requerimentos, resumo e versões na mesma transação"""
+    db.session.execute(insert(_tabela), linhas)
+    conexao = db.session.connection()
+    recalcular_alunos(conexao, {linha['aluno_id'] for linha in linhas})
+    incrementar_versoes(conexao, ['requerimentos'])
+    db.session.commit()
+
+
+def gerar_declaracoes_lote(alunos, tipo, processos=None, pdf_unico=False,
+                           assinatura='Secretaria Acadêmica'):
+    """
+    Relatório (gerador de dicts) da geração das declarações dos alunos.
+
+    Args:
+        alunos: resultado de selecionar_alunos
+        tipo: matricula, frequencia ou conclusao
+        processos: tamanho do pool (padrão: número de CPUs)
+        pdf_unico: também gera um PDF com todas as declarações
+
+    Raises:
+        ValidationError: tipo inválido
+    """
+    if tipo not in TITULOS_DECLARACAO:
+        raise ValidationError(f"declaracao_tipo invalido. Use: {', '.join(TITULOS_DECLARACAO)}")
+
+    inicio = time.perf_counter()
+    lista_dados = [dados_declaracao(aluno, tipo) for aluno in alunos]
+    armazem = armazem_pdf()
+    processos = processos or os.cpu_count() or 1
+    agora = datetime.now()
+    linhas, arquivos = [], []
+    unico = None
+
+    if lista_dados:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            # O PDF único roda em paralelo com os individuais
+            futuro_unico = pool.submit(renderizar_declaracoes, lista_dados) if pdf_unico else None
+            blocos = max(1, len(lista_dados) // (processos * 4))
+            pdfs = pool.map(renderizar_declaracao, lista_dados, chunksize=blocos)
+            for feitos, (aluno, dados, pdf) in enumerate(zip(alunos, lista_dados, pdfs), 1):
+                _, caminho = armazem.guardar(pdf)
+                arquivos.append((nome_arquivo(dados), caminho))
+                linhas.append({
+                    'aluno_id': aluno.id,
+                    'tipo': 'declaracao',
+                    'status': 'pendente',
+                    'data_solicitacao': agora,
+                    'descricao': f"Solicitação de declaração de {tipo}",
+                    'declaracao_tipo': tipo,
+                    'declaracao_texto': texto_declaracao(dados),
+                    'declaracao_assinatura': assinatura,
+                    'declaracao_data_assinatura': agora,
+                    'declaracao_pdf_path': caminho,
+                })
+                if feitos % PROGRESSO_DECLARACOES == 0 or feitos == len(lista_dados):
+                    logger.info("Declarações em lote (%s): %d/%d", tipo, feitos, len(lista_dados))
+                    yield {'progresso': feitos, 'total': len(lista_dados)}
+            if futuro_unico is not None:
+                _, unico = armazem.guardar(futuro_unico.result())
+
+        _inserir_requerimentos(linhas)
+
+    segundos = time.perf_counter() - inicio
+    logger.info("Declarações em lote (%s): %d em %.3fs", tipo, len(linhas), segundos)
+    yield {'resumo': {
+        'tipo': tipo,
+        'requerimentos': len(linhas),
+        'arquivos': arquivos,
+        'pdf_unico': unico,
+        'segundos': round(segundos, 3),
+        'por_segundo': round(len(linhas) / segundos, 1) if segundos else None,
+    }}
+
+
+# ============ SAÍDAS ============
+
+class _SaidaZip:
+    """Destino não posicionável do ZipFile; guarda os bytes até o próximo yield"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        conteudo = b''.join(self.partes)
+        self.partes = []
+        return conteudo
+
+
+def zip_declaracoes(arquivos):
+    """Pedaços de um ZIP com os PDFs (nome, caminho), lidos do disco um por vez"""
+    saida = _SaidaZip()
+    # PDFs já são comprimidos: ZIP_STORED
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, caminho in arquivos:
+            arquivo_zip.write(caminho, arcname=nome)
+            yield saida.esvaziar()
+    yield saida.esvaziar()
+
+
+# ============ COMANDOS ============
+
+requerimentos_cli = AppGroup('requerimentos', help='Operações em massa com requerimentos')
+
+
+@requerimentos_cli.command('declaracoes')
+@click.option('--tipo', type=click.Choice(tuple(TITULOS_DECLARACAO)), required=True)
+@click.option('--curso-id', type=int, default=None)
+@click.option('--ano', type=int, default=None)
+@click.option('--semestre', type=click.IntRange(1, 2), default=None)
+@click.option('--processos', type=int, default=None)
+@click.option('--saida', type=click.Path(dir_okay=False), default=None,
+              help='Grava também um .zip com os PDFs ou um .pdf único')
+def comando_declaracoes(tipo, curso_id, ano, semestre, processos, saida):
+    """Gera as declarações de um curso/turma; progresso em NDJSON na saída"""
+    alunos = selecionar_alunos(curso_id=curso_id, ano=ano, semestre=semestre)
+    pdf_unico = bool(saida) and saida.lower().endswith('.pdf')
+    resumo = None
+    for item in gerar_declaracoes_lote(alunos, tipo, processos=processos, pdf_unico=pdf_unico):
+        resumo = item.get('resumo', resumo)
+        click.echo(json.dumps(item, ensure_ascii=False))
+
+    if saida and resumo['requerimentos']:
+        with open(saida, 'wb') as destino:
+            if pdf_unico:
+                with open(resumo['pdf_unico'], 'rb') as origem:
+                    destino.write(origem.read())
+            else:
+                for parte in zip_declaracoes(resumo['arquivos']):
+                    destino.write(parte)
+        click.echo(f"Gravado em {saida}", err=True)
@@ -0,0 +1,166 @@
+"""
+Faturamento de mensalidades do semestre em massa
+
+Em vez de um Pagamento por objeto e por aluno, cada mês do semestre vira
+um INSERT ... SELECT sobre as matrículas ativas: vencimento, link e código
+do boleto são expressões da própria consulta (matrícula do aluno + ano e
+mês), o valor vem do curso (ou de valor_mensal).
+
+As matrículas são percorridas em faixas de id de LOTE_FATURAMENTO, uma
+transação por faixa. O índice único uq_pagamentos_referencia (aluno, ano,
+mês, tipo) com ON CONFLICT DO NOTHING torna o job idempotente: rodar de
+novo só gera o que falta. resumo_aluno e versoes_tabelas são atualizados
+na mesma transação de cada faixa.
+"""
+import time
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import db
+from src.core.errors import ValidationError
+from src.core.resumo_aluno import recalcular_alunos
+from src.core.versoes_tabelas import incrementar_versoes
+from src.models import Aluno, Curso, Matricula, Pagamento
+
+LOTE_FATURAMENTO = 2000
+DIA_VENCIMENTO = 10
+URL_BOLETO = 'https://pagamento.escola.edu.br/boleto/'
+
+_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+_COLUNAS = (
+    'aluno_id', 'tipo', 'valor', 'data_emissao', 'data_vencimento', 'status',
+    'link_boleto', 'codigo_boleto', 'mes_referencia', 'ano_referencia',
+)
+
+
+def meses_do_semestre(ano, semestre, a_partir_de=None):
+    """(mês, vencimento) do semestre com vencimento a partir de a_partir_de (hoje)"""
+    a_partir_de = a_partir_de or date.today()
+    meses = range(1, 7) if semestre == 1 else range(7, 13)
+    return [
+        (mes, date(ano, mes, DIA_VENCIMENTO)) for mes in meses
+        if date(ano, mes, DIA_VENCIMENTO) >= a_partir_de
+    ]
+
+
+def _selecao_do_mes(ano, mes, vencimento, valor_mensal, filtros, agora):
+    referencia = f'{ano}{mes:02d}'
+    valor = literal(valor_mensal) if valor_mensal is not None else Curso.valor_mensalidade
+    return (
+        select(
+            Matricula.aluno_id,
+            literal('mensalidade'),
+            valor,
+            literal(agora),
+            literal(vencimento),
+            literal('pendente'),
+            literal(URL_BOLETO) + Aluno.matricula + literal(f'/{referencia}'),
+            func.replace(Aluno.matricula, '/', '') + literal(referencia),
+            literal(mes),
+            literal(ano),
+        )
+        .select_from(Matricula)
+        .join(Aluno, Aluno.id == Matricula.aluno_id)
+        .join(Curso, Curso.id == Matricula.curso_id)
+        .where(*filtros)
+    )
+
+
+def _gerar_faixa(conexao, meses, ano, valor_mensal, filtros):
+    """Gera as mensalidades da faixa; retorna os alunos que ganharam linhas"""
+    tabela = Pagamento.__table__
+    alunos = []
+    agora = datetime.utcnow()
+    for mes, vencimento in meses:
+        instrucao = (
+            _INSERTS[conexao.dialect.name](tabela)
+            .from_select(_COLUNAS, _selecao_do_mes(ano, mes, vencimento, valor_mensal, filtros, agora))
+            .on_conflict_do_nothing(
+                index_elements=['aluno_id', 'ano_referencia', 'mes_referencia', 'tipo'])
+            .returning(tabela.c.aluno_id)
+        )
+        alunos += conexao.execute(instrucao).scalars().all()
+    return alunos
+
+
+def faturar_semestre(ano, semestre, valor_mensal=None, curso_id=None, aluno_id=None,
+                     a_partir_de=None, tamanho_lote=LOTE_FATURAMENTO):
+    """
+    Mensalidades do semestre para toda matrícula cursando de aluno ativo.
+
+    Args:
+        valor_mensal: valor fixo (padrão: valor_mensalidade do curso)
+        curso_id, aluno_id: restringem as matrículas faturadas
+        a_partir_de: meses com vencimento antes disso são pulados (padrão: hoje)
+
+    Returns:
+        dict com meses, geradas, alunos, lotes, segundos e linhas_por_segundo
+
+    Raises:
+        ValidationError: parâmetro inválido
+    """
+    if semestre not in (1, 2):
+        raise ValidationError("semestre deve ser 1 ou 2")
+    if valor_mensal is not None and valor_mensal <= 0:
+        raise ValidationError("valor_mensal deve ser maior que zero")
+
+    inicio = time.perf_counter()
+    meses = meses_do_semestre(ano, semestre, a_partir_de)
+    filtros = [Matricula.status == 'cursando', Aluno.status == 'ativo']
+    if curso_id is not None:
+        filtros.append(Matricula.curso_id == curso_id)
+    if aluno_id is not None:
+        filtros.append(Matricula.aluno_id == aluno_id)
+
+    menor, maior = db.session.execute(
+        select(func.min(Matricula.id), func.max(Matricula.id)).where(Matricula.status == 'cursando')
+    ).one()
+    geradas = lotes = 0
+    alunos_faturados = set()
+    if meses and menor is not None:
+        for base in range(menor, maior + 1, tamanho_lote):
+            faixa = [*filtros, Matricula.id >= base, Matricula.id < base + tamanho_lote]
+            conexao = db.session.connection()
+            alunos = _gerar_faixa(conexao, meses, ano, valor_mensal, faixa)
+            if alunos:
+                recalcular_alunos(conexao, set(alunos))
+                incrementar_versoes(conexao, ['pagamentos'])
+            db.session.commit()
+            geradas += len(alunos)
+            alunos_faturados.update(alunos)
+            lotes += 1
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'ano': ano,
+        'semestre': semestre,
+        'meses': [mes for mes, _ in meses],
+        'geradas': geradas,
+        'alunos': len(alunos_faturados),
+        'lotes': lotes,
+        'segundos': round(segundos, 3),
+        'linhas_por_segundo': round(geradas / segundos, 1) if segundos else None,
+    }
+
+
+# ============ COMANDOS ============
+
+pagamentos_cli = AppGroup('pagamentos', help='Operações em massa com pagamentos')
+
+
+@pagamentos_cli.command('faturar')
+@click.option('--ano', type=int, default=lambda: date.today().year)
+@click.option('--semestre', type=click.IntRange(1, 2), required=True)
+@click.option('--valor-mensal', type=float, default=None, help='Padrão: valor do curso')
+@click.option('--curso-id', type=int, default=None)
+def comando_faturar(ano, semestre, valor_mensal, curso_id):
+    """Gera as mensalidades do semestre para todas as matrículas ativas"""
+    resultado = faturar_semestre(ano, semestre, valor_mensal=valor_mensal, curso_id=curso_id)
+    click.echo(
+        f"{resultado['geradas']} mensalidades para {resultado['alunos']} alunos "
+        f"em {resultado['segundos']}s ({resultado['linhas_por_segundo']} linhas/s)"
+    )
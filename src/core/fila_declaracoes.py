@@ -0,0 +1,181 @@
+"""
+Fila de renderização de declarações
+
+POST /api/requerimentos/declaracao grava o Requerimento, entrega os dados
+da declaração a esta fila e responde 202 com o id da tarefa; o PDF é
+desenhado num pool de DECLARACOES_PROCESSOS processos (ReportLab é Python
+puro e seguraria o GIL dos workers HTTP).
+
+Quando o PDF fica pronto ele entra no armazém endereçado por conteúdo
+(src/core/armazem_pdf) e o caminho é gravado em
+Requerimento.declaracao_pdf_path, o mesmo campo que o portal já consulta.
+
+Pedidos com os mesmos dados enquanto a renderização está em andamento
+esperam o mesmo Future (uma renderização só); os que chegam depois
+encontram o hash pronto e nem vão ao pool. Um requerimento com tarefa em
+andamento recebe a mesma tarefa (as rotas de PDF regeneram por aqui um
+arquivo que sumiu, e vários GETs ao mesmo tempo geram uma vez só).
+
+As tarefas ficam em memória, no processo que as recebeu, até
+TAREFAS_GUARDADAS; depois disso o estado do pedido está no Requerimento.
+"""
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from database import db
+from src.core.armazem_pdf import armazem_pdf
+from src.core.logger import get_logger
+from src.models import Requerimento
+from services.requerimento_service import renderizar_declaracao
+
+TAREFAS_GUARDADAS = 1000
+
+logger = get_logger('fila_declaracoes')
+
+
+def chave_declaracao(dados):
+    """Identifica pedidos idênticos (mesmos dados, mesmo PDF)"""
+    return hashlib.sha256(json.dumps(dados, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FilaDeclaracoes:
+    """
+    Args:
+        app: app Flask (o resultado é gravado no banco dele)
+        armazem: ArmazemPdf onde os PDFs ficam
+        processos: tamanho do pool (padrão: número de CPUs)
+    """
+
+    def __init__(self, app, armazem, processos=None):
+        self.app = app
+        self.armazem = armazem
+        self.processos = processos
+        self._pool = None
+        self._lock = threading.Lock()
+        self._tarefas = OrderedDict()    # tarefa_id -> estado
+        self._em_andamento = {}          # chave -> Future
+        self._prontos = OrderedDict()    # chave -> hash do PDF
+        self._por_requerimento = {}      # requerimento_id -> tarefa em andamento
+
+    def enviar(self, requerimento_id, dados):
+        """Agenda a declaração do requerimento; retorna o estado da tarefa"""
+        chave = chave_declaracao(dados)
+        tarefa = {
+            'tarefa_id': uuid.uuid4().hex,
+            'requerimento_id': requerimento_id,
+            'status': 'na_fila',
+            'pdf_hash': None,
+            'erro': None,
+            'criada_em': datetime.now().isoformat(timespec='seconds'),
+            'concluida_em': None,
+        }
+        with self._lock:
+            em_andamento = self._por_requerimento.get(requerimento_id)
+            if em_andamento is None:
+                self._por_requerimento[requerimento_id] = tarefa
+                self._guardar(tarefa)
+                hash_pronto = self._prontos.get(chave)
+                if hash_pronto is not None and self.armazem.existe(hash_pronto):
+                    futuro = None
+                else:
+                    futuro = self._em_andamento.get(chave)
+                    if futuro is None:
+                        if self._pool is None:
+                            self._pool = ProcessPoolExecutor(max_workers=self.processos)
+                        futuro = self._pool.submit(renderizar_declaracao, dados)
+                        self._em_andamento[chave] = futuro
+        if em_andamento is not None:
+            return self.consultar(em_andamento['tarefa_id'])
+        tarefa['_futuro'] = futuro
+
+        if futuro is None:
+            self._concluir(tarefa, hash_pronto)
+        else:
+            futuro.add_done_callback(lambda f: self._renderizado(tarefa, chave, f))
+        return self.consultar(tarefa['tarefa_id'])
+
+    def consultar(self, tarefa_id):
+        """Estado da tarefa (None se desconhecida neste processo)"""
+        with self._lock:
+            tarefa = self._tarefas.get(tarefa_id)
+            if tarefa is None:
+                return None
+            estado = {campo: valor for campo, valor in tarefa.items() if not campo.startswith('_')}
+        futuro = tarefa.get('_futuro')
+        if estado['status'] == 'na_fila' and futuro is not None and futuro.running():
+            estado['status'] = 'processando'
+        return estado
+
+    def encerrar(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def _guardar(self, tarefa):
+        self._tarefas[tarefa['tarefa_id']] = tarefa
+        while len(self._tarefas) > TAREFAS_GUARDADAS:
+            self._tarefas.popitem(last=False)
+
+    def _renderizado(self, tarefa, chave, futuro):
+        # Roda numa thread do pool, fora de qualquer request
+        try:
+            hash_pdf, _ = self.armazem.guardar(futuro.result())
+        except Exception as e:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+            logger.error("Declaração do requerimento %s falhou: %s", tarefa['requerimento_id'], e)
+            self._atualizar(tarefa, status='erro', erro=str(e))
+            return
+
+        with self._lock:
+            self._em_andamento.pop(chave, None)
+            self._prontos[chave] = hash_pdf
+            while len(self._prontos) > TAREFAS_GUARDADAS:
+                self._prontos.popitem(last=False)
+        self._concluir(tarefa, hash_pdf)
+
+    def _concluir(self, tarefa, hash_pdf):
+        try:
+            with self.app.app_context():
+                try:
+                    requerimento = db.session.get(Requerimento, tarefa['requerimento_id'])
+                    if requerimento is not None:
+                        requerimento.declaracao_pdf_path = self.armazem.caminho(hash_pdf)
+                        db.session.commit()
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error("PDF pronto, mas o requerimento %s não foi atualizado: %s",
+                         tarefa['requerimento_id'], e)
+            self._atualizar(tarefa, status='erro', erro=str(e))
+            return
+        self._atualizar(tarefa, status='concluido', pdf_hash=hash_pdf)
+
+    def _atualizar(self, tarefa, **campos):
+        with self._lock:
+            tarefa.update(campos, concluida_em=datetime.now().isoformat(timespec='seconds'))
+            if self._por_requerimento.get(tarefa['requerimento_id']) is tarefa:
+                del self._por_requerimento[tarefa['requerimento_id']]
+
+
+def fila_declaracoes():
+    """Fila do app (DECLARACOES_PROCESSOS, DECLARACOES_DIR)"""
+    fila = current_app.extensions.get('fila_declaracoes')
+    if fila is None:
+        fila = current_app.extensions.setdefault(
+            'fila_declaracoes',
+            FilaDeclaracoes(
+                current_app._get_current_object(),
+                armazem_pdf(),
+                processos=current_app.config.get('DECLARACOES_PROCESSOS'),
+            ),
+        )
+    return fila
@@ -0,0 +1,284 @@
+"""
+Importação de alunos em massa (CSV ou NDJSON)
+
+Os registros são lidos em fluxo e tratados em lotes de LOTE_IMPORTACAO:
+
+- cada linha passa pelos validadores de src/utils/validators; CPF ou email
+  repetidos no arquivo ou já cadastrados (uma consulta por lote, pelos
+  índices únicos) viram erro da linha
+- as senhas do lote são processadas com bcrypt num pool de processos
+- as matrículas do lote saem de um único bloco de sequencias_matricula
+- o lote entra com um INSERT executemany e um commit; resumo_aluno e
+  versoes_tabelas são atualizados na mesma transação
+
+Se o INSERT do lote falhar (um cadastro concorrente com o mesmo CPF, por
+exemplo), o lote é refeito linha a linha para apontar quem falhou.
+
+O relatório é um gerador de dicts, um por linha com erro, um por lote
+concluído e um resumo no fim, pronto para ser transmitido como NDJSON.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from src.core.errors import ValidationError
+from src.core.resumo_aluno import recalcular_alunos
+from src.core.security import hash_senha_bcrypt
+from src.core.sequencia_matricula import reservar_bloco
+from src.core.versoes_tabelas import incrementar_versoes
+from src.models import Aluno
+from src.utils.helpers import gerar_matricula
+from src.utils.validators import (
+    validar_campos_obrigatorios,
+    validar_cpf,
+    validar_email,
+    validar_senha,
+    validar_telefone,
+)
+
+LOTE_IMPORTACAO = 500
+FORMATOS = ('csv', 'ndjson')
+CAMPOS_OBRIGATORIOS = ('nome_completo', 'cpf', 'data_nascimento', 'email')
+CAMPOS_OPCIONAIS = ('rg', 'telefone', 'endereco', 'cidade', 'estado', 'cep')
+
+_tabela = Aluno.__table__
+
+
+# ============ LEITURA ============
+
+def ler_registros(linhas, formato):
+    """
+    (número da linha, registro, erro) para cada registro do arquivo.
+
+    linhas: iterável de linhas de texto (arquivo aberto, TextIOWrapper)
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(linhas)
+        for registro in leitor:
+            limpo = {
+                campo.strip(): valor.strip() for campo, valor in registro.items()
+                if campo and isinstance(valor, str) and valor.strip()
+            }
+            yield leitor.line_num, limpo, None
+        return
+
+    for numero, linha in enumerate(linhas, 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            yield numero, None, "JSON invalido"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "linha deve ser um objeto JSON"
+            continue
+        yield numero, registro, None
+
+
+def validar_registro(registro):
+    """
+    Valores da linha para a tabela alunos e a senha (ou None).
+
+    Raises:
+        ValidationError: primeiro problema encontrado na linha
+    """
+    validar_campos_obrigatorios(registro, CAMPOS_OBRIGATORIOS)
+    nome = str(registro['nome_completo']).strip()
+    if not nome:
+        raise ValidationError("nome_completo é obrigatório")
+    validar_cpf(str(registro['cpf']))
+    validar_email(str(registro['email']))
+    if registro.get('telefone'):
+        validar_telefone(str(registro['telefone']))
+    senha = registro.get('senha')
+    if senha is not None:
+        senha = validar_senha(str(senha))
+    try:
+        data_nascimento = datetime.strptime(str(registro['data_nascimento']), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError("data_nascimento deve estar no formato YYYY-MM-DD")
+
+    # Gravado como no POST /api/alunos
+    valores = {
+        'nome_completo': nome,
+        'cpf': str(registro['cpf']),
+        'email': str(registro['email']),
+        'data_nascimento': data_nascimento,
+    }
+    for campo in CAMPOS_OPCIONAIS:
+        if registro.get(campo) is not None:
+            valores[campo] = str(registro[campo])
+    return valores, senha
+
+
+# ============ LOTES ============
+
+def _ja_cadastrados(valores):
+    cpfs = [v['cpf'] for v in valores]
+    emails = [v['email'] for v in valores]
+    consulta = select(_tabela.c.cpf, _tabela.c.email).where(
+        or_(_tabela.c.cpf.in_(cpfs), _tabela.c.email.in_(emails))
+    )
+    existentes = set()
+    for cpf, email in db.session.execute(consulta):
+        existentes.update((cpf, email))
+    return existentes
+
+
+def _inserir(linhas):
+    """INSERT executemany do lote, resumo e versões na mesma transação"""
+    ids = db.session.execute(insert(_tabela).returning(_tabela.c.id), linhas).scalars().all()
+    conexao = db.session.connection()
+    recalcular_alunos(conexao, ids)
+    incrementar_versoes(conexao, ['alunos'])
+    db.session.commit()
+
+
+class ImportadorAlunos:
+    """
+    Args:
+        processos: processos para o bcrypt (padrão: número de CPUs)
+        tamanho_lote: registros por transação
+    """
+
+    def __init__(self, processos=None, tamanho_lote=LOTE_IMPORTACAO):
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self._pool = None
+        self._cpfs, self._emails = set(), set()
+
+    def _hashes(self, senhas):
+        if not senhas:
+            return []
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processos)
+        blocos = max(1, len(senhas) // (self.processos * 4))
+        return list(self._pool.map(hash_senha_bcrypt, senhas, chunksize=blocos))
+
+    def _validar_lote(self, lote):
+        """(linhas válidas, erros) do lote"""
+        validas, erros = [], []
+        for numero, registro, erro in lote:
+            if erro is None:
+                try:
+                    valores, senha = validar_registro(registro)
+                except ValidationError as e:
+                    erro = str(e)
+            if erro is None and (valores['cpf'] in self._cpfs or valores['email'] in self._emails):
+                erro = "CPF ou email repetido no arquivo"
+            if erro:
+                erros.append({'linha': numero, 'erro': erro})
+                continue
+            self._cpfs.add(valores['cpf'])
+            self._emails.add(valores['email'])
+            validas.append((numero, valores, senha))
+
+        if validas:
+            existentes = _ja_cadastrados([v for _, v, _ in validas])
+            if existentes:
+                for numero, valores, _ in validas:
+                    if valores['cpf'] in existentes or valores['email'] in existentes:
+                        erros.append({'linha': numero, 'erro': "CPF ou email ja cadastrado"})
+                validas = [
+                    (n, v, s) for n, v, s in validas
+                    if v['cpf'] not in existentes and v['email'] not in existentes
+                ]
+        erros.sort(key=lambda e: e['linha'])
+        return validas, erros
+
+    def _gravar(self, validas):
+        """Grava o lote; retorna os erros das linhas que não entraram"""
+        hashes = iter(self._hashes([s for _, _, s in validas if s is not None]))
+        ano = datetime.now().year
+        ultimo = reservar_bloco(db.engine, ano, len(validas))
+        linhas = []
+        for i, (_, valores, senha) in enumerate(validas):
+            linhas.append({
+                **dict.fromkeys(CAMPOS_OPCIONAIS),
+                **valores,
+                'matricula': gerar_matricula(ano, ultimo - len(validas) + 1 + i),
+                'senha_hash': next(hashes) if senha is not None else None,
+            })
+
+        try:
+            _inserir(linhas)
+            return []
+        except IntegrityError:
+            db.session.rollback()
+
+        # Alguém gravou o mesmo CPF/email no meio tempo: refaz uma a uma
+        erros = []
+        for (numero, _, _), linha in zip(validas, linhas):
+            try:
+                _inserir([linha])
+            except IntegrityError:
+                db.session.rollback()
+                erros.append({'linha': numero, 'erro': "CPF ou email ja cadastrado"})
+        return erros
+
+    def importar(self, registros):
+        """Relatório (gerador de dicts) da importação dos registros de ler_registros"""
+        inicio = time.perf_counter()
+        lidas = importadas = com_erro = 0
+        registros = iter(registros)
+        try:
+            for numero_lote in itertools.count(1):
+                lote = list(itertools.islice(registros, self.tamanho_lote))
+                if not lote:
+                    break
+                lidas += len(lote)
+
+                validas, erros = self._validar_lote(lote)
+                if validas:
+                    erros += self._gravar(validas)
+                    erros.sort(key=lambda e: e['linha'])
+                yield from erros
+                com_erro += len(erros)
+                importadas += len(lote) - len(erros)
+                yield {'lote': numero_lote, 'importadas': importadas, 'erros': com_erro}
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        segundos = time.perf_counter() - inicio
+        yield {'resumo': {
+            'lidas': lidas,
+            'importadas': importadas,
+            'erros': com_erro,
+            'segundos': round(segundos, 3),
+            'linhas_por_segundo': round(lidas / segundos, 1) if segundos else None,
+        }}
+
+
+def importar_alunos(linhas, formato, processos=None):
+    """Lê, valida e grava; retorna o gerador do relatório"""
+    return ImportadorAlunos(processos=processos).importar(ler_registros(linhas, formato))
+
+
+# ============ COMANDOS ============
+
+alunos_cli = AppGroup('alunos', help='Operações em massa com alunos')
+
+
+@alunos_cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(FORMATOS), help='Padrão: pela extensão do arquivo')
+@click.option('--processos', type=int, default=None, help='Processos para o bcrypt')
+def comando_importar(arquivo, formato, processos):
+    """Importa alunos de um CSV ou NDJSON; relatório em NDJSON na saída"""
+    formato = formato or ('csv' if arquivo.lower().endswith('.csv') else 'ndjson')
+    with open(arquivo, encoding='utf-8', newline='') as linhas:
+        for item in importar_alunos(linhas, formato, processos):
+            click.echo(json.dumps(item, ensure_ascii=False))
@@ -0,0 +1,306 @@
+"""
+Paginação por chave (keyset) e projeção de campos nas listagens
+
+Cada página é um SELECT ... WHERE chave > cursor ORDER BY chave LIMIT n+1:
+o custo não cresce com a posição na tabela e nada fora da página é
+carregado. O cursor é opaco (base64 dos valores da chave da última linha).
+
+Com fields=a,b só as colunas pedidas saem do banco (relacionamentos como
+aluno_nome viram um OUTER JOIN) e os objetos nem são montados.
+
+Com Accept: application/x-ndjson (ou formato=ndjson|json) a coleção
+filtrada inteira é transmitida linha a linha em vez de paginada.
+
+O total vem de um COUNT guardado junto com a versão da tabela (ver
+versoes_tabelas): enquanto a versão não muda o valor é exato; se mudou
+há pouco (menos de PAGINACAO_TOTAL_TTL segundos), o valor anterior é
+devolvido como estimativa em vez de contar de novo.
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from flask import Response, current_app, jsonify, stream_with_context
+from sqlalchemy import and_, or_
+
+from database import db
+from src.core.errors import ValidationError
+from src.core.perfis_carga import perfil_carga
+from src.core.versoes_tabelas import ler_versao
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+TOTAL_TTL_PADRAO = 30  # segundos
+MAX_TOTAIS_EM_CACHE = 1024
+LOTE_EXPORTACAO = 500
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+
+@dataclass
+class Listagem:
+    """
+    Como uma listagem é ordenada e projetada.
+
+    ordem: função que devolve as colunas da chave, da mais significativa
+        para a menos; a última precisa ser única (id)
+    campos: função que devolve {nome: coluna} ou {nome: (coluna, relacionamento)}
+        com os campos aceitos em fields=; o relacionamento entra como OUTER JOIN
+    perfil: perfil de carga (perfis_carga) usado na listagem completa
+    """
+    modelo: type
+    ordem: object
+    campos: object
+    decrescente: bool = False
+    perfil: str = None
+    _cache: dict = field(default=None, init=False, repr=False)
+
+    def colunas_ordem(self):
+        return self.ordem()
+
+    def colunas_campos(self):
+        # Montado na primeira requisição: relacionamentos de backref só existem com os mappers configurados
+        if self._cache is None:
+            self._cache = {
+                nome: spec if isinstance(spec, tuple) else (spec, None)
+                for nome, spec in self.campos().items()
+            }
+        return self._cache
+
+
+# ============ PARÂMETROS ============
+
+def _ler_limite(valor):
+    if valor is None:
+        return LIMITE_PADRAO
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise ValidationError("limit deve ser numerico")
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ValidationError(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    return limite
+
+
+def _ler_campos(valor, listagem):
+    if not valor:
+        return None
+    nomes = list(dict.fromkeys(n.strip() for n in valor.split(',') if n.strip()))
+    disponiveis = listagem.colunas_campos()
+    invalidos = [n for n in nomes if n not in disponiveis]
+    if invalidos or not nomes:
+        raise ValidationError(
+            f"fields invalido: {', '.join(invalidos) or valor}. Use: {', '.join(disponiveis)}"
+        )
+    return nomes
+
+
+def codificar_cursor(valores):
+    bruto = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _converter(coluna, valor):
+    tipo = coluna.type.python_type
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    return tipo(valor)
+
+
+def decodificar_cursor(cursor, colunas):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+        if not isinstance(valores, list) or len(valores) != len(colunas):
+            raise ValueError(cursor)
+        return [_converter(c, v) for c, v in zip(colunas, valores)]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValidationError("cursor invalido")
+
+
+def _depois_do_cursor(colunas, valores, decrescente):
+    # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y); sem depender de row values
+    condicoes = []
+    for i, coluna in enumerate(colunas):
+        iguais = [colunas[j] == valores[j] for j in range(i)]
+        passou = coluna < valores[i] if decrescente else coluna > valores[i]
+        condicoes.append(and_(*iguais, passou))
+    return or_(*condicoes)
+
+
+def _formatar(valor):
+    """Mesmo formato de data dos to_dict"""
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    return valor
+
+
+# ============ TOTAL ============
+
+def total_em_cache(query, tabela):
+    """(total, estimado) da consulta, recontando só quando a tabela mudou"""
+    totais = current_app.extensions.setdefault('paginacao_totais', ({}, threading.Lock()))
+    cache, lock = totais
+    compilada = query.order_by(None).statement.compile()
+    chave = (str(compilada), repr(sorted(compilada.params.items())))
+    versao = ler_versao(db.session.connection(), tabela)
+    agora = time.monotonic()
+    ttl = current_app.config.get('PAGINACAO_TOTAL_TTL', TOTAL_TTL_PADRAO)
+
+    with lock:
+        salvo = cache.get(chave)
+    if salvo is not None:
+        versao_salva, total, instante = salvo
+        if versao_salva == versao:
+            return total, False
+        if agora - instante < ttl:
+            return total, True
+
+    total = query.order_by(None).count()
+    with lock:
+        if len(cache) >= MAX_TOTAIS_EM_CACHE:
+            cache.clear()
+        cache[chave] = (versao, total, agora)
+    return total, False
+
+
+# ============ CONSULTA ============
+
+def _consulta_ordenada(query, listagem, campos):
+    """
+    Consulta na ordem da chave e as funções que extraem de cada linha o
+    item serializado e os valores da chave.
+    """
+    ordem = listagem.colunas_ordem()
+    ordenacao = [c.desc() for c in ordem] if listagem.decrescente else list(ordem)
+
+    if campos is None:
+        if listagem.perfil:
+            query = query.options(*perfil_carga(listagem.perfil))
+        return (
+            query.order_by(*ordenacao),
+            lambda linha: linha.to_dict(),
+            lambda linha: [getattr(linha, c.key) for c in ordem],
+        )
+
+    specs = listagem.colunas_campos()
+    colunas = [specs[nome][0].label(nome) for nome in campos]
+    colunas += [c.label(f'_chave{i}') for i, c in enumerate(ordem)]
+    # As colunas da chave são do próprio modelo: o FROM continua sendo a tabela da listagem
+    query = query.with_entities(*colunas)
+    juntados = set()
+    for nome in campos:
+        relacionamento = specs[nome][1]
+        if relacionamento is not None and relacionamento.key not in juntados:
+            query = query.outerjoin(relacionamento)
+            juntados.add(relacionamento.key)
+    return (
+        query.order_by(*ordenacao),
+        lambda linha: {nome: _formatar(linha._mapping[nome]) for nome in campos},
+        lambda linha: [linha._mapping[f'_chave{i}'] for i in range(len(ordem))],
+    )
+
+
+# ============ PÁGINA ============
+
+def paginar(query, listagem, args):
+    """
+    Página da consulta conforme limit, cursor e fields da query string.
+
+    Returns:
+        dict com items, next_cursor, total, total_estimado e limit
+
+    Raises:
+        ValidationError: parâmetro inválido
+    """
+    limite = _ler_limite(args.get('limit'))
+    campos = _ler_campos(args.get('fields'), listagem)
+
+    total, estimado = total_em_cache(query, listagem.modelo.__tablename__)
+
+    cursor = args.get('cursor')
+    if cursor:
+        ordem = listagem.colunas_ordem()
+        query = query.filter(_depois_do_cursor(ordem, decodificar_cursor(cursor, ordem), listagem.decrescente))
+
+    query, serializar, chave = _consulta_ordenada(query, listagem, campos)
+    linhas = query.limit(limite + 1).all()
+
+    return {
+        'items': [serializar(linha) for linha in linhas[:limite]],
+        'next_cursor': codificar_cursor(chave(linhas[limite - 1])) if len(linhas) > limite else None,
+        'total': total,
+        'total_estimado': estimado,
+        'limit': limite,
+    }
+
+
+# ============ EXPORTAÇÃO ============
+
+def formato_exportacao(req):
+    """
+    'ndjson', 'json' ou None (listagem paginada).
+
+    NDJSON com Accept: application/x-ndjson ou formato=ndjson; um array
+    JSON transmitido aos poucos com formato=json.
+    """
+    formato = req.args.get('formato')
+    if formato is not None:
+        if formato not in ('ndjson', 'json'):
+            raise ValidationError("formato invalido. Use: ndjson, json")
+        return formato
+    if req.accept_mimetypes.best_match(['application/json', MIMETYPE_NDJSON]) == MIMETYPE_NDJSON:
+        return 'ndjson'
+    return None
+
+
+def exportar(query, listagem, args, formato):
+    """
+    Toda a coleção filtrada, escrita linha a linha.
+
+    A consulta é lida em lotes de LOTE_EXPORTACAO com yield_per (cursor do
+    lado do servidor quando o driver suporta), então a memória não depende
+    do tamanho da coleção. fields= funciona como na listagem paginada.
+
+    Raises:
+        ValidationError: parâmetro inválido (antes de começar a transmitir)
+    """
+    campos = _ler_campos(args.get('fields'), listagem)
+    query, serializar, _ = _consulta_ordenada(query, listagem, campos)
+    linhas = query.yield_per(LOTE_EXPORTACAO)
+
+    def ndjson():
+        for linha in linhas:
+            yield json.dumps(serializar(linha), ensure_ascii=False) + '\n'
+
+    def array_json():
+        separador = '['
+        for linha in linhas:
+            yield separador + json.dumps(serializar(linha), ensure_ascii=False)
+            separador = ','
+        yield ']' if separador == ',' else '[]'
+
+    if formato == 'ndjson':
+        return Response(stream_with_context(ndjson()), mimetype=MIMETYPE_NDJSON)
+    return Response(stream_with_context(array_json()), mimetype='application/json')
+
+
+def responder_listagem(query, listagem, req):
+    """
+    Resposta de um endpoint de listagem: exportação em streaming se pedida
+    (ver formato_exportacao), senão a página em JSON.
+
+    Raises:
+        ValidationError: parâmetro inválido
+    """
+    formato = formato_exportacao(req)
+    if formato:
+        return exportar(query, listagem, req.args, formato)
+    return jsonify(paginar(query, listagem, req.args))
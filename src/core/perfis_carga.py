@@ -0,0 +1,46 @@
+"""
+Perfis de carregamento das listagens
+
+Os to_dict dos modelos leem relacionamentos (aluno, materia, curso). Numa
+listagem, cada leitura preguiçosa vira uma consulta por linha; cada
+endpoint aplica aqui o perfil com os relacionamentos que serializa:
+
+- joinedload: alvo quase sempre diferente por linha, vem no mesmo SELECT
+- selectinload: alvo repetido em muitas linhas (mesmo aluno, mesmo curso),
+  um SELECT ... IN por relacionamento com cada alvo uma vez só
+
+O aluno dono de uma listagem já carregado (get_or_404) sai do identity
+map, sem consulta, e por isso não entra nos perfis por aluno.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.models import Materia, Matricula, MatriculaMateria, Pagamento, Requerimento
+
+# Os relacionamentos criados por backref só existem depois que os mappers
+# são configurados; por isso cada perfil é montado na hora da consulta
+_PERFIS = {
+    'requerimentos.lista': lambda: (
+        joinedload(Requerimento.aluno),
+        selectinload(Requerimento.materia),
+    ),
+    'requerimentos.aluno': lambda: (
+        selectinload(Requerimento.materia),
+    ),
+    'pagamentos.lista': lambda: (
+        selectinload(Pagamento.aluno),
+    ),
+    'materias.lista': lambda: (
+        selectinload(Materia.curso),
+    ),
+    'materias.alunos': lambda: (
+        joinedload(MatriculaMateria.matricula).joinedload(Matricula.aluno),
+    ),
+    'matriculas.aluno': lambda: (
+        selectinload(Matricula.curso),
+    ),
+}
+
+
+def perfil_carga(nome):
+    """Opções de carregamento (query.options(*...)) do perfil"""
+    return _PERFIS[nome]()
@@ -0,0 +1,411 @@
+"""
+Resumo acadêmico por aluno mantido a cada flush
+
+resumo_aluno guarda, por aluno, as contagens de matérias por status, de
+pagamentos e valor devido e de requerimentos por status. Quem só precisa
+desses números (resumo_academico, consultar_aluno, /dashboard-data) lê uma
+linha pela chave primária em vez de agregar as tabelas.
+
+Depois de cada flush, os MatriculaMateria, Pagamento e Requerimento
+inseridos, alterados ou removidos viram deltas por aluno (contribuição
+nova menos a antiga), aplicados na mesma transação com um upsert. Quando o
+valor antigo não está disponível (atributo expirado) ou uma matrícula muda
+de aluno, os alunos afetados são recontados por inteiro.
+
+UPDATE/DELETE em massa (query.update, SQL direto) não passam pelo flush:
+quem os usa recalcula os alunos afetados com recalcular_alunos. Os
+comandos `flask resumo reconstruir` e `flask resumo verificar` refazem a
+tabela inteira e comparam os contadores com as tabelas de origem.
+"""
+import itertools
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import db
+from src.models import Aluno, Matricula, MatriculaMateria, Pagamento, Requerimento, ResumoAluno
+
+CAMPOS = (
+    'materias_total', 'materias_cursando', 'materias_aprovadas', 'materias_reprovadas',
+    'pagamentos_total', 'pagamentos_pendentes', 'valor_devido',
+    'requerimentos_total', 'requerimentos_pendentes', 'requerimentos_concluidos',
+    'requerimentos_rejeitados',
+)
+STATUS_PAGAMENTO_EM_ABERTO = ('pendente', 'atrasado')
+TOLERANCIA_VALOR = 0.005
+
+_tabela = ResumoAluno.__table__
+_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+# Valor de atributo que não está carregado no objeto
+_DESCONHECIDO = object()
+
+# Engines em que a tabela já foi garantida
+_engines_preparadas = set()
+
+
+# ============ CONTRIBUIÇÕES ============
+
+def _contribuicao_materia(valores):
+    status = valores['status']
+    return {
+        'materias_total': 1,
+        'materias_cursando': int(status == 'cursando'),
+        'materias_aprovadas': int(status == 'aprovado'),
+        'materias_reprovadas': int(status == 'reprovado'),
+    }
+
+
+def _contribuicao_pagamento(valores):
+    em_aberto = valores['status'] in STATUS_PAGAMENTO_EM_ABERTO
+    return {
+        'pagamentos_total': 1,
+        'pagamentos_pendentes': int(em_aberto),
+        'valor_devido': (valores['valor'] or 0.0) if em_aberto else 0.0,
+    }
+
+
+def _contribuicao_requerimento(valores):
+    status = valores['status']
+    return {
+        'requerimentos_total': 1,
+        'requerimentos_pendentes': int(status == 'pendente'),
+        'requerimentos_concluidos': int(status == 'concluido'),
+        'requerimentos_rejeitados': int(status == 'rejeitado'),
+    }
+
+
+# modelo -> (atributo que leva ao aluno, atributos lidos, contribuição)
+_ORIGENS = {
+    MatriculaMateria: ('matricula_id', ('matricula_id', 'status'), _contribuicao_materia),
+    Pagamento: ('aluno_id', ('aluno_id', 'status', 'valor'), _contribuicao_pagamento),
+    Requerimento: ('aluno_id', ('aluno_id', 'status'), _contribuicao_requerimento),
+}
+
+
+def _valor_atual(estado, atributo):
+    historico = estado.attrs[atributo].history
+    if historico.added:
+        return historico.added[0]
+    if historico.unchanged:
+        return historico.unchanged[0]
+    return _DESCONHECIDO
+
+
+def _valor_antigo(estado, atributo):
+    historico = estado.attrs[atributo].history
+    if historico.deleted:
+        return historico.deleted[0]
+    if historico.unchanged:
+        return historico.unchanged[0]
+    # Expirado, ou alterado sem que o valor anterior tivesse sido carregado
+    return _DESCONHECIDO
+
+
+def _valores(estado, atributos, leitor):
+    valores = {a: leitor(estado, a) for a in atributos}
+    return None if _DESCONHECIDO in valores.values() else valores
+
+
+# ============ FLUSH ============
+
+def _alunos_das_matriculas(session, conexao, ids):
+    """{matricula_id: aluno_id}, do que já está na sessão ou numa consulta só"""
+    mapa = {}
+    for obj in itertools.chain(session.identity_map.values(), session.new, session.deleted):
+        if isinstance(obj, Matricula):
+            dados = inspect(obj).dict
+            if dados.get('id') in ids and dados.get('aluno_id') is not None:
+                mapa[dados['id']] = dados['aluno_id']
+    faltando = ids - mapa.keys()
+    if faltando:
+        consulta = select(Matricula.id, Matricula.aluno_id).where(Matricula.id.in_(faltando))
+        mapa.update(conexao.execute(consulta).all())
+    return mapa
+
+
+def _coletar_mudancas(session):
+    """
+    Returns:
+        (contribuições, alunos a recontar, alunos novos, alunos removidos),
+        com contribuições = [(sinal, modelo, valores)]
+    """
+    contribuicoes = []
+    recontar = set()
+    novos, removidos = set(), set()
+
+    for obj in session.new:
+        origem = _ORIGENS.get(type(obj))
+        if origem:
+            contribuicoes.append((1, type(obj), _valores(inspect(obj), origem[1], _valor_atual)))
+        elif isinstance(obj, Aluno):
+            novos.add(obj.id)
+
+    for obj in session.dirty:
+        estado = inspect(obj)
+        origem = _ORIGENS.get(type(obj))
+        if isinstance(obj, Matricula):
+            historico = estado.attrs.aluno_id.history
+            if historico.has_changes():
+                recontar.update(a for a in itertools.chain(historico.added, historico.deleted) if a)
+            continue
+        if not origem or not session.is_modified(obj, include_collections=False):
+            continue
+        contribuicoes.append((-1, type(obj), _valores(estado, origem[1], _valor_antigo)))
+        contribuicoes.append((1, type(obj), _valores(estado, origem[1], _valor_atual)))
+
+    for obj in session.deleted:
+        origem = _ORIGENS.get(type(obj))
+        if origem:
+            contribuicoes.append((-1, type(obj), _valores(inspect(obj), origem[1], _valor_antigo)))
+        elif isinstance(obj, Aluno):
+            removidos.add(inspect(obj).dict.get('id'))
+
+    return contribuicoes, recontar, novos, removidos
+
+
+def _somar_deltas(session, conexao, contribuicoes, recontar):
+    matriculas = {
+        valores['matricula_id'] for _, modelo, valores in contribuicoes
+        if modelo is MatriculaMateria and valores
+    }
+    alunos_por_matricula = _alunos_das_matriculas(session, conexao, matriculas) if matriculas else {}
+
+    deltas = {}
+    for sinal, modelo, valores in contribuicoes:
+        if valores is None:
+            # Sem o valor antigo não há delta confiável
+            return deltas, None
+        chave, _, contribuicao = _ORIGENS[modelo]
+        aluno_id = alunos_por_matricula.get(valores[chave]) if modelo is MatriculaMateria else valores[chave]
+        if aluno_id is None:
+            continue
+        soma = deltas.setdefault(aluno_id, dict.fromkeys(CAMPOS, 0))
+        for campo, valor in contribuicao(valores).items():
+            soma[campo] += sinal * valor
+
+    return {a: d for a, d in deltas.items() if a not in recontar and any(d.values())}, recontar
+
+
+def _upsert(conexao, linhas, somar):
+    if not linhas:
+        return
+    instrucao = _INSERTS[conexao.dialect.name](_tabela)
+    excluido = instrucao.excluded
+    if somar:
+        valores = {c: _tabela.c[c] + excluido[c] for c in CAMPOS}
+    else:
+        valores = {c: excluido[c] for c in CAMPOS}
+    valores['atualizado_em'] = excluido.atualizado_em
+    agora = datetime.utcnow()
+    conexao.execute(
+        instrucao.on_conflict_do_update(index_elements=['aluno_id'], set_=valores),
+        [{'aluno_id': a, 'atualizado_em': agora, **contadores} for a, contadores in linhas.items()],
+    )
+
+
+def _preparar(conexao):
+    chave = conexao.engine.url
+    if chave in _engines_preparadas:
+        return
+    if not inspect(conexao).has_table(_tabela.name):
+        # Banco anterior ao resumo: cria e preenche uma vez, na transação deste flush
+        _tabela.create(conexao)
+        reconstruir(conexao)
+    _engines_preparadas.add(chave)
+
+
+def _atualizar_apos_flush(session, flush_context):
+    contribuicoes, recontar, novos, removidos = _coletar_mudancas(session)
+    if not (contribuicoes or recontar or novos or removidos):
+        return
+
+    conexao = session.connection()
+    _preparar(conexao)
+
+    recontar_original = recontar
+    deltas, recontar = _somar_deltas(session, conexao, contribuicoes, recontar)
+    if recontar is None:
+        # Algum valor antigo não estava carregado: reconta os alunos tocados pelo flush,
+        # sem perder os donos antigo e novo de matrículas que trocaram de aluno
+        recontar = (recontar_original or set()) | _alunos_tocados(session, conexao)
+        deltas = {}
+
+    _upsert(conexao, {a: dict.fromkeys(CAMPOS, 0) for a in novos - deltas.keys()}, somar=True)
+    _upsert(conexao, deltas, somar=True)
+    if recontar:
+        recalcular_alunos(conexao, recontar)
+    if removidos:
+        conexao.execute(delete(_tabela).where(_tabela.c.aluno_id.in_(removidos)))
+
+
+def _alunos_tocados(session, conexao):
+    alunos, matriculas = set(), set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        dados = inspect(obj).dict
+        if isinstance(obj, MatriculaMateria):
+            matriculas.add(dados.get('matricula_id'))
+        elif type(obj) in _ORIGENS:
+            alunos.add(dados.get('aluno_id'))
+    # Atributos expirados: o banco (já com o flush) diz a quem pertencem
+    for obj in itertools.chain(session.dirty, session.deleted):
+        if isinstance(obj, (Pagamento, Requerimento)) and inspect(obj).dict.get('aluno_id') is None:
+            tabela = type(obj).__table__
+            consulta = select(tabela.c.aluno_id).where(tabela.c.id == inspect(obj).identity[0])
+            alunos.add(conexao.execute(consulta).scalar())
+    matriculas.discard(None)
+    if matriculas:
+        alunos.update(_alunos_das_matriculas(session, conexao, matriculas).values())
+    alunos.discard(None)
+    return alunos
+
+
+def registrar_resumo_aluno():
+    """Liga a manutenção de resumo_aluno a todas as sessões do SQLAlchemy"""
+    if not event.contains(Session, 'after_flush', _atualizar_apos_flush):
+        event.listen(Session, 'after_flush', _atualizar_apos_flush)
+
+
+# ============ RECONTAGEM ============
+
+def _em_aberto(coluna_status):
+    return coluna_status.in_(STATUS_PAGAMENTO_EM_ABERTO)
+
+
+def _contar_por_status(coluna_status, status):
+    return func.coalesce(func.sum(case((coluna_status == status, 1), else_=0)), 0)
+
+
+def calcular_resumos(conexao, alunos=None):
+    """
+    Contadores de cada aluno calculados das tabelas de origem.
+
+    Args:
+        alunos: ids a calcular (None = todos os alunos)
+
+    Returns:
+        {aluno_id: {campo: valor}}, com zeros para quem não tem registros
+    """
+    def filtrar(consulta, coluna):
+        return consulta if alunos is None else consulta.where(coluna.in_(alunos))
+
+    consulta_alunos = filtrar(select(Aluno.id), Aluno.id)
+    resumos = {aluno_id: dict.fromkeys(CAMPOS, 0) for aluno_id in conexao.execute(consulta_alunos).scalars()}
+
+    mm = MatriculaMateria.__table__
+    mat = Matricula.__table__
+    materias = filtrar(
+        select(
+            mat.c.aluno_id,
+            func.count(mm.c.id),
+            _contar_por_status(mm.c.status, 'cursando'),
+            _contar_por_status(mm.c.status, 'aprovado'),
+            _contar_por_status(mm.c.status, 'reprovado'),
+        ).select_from(mm.join(mat, mat.c.id == mm.c.matricula_id)).group_by(mat.c.aluno_id),
+        mat.c.aluno_id,
+    )
+    pag = Pagamento.__table__
+    pagamentos = filtrar(
+        select(
+            pag.c.aluno_id,
+            func.count(pag.c.id),
+            func.coalesce(func.sum(case((_em_aberto(pag.c.status), 1), else_=0)), 0),
+            func.coalesce(func.sum(case((_em_aberto(pag.c.status), pag.c.valor), else_=0.0)), 0.0),
+        ).group_by(pag.c.aluno_id),
+        pag.c.aluno_id,
+    )
+    req = Requerimento.__table__
+    requerimentos = filtrar(
+        select(
+            req.c.aluno_id,
+            func.count(req.c.id),
+            _contar_por_status(req.c.status, 'pendente'),
+            _contar_por_status(req.c.status, 'concluido'),
+            _contar_por_status(req.c.status, 'rejeitado'),
+        ).group_by(req.c.aluno_id),
+        req.c.aluno_id,
+    )
+
+    for consulta, campos in (
+        (materias, CAMPOS[0:4]),
+        (pagamentos, CAMPOS[4:7]),
+        (requerimentos, CAMPOS[7:11]),
+    ):
+        for aluno_id, *valores in conexao.execute(consulta):
+            if aluno_id in resumos:
+                resumos[aluno_id].update(zip(campos, valores))
+    return resumos
+
+
+def recalcular_alunos(conexao, alunos):
+    """Reconta por inteiro os alunos dados (depois de escritas fora do ORM)"""
+    _upsert(conexao, calcular_resumos(conexao, set(alunos)), somar=False)
+
+
+def reconstruir(conexao):
+    """Refaz resumo_aluno inteira a partir das tabelas de origem; retorna quantas linhas"""
+    resumos = calcular_resumos(conexao)
+    conexao.execute(delete(_tabela))
+    _upsert(conexao, resumos, somar=False)
+    return len(resumos)
+
+
+def verificar(conexao):
+    """
+    Divergências entre resumo_aluno e as tabelas de origem.
+
+    Returns:
+        lista de {'aluno_id', 'campo', 'armazenado', 'esperado'}; campo None
+        quando falta a linha do aluno (esperado) ou o aluno não existe mais
+        (armazenado)
+    """
+    esperados = calcular_resumos(conexao)
+    armazenados = {
+        linha.aluno_id: {c: getattr(linha, c) for c in CAMPOS}
+        for linha in conexao.execute(select(_tabela))
+    }
+    divergencias = []
+    for aluno_id in sorted(esperados.keys() | armazenados.keys()):
+        esperado, armazenado = esperados.get(aluno_id), armazenados.get(aluno_id)
+        if esperado is None or armazenado is None:
+            divergencias.append({'aluno_id': aluno_id, 'campo': None,
+                                 'armazenado': armazenado, 'esperado': esperado})
+            continue
+        for campo in CAMPOS:
+            diferenca = abs((armazenado[campo] or 0) - esperado[campo])
+            if diferenca > (TOLERANCIA_VALOR if campo == 'valor_devido' else 0):
+                divergencias.append({'aluno_id': aluno_id, 'campo': campo,
+                                     'armazenado': armazenado[campo], 'esperado': esperado[campo]})
+    return divergencias
+
+
+# ============ COMANDOS ============
+
+resumo_cli = AppGroup('resumo', help='Manutenção da tabela resumo_aluno')
+
+
+@resumo_cli.command('reconstruir')
+def comando_reconstruir():
+    """Recalcula resumo_aluno inteira"""
+    with db.engine.begin() as conexao:
+        if not inspect(conexao).has_table(_tabela.name):
+            _tabela.create(conexao)
+        total = reconstruir(conexao)
+    click.echo(f'resumo_aluno reconstruída: {total} alunos')
+
+
+@resumo_cli.command('verificar')
+def comando_verificar():
+    """Compara resumo_aluno com as tabelas de origem (sai com 1 se divergir)"""
+    with db.engine.connect() as conexao:
+        divergencias = verificar(conexao)
+    for d in divergencias:
+        click.echo(f"aluno {d['aluno_id']} {d['campo'] or '(linha)'}: "
+                   f"armazenado={d['armazenado']} esperado={d['esperado']}")
+    if divergencias:
+        raise click.exceptions.Exit(1)
+    click.echo('resumo_aluno consistente')
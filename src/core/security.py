@@ -5,6 +5,8 @@ import hashlib
 import secrets
 import string
 
+import bcrypt
+
 
 def generate_secure_token(length=32):
     """Gera um token seguro"""
@@ -16,6 +18,11 @@ def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+def hash_senha_bcrypt(senha):
+    """Hash bcrypt de uma senha (o mesmo de Aluno.set_senha)"""
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
 def verify_password(password, hash_value):
     """Verifica se uma senha corresponde ao hash"""
     return hash_password(password) == hash_value
@@ -0,0 +1,121 @@
+"""
+Números de matrícula (ANO/NNNNN) sem ler o último aluno
+
+sequencias_matricula guarda, por ano, o último número já entregue. Cada
+processo reserva um bloco de MATRICULA_BLOCO números com um único UPDATE
+... RETURNING (incremento atômico no banco, em transação própria e curta)
+e distribui o bloco localmente sob um lock. Dois workers nunca recebem o
+mesmo número; o custo por cadastro é um lock em memória, e uma escrita no
+banco a cada bloco.
+
+Números de um bloco não usado até o fim do processo (ou de um cadastro que
+falhou) ficam sem aluno: a sequência pode ter lacunas, nunca repetições.
+
+Na primeira reserva de um ano sem linha, o contador parte do maior número
+já existente daquele ano em alunos (consulta pelo índice único de
+matricula).
+"""
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import db
+from src.models import Aluno
+from src.utils.helpers import gerar_matricula
+
+BLOCO_PADRAO = 20
+
+_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+sequencias_matricula = db.Table(
+    'sequencias_matricula',
+    db.Column('ano', db.Integer, primary_key=True),
+    db.Column('ultimo', db.Integer, nullable=False, default=0),
+)
+
+# Engines em que a tabela já foi garantida
+_engines_preparadas = set()
+
+
+def _maior_existente(conexao, ano):
+    prefixo = f'{ano}/'
+    consulta = select(func.max(Aluno.matricula)).where(
+        Aluno.matricula >= prefixo, Aluno.matricula < f'{ano}0'  # '0' vem logo depois de '/'
+    )
+    maior = conexao.execute(consulta).scalar()
+    return int(maior[len(prefixo):]) if maior else 0
+
+
+def reservar_bloco(engine, ano, tamanho):
+    """
+    Reserva os números (ultimo - tamanho, ultimo] do ano e retorna ultimo.
+
+    Roda em transação própria: o bloco continua reservado mesmo que o
+    cadastro que o pediu seja desfeito.
+    """
+    with engine.begin() as conexao:
+        if engine.url not in _engines_preparadas:
+            sequencias_matricula.create(conexao, checkfirst=True)
+            _engines_preparadas.add(engine.url)
+
+        incrementar = (
+            update(sequencias_matricula)
+            .where(sequencias_matricula.c.ano == ano)
+            .values(ultimo=sequencias_matricula.c.ultimo + tamanho)
+            .returning(sequencias_matricula.c.ultimo)
+        )
+        ultimo = conexao.execute(incrementar).scalar()
+        if ultimo is not None:
+            return ultimo
+
+        # Primeiro bloco do ano; se outro processo criou a linha no meio tempo, vira incremento
+        criar = (
+            _INSERTS[conexao.dialect.name](sequencias_matricula)
+            .values(ano=ano, ultimo=_maior_existente(conexao, ano) + tamanho)
+        )
+        criar = criar.on_conflict_do_update(
+            index_elements=['ano'],
+            set_={'ultimo': sequencias_matricula.c.ultimo + tamanho},
+        ).returning(sequencias_matricula.c.ultimo)
+        return conexao.execute(criar).scalar()
+
+
+class AlocadorMatriculas:
+    """
+    Entrega números de matrícula de blocos reservados no banco.
+
+    Args:
+        tamanho_bloco: quantos números reservar por ida ao banco
+    """
+
+    def __init__(self, tamanho_bloco=BLOCO_PADRAO):
+        self.tamanho_bloco = tamanho_bloco
+        self._lock = threading.Lock()
+        self._blocos = {}  # ano -> (próximo, último do bloco)
+
+    def proximo_numero(self, engine, ano):
+        with self._lock:
+            proximo, ultimo = self._blocos.get(ano, (1, 0))
+            if proximo > ultimo:
+                ultimo = reservar_bloco(engine, ano, self.tamanho_bloco)
+                proximo = ultimo - self.tamanho_bloco + 1
+            self._blocos[ano] = (proximo + 1, ultimo)
+            return proximo
+
+    def proxima_matricula(self, engine, ano=None):
+        ano = ano or datetime.now().year
+        return gerar_matricula(ano, self.proximo_numero(engine, ano))
+
+
+def proxima_matricula():
+    """Próxima matrícula do ano corrente, pelo alocador do app (MATRICULA_BLOCO)"""
+    alocador = current_app.extensions.get('alocador_matriculas')
+    if alocador is None:
+        alocador = current_app.extensions.setdefault(
+            'alocador_matriculas',
+            AlocadorMatriculas(current_app.config.get('MATRICULA_BLOCO', BLOCO_PADRAO)),
+        )
+    return alocador.proxima_matricula(db.engine)
@@ -0,0 +1,155 @@
+"""
+Varredura periódica de pagamentos vencidos
+
+Marca como 'atrasado' todo pagamento 'pendente' com vencimento anterior
+a hoje, para que as leituras (buscar_pagamentos, consultar_aluno,
+resumo_aluno) confiem só na coluna status, sem comparar datas.
+
+Cada execução percorre o índice ix_pagamentos_status_vencimento apenas na
+faixa [marca d'água, hoje): a marca é o "hoje" da execução anterior,
+guardado em marcas_varredura, então o que já foi varrido não é relido.
+Pagamentos lançados depois com vencimento no passado ficam de fora dessa
+faixa; varrer_atrasos(completa=True) (ou --completa) ignora a marca.
+
+Os UPDATE são feitos em lotes de LOTE_VARREDURA ids, uma transação por
+lote. pendente e atrasado contam igual em resumo_aluno, então só
+versoes_tabelas precisa ser incrementada (cache do MCP Server).
+
+Com VARREDURA_ATRASOS_INTERVALO (segundos) > 0, create_app inicia uma
+thread que roda a varredura nesse intervalo.
+"""
+import threading
+import time
+from datetime import date
+
+import click
+from sqlalchemy import bindparam, select, update
+
+from database import db
+from src.core.faturamento import pagamentos_cli
+from src.core.logger import get_logger
+from src.core.versoes_tabelas import incrementar_versoes
+from src.models import Pagamento
+
+LOTE_VARREDURA = 1000
+NOME_VARREDURA = 'pagamentos_atrasados'
+
+logger = get_logger('varredura_atrasos')
+
+marcas_varredura = db.Table(
+    'marcas_varredura',
+    db.Column('nome', db.String(64), primary_key=True),
+    db.Column('ate', db.Date, nullable=False),
+)
+
+# Engines em que a tabela já foi garantida
+_engines_preparadas = set()
+
+
+def _ler_marca(conexao):
+    if conexao.engine.url not in _engines_preparadas:
+        marcas_varredura.create(conexao, checkfirst=True)
+        _engines_preparadas.add(conexao.engine.url)
+    consulta = select(marcas_varredura.c.ate).where(marcas_varredura.c.nome == NOME_VARREDURA)
+    return conexao.execute(consulta).scalar()
+
+
+def _gravar_marca(conexao, ate):
+    atualizada = conexao.execute(
+        update(marcas_varredura).where(marcas_varredura.c.nome == NOME_VARREDURA).values(ate=ate)
+    ).rowcount
+    if not atualizada:
+        conexao.execute(marcas_varredura.insert().values(nome=NOME_VARREDURA, ate=ate))
+
+
+def varrer_atrasos(hoje=None, completa=False, tamanho_lote=LOTE_VARREDURA):
+    """
+    Marca como atrasados os pendentes com vencimento em [marca, hoje).
+
+    Args:
+        hoje: fim exclusivo da faixa e nova marca (padrão: data de hoje)
+        completa: ignora a marca e varre desde o primeiro vencimento
+
+    Returns:
+        dict com de, ate, marcados, lotes e segundos
+    """
+    inicio = time.perf_counter()
+    hoje = hoje or date.today()
+    marca = _ler_marca(db.session.connection())
+    de = None if completa else marca
+
+    filtros = [Pagamento.status == 'pendente', Pagamento.data_vencimento < hoje]
+    if de is not None:
+        filtros.append(Pagamento.data_vencimento >= de)
+    # Os marcados saem da faixa do índice: a mesma consulta traz o próximo lote
+    proximos = select(Pagamento.id).where(*filtros).limit(tamanho_lote)
+    marcar = (
+        update(Pagamento.__table__)
+        .where(Pagamento.id.in_(bindparam('ids', expanding=True)), Pagamento.status == 'pendente')
+        .values(status='atrasado')
+    )
+
+    marcados = lotes = 0
+    while True:
+        ids = db.session.execute(proximos).scalars().all()
+        if not ids:
+            break
+        conexao = db.session.connection()
+        marcados += conexao.execute(marcar, {'ids': ids}).rowcount
+        incrementar_versoes(conexao, ['pagamentos'])
+        db.session.commit()
+        lotes += 1
+
+    if marca is None or hoje > marca:
+        _gravar_marca(db.session.connection(), hoje)
+    db.session.commit()
+
+    resultado = {
+        'de': de.isoformat() if de else None,
+        'ate': hoje.isoformat(),
+        'marcados': marcados,
+        'lotes': lotes,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+    logger.info(
+        "Varredura de atrasos [%s, %s): %d marcados em %d lotes, %.3fs",
+        resultado['de'] or 'inicio', resultado['ate'], marcados, lotes, resultado['segundos'],
+    )
+    return resultado
+
+
+# ============ AGENDAMENTO ============
+
+def iniciar_varredura_periodica(app, intervalo):
+    """Thread daemon que roda varrer_atrasos a cada intervalo segundos"""
+    parar = threading.Event()
+
+    def laco():
+        while not parar.is_set():
+            with app.app_context():
+                try:
+                    varrer_atrasos()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Falha na varredura de atrasos")
+                finally:
+                    db.session.remove()
+            parar.wait(intervalo)
+
+    thread = threading.Thread(target=laco, name='varredura-atrasos', daemon=True)
+    thread.start()
+    app.extensions['varredura_atrasos'] = (thread, parar)
+    return parar
+
+
+# ============ COMANDOS ============
+
+@pagamentos_cli.command('varrer-atrasos')
+@click.option('--completa', is_flag=True, help="Ignora a marca d'água e varre todos os vencidos")
+def comando_varrer_atrasos(completa):
+    """Marca como atrasados os pagamentos pendentes vencidos"""
+    resultado = varrer_atrasos(completa=completa)
+    click.echo(
+        f"{resultado['marcados']} pagamentos atrasados "
+        f"(vencimento em [{resultado['de'] or 'inicio'}, {resultado['ate']})) em {resultado['segundos']}s"
+    )
@@ -0,0 +1,89 @@
+"""
+Versões por tabela para invalidar caches fora do Flask
+
+Cada flush que grava em uma tabela incrementa a linha correspondente em
+versoes_tabelas, na mesma transação. O MCP Server compara essas versões
+com as que guardou junto de cada resultado em cache.
+"""
+import itertools
+import weakref
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from database import db
+
+versoes_tabelas = db.Table(
+    'versoes_tabelas',
+    db.Column('tabela', db.String(64), primary_key=True),
+    db.Column('versao', db.Integer, nullable=False, default=0),
+)
+
+_SQL_INCREMENTAR = text("""
+    INSERT INTO versoes_tabelas (tabela, versao) VALUES (:tabela, 1)
+    ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1
+""")
+
+# Engines em que a tabela já foi garantida (evita o CREATE a cada flush)
+_engines_preparadas = set()
+
+# Engines em que a tabela existe (vista pela leitura ou criada por este processo)
+_engines_com_tabela = weakref.WeakSet()
+
+
+@event.listens_for(versoes_tabelas, 'after_create')
+def _tabela_criada(tabela, conexao, **kwargs):
+    _engines_com_tabela.add(conexao.engine)
+
+
+@event.listens_for(versoes_tabelas, 'after_drop')
+def _tabela_removida(tabela, conexao, **kwargs):
+    _engines_com_tabela.discard(conexao.engine)
+
+
+def _tabelas_alteradas(session):
+    tabelas = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        tabela = getattr(type(obj), '__tablename__', None)
+        if tabela:
+            tabelas.add(tabela)
+    return tabelas
+
+
+def incrementar_versoes(conexao, tabelas):
+    """Incrementa as versões na transação da conexão (escritas fora do flush do ORM)"""
+    chave = conexao.engine.url
+    if chave not in _engines_preparadas:
+        versoes_tabelas.create(conexao, checkfirst=True)
+        _engines_preparadas.add(chave)
+
+    conexao.execute(_SQL_INCREMENTAR, [{'tabela': t} for t in sorted(tabelas)])
+
+
+def ler_versao(conexao, tabela):
+    """
+    Versão atual da tabela (0 se nunca mudou).
+
+    Um banco migrado pode ainda não ter versoes_tabelas (ela nasce no primeiro
+    flush); a leitura não a cria, porque a transação de um GET nunca é
+    confirmada: sem a tabela, nada mudou e a versão é 0.
+    """
+    if conexao.engine not in _engines_com_tabela:
+        if not inspect(conexao).has_table(versoes_tabelas.name):
+            return 0
+        _engines_com_tabela.add(conexao.engine)
+    consulta = select(versoes_tabelas.c.versao).where(versoes_tabelas.c.tabela == tabela)
+    return conexao.execute(consulta).scalar() or 0
+
+
+def _incrementar_apos_flush(session, flush_context):
+    # Em after_flush new/dirty/deleted ainda refletem o que acabou de ser gravado
+    tabelas = _tabelas_alteradas(session)
+    if tabelas:
+        incrementar_versoes(session.connection(), tabelas)
+
+
+def registrar_versionamento():
+    """Liga o incremento de versões a todas as sessões do SQLAlchemy"""
+    if not event.contains(Session, 'after_flush', _incrementar_apos_flush):
+        event.listen(Session, 'after_flush', _incrementar_apos_flush)
@@ -8,6 +8,7 @@ from src.models.materia import Materia
 from src.models.matricula import Matricula, MatriculaMateria
 from src.models.requerimento import Requerimento
 from src.models.pagamento import Pagamento
+from src.models.resumo_aluno import ResumoAluno
 
 __all__ = [
     'Aluno',
@@ -18,4 +19,5 @@ __all__ = [
     'MatriculaMateria',
     'Requerimento',
     'Pagamento',
+    'ResumoAluno',
 ]
@@ -6,6 +6,7 @@ from database import db
 import bcrypt
 import jwt
 from flask import current_app
+from src.core.security import hash_senha_bcrypt
 
 
 class Aluno(db.Model):
@@ -41,7 +42,7 @@ class Aluno(db.Model):
         """Define a senha do aluno (armazena hash bcrypt)"""
         if not senha or len(senha) < 4:
             raise ValueError("Senha deve ter no mínimo 4 caracteres")
-        self.senha_hash = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.senha_hash = hash_senha_bcrypt(senha)
     
     def check_senha(self, senha):
         """Verifica se a senha fornecida está correta"""
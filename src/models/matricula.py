@@ -7,6 +7,9 @@ from database import db
 
 class Matricula(db.Model):
     __tablename__ = 'matriculas'
+    __table_args__ = (
+        db.Index('ix_matriculas_aluno', 'aluno_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False)
@@ -38,6 +41,10 @@ class Matricula(db.Model):
 
 class MatriculaMateria(db.Model):
     __tablename__ = 'matriculas_materias'
+    __table_args__ = (
+        db.Index('ix_matriculas_materias_matricula_status', 'matricula_id', 'status'),
+        db.Index('ix_matriculas_materias_materia', 'materia_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     matricula_id = db.Column(db.Integer, db.ForeignKey('matriculas.id'), nullable=False)
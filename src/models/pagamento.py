@@ -7,6 +7,13 @@ from database import db
 
 class Pagamento(db.Model):
     __tablename__ = 'pagamentos'
+    __table_args__ = (
+        db.Index('ix_pagamentos_aluno_status', 'aluno_id', 'status'),
+        db.Index('ix_pagamentos_data_emissao', 'data_emissao'),
+        db.Index('ix_pagamentos_status_vencimento', 'status', 'data_vencimento'),
+        # Uma mensalidade (ou taxa) por aluno e mês de referência; avulsos sem mês não entram
+        db.Index('uq_pagamentos_referencia', 'aluno_id', 'ano_referencia', 'mes_referencia', 'tipo', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False)
@@ -7,6 +7,10 @@ from database import db
 
 class Requerimento(db.Model):
     __tablename__ = 'requerimentos'
+    __table_args__ = (
+        db.Index('ix_requerimentos_aluno_data', 'aluno_id', 'data_solicitacao'),
+        db.Index('ix_requerimentos_data_solicitacao', 'data_solicitacao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False)
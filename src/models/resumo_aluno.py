@@ -0,0 +1,56 @@
+"""
+Modelo do Resumo Acadêmico por aluno
+"""
+from datetime import datetime
+from database import db
+
+
+class ResumoAluno(db.Model):
+    """
+    Contadores por aluno mantidos a cada flush (ver src/core/resumo_aluno):
+    não é gravado diretamente pela aplicação.
+    """
+    __tablename__ = 'resumo_aluno'
+
+    aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id', ondelete='CASCADE'), primary_key=True)
+
+    materias_total = db.Column(db.Integer, nullable=False, default=0)
+    materias_cursando = db.Column(db.Integer, nullable=False, default=0)
+    materias_aprovadas = db.Column(db.Integer, nullable=False, default=0)
+    materias_reprovadas = db.Column(db.Integer, nullable=False, default=0)
+
+    pagamentos_total = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_pendentes = db.Column(db.Integer, nullable=False, default=0)  # pendente ou atrasado
+    valor_devido = db.Column(db.Float, nullable=False, default=0.0)
+
+    requerimentos_total = db.Column(db.Integer, nullable=False, default=0)
+    requerimentos_pendentes = db.Column(db.Integer, nullable=False, default=0)
+    requerimentos_concluidos = db.Column(db.Integer, nullable=False, default=0)
+    requerimentos_rejeitados = db.Column(db.Integer, nullable=False, default=0)
+
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumoAluno {self.aluno_id}>'
+
+    def to_dict(self):
+        return {
+            'aluno_id': self.aluno_id,
+            'materias': {
+                'total': self.materias_total,
+                'cursando': self.materias_cursando,
+                'aprovadas': self.materias_aprovadas,
+                'reprovadas': self.materias_reprovadas
+            },
+            'pagamentos': {
+                'total': self.pagamentos_total,
+                'pendentes': self.pagamentos_pendentes,
+                'valor_devido': round(self.valor_devido, 2)
+            },
+            'requerimentos': {
+                'total': self.requerimentos_total,
+                'pendentes': self.requerimentos_pendentes,
+                'concluidos': self.requerimentos_concluidos,
+                'rejeitados': self.requerimentos_rejeitados
+            }
+        }
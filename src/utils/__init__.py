@@ -18,7 +18,6 @@ from src.utils.formatters import (
 )
 from src.utils.helpers import (
     criar_resposta_json,
-    paginar_lista,
     gerar_matricula,
     calcular_idade,
     eh_maior_idade,
@@ -51,7 +50,6 @@ __all__ = [
     'truncar_texto',
     # Helpers
     'criar_resposta_json',
-    'paginar_lista',
     'gerar_matricula',
     'calcular_idade',
     'eh_maior_idade',
@@ -2,9 +2,9 @@
 Funções e decoradores customizados
 """
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify
+from src.core.cache_tokens import cache_tokens
 from src.core.errors import AuthenticationError, AuthorizationError
-from src.models.usuario import Usuario
 import jwt
 
 
@@ -22,7 +22,8 @@ def requer_autenticacao(f):
             if token.startswith('Bearer '):
                 token = token[7:]
             
-            payload = jwt.decode(token, current_app.config.get('SECRET_KEY'), algorithms=['HS256'])
+            payload = cache_tokens().verificar(token)
+            request.token = token
             request.user_id = payload.get('user_id')
             request.aluno_id = payload.get('aluno_id')
         except jwt.ExpiredSignatureError:
@@ -40,9 +41,10 @@ def requer_admin(f):
     @wraps(f)
     @requer_autenticacao
     def decorated_function(*args, **kwargs):
-        user = Usuario.query.get(request.user_id)
+        # Tipo do usuário em cache junto do token (invalidado quando o usuário muda)
+        user = cache_tokens().principal(request.token, 'usuario')
         
-        if not user or user.tipo != 'admin':
+        if not user or user['tipo'] != 'admin':
             return jsonify({'erro': 'Acesso negado'}), 403
         
         return f(*args, **kwargs)
@@ -55,9 +57,10 @@ def requer_funcionario(f):
     @wraps(f)
     @requer_autenticacao
     def decorated_function(*args, **kwargs):
-        user = Usuario.query.get(request.user_id)
+        # Tipo do usuário em cache junto do token (invalidado quando o usuário muda)
+        user = cache_tokens().principal(request.token, 'usuario')
         
-        if not user or user.tipo not in ['admin', 'funcionario']:
+        if not user or user['tipo'] not in ['admin', 'funcionario']:
             return jsonify({'erro': 'Acesso negado'}), 403
         
         return f(*args, **kwargs)
@@ -19,23 +19,6 @@ def criar_resposta_json(sucesso=True, mensagem='', dados=None, status_code=200):
     return jsonify(resposta), status_code
 
 
-def paginar_lista(items, pagina=1, itens_por_pagina=20):
-    """Pagina uma lista de itens"""
-    inicio = (pagina - 1) * itens_por_pagina
-    fim = inicio + itens_por_pagina
-    
-    total = len(items)
-    total_paginas = (total + itens_por_pagina - 1) // itens_por_pagina
-    
-    return {
-        'items': items[inicio:fim],
-        'pagina': pagina,
-        'total_items': total,
-        'total_paginas': total_paginas,
-        'itens_por_pagina': itens_por_pagina
-    }
-
-
 def gerar_matricula(ano, numero_aluno):
     """Gera um número de matrícula"""
     return f"{ano}/{numero_aluno:05d}"
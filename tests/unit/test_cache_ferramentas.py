@@ -0,0 +1,98 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from cache_ferramentas import CacheFerramentas, VersoesTabelas
+from pool_conexoes import PoolConexoesSQLite
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def versoes(tmp_path):
+    caminho = tmp_path / "escola.db"
+    sqlite3.connect(caminho).close()
+    versoes = VersoesTabelas(PoolConexoesSQLite(str(caminho), tamanho_maximo=2))
+    versoes.garantir_tabela()
+    return versoes
+
+
+@pytest.mark.unit
+def test_hit_com_argumentos_normalizados(versoes):
+    cache = CacheFerramentas(versoes)
+    chamadas = []
+
+    @cache.cachear("pagamentos")
+    def buscar_pagamentos(aluno_id: int, status: str = None) -> str:
+        chamadas.append(aluno_id)
+        return f"pagamentos de {aluno_id}"
+
+    assert buscar_pagamentos(1) == "pagamentos de 1"
+    assert buscar_pagamentos(aluno_id=1, status=None) == "pagamentos de 1"
+    buscar_pagamentos(2)
+
+    assert chamadas == [1, 2]
+    metricas = cache.metricas()
+    assert (metricas["hits"], metricas["misses"]) == (1, 2)
+
+
+@pytest.mark.unit
+def test_escrita_invalida_tabelas_dependentes(versoes):
+    cache = CacheFerramentas(versoes)
+    chamadas = []
+
+    @cache.cachear("requerimentos")
+    def resumo(aluno_id: int) -> str:
+        chamadas.append(aluno_id)
+        return "resumo"
+
+    @cache.invalida("requerimentos")
+    def criar_requerimento(aluno_id: int) -> str:
+        return "criado"
+
+    resumo(1)
+    criar_requerimento(1)
+    resumo(1)
+
+    # Escrita feita por outro processo (ex.: Flask) também invalida
+    versoes.incrementar(["requerimentos"])
+    resumo(1)
+
+    assert chamadas == [1, 1, 1]
+    assert cache.metricas()["invalidadas"] == 2
+
+
+@pytest.mark.unit
+def test_ttl_lru_e_erros_nao_cacheados(versoes):
+    relogio = Relogio()
+    cache = CacheFerramentas(versoes, ttl=10, max_bytes=250, relogio=relogio)
+
+    @cache.cachear("cursos")
+    def listar(codigo: str) -> str:
+        return codigo * 60
+
+    @cache.cachear("cursos")
+    def falha() -> str:
+        return " Erro de conexão com o banco de dados."
+
+    listar("a")
+    listar("b")  # ultrapassa max_bytes e expulsa "a"
+    assert cache.metricas()["evictions"] == 1
+
+    relogio.agora = 11
+    listar("b")
+    assert cache.metricas()["expiradas"] == 1
+
+    falha()
+    falha()
+    assert cache.metricas()["hits"] == 0
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from cache_llm import CacheRespostasLLM
+
+DECISAO = {"acao": "ferramenta", "ferramenta": "perguntar_sobre_aluno", "argumentos": {"pergunta": "minhas notas"}}
+
+
+@pytest.mark.unit
+def test_camada_exata_ignora_acento_caixa_e_pontuacao():
+    cache = CacheRespostasLLM()
+    cache.guardar("decisao|logado|x", "Minhas notas", DECISAO)
+
+    assert cache.obter("decisao|logado|x", "minhas notas?") == DECISAO
+    assert cache.obter("decisao|visitante|x", "minhas notas") is None
+
+    resposta = cache.obter("decisao|logado|x", "MINHAS NOTAS")
+    resposta["argumentos"]["aluno_id"] = 7
+    assert "aluno_id" not in cache.obter("decisao|logado|x", "minhas notas")["argumentos"]
+
+    metricas = cache.metricas()
+    assert metricas["hits_exatos"] == 3 and metricas["misses"] == 1
+    assert metricas["taxa_acerto"] == 0.75
+
+
+@pytest.mark.unit
+def test_camada_aproximada_respeita_limiar_e_codigos():
+    cache = CacheRespostasLLM(limiar=0.6)
+    cache.guardar("e", "quais cursos voces tem disponiveis", "cursos")
+    cache.guardar("e", "quero trancar a materia ALG-101", "trancar ALG")
+
+    assert cache.obter("e", "quais cursos voces tem disponivel") == "cursos"
+    assert cache.obter("e", "quero trancar a materia MAT-102") is None
+    assert cache.obter("e", "nao quero trancar a materia ALG-101") is None
+    assert cache.obter("e", "qual a capital da franca") is None
+    assert cache.metricas()["hits_aproximados"] == 1
+
+
+@pytest.mark.unit
+def test_lru_e_persistencia(tmp_path):
+    arquivo = tmp_path / "cache.json"
+    cache = CacheRespostasLLM(caminho=arquivo, max_entradas=2, salvar_a_cada=100)
+    cache.guardar("e", "um", 1)
+    cache.guardar("e", "dois", 2)
+    cache.obter("e", "um")
+    cache.guardar("e", "tres", 3)
+    cache.salvar()
+
+    recarregado = CacheRespostasLLM(caminho=arquivo, max_entradas=2)
+    assert recarregado.obter("e", "um") == 1
+    assert recarregado.obter("e", "tres") == 3
+    assert recarregado.obter("e", "dois") is None
+    assert cache.metricas()["evictions"] == 1
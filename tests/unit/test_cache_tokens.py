@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from database import db
+from src.models import Aluno
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+@pytest.mark.unit
+def test_validar_token_usa_cache_ate_o_aluno_mudar():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        for i in (1, 2):
+            db.session.add(Aluno(matricula=f'2030/0000{i}', nome_completo=f'Aluno {i}', cpf=f'0000000000{i}',
+                                 data_nascimento=date(2000, 1, 1), email=f'aluno{i}@escola.edu'))
+        db.session.commit()
+        token = db.session.get(Aluno, 1).gerar_token_jwt()
+
+        consultas = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, sql, *args: consultas.append(sql))
+
+    cliente = app.test_client()
+    cabecalho = {'Authorization': f'Bearer {token}'}
+    primeira = cliente.get('/api/auth/validar-token', headers=cabecalho)
+    assert primeira.status_code == 200
+    assert any('FROM alunos' in sql for sql in consultas)
+
+    consultas.clear()
+    assert cliente.get('/api/auth/validar-token', headers=cabecalho).get_json() == primeira.get_json()
+    assert not consultas
+
+    # Requerimentos do próprio aluno não reconsultam o aluno; de outro aluno, 403
+    assert cliente.get('/api/auth/requerimentos/1', headers=cabecalho).status_code == 200
+    assert not any('FROM alunos' in sql for sql in consultas)
+    assert cliente.get('/api/auth/requerimentos/2', headers=cabecalho).status_code == 403
+
+    with app.app_context():
+        aluno = db.session.get(Aluno, 1)
+        aluno.set_senha('nova-senha')
+        aluno.status = 'trancado'
+        db.session.commit()
+
+    resposta = cliente.get('/api/auth/validar-token', headers=cabecalho).get_json()
+    assert resposta['aluno']['status'] == 'trancado'
+    assert resposta['aluno']['tem_senha'] is True
+    assert cliente.get('/api/auth/validar-token', headers={'Authorization': 'Bearer x.y.z'}).status_code == 401
@@ -0,0 +1,52 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from classificador_intencoes import AutomatoTermos, classificar
+
+
+@pytest.mark.unit
+def test_automato_encontra_as_mesmas_substrings_que_busca_ingenua():
+    termos = ["oi", "noite", "boa noite", "nota", "notas", "e ai", "ai", "curso", "cursos"]
+    automato = AutomatoTermos(termos)
+    gerador = random.Random(7)
+    alfabeto = "abeinorstuc "
+
+    for _ in range(500):
+        texto = "".join(gerador.choice(alfabeto) for _ in range(gerador.randint(0, 30)))
+        assert automato.encontrar(texto) == {t for t in termos if t in texto}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "pergunta,intencao",
+    [
+        ("quem sou eu?", "consultar_aluno"),
+        ("minhas matérias", "materias"),
+        ("adicionar matéria ALG-101", "adicionar_materia"),
+        ("declaração de frequência", "declaracao_frequencia"),
+        ("segunda via", "segunda_via"),
+        ("boa noite!", "saudacao"),
+        ("qual é a capital da França?", None),
+    ],
+)
+def test_prioridade_das_regras(pergunta, intencao):
+    assert classificar(pergunta).intencao == intencao
+
+
+@pytest.mark.unit
+def test_slots_necessidade_e_oportunidades_na_mesma_passada():
+    resultado = classificar("quero trocar ALG-101 por mat-102, o boleto está em atraso")
+
+    assert resultado.slots["codigos"] == ["ALG-101", "MAT-102"]
+    assert resultado.necessidade["tipo"] == "boleto"
+    assert [o["tipo"] for o in resultado.oportunidades][:1] == ["financeiro_critico"]
+    assert resultado.academica
+
+    assert classificar(" alg-101 ").slots["codigo_isolado"] == "ALG-101"
+    assert classificar("2 via de R$ 99,90").slots["valor"] == 99.90
+    assert classificar("cursos do ADS").slots["codigo_curso"] == "ADS"
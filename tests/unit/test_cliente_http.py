@@ -0,0 +1,45 @@
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from cliente_http import ClienteHTTP, HistogramaLatencia
+
+
+def _porta_fechada():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.unit
+def test_histograma_percentis():
+    histograma = HistogramaLatencia(baldes=(10, 100, 1000))
+    for ms in (3, 4, 5, 50, 70, 2000):
+        histograma.registrar(ms)
+
+    resumo = histograma.resumo()
+    assert resumo["chamadas"] == 6
+    assert resumo["p50_ms"] == 10.0
+    assert resumo["p99_ms"] == 2000.0
+    assert resumo["baldes"] == {"<=10ms": 3, "<=100ms": 2, ">1000ms": 1}
+
+
+@pytest.mark.unit
+def test_post_repete_apenas_falha_de_conexao():
+    cliente = ClienteHTTP(
+        endpoints={"teste": {"timeout": (0.5, 0.5), "tentativas": 2}},
+        backoff=0.01,
+    )
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cliente.post("teste", f"http://127.0.0.1:{_porta_fechada()}/", json={})
+
+    metricas = cliente.metricas()["teste"]
+    assert metricas["chamadas"] == 1
+    assert metricas["repeticoes"] == 2
+    assert metricas["erros"] == 1
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from database import db
+from src.models import Aluno, Curso, Materia, Matricula, MatriculaMateria, Pagamento, Requerimento
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    PAGINACAO_TOTAL_TTL = 0  # total sempre recontado: mesma quantidade de consultas nas duas medições
+
+
+@contextmanager
+def contar_consultas():
+    """SQL executado dentro do bloco (lista de statements)"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def _semear(inicio, quantidade):
+    """
+    Alunos com matrícula, matéria cursada, requerimento e pagamento, cada um
+    em seu curso; o aluno 1 e a matéria 1 ganham mais linhas a cada chamada
+    """
+    for i in range(inicio, inicio + quantidade):
+        curso = Curso(nome=f'Curso {i}', codigo=f'C{i}', duracao_semestres=8, valor_mensalidade=500.0)
+        materia = Materia(nome=f'Materia {i}', codigo=f'M{i}', curso=curso)
+        aluno = Aluno(matricula=f'2024/{i:05d}', nome_completo=f'Aluno {i}', cpf=f'{i:011d}',
+                      data_nascimento=date(2000, 1, 1), email=f'aluno{i}@escola.edu')
+        matricula = Matricula(aluno=aluno, curso=curso, ano=2024, semestre=1)
+        db.session.add_all([
+            curso, materia, aluno, matricula,
+            MatriculaMateria(matricula=matricula, materia_id=1),
+            Requerimento(aluno=aluno, tipo='adicao_materia', materia=materia),
+            Requerimento(aluno_id=1, tipo='adicao_materia', materia=materia),
+            Matricula(aluno_id=1, curso=curso, ano=2025, semestre=1),
+            Pagamento(aluno=aluno, tipo='mensalidade', valor=500.0, data_vencimento=date(2024, 3, 10)),
+        ])
+    db.session.commit()
+
+
+def _consultas_do_endpoint(cliente, url):
+    db.session.expunge_all()
+    with contar_consultas() as consultas:
+        resposta = cliente.get(url)
+    assert resposta.status_code == 200
+    return consultas, resposta.get_json()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('url', [
+    '/api/requerimentos/',
+    '/api/pagamentos/',
+    '/api/materias/',
+    '/api/materias/1/alunos',
+    '/api/alunos/1/matriculas',
+    '/dashboard-data/1',
+])
+def test_consultas_nao_crescem_com_o_resultado(url):
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+
+        _semear(1, 2)
+        poucas, dados_antes = _consultas_do_endpoint(cliente, url)
+        _semear(3, 6)
+        muitas, dados_depois = _consultas_do_endpoint(cliente, url)
+
+        assert len(str(dados_depois)) > len(str(dados_antes))
+        assert len(muitas) == len(poucas), '\n'.join(muitas)
@@ -0,0 +1,62 @@
+import io
+import json
+import re
+import zipfile
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.resumo_aluno import verificar
+from src.models import Aluno, Curso, Matricula, Requerimento
+
+
+def _config(diretorio):
+    class ConfigTeste(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        TESTING = True
+        DECLARACOES_DIR = str(diretorio)
+        DECLARACOES_PROCESSOS = 2
+    return ConfigTeste
+
+
+@pytest.mark.unit
+def test_declaracoes_do_curso_em_lote(tmp_path):
+    app = create_app(_config(tmp_path / 'pdfs'))
+    with app.app_context():
+        db.create_all()
+        cursos = [Curso(nome=f'Curso {i}', codigo=f'C{i}', duracao_semestres=8, valor_mensalidade=1.0)
+                  for i in (1, 2)]
+        for i in range(1, 5):
+            aluno = Aluno(matricula=f'2030/{i:05d}', nome_completo=f'Aluno {i}', cpf=f'{i:011d}',
+                          data_nascimento=date(2000, 1, 1), email=f'aluno{i}@escola.edu')
+            db.session.add(Matricula(aluno=aluno, curso=cursos[i == 4], ano=2030, semestre=1))
+        db.session.commit()
+
+        cliente = app.test_client()
+        resposta = cliente.post('/api/requerimentos/declaracoes/lote',
+                                json={'declaracao_tipo': 'matricula', 'curso_id': 1})
+        itens = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+        assert itens[0] == {'progresso': 3, 'total': 3}
+        assert itens[-1]['resumo']['requerimentos'] == 3
+        assert Requerimento.query.filter(Requerimento.declaracao_pdf_path.isnot(None)).count() == 3
+        assert verificar(db.session.connection()) == []
+
+        resposta = cliente.post('/api/requerimentos/declaracoes/lote',
+                                json={'declaracao_tipo': 'matricula', 'curso_id': 1, 'saida': 'zip'})
+        nomes = zipfile.ZipFile(io.BytesIO(resposta.get_data())).namelist()
+        assert nomes == [f'declaracao_2030_0000{i}_matricula.pdf' for i in (1, 2, 3)]
+
+        resposta = cliente.post('/api/requerimentos/declaracoes/lote',
+                                json={'declaracao_tipo': 'matricula', 'aluno_ids': [4], 'saida': 'pdf'})
+        assert resposta.mimetype == 'application/pdf'
+        assert len(re.findall(rb'/Type /Page\b', resposta.get_data())) == 1
+
+        # Os PDFs repetidos (e o único de uma página só) caem no mesmo arquivo do armazém
+        assert len(list((tmp_path / 'pdfs').rglob('*.pdf'))) == 4
+        assert cliente.post('/api/requerimentos/declaracoes/lote',
+                            json={'declaracao_tipo': 'matricula'}).status_code == 400
+        assert cliente.post('/api/requerimentos/declaracoes/lote',
+                            json={'declaracao_tipo': 'matricula', 'curso_id': 9}).status_code == 404
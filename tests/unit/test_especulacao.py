@@ -0,0 +1,153 @@
+import json
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+import agente_ia_inteligente
+from agente_ia_inteligente import AgenteIAInteligente
+from cache_llm import CacheRespostasLLM
+from cliente_http import ClienteHTTP
+from especulacao import ExecutorEspeculativo
+from estado_sessao import EstadoSessao
+
+
+@pytest.mark.unit
+def test_so_aproveita_a_mesma_chamada_e_cancela_o_resto():
+    liberar = threading.Event()
+    chamadas = []
+
+    def executar(ferramenta, argumentos):
+        chamadas.append(ferramenta)
+        if ferramenta == "buscar_pagamentos":
+            liberar.wait(5)
+        return f"{ferramenta}:{argumentos.get('aluno_id')}"
+
+    executor = ExecutorEspeculativo(k=3, max_paralelo=1)
+    rodada = executor.iniciar(
+        [
+            ("buscar_pagamentos", {"aluno_id": 1}),
+            ("criar_requerimento", {"tipo": "boleto"}),
+            ("resumo_academico", {"aluno_id": 1}),
+            ("resumo_academico", {"aluno_id": 1}),
+        ],
+        executar,
+    )
+
+    assert rodada.resultado("buscar_pagamentos", {"aluno_id": 2}) == (False, None)
+    # Ainda na fila atrás de buscar_pagamentos: cancelada em vez de esperar
+    assert rodada.resultado("resumo_academico", {"aluno_id": 1}) == (False, None)
+    liberar.set()
+    assert rodada.resultado("buscar_pagamentos", {"aluno_id": 1}) == (True, "buscar_pagamentos:1")
+    rodada.encerrar()
+    executor.fechar()
+
+    assert chamadas == ["buscar_pagamentos"]
+    metricas = executor.metricas()
+    assert metricas["disparadas"] == 2 and metricas["aproveitadas"] == 1
+    assert metricas["canceladas"] == 1 and metricas["descartadas"] == 0
+    assert metricas["taxa_acerto"] == 1.0 and metricas["taxa_aproveitamento"] == 0.5
+
+
+@pytest.mark.unit
+def test_agente_usa_a_ferramenta_especulada(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        fechada = f"http://127.0.0.1:{s.getsockname()[1]}"
+    # Ollama fora do ar: a decisão vem do classificador, que é o mesmo palpite da especulação
+    monkeypatch.setattr(agente_ia_inteligente, "OLLAMA_URL", f"{fechada}/api/chat")
+
+    def chamar(tool_name, arguments):
+        chamadas.append((tool_name, dict(arguments)))
+        return "Resumo do aluno"
+
+    class Agente(AgenteIAInteligente):
+        def chamar_ferramenta(self, tool_name, arguments):
+            return chamar(tool_name, arguments)
+
+        def _chamada_especulativa(self):
+            return chamar
+
+    chamadas = []
+    executor = ExecutorEspeculativo(k=2)
+    agente = Agente(fechada, estado=EstadoSessao(aluno_id=7), http=ClienteHTTP(backoff=0),
+                    cache_llm=CacheRespostasLLM(), especulacao=executor)
+
+    assert "Resumo do aluno" in agente.processar_mensagem("meu resumo acadêmico")
+    assert chamadas == [("resumo_academico", {"aluno_id": 7})]
+    assert executor.metricas()["aproveitadas"] == 1
+    executor.fechar()
+
+
+@pytest.mark.unit
+def test_chamadas_previstas_vao_num_lote_so(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        fechada = f"http://127.0.0.1:{s.getsockname()[1]}"
+    monkeypatch.setattr(agente_ia_inteligente, "OLLAMA_URL", f"{fechada}/api/chat")
+
+    corpos = []
+
+    @Request.application
+    def mcp(request):
+        corpo = json.loads(request.get_data())
+        corpos.append(corpo)
+        itens = corpo if isinstance(corpo, list) else [corpo]
+        respostas = [{"jsonrpc": "2.0", "id": item["id"],
+                      "result": {"content": [{"type": "text", "text": json.dumps(item["params"])}]}}
+                     for item in itens]
+        return Response(json.dumps(respostas if isinstance(corpo, list) else respostas[0]),
+                        mimetype="application/json")
+
+    servidor = make_server("127.0.0.1", 0, mcp, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    executor = ExecutorEspeculativo(k=3)
+    try:
+        agente = AgenteIAInteligente(f"http://127.0.0.1:{servidor.server_port}", estado=EstadoSessao(aluno_id=7),
+                                     http=ClienteHTTP(backoff=0), cache_llm=CacheRespostasLLM(),
+                                     especulacao=executor)
+        resposta = agente.processar_mensagem("quero ver meu resumo, meus pagamentos e minhas matérias")
+    finally:
+        servidor.shutdown()
+        executor.fechar()
+
+    # Resumo, pagamentos e matérias numa requisição; a decisão usa o resultado dela
+    assert len(corpos) == 1
+    assert [item["params"] for item in corpos[0]] == [
+        {"name": "perguntar_sobre_aluno", "arguments": {"pergunta": "minhas matérias", "aluno_id": 7}},
+        {"name": "perguntar_sobre_aluno", "arguments": {"pergunta": "meus boletos", "aluno_id": 7}},
+        {"name": "resumo_academico", "arguments": {"aluno_id": 7}},
+    ]
+    assert json.dumps(corpos[0][0]["params"]) in resposta
+    assert executor.metricas()["aproveitadas"] == 1
+
+
+@pytest.mark.unit
+def test_lote_sem_suporte_no_servidor_refaz_uma_a_uma():
+    enviados = []
+
+    class HTTP:
+        def post(self, servico, url, json=None, headers=None):
+            enviados.append(json)
+            if isinstance(json, list):
+                return Resposta(400, {"error": "batch"})
+            return Resposta(200, {"id": json["id"], "result": {"content": [{"text": json["params"]["name"]}]}})
+
+    class Resposta:
+        def __init__(self, status_code, corpo):
+            self.status_code, self._corpo = status_code, corpo
+
+        def json(self):
+            return self._corpo
+
+    agente = AgenteIAInteligente("http://mcp", estado=EstadoSessao(aluno_id=3), http=HTTP(),
+                                 cache_llm=CacheRespostasLLM(), especulacao=ExecutorEspeculativo(k=0))
+    assert agente.chamar_ferramentas_lote([("resumo_academico", {}), ("listar_cursos", {})]) == [
+        "resumo_academico", "listar_cursos"]
+    assert len(enviados) == 3 and enviados[0][0]["params"]["arguments"] == {"aluno_id": 3}
@@ -0,0 +1,81 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from executor_ferramentas import ExecutorFerramentas
+
+
+@pytest.mark.unit
+def test_limite_por_ferramenta_respeitado():
+    executor = ExecutorFerramentas(max_workers=4, limites={"criar_requerimento": 1})
+    ativos = []
+    pico = []
+    lock = threading.Lock()
+
+    def ferramenta_lenta(aluno_id):
+        with lock:
+            ativos.append(aluno_id)
+            pico.append(len(ativos))
+        time.sleep(0.02)
+        with lock:
+            ativos.remove(aluno_id)
+        return f"ok {aluno_id}"
+
+    async def cenario():
+        return await asyncio.gather(*[
+            executor.executar("criar_requerimento", ferramenta_lenta, {"aluno_id": i})
+            for i in range(3)
+        ])
+
+    resultados = asyncio.run(cenario())
+    executor.encerrar()
+
+    assert resultados == ["ok 0", "ok 1", "ok 2"]
+    assert max(pico) == 1
+    metricas = executor.metricas()
+    assert metricas["fila"] == 0
+    assert metricas["ferramentas"]["criar_requerimento"]["chamadas"] == 3
+    assert metricas["ferramentas"]["criar_requerimento"]["limite"] == 1
+
+
+@pytest.mark.unit
+def test_event_loop_nao_bloqueia_durante_ferramenta():
+    executor = ExecutorFerramentas(max_workers=2)
+
+    def ferramenta_lenta(segundos):
+        time.sleep(segundos)
+
+    async def cenario():
+        tarefa = asyncio.create_task(executor.executar("lenta", ferramenta_lenta, {"segundos": 0.1}))
+        inicio = time.monotonic()
+        await asyncio.sleep(0.01)
+        decorrido = time.monotonic() - inicio
+        await tarefa
+        return decorrido
+
+    decorrido = asyncio.run(cenario())
+    executor.encerrar()
+
+    assert decorrido < 0.08
+
+
+@pytest.mark.unit
+def test_erro_da_ferramenta_contabilizado():
+    executor = ExecutorFerramentas(max_workers=1)
+
+    def falha():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.executar("falha", falha))
+    executor.encerrar()
+
+    stats = executor.metricas()["ferramentas"]["falha"]
+    assert stats["erros"] == 1
+    assert stats["em_execucao"] == 0
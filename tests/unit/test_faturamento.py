@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.faturamento import faturar_semestre
+from src.core.resumo_aluno import verificar
+from src.models import Aluno, Curso, Matricula, Pagamento
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+@pytest.mark.unit
+def test_faturamento_gera_em_lotes_e_e_idempotente():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        curso = Curso(nome='Curso', codigo='C1', duracao_semestres=8, valor_mensalidade=750.0)
+        db.session.add(curso)
+        for i in range(1, 8):
+            aluno = Aluno(matricula=f'2030/{i:05d}', nome_completo=f'Aluno {i}', cpf=f'{i:011d}',
+                          data_nascimento=date(2000, 1, 1), email=f'aluno{i}@escola.edu',
+                          status='trancado' if i == 7 else 'ativo')
+            db.session.add(Matricula(aluno=aluno, curso=curso, ano=2030, semestre=1,
+                                     status='concluido' if i == 6 else 'cursando'))
+        db.session.commit()
+
+        primeiro = faturar_semestre(2030, 2, a_partir_de=date(2030, 9, 1), tamanho_lote=2)
+        assert primeiro['meses'] == [9, 10, 11, 12]
+        assert primeiro['geradas'] == 5 * 4 and primeiro['alunos'] == 5
+        assert primeiro['lotes'] == 4
+
+        segundo = faturar_semestre(2030, 2, a_partir_de=date(2030, 7, 1), tamanho_lote=2)
+        assert segundo['geradas'] == 5 * 2  # só julho e agosto faltavam
+
+        boleto = Pagamento.query.filter_by(aluno_id=1, mes_referencia=9).one()
+        assert boleto.valor == 750.0 and boleto.status == 'pendente'
+        assert boleto.data_vencimento == date(2030, 9, 10)
+        assert boleto.codigo_boleto == '203000001203009'
+        assert boleto.link_boleto.endswith('/boleto/2030/00001/203009')
+        assert verificar(db.session.connection()) == []
@@ -0,0 +1,104 @@
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.fila_declaracoes import fila_declaracoes
+from src.models import Aluno, Requerimento
+
+
+def _config(caminho, diretorio):
+    class ConfigTeste(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+        TESTING = True
+        DECLARACOES_DIR = str(diretorio)
+        DECLARACOES_PROCESSOS = 1
+    return ConfigTeste
+
+
+def _aguardar(cliente, status_url):
+    for _ in range(200):
+        tarefa = cliente.get(status_url).get_json()
+        if tarefa['status'] in ('concluido', 'erro'):
+            return tarefa
+        time.sleep(0.05)
+    raise AssertionError(tarefa)
+
+
+@pytest.mark.unit
+def test_declaracao_responde_202_e_pedidos_iguais_dividem_o_pdf(tmp_path):
+    app = create_app(_config(tmp_path / 'escola.db', tmp_path / 'pdfs'))
+    with app.app_context():
+        db.create_all()
+        db.session.add(Aluno(matricula='2030/00001', nome_completo='Aluno', cpf='00000000001',
+                             data_nascimento=date(2000, 1, 1), email='aluno@escola.edu'))
+        db.session.commit()
+
+    try:
+        cliente = app.test_client()
+        respostas = [
+            cliente.post('/api/requerimentos/declaracao', json={'aluno_id': 1, 'declaracao_tipo': 'matricula'})
+            for _ in range(2)
+        ]
+        assert [r.status_code for r in respostas] == [202, 202]
+        assert respostas[0].headers['Location'] == respostas[0].get_json()['tarefa']['status_url']
+
+        tarefas = [_aguardar(cliente, r.headers['Location']) for r in respostas]
+        assert [t['status'] for t in tarefas] == ['concluido', 'concluido']
+        assert tarefas[0]['pdf_hash'] == tarefas[1]['pdf_hash']
+        assert tarefas[0]['pdf_url'] == '/api/requerimentos/1/pdf'
+
+        with app.app_context():
+            caminhos = {r.declaracao_pdf_path for r in Requerimento.query}
+        assert len(caminhos) == 1
+        assert [p.name for p in (tmp_path / 'pdfs').rglob('*.pdf')] == [f"{tarefas[0]['pdf_hash']}.pdf"]
+        assert cliente.get('/api/requerimentos/declaracao/tarefas/nao-existe').status_code == 404
+    finally:
+        with app.app_context():
+            fila_declaracoes().encerrar()
+
+
+@pytest.mark.unit
+def test_pdf_com_etag_range_e_regeneracao_em_segundo_plano(tmp_path):
+    app = create_app(_config(tmp_path / 'escola.db', tmp_path / 'pdfs'))
+    with app.app_context():
+        db.create_all()
+        db.session.add(Aluno(matricula='2030/00001', nome_completo='Aluno', cpf='00000000001',
+                             data_nascimento=date(2000, 1, 1), email='aluno@escola.edu'))
+        db.session.commit()
+
+    try:
+        cliente = app.test_client()
+        criada = cliente.post('/api/requerimentos/declaracao', json={'aluno_id': 1, 'declaracao_tipo': 'matricula'})
+        pdf_hash = _aguardar(cliente, criada.headers['Location'])['pdf_hash']
+
+        resposta = cliente.get('/api/requerimentos/1/pdf')
+        assert resposta.status_code == 200 and resposta.headers['ETag'] == f'"{pdf_hash}"'
+        assert 'private' in resposta.headers['Cache-Control']
+        assert cliente.get('/api/requerimentos/1/visualizar-pdf',
+                           headers={'If-None-Match': f'"{pdf_hash}"'}).status_code == 304
+        parcial = cliente.get('/api/requerimentos/1/pdf', headers={'Range': 'bytes=0-3'})
+        assert parcial.status_code == 206 and parcial.data == b'%PDF'
+
+        app.config['PDF_X_ACCEL_PREFIX'] = '/interno/declaracoes/'
+        offload = cliente.get('/api/requerimentos/1/pdf')
+        assert offload.data == b''
+        assert offload.headers['X-Accel-Redirect'] == f'/interno/declaracoes/{pdf_hash[:2]}/{pdf_hash}.pdf'
+        del app.config['PDF_X_ACCEL_PREFIX']
+
+        # Arquivo apagado: GETs simultâneos recebem a mesma tarefa de regeneração
+        # (o único processo do pool fica ocupado para a regeneração não terminar entre os dois)
+        next((tmp_path / 'pdfs').rglob('*.pdf')).unlink()
+        with app.app_context():
+            fila_declaracoes()._pool.submit(time.sleep, 0.5)
+        pendentes = [cliente.get('/api/requerimentos/1/pdf') for _ in range(2)]
+        assert [r.status_code for r in pendentes] == [202, 202]
+        assert pendentes[0].headers['Location'] == pendentes[1].headers['Location']
+        assert _aguardar(cliente, pendentes[0].headers['Location'])['status'] == 'concluido'
+        assert cliente.get('/api/requerimentos/1/pdf').status_code == 200
+    finally:
+        with app.app_context():
+            fila_declaracoes().encerrar()
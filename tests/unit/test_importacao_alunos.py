@@ -0,0 +1,54 @@
+import json
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.resumo_aluno import verificar
+from src.models import Aluno
+
+
+def _config(caminho):
+    class ConfigTeste(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+        TESTING = True
+    return ConfigTeste
+
+
+CSV = """nome_completo,cpf,data_nascimento,email,telefone,senha
+Ana Souza,111.222.333-44,2001-02-03,ana@escola.edu,11999990000,segredo1
+Bruno Lima,22233344455,2000-05-06,bruno@escola.edu,,
+Sem Email,33344455566,2000-05-06,,,
+Data Errada,44455566677,06/05/2000,data@escola.edu,,
+Ana de Novo,111.222.333-44,2001-02-03,outra@escola.edu,,
+Veterano Repetido,99988877766,1999-01-01,veterano@escola.edu,,
+"""
+
+
+@pytest.mark.unit
+def test_importa_csv_e_relata_linhas_com_erro(tmp_path):
+    app = create_app(_config(tmp_path / 'escola.db'))
+    with app.app_context():
+        db.create_all()
+        db.session.add(Aluno(matricula='2020/00001', nome_completo='Veterano', cpf='99988877766',
+                             data_nascimento=date(1999, 1, 1), email='v@escola.edu'))
+        db.session.commit()
+
+        resposta = app.test_client().post('/api/alunos/importar', data=CSV, content_type='text/csv')
+        assert resposta.mimetype == 'application/x-ndjson'
+        relatorio = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+
+        erros = {item['linha']: item['erro'] for item in relatorio if 'erro' in item}
+        assert set(erros) == {4, 5, 6, 7}
+        assert 'email' in erros[4] and 'data_nascimento' in erros[5]
+        assert erros[6] == 'CPF ou email repetido no arquivo'
+        assert erros[7] == 'CPF ou email ja cadastrado'
+        assert relatorio[-1]['resumo']['importadas'] == 2
+
+        ana = Aluno.query.filter_by(email='ana@escola.edu').one()
+        bruno = Aluno.query.filter_by(email='bruno@escola.edu').one()
+        assert ana.check_senha('segredo1') and bruno.senha_hash is None
+        assert ana.matricula != bruno.matricula
+        assert verificar(db.session.connection()) == []
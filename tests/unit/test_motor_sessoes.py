@@ -0,0 +1,137 @@
+import socket
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from fastapi.testclient import TestClient
+from werkzeug.serving import make_server
+
+from app import create_app
+from config import Config
+from database import db
+from src.models import Aluno
+
+from cache_llm import CacheRespostasLLM
+from cliente_http import ClienteHTTP
+from estado_sessao import EstadoSessao
+from motor_sessoes import MotorSessoes
+from servidor_chat import criar_app
+
+
+def _url_fechada():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+@pytest.fixture
+def cliente():
+    motor = MotorSessoes(
+        _url_fechada(), max_turnos_simultaneos=2, http=ClienteHTTP(backoff=0), cache_llm=CacheRespostasLLM()
+    )
+    with TestClient(criar_app(motor)) as cliente:
+        yield cliente
+
+
+@pytest.mark.unit
+def test_estado_sessao_ida_e_volta():
+    estado = EstadoSessao(aluno_id=3, acao_pendente={"tipo": "servico_interesse"})
+    restaurado = EstadoSessao.de_dict({**estado.para_dict(), "campo_antigo": 1})
+    assert restaurado == estado
+
+
+@pytest.mark.unit
+def test_sessoes_tem_estado_isolado(cliente):
+    primeira = cliente.post("/sessoes").json()["sessao_id"]
+    segunda = cliente.post("/sessoes").json()["sessao_id"]
+
+    resposta = cliente.post(f"/sessoes/{primeira}/mensagens", json={"mensagem": "quero me cadastrar"})
+    assert resposta.status_code == 200
+    assert "Cadastro" in resposta.json()["resposta"]
+
+    assert cliente.get(f"/sessoes/{primeira}").json()["dados_cadastro"]["etapa_atual"] == "confirmacao"
+    assert cliente.get(f"/sessoes/{segunda}").json()["dados_cadastro"] is None
+
+    with cliente.websocket_connect(f"/sessoes/{primeira}/ws") as ws:
+        ws.send_text("sim")
+        assert "Campo 1/" in ws.receive_json()["resposta"]
+
+
+@pytest.mark.unit
+def test_sessao_inexistente(cliente):
+    assert cliente.post("/sessoes/nao-existe/mensagens", json={"mensagem": "oi"}).status_code == 404
+    assert cliente.delete("/sessoes/nao-existe").status_code == 404
+
+
+@pytest.mark.unit
+def test_mensagem_em_streaming(cliente):
+    sessao = cliente.post("/sessoes").json()["sessao_id"]
+
+    with cliente.stream("POST", f"/sessoes/{sessao}/mensagens/stream", json={"mensagem": "quero me cadastrar"}) as r:
+        assert r.status_code == 200
+        texto = "".join(r.iter_text())
+    assert "Cadastro" in texto
+    assert cliente.get(f"/sessoes/{sessao}").json()["dados_cadastro"]["etapa_atual"] == "confirmacao"
+
+    assert cliente.post("/sessoes/nao-existe/mensagens/stream", json={"mensagem": "oi"}).status_code == 404
+
+
+@pytest.mark.unit
+def test_sessao_de_aluno_exige_token_do_flask():
+    class ConfigTeste(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+        TESTING = True
+
+    flask_app = create_app(ConfigTeste)
+    with flask_app.app_context():
+        db.create_all()
+        for i in (1, 2):
+            db.session.add(Aluno(matricula=f"2030/0000{i}", nome_completo=f"Aluno {i}", cpf=f"0000000000{i}",
+                                 data_nascimento=date(2000, 1, 1), email=f"aluno{i}@escola.edu"))
+        db.session.commit()
+        token = db.session.get(Aluno, 2).gerar_token_jwt()
+
+    servidor = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        motor = MotorSessoes(
+            _url_fechada(), max_turnos_simultaneos=2, http=ClienteHTTP(backoff=0), cache_llm=CacheRespostasLLM(),
+            flask_url=f"http://127.0.0.1:{servidor.server_port}",
+        )
+        with TestClient(criar_app(motor)) as cliente:
+            assert cliente.post("/sessoes", json={"aluno_id": 1}).status_code == 401
+            invalido = {"Authorization": "Bearer x.y.z"}
+            assert cliente.post("/sessoes", json={"aluno_id": 1}, headers=invalido).status_code == 401
+            valido = {"Authorization": f"Bearer {token}"}
+            assert cliente.post("/sessoes", json={"aluno_id": 1}, headers=valido).status_code == 403
+            # Token aceito: segue para a consulta ao MCP, fora do ar aqui
+            assert cliente.post("/sessoes", headers=valido).status_code == 404
+            assert cliente.post("/sessoes").status_code == 201
+    finally:
+        servidor.shutdown()
+
+
+@pytest.mark.unit
+def test_websocket_termina_com_a_resposta_de_processar_mensagem():
+    class Motor(MotorSessoes):
+        def _processar_turno(self, dados_estado, mensagem, ao_fragmento=None):
+            # Começou a transmitir e depois mudou de rumo (ex.: chamou uma ferramenta)
+            ao_fragmento("Vou verificar")
+            return "Resumo pronto", dados_estado
+
+    motor = Motor(_url_fechada(), max_turnos_simultaneos=2, http=ClienteHTTP(backoff=0),
+                  cache_llm=CacheRespostasLLM())
+    with TestClient(criar_app(motor)) as cliente:
+        sessao = cliente.post("/sessoes").json()["sessao_id"]
+        with cliente.websocket_connect(f"/sessoes/{sessao}/ws") as ws:
+            ws.send_text("meu resumo")
+            assert ws.receive_json() == {"fragmento": "Vou verificar"}
+            assert ws.receive_json() == {"resposta": "Resumo pronto"}
+
+        with cliente.stream("POST", f"/sessoes/{sessao}/mensagens/stream", json={"mensagem": "meu resumo"}) as r:
+            assert "".join(r.iter_text()) == "Vou verificar\n\nResumo pronto"
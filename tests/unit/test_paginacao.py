@@ -0,0 +1,118 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from database import db
+from src.models import Aluno, Pagamento
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        aluno = Aluno(matricula='2024/00001', nome_completo='Ana', cpf='1', email='ana@escola.edu',
+                      data_nascimento=date(2000, 1, 1))
+        db.session.add(aluno)
+        emissao = datetime(2024, 1, 1)
+        # Emissões repetidas: a chave (data_emissao, id) precisa desempatar
+        db.session.add_all([
+            Pagamento(aluno=aluno, tipo='mensalidade', valor=100.0 + i, data_vencimento=date(2024, 2, 10),
+                      data_emissao=emissao + timedelta(days=i // 3))
+            for i in range(11)
+        ])
+        db.session.commit()
+        yield app
+
+
+@pytest.mark.unit
+def test_cursor_percorre_tudo_na_ordem_sem_repetir(app):
+    cliente = app.test_client()
+    vistos, cursor = [], None
+    while True:
+        url = '/api/pagamentos/?limit=4' + (f'&cursor={cursor}' if cursor else '')
+        pagina = cliente.get(url).get_json()
+        vistos += [(p['data_emissao'], p['id']) for p in pagina['items']]
+        cursor = pagina['next_cursor']
+        if cursor is None:
+            break
+
+    assert pagina['total'] == 11 and not pagina['total_estimado']
+    assert len(vistos) == 11
+    assert vistos == sorted(vistos, reverse=True)
+
+    assert cliente.get('/api/pagamentos/?cursor=xyz').status_code == 400
+    assert cliente.get('/api/pagamentos/?limit=0').status_code == 400
+
+
+@pytest.mark.unit
+def test_fields_seleciona_so_as_colunas_pedidas(app):
+    cliente = app.test_client()
+    consultas = []
+    event.listen(db.engine, 'before_cursor_execute', lambda c, cur, sql, *a: consultas.append(sql))
+
+    pagina = cliente.get('/api/pagamentos/?fields=valor,aluno_nome&limit=2').get_json()
+
+    assert pagina['items'][0] == {'valor': 110.0, 'aluno_nome': 'Ana'}
+    listagem = next(sql for sql in consultas if 'LIMIT' in sql)
+    assert 'link_boleto' not in listagem and 'LEFT OUTER JOIN alunos' in listagem
+    assert cliente.get('/api/pagamentos/?fields=senha').status_code == 400
+    assert set(cliente.get('/api/alunos/?fields=id,tem_senha').get_json()['items'][0]) == {'id', 'tem_senha'}
+
+
+@pytest.mark.unit
+def test_total_estimado_enquanto_a_tabela_muda():
+    class ComTTL(ConfigTeste):
+        PAGINACAO_TOTAL_TTL = 60
+
+    app = create_app(ComTTL)
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        assert cliente.get('/api/alunos/').get_json()['total'] == 0
+
+        db.session.add(Aluno(matricula='2024/00002', nome_completo='Bia', cpf='2', email='bia@escola.edu',
+                             data_nascimento=date(2000, 1, 1)))
+        db.session.commit()
+        pagina = cliente.get('/api/alunos/').get_json()
+        assert pagina['total'] == 0 and pagina['total_estimado']
+        assert len(pagina['items']) == 1
+
+
+@pytest.mark.unit
+def test_exportacao_em_streaming(app):
+    cliente = app.test_client()
+
+    resposta = cliente.get('/api/pagamentos/?fields=id,valor', headers={'Accept': 'application/x-ndjson'})
+    assert resposta.is_streamed and resposta.mimetype == 'application/x-ndjson'
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert len(linhas) == 11 and set(linhas[0]) == {'id', 'valor'}
+
+    completo = cliente.get('/api/pagamentos/?formato=json&aluno_id=1').get_json()
+    assert len(completo) == 11 and completo[0]['aluno_nome'] == 'Ana'
+    assert cliente.get('/api/requerimentos/?formato=json').get_json() == []
+    assert cliente.get('/api/pagamentos/?formato=csv').status_code == 400
+
+
+@pytest.mark.unit
+def test_total_sem_versoes_tabelas_ainda_criada():
+    # Banco migrado antes de qualquer flush: versoes_tabelas ainda não existe
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[
+            tabela for tabela in db.metadata.sorted_tables if tabela.name != 'versoes_tabelas'
+        ])
+
+    cliente = app.test_client()
+    resposta = cliente.get('/api/alunos/')
+    assert resposta.status_code == 200 and resposta.get_json()['total'] == 0
+    assert cliente.get('/api/alunos/').get_json()['total'] == 0
@@ -0,0 +1,99 @@
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+import consultas_aluno
+from app import create_app
+from config import Config
+from database import db
+from src.models import Matricula, MatriculaMateria, Pagamento, Requerimento
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+# Consultas por aluno do servidor MCP e do database_adapter (as mesmas strings que eles executam)
+CONSULTAS_SQL = {
+    'mcp.contagem_materias': (consultas_aluno.CONTAGEM_MATERIAS, (1,)),
+    'mcp.total_pendente': (consultas_aluno.TOTAL_PENDENTE, (1,)),
+    'mcp.ids_materias_do_aluno': (consultas_aluno.IDS_MATERIAS_DO_ALUNO, (1,)),
+    'mcp.materias_do_aluno': (consultas_aluno.MATERIAS_DO_ALUNO, (1,)),
+    'mcp.notas_do_aluno': (consultas_aluno.NOTAS_DO_ALUNO, (1,)),
+    'mcp.pagamentos_pendentes': (consultas_aluno.PAGAMENTOS_PENDENTES, (1,)),
+    'mcp.frequencia_do_aluno': (consultas_aluno.FREQUENCIA_DO_ALUNO, (1,)),
+    'mcp.estatisticas_materias': (consultas_aluno.ESTATISTICAS_MATERIAS, (1,)),
+    'mcp.estatisticas_pagamentos': (consultas_aluno.ESTATISTICAS_PAGAMENTOS, (1,)),
+    'mcp.total_requerimentos': (consultas_aluno.TOTAL_REQUERIMENTOS, (1,)),
+    'mcp.pagamentos_por_status': (consultas_aluno.PAGAMENTOS_POR_STATUS, (1, 'pendente')),
+    'mcp.pagamentos_do_aluno': (consultas_aluno.PAGAMENTOS_DO_ALUNO, (1,)),
+    'adapter.cursos_do_aluno': (consultas_aluno.ADAPTER_CURSOS_DO_ALUNO, {'aluno_id': 1}),
+    'adapter.materias_do_aluno': (consultas_aluno.ADAPTER_MATERIAS_DO_ALUNO, {'aluno_id': 1}),
+    'adapter.pagamentos_do_aluno': (consultas_aluno.ADAPTER_PAGAMENTOS_DO_ALUNO, {'aluno_id': 1}),
+    'adapter.requerimentos_do_aluno': (consultas_aluno.ADAPTER_REQUERIMENTOS_DO_ALUNO, {'aluno_id': 1}),
+}
+
+# Consultas das rotas Flask (com a ordem e o LIMIT da paginação)
+CONSULTAS_ORM = {
+    'rota.pagamentos_do_aluno': lambda: Pagamento.query.filter_by(aluno_id=1, status='pendente')
+        .order_by(Pagamento.data_emissao.desc(), Pagamento.id.desc()).limit(51),
+    'rota.pagamentos': lambda: Pagamento.query
+        .order_by(Pagamento.data_emissao.desc(), Pagamento.id.desc()).limit(51),
+    'rota.requerimentos_do_aluno': lambda: Requerimento.query.filter_by(aluno_id=1)
+        .order_by(Requerimento.data_solicitacao.desc(), Requerimento.id.desc()).limit(51),
+    'rota.requerimentos': lambda: Requerimento.query
+        .order_by(Requerimento.data_solicitacao.desc(), Requerimento.id.desc()).limit(51),
+    'rota.matriculas_do_aluno': lambda: Matricula.query.filter_by(aluno_id=1),
+    'rota.alunos_da_materia': lambda: MatriculaMateria.query.filter_by(materia_id=1),
+    'varredura.pendentes_vencidos': lambda: Pagamento.query.with_entities(Pagamento.id).filter(
+        Pagamento.status == 'pendente', Pagamento.data_vencimento < date(2030, 3, 10),
+        Pagamento.data_vencimento >= date(2030, 3, 1)).limit(1000),
+}
+
+# "SCAN pagamentos" / "SCAN TABLE pagamentos AS p" (SQLite antigo): tabela lida inteira
+VARREDURA_COMPLETA = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+
+
+def _plano(sql, parametros):
+    linhas = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parametros).fetchall()
+    return [linha[-1] for linha in linhas]
+
+
+def _plano_orm(query):
+    compilada = query.statement.compile(dialect=db.engine.dialect)
+    return _plano(str(compilada), tuple(compilada.params[nome] for nome in compilada.positiontup))
+
+
+@pytest.fixture
+def app():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('nome', sorted(CONSULTAS_SQL))
+def test_consultas_sql_usam_indice(app, nome):
+    plano = _plano(*CONSULTAS_SQL[nome])
+    assert not any(VARREDURA_COMPLETA.match(passo) for passo in plano), plano
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('nome', sorted(CONSULTAS_ORM))
+def test_consultas_das_rotas_usam_indice(app, nome):
+    plano = _plano_orm(CONSULTAS_ORM[nome]())
+    assert not any(VARREDURA_COMPLETA.match(passo) for passo in plano), plano
+
+
+@pytest.mark.unit
+def test_todas_as_consultas_do_modulo_tem_plano_verificado():
+    constantes = {nome for nome, valor in vars(consultas_aluno).items() if nome.isupper() and isinstance(valor, str)}
+    verificadas = {sql for sql, _ in CONSULTAS_SQL.values()}
+    assert {nome for nome in constantes if getattr(consultas_aluno, nome) not in verificadas} == set()
@@ -0,0 +1,83 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from pool_conexoes import PoolConexoesSQLite, PoolEsgotadoError
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    caminho = tmp_path / "escola.db"
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE alunos (id INTEGER PRIMARY KEY, nome_completo TEXT)")
+    conn.execute("INSERT INTO alunos (nome_completo) VALUES ('Ana')")
+    conn.commit()
+    conn.close()
+    return str(caminho)
+
+
+@pytest.mark.unit
+def test_conexao_reutilizada_e_contabilizada(db_path):
+    pool = PoolConexoesSQLite(db_path, tamanho_maximo=2)
+
+    conn = pool.emprestar()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT nome_completo FROM alunos").fetchone()["nome_completo"] == "Ana"
+    conn.close()
+    conn.close()  # idempotente
+
+    pool.emprestar().close()
+
+    metricas = pool.metricas()
+    assert metricas["criadas"] == 1
+    assert metricas["emprestimos"] == 2
+    assert metricas["devolucoes"] == 2
+    assert metricas["em_uso"] == 0
+    assert metricas["ociosas"] == 1
+
+
+@pytest.mark.unit
+def test_pool_esgotado_gera_timeout(db_path):
+    pool = PoolConexoesSQLite(db_path, tamanho_maximo=1)
+
+    with pool.conexao():
+        with pytest.raises(PoolEsgotadoError):
+            pool.emprestar(timeout=0.05)
+
+    assert pool.metricas()["timeouts"] == 1
+
+
+@pytest.mark.unit
+def test_transacao_aberta_desfeita_na_devolucao(db_path):
+    pool = PoolConexoesSQLite(db_path, tamanho_maximo=1)
+
+    conn = pool.emprestar()
+    conn.execute("INSERT INTO alunos (nome_completo) VALUES ('Bruno')")
+    conn.close()
+
+    with pool.conexao() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM alunos").fetchone()[0] == 1
+
+
+@pytest.mark.unit
+def test_banco_inexistente_nao_consome_vaga(tmp_path):
+    pool = PoolConexoesSQLite(str(tmp_path / "nao_existe.db"), tamanho_maximo=1)
+
+    with pytest.raises(sqlite3.OperationalError):
+        pool.emprestar()
+
+    assert pool.metricas()["abertas"] == 0
+    assert not (tmp_path / "nao_existe.db").exists()
+
+
+@pytest.mark.unit
+def test_tabela_existe_usa_cache(db_path):
+    pool = PoolConexoesSQLite(db_path, tamanho_maximo=1)
+
+    assert pool.tabela_existe("alunos")
+    assert not pool.tabela_existe("pagamentos")
+    assert pool.metricas()["emprestimos"] == 1
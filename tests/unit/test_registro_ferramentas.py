@@ -0,0 +1,67 @@
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from mcp.server.fastmcp import FastMCP
+
+from registro_ferramentas import (
+    ListaFerramentasSerializada,
+    construir_registro,
+    construir_schema_ferramentas,
+)
+
+
+@pytest.fixture
+def mcp():
+    servidor = FastMCP("teste")
+
+    @servidor.tool()
+    def buscar_pagamentos(aluno_id: int, status: Optional[str] = None) -> str:
+        """
+        Busca pagamentos/boletos do aluno.
+
+        Args:
+            aluno_id: ID do aluno
+            status: Filtro por status - opcional
+        """
+        return f"{aluno_id}:{status}"
+
+    return servidor
+
+
+@pytest.mark.unit
+def test_registro_aponta_para_funcao_original(mcp):
+    registro = construir_registro(mcp)
+
+    assert list(registro) == ["buscar_pagamentos"]
+    assert registro["buscar_pagamentos"](aluno_id=3, status="pago") == "3:pago"
+
+
+@pytest.mark.unit
+def test_schema_gerado_da_docstring(mcp):
+    (ferramenta,) = construir_schema_ferramentas(mcp)
+
+    assert ferramenta["description"] == "Busca pagamentos/boletos do aluno"
+    schema = ferramenta["inputSchema"]
+    assert schema["required"] == ["aluno_id"]
+    assert schema["properties"]["aluno_id"] == {"type": "number", "description": "ID do aluno"}
+    assert schema["properties"]["status"]["type"] == "string"
+
+
+@pytest.mark.unit
+def test_lista_serializada_com_etag(mcp):
+    lista = ListaFerramentasSerializada(construir_schema_ferramentas(mcp))
+
+    resposta = json.loads(lista.corpo("abc"))
+    assert resposta["id"] == "abc"
+    assert resposta["result"] == lista.resultado()
+
+    assert lista.etag_confere(lista.etag)
+    assert lista.etag_confere(f'"outro", {lista.etag}')
+    assert not lista.etag_confere('"outro"')
+    assert not lista.etag_confere(None)
@@ -0,0 +1,40 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from registro_templates import RegistroTemplates
+
+TEMPLATES = Path(__file__).resolve().parents[2] / "templates"
+
+
+@pytest.mark.unit
+def test_template_compilado_uma_vez_e_recarregado_quando_o_arquivo_muda(tmp_path):
+    arquivo = tmp_path / "oi.html"
+    arquivo.write_text("Oi {{ nome }} em {{ quando|date('d/m/Y H:i') }}", encoding="utf-8")
+    registro = RegistroTemplates([str(tmp_path)], diretorio_bytecode=str(tmp_path / "bytecode"))
+
+    primeiro = registro.template("oi.html")
+    assert registro.template("oi.html") is primeiro
+    assert primeiro.render(nome="<Ana>", quando=datetime(2030, 3, 4, 9, 5)) == "Oi &lt;Ana&gt; em 04/03/2030 09:05"
+    assert list((tmp_path / "bytecode").iterdir())
+
+    arquivo.write_text("Tchau {{ nome }}", encoding="utf-8")
+    os.utime(arquivo, ns=(0, arquivo.stat().st_mtime_ns + 10**9))
+    assert registro.template("oi.html").render(nome="Ana") == "Tchau Ana"
+
+
+@pytest.mark.unit
+def test_template_de_declaracao_compila():
+    registro = RegistroTemplates([str(TEMPLATES)])
+    hoje = datetime(2030, 3, 4)
+    html = registro.template("declaracao_template.html").render(
+        aluno={"nome": "Ana", "cpf": "1", "matricula": "2030/00001", "data_nascimento": hoje,
+               "data_previsao_conclusao": hoje},
+        tipo_declaracao="DECLARAÇÃO DE MATRÍCULA", materias_atual=[],
+    )
+    assert "Ana" in html and "04/03/2030" in html
@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.resumo_aluno import verificar
+from src.models import Aluno, Curso, Materia, Matricula, MatriculaMateria, Pagamento, Requerimento, ResumoAluno
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def _aluno(i):
+    return Aluno(matricula=f'2024/{i:05d}', nome_completo=f'Aluno {i}', cpf=f'{i:011d}',
+                 data_nascimento=date(2000, 1, 1), email=f'aluno{i}@escola.edu')
+
+
+def _resumo(aluno_id):
+    db.session.expire_all()
+    return db.session.get(ResumoAluno, aluno_id).to_dict()
+
+
+@pytest.mark.unit
+def test_contadores_acompanham_as_escritas():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        curso = Curso(nome='Curso', codigo='C1', duracao_semestres=8, valor_mensalidade=500.0)
+        materia = Materia(nome='Materia', codigo='M1', curso=curso)
+        aluno, outro = _aluno(1), _aluno(2)
+        matricula = Matricula(aluno=aluno, curso=curso, ano=2024, semestre=1)
+        db.session.add_all([
+            curso, materia, aluno, outro, matricula,
+            MatriculaMateria(matricula=matricula, materia=materia),
+            MatriculaMateria(matricula=matricula, materia=materia, status='aprovado'),
+            Pagamento(aluno=aluno, tipo='mensalidade', valor=500.0, data_vencimento=date(2024, 3, 10)),
+            Pagamento(aluno=aluno, tipo='taxa', valor=30.0, data_vencimento=date(2024, 4, 10)),
+            Requerimento(aluno=aluno, tipo='declaracao'),
+        ])
+        db.session.commit()
+
+        resumo = _resumo(aluno.id)
+        assert resumo['materias'] == {'total': 2, 'cursando': 1, 'aprovadas': 1, 'reprovadas': 0}
+        assert resumo['pagamentos'] == {'total': 2, 'pendentes': 2, 'valor_devido': 530.0}
+        assert _resumo(outro.id)['requerimentos']['total'] == 0
+
+        # Alteração com o objeto carregado (delta) e com atributos expirados (recontagem)
+        pagamento = Pagamento.query.filter_by(tipo='mensalidade').one()
+        pagamento.status = 'pago'
+        db.session.commit()
+        requerimento = Requerimento.query.one()
+        db.session.commit()
+        requerimento.status = 'concluido'
+        db.session.commit()
+
+        resumo = _resumo(aluno.id)
+        assert resumo['pagamentos'] == {'total': 2, 'pendentes': 1, 'valor_devido': 30.0}
+        assert resumo['requerimentos'] == {'total': 1, 'pendentes': 0, 'concluidos': 1, 'rejeitados': 0}
+
+        # Matrícula trocada de aluno no mesmo flush de um objeto expirado: recontagem dos dois donos
+        taxa = Pagamento.query.filter_by(tipo='taxa').one()
+        db.session.commit()
+        Matricula.query.one().aluno_id = outro.id
+        taxa.status = 'pago'
+        db.session.commit()
+
+        assert _resumo(aluno.id)['materias']['total'] == 0
+        assert _resumo(aluno.id)['pagamentos']['valor_devido'] == 0
+        assert _resumo(outro.id)['materias'] == {'total': 2, 'cursando': 1, 'aprovadas': 1, 'reprovadas': 0}
+
+        # Remoção em cascata: as matérias da matrícula saem do resumo
+        db.session.delete(Matricula.query.one())
+        Requerimento.query.one().aluno = outro
+        db.session.commit()
+
+        assert _resumo(outro.id)['materias']['total'] == 0
+        assert _resumo(outro.id)['requerimentos']['concluidos'] == 1
+        assert verificar(db.session.connection()) == []
+
+        resposta = app.test_client().get(f'/dashboard-data/{outro.id}')
+        assert resposta.get_json()['estatisticas']['concluidos'] == 1
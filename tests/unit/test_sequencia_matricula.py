@@ -0,0 +1,68 @@
+import threading
+from datetime import date, datetime
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.sequencia_matricula import AlocadorMatriculas
+from src.models import Aluno
+
+
+def _config(caminho):
+    class ConfigTeste(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+        TESTING = True
+        MATRICULA_BLOCO = 5
+    return ConfigTeste
+
+
+@pytest.mark.unit
+def test_workers_em_paralelo_nao_repetem_numeros(tmp_path):
+    app = create_app(_config(tmp_path / 'escola.db'))
+    with app.app_context():
+        db.create_all()
+        db.session.add(Aluno(matricula='2030/00042', nome_completo='Veterano', cpf='1',
+                             data_nascimento=date(2000, 1, 1), email='v@escola.edu'))
+        db.session.commit()
+
+        # Dois "workers", cada um com seu alocador e várias threads
+        workers = [AlocadorMatriculas(tamanho_bloco=7), AlocadorMatriculas(tamanho_bloco=3)]
+        engine = db.engine
+        entregues = []
+        lock = threading.Lock()
+
+        def cadastrar(alocador):
+            for _ in range(25):
+                numero = alocador.proxima_matricula(engine, ano=2030)
+                with lock:
+                    entregues.append(numero)
+
+        threads = [threading.Thread(target=cadastrar, args=(w,)) for w in workers for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(entregues) == len(set(entregues)) == 200
+        assert min(entregues) == '2030/00043'
+
+
+@pytest.mark.unit
+def test_cadastro_usa_a_sequencia_sem_ler_o_ultimo_aluno(tmp_path):
+    app = create_app(_config(tmp_path / 'escola.db'))
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        matriculas = []
+        for i in range(3):
+            resposta = cliente.post('/api/alunos/', json={
+                'nome_completo': f'Aluno {i}', 'cpf': f'{i:011d}',
+                'data_nascimento': '2000-01-01', 'email': f'aluno{i}@escola.edu',
+            })
+            assert resposta.status_code == 201
+            matriculas.append(resposta.get_json()['matricula'])
+
+        ano = datetime.now().year
+        assert matriculas == [f'{ano}/00001', f'{ano}/00002', f'{ano}/00003']
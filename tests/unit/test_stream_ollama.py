@@ -0,0 +1,135 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "agente-ia"))
+
+from stream_ollama import LeitorDecisao, StreamOllama, complemento_resposta
+
+
+class RespostaNDJSON:
+    """Corpo NDJSON em memória com a interface usada de requests.Response"""
+
+    def __init__(self, linhas):
+        self.linhas = [json.dumps(linha).encode() for linha in linhas]
+        self.fechada = False
+
+    def iter_lines(self):
+        yield from self.linhas
+
+    def close(self):
+        self.fechada = True
+
+
+def _em_pedacos(texto, tamanho=3):
+    return [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+
+
+@pytest.mark.unit
+def test_ferramenta_fica_pronta_antes_do_fim():
+    texto = '{"acao": "ferramenta", "ferramenta": "criar_requerimento", "argumentos": {"tipo": "declaracao", "kwargs": {"x": [1, "}"]}}, "obs": "texto longo"}'
+    leitor = LeitorDecisao()
+    consumidos = 0
+    for pedaco in _em_pedacos(texto):
+        leitor.alimentar(pedaco)
+        consumidos += len(pedaco)
+        if leitor.pronta:
+            break
+
+    assert consumidos < len(texto)
+    assert leitor.decisao()["argumentos"] == {"tipo": "declaracao", "kwargs": {"x": [1, "}"]}}
+
+
+@pytest.mark.unit
+def test_resposta_de_conversa_e_repassada_decodificada():
+    emitido = []
+    leitor = LeitorDecisao(ao_texto=emitido.append)
+    texto = json.dumps({"acao": "conversa", "resposta": 'Olá, "aluno"!\nAté já ☺'})
+    for pedaco in _em_pedacos(texto, 2):
+        leitor.alimentar(pedaco)
+
+    assert leitor.completo and not leitor.invalido
+    assert "".join(emitido) == 'Olá, "aluno"!\nAté já ☺'
+    assert leitor.decisao()["acao"] == "conversa"
+
+    invalido = LeitorDecisao(ao_texto=emitido.append)
+    invalido.alimentar("Claro! Aqui vai")
+    assert invalido.invalido and "".join(invalido.texto) == "Claro! Aqui vai"
+
+
+@pytest.mark.unit
+def test_par_de_surrogates_vira_um_caractere():
+    # json.dumps escapa o emoji como 😀; os pedaços cortam o par ao meio
+    texto = json.dumps({"acao": "conversa", "resposta": "Olá 😀 fim"})
+    for tamanho in (1, 3, 7):
+        emitido = []
+        leitor = LeitorDecisao(ao_texto=emitido.append)
+        for pedaco in _em_pedacos(texto, tamanho):
+            leitor.alimentar(pedaco)
+        assert "".join(emitido) == leitor.decisao()["resposta"] == "Olá 😀 fim"
+        "".join(emitido).encode("utf-8")
+
+    emitido = []
+    leitor = LeitorDecisao(ao_texto=emitido.append)
+    leitor.alimentar('{"acao": "conversa", "resposta": "a\\ud83d b"}')
+    assert "".join(emitido) == "a� b"
+
+
+@pytest.mark.unit
+def test_stream_ollama_e_complemento():
+    resposta = RespostaNDJSON([
+        {"response": "Boa ", "done": False},
+        {"response": "tarde", "done": False},
+        {"response": "", "done": True, "eval_count": 2},
+    ])
+    stream = StreamOllama(resposta)
+
+    assert list(stream) == ["Boa ", "tarde"]
+    assert stream.final["eval_count"] == 2
+    assert resposta.fechada
+
+    assert complemento_resposta("Boa tarde", "Boa tarde\n\nSugestões") == "\n\nSugestões"
+    assert complemento_resposta("Boa tarde \n", "Boa tarde") == ""
+    assert complemento_resposta("Boa", "Outra coisa") == "\n\nOutra coisa"
+    assert complemento_resposta("", "Texto") == "Texto"
+
+
+@pytest.mark.unit
+def test_formato_chat_e_tempos_de_prompt_e_geracao():
+    resposta = RespostaNDJSON([
+        {"message": {"role": "assistant", "content": "Oi"}, "done": False},
+        {"message": {"role": "assistant", "content": ""}, "done": True,
+         "load_duration": 1_000_000, "prompt_eval_count": 12, "prompt_eval_duration": 60_000_000,
+         "eval_count": 40, "eval_duration": 2_000_000_000},
+    ])
+    stream = StreamOllama(resposta)
+
+    assert list(stream) == ["Oi"]
+    tempos = stream.tempos()
+    assert tempos["concluido"] and tempos["primeiro_token_ms"] is not None
+    assert tempos["load_ms"] == 1.0 and tempos["prompt_eval_tokens_s"] == 200.0
+    assert tempos["eval_ms"] == 2000.0 and tempos["eval_tokens_s"] == 20.0
+
+    interrompido = StreamOllama(RespostaNDJSON([{"response": "{", "done": False}]))
+    next(iter(interrompido))
+    interrompido.fechar()
+    assert not interrompido.tempos()["concluido"]
+
+
+@pytest.mark.unit
+def test_prompt_de_decisao_e_payload_reaproveitam_o_prefixo():
+    from agente_ia_inteligente import OLLAMA_KEEP_ALIVE, payload_chat, prompt_sistema_decisao
+
+    ferramentas = (("resumo_academico", "Resumo do aluno"),)
+    prompt = prompt_sistema_decisao(ferramentas, True)
+
+    assert prompt_sistema_decisao(ferramentas, True) is prompt
+    assert prompt_sistema_decisao(ferramentas, False) != prompt
+    assert "- resumo_academico: Resumo do aluno" in prompt
+
+    payload = payload_chat(prompt, "minhas notas", temperatura=0.3, formato="json")
+    assert payload["messages"][0] == {"role": "system", "content": prompt}
+    assert payload["messages"][1]["content"] == "minhas notas"
+    assert payload["keep_alive"] == OLLAMA_KEEP_ALIVE and payload["options"]["temperature"] == 0.3
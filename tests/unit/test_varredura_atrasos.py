@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.core.resumo_aluno import verificar
+from src.core.varredura_atrasos import varrer_atrasos
+from src.models import Aluno, Pagamento
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def _pagamento(aluno, vencimento, status='pendente'):
+    return Pagamento(aluno=aluno, tipo='mensalidade', valor=100.0,
+                     data_vencimento=vencimento, status=status)
+
+
+@pytest.mark.unit
+def test_varredura_marca_vencidos_em_lotes_a_partir_da_marca():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+        aluno = Aluno(matricula='2030/00001', nome_completo='Aluno', cpf='00000000001',
+                      data_nascimento=date(2000, 1, 1), email='aluno@escola.edu')
+        db.session.add_all([_pagamento(aluno, date(2030, 3, dia)) for dia in range(1, 6)])
+        db.session.add_all([_pagamento(aluno, date(2030, 3, 1), 'pago'),
+                            _pagamento(aluno, date(2030, 3, 20))])
+        db.session.commit()
+
+        primeira = varrer_atrasos(hoje=date(2030, 3, 10), tamanho_lote=2)
+        assert primeira['de'] is None and primeira['ate'] == '2030-03-10'
+        assert primeira['marcados'] == 5 and primeira['lotes'] == 3
+
+        # Vencimento antes da marca fica para a varredura completa
+        db.session.add(_pagamento(aluno, date(2030, 3, 2)))
+        db.session.commit()
+        segunda = varrer_atrasos(hoje=date(2030, 3, 25))
+        assert segunda['de'] == '2030-03-10' and segunda['marcados'] == 1
+
+        completa = varrer_atrasos(hoje=date(2030, 3, 25), completa=True)
+        assert completa['marcados'] == 1
+
+        status = [p.status for p in Pagamento.query.order_by(Pagamento.id)]
+        assert status == ['atrasado'] * 5 + ['pago', 'atrasado', 'atrasado']
+        assert verificar(db.session.connection()) == []
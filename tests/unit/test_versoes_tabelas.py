@@ -0,0 +1,28 @@
+import pytest
+
+from app import create_app
+from config import Config
+from database import db
+from src.models import Curso
+
+
+class ConfigTeste(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+@pytest.mark.unit
+def test_commit_incrementa_versao_da_tabela():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        db.create_all()
+
+        db.session.add(Curso(nome='Direito', codigo='DIR', duracao_semestres=10, valor_mensalidade=900.0))
+        db.session.commit()
+
+        curso = Curso.query.filter_by(codigo='DIR').first()
+        curso.ativo = False
+        db.session.commit()
+
+        versoes = dict(db.session.execute(db.text('SELECT tabela, versao FROM versoes_tabelas')).fetchall())
+        assert versoes == {'cursos': 2}